@@ -0,0 +1,52 @@
+"""Command-line exporter of BatLLM sessions to columnar per-play shards."""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.play_table import export_sessions  # noqa: E402
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Flatten v2 saved sessions and v3 research traces into columnar "
+            "per-play shards."
+        )
+    )
+    parser.add_argument("sessions", nargs="+", help="session files or folders")
+    parser.add_argument("--out", required=True, help="output folder for shards")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="rewrite unchanged shards")
+    parser.add_argument("--quiet", action="store_true")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    report = export_sessions(
+        args.sessions, args.out, workers=args.workers, force=args.force
+    )
+    if not args.quiet:
+        print(
+            f"written={len(report.written)} skipped={len(report.skipped)} "
+            f"failed={len(report.failed)}"
+        )
+        for source, error in report.failed.items():
+            print(f"FAILED {source}: {error}")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
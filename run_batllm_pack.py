@@ -0,0 +1,83 @@
+"""Command-line packer for archives of saved BatLLM sessions."""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from game.session_archive import (  # noqa: E402
+    SessionArchive,
+    SessionArchiveError,
+    pack_sessions,
+)
+
+
+def _session_files(sources: list[str]) -> list[Path]:
+    files: list[Path] = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            files.extend(
+                sorted(
+                    item
+                    for item in path.glob("*.json")
+                    if item.is_file() and not item.name.startswith(".")
+                )
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Pack saved sessions into a .pack archive, list it, or extract entries."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add = subparsers.add_parser("add", help="append session files or folders")
+    add.add_argument("archive")
+    add.add_argument("sessions", nargs="+")
+
+    listing = subparsers.add_parser("list", help="print the archive index")
+    listing.add_argument("archive")
+
+    extract = subparsers.add_parser("extract", help="write one entry back to a file")
+    extract.add_argument("archive")
+    extract.add_argument("entry")
+    extract.add_argument("--out", default=None, help="output file (default: entry name)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "add":
+            written, present = pack_sessions(_session_files(args.sessions), args.archive)
+            print(f"added={len(written)} unchanged={len(present)}")
+        elif args.command == "list":
+            for record in SessionArchive(args.archive).entries():
+                print(
+                    f"{record.name}\t{record.size}\t{record.compressed_size}\t"
+                    f"{record.session_type or '-'}\t{record.sha256[:12]}"
+                )
+        else:
+            data = SessionArchive(args.archive).read_bytes(args.entry)
+            output = Path(args.out or args.entry)
+            output.write_bytes(data)
+            print(output)
+    except SessionArchiveError as exc:
+        print(f"ERROR {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""Command-line queries across BatLLM saved sessions and research traces."""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict
+import json
+import os
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.session_query import SessionQueryIndex  # noqa: E402
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Index and query plays across BatLLM sessions and v3 traces."
+    )
+    parser.add_argument("--index", required=True, help="SQLite query index path")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="index new or changed sessions")
+    index_parser.add_argument("sessions", nargs="+", help="session files or folders")
+
+    plays_parser = subparsers.add_parser("plays", help="list plays matching filters")
+    plays_parser.add_argument("--model")
+    plays_parser.add_argument("--cmd", dest="play_command", help="command, e.g. B or C90")
+    plays_parser.add_argument("--event", action="append", default=[],
+                              help="replay event type, e.g. shield_block (repeatable)")
+    plays_parser.add_argument("--bot", type=int)
+    plays_parser.add_argument("--prompt-sha256")
+    plays_parser.add_argument("--health-below", type=float)
+    plays_parser.add_argument("--health-at-least", type=float)
+    plays_parser.add_argument("--session", help="substring of the session path")
+    plays_parser.add_argument("--limit", type=int)
+
+    shared_parser = subparsers.add_parser(
+        "shared-prompts", help="round prompts reused across sessions"
+    )
+    shared_parser.add_argument("--min-sessions", type=int, default=2)
+    return parser
+
+
+def _print_json(rows) -> None:
+    print(json.dumps([asdict(row) for row in rows], indent=2, default=str))
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    index = SessionQueryIndex(args.index)
+
+    if args.command == "index":
+        count = index.refresh(args.sessions)
+        failed = [(path, error) for path, error in index.sources() if error]
+        print(f"indexed={count} failed={len(failed)}")
+        for path, error in failed:
+            print(f"FAILED {path}: {error}")
+        return 0
+
+    if args.command == "plays":
+        try:
+            matches = index.plays(
+                model=args.model,
+                command=args.play_command,
+                events=args.event,
+                bot=args.bot,
+                prompt_sha256=args.prompt_sha256,
+                health_below=args.health_below,
+                health_at_least=args.health_at_least,
+                session=args.session,
+                limit=args.limit,
+            )
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        if args.json:
+            _print_json(matches)
+        else:
+            for match in matches:
+                print(
+                    f"{match.path.name} g{match.game} r{match.round} t{match.turn} "
+                    f"#{match.sequence} bot{match.bot} {match.command} "
+                    f"[{','.join(match.events)}] model={match.model} "
+                    f"health={match.health_before}"
+                )
+            print(f"{len(matches)} play(s)")
+        return 0
+
+    shared = index.shared_prompts(min_sessions=args.min_sessions)
+    if args.json:
+        _print_json(shared)
+    else:
+        for prompt in shared:
+            print(f"{prompt.prompt_sha256} sessions={prompt.session_count}")
+            for occurrence in prompt.occurrences:
+                print(
+                    f"  {occurrence.path.name} g{occurrence.game} "
+                    f"r{occurrence.round} bot{occurrence.bot}"
+                )
+        print(f"{len(shared)} shared prompt(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import argparse
+import os
 from pathlib import Path
 import sys
 
@@ -11,7 +12,17 @@ ROOT = Path(__file__).resolve().parent
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
 
+from game.command_grammar import CONSTRAINT_MODES, CONSTRAINT_OFF  # noqa: E402
+from game.endpoint_pool import (  # noqa: E402
+    EndpointPool,
+    PooledChatClient,
+    parse_endpoints,
+    split_endpoint,
+)
+from game.invocation_policy import HEDGE_OFF, can_hedge, normalize_hedge_after  # noqa: E402
 from game.replay_engine import GameplaySettingsSnapshot  # noqa: E402
 from game.research_runtime import (  # noqa: E402
     InvocationPolicy,
@@ -19,7 +30,14 @@ from game.research_runtime import (  # noqa: E402
     ModelitoChatClient,
     ScriptedClient,
 )
-from game.session_v3 import write_session_v3  # noqa: E402
+from game.response_cache import (  # noqa: E402
+    CACHE_MODES,
+    CACHE_PASSTHROUGH,
+    CachedChatClient,
+    ResponseCache,
+)
+from game.session_journal import JOURNAL_SUFFIX, recover_session_journal  # noqa: E402
+from game.state_encoding import STATE_ENCODERS, STATE_JSON  # noqa: E402
 from game.trace_contract import PrivacyMode  # noqa: E402
 
 
@@ -70,12 +88,57 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument("--model", default="smollm2")
     parser.add_argument("--output", default="batllm-research-session.json")
+    parser.add_argument(
+        "--journal",
+        default=None,
+        help=f"append-only record of the run (default: --output plus {JOURNAL_SUFFIX}); "
+        "removed once the session is written",
+    )
+    parser.add_argument(
+        "--recover",
+        metavar="JOURNAL",
+        default=None,
+        help="write --output from an interrupted run's journal, up to its last complete play",
+    )
     parser.add_argument(
         "--privacy",
         choices=[mode.value for mode in PrivacyMode],
         default=PrivacyMode.FULL.value,
     )
     parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument(
+        "--command-constraint",
+        choices=CONSTRAINT_MODES,
+        default=CONSTRAINT_OFF,
+        help="constrain replies with a JSON schema or with stop/num_predict limits",
+    )
+    parser.add_argument(
+        "--response-cache",
+        choices=CACHE_MODES,
+        default=CACHE_PASSTHROUGH,
+        help="record replies to --cache-dir, or replay them without contacting the model",
+    )
+    parser.add_argument("--cache-dir", default="cache/responses")
+    parser.add_argument(
+        "--state-encoding",
+        choices=tuple(STATE_ENCODERS),
+        default=STATE_JSON,
+        help="how the game state is written into augmented prompts",
+    )
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        default=[],
+        help="Ollama endpoint (host:port); repeat to balance requests over several servers",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        default="off",
+        help="duplicate a request still running after this many seconds, or after p95 latency",
+    )
+    parser.add_argument(
+        "--hedge-model", default=None, help="model that serves hedged requests (default: --model)"
+    )
     parser.add_argument(
         "--prompt-1", default="Select a valid tactical command."
     )
@@ -85,25 +148,60 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def ollama_client(endpoints: list[str]) -> object:
+    """Return a client for one endpoint, or a pooled client over several."""
+    if not endpoints:
+        return ModelitoChatClient()
+    clients = {}
+    for endpoint in endpoints:
+        host, port = split_endpoint(endpoint)
+        clients[endpoint] = ModelitoChatClient(host=host, port=port)
+    if len(clients) == 1:
+        return clients[endpoints[0]]
+    return PooledChatClient(clients, EndpointPool(endpoints))
+
+
 def main(argv: list[str] | None = None) -> int:
     args = build_parser().parse_args(argv)
+    if args.recover:
+        print(recover_session_journal(args.recover, args.output))
+        return 0
+    journal = Path(args.journal or f"{args.output}{JOURNAL_SUFFIX}")
+    endpoints = parse_endpoints(args.endpoint)
     client = (
         ScriptedClient(["M", "C15", "S1", "S0", "B"])
         if args.provider == "scripted"
-        else ModelitoChatClient()
+        else ollama_client(endpoints)
     )
+    if args.response_cache != CACHE_PASSTHROUGH:
+        client = CachedChatClient(client, ResponseCache(args.cache_dir), args.response_cache)
+    hedge_after = normalize_hedge_after(args.hedge_after)
+    if not can_hedge(len(endpoints), args.model, args.hedge_model):
+        # A duplicate on the only server would just queue behind the request.
+        hedge_after = HEDGE_OFF
     runtime = MediatedGameRuntime(
         client=client,
         initial_state=initial_state(),
         rules=default_rules(args.turns * 2),
-        policy=InvocationPolicy(provider=args.provider, model=args.model),
+        policy=InvocationPolicy(
+            provider=args.provider,
+            model=args.model,
+            command_constraint=args.command_constraint,
+            hedge_after=hedge_after,
+            hedge_model=args.hedge_model,
+            **({"endpoint": f"{endpoints[0]}/api/chat"} if endpoints else {}),
+        ),
+        model_provenance={"endpoints": endpoints} if len(endpoints) > 1 else None,
         system_instructions="Return exactly one BatLLM command.",
+        state_encoding=args.state_encoding,
         privacy_mode=args.privacy,
+        journal_path=journal,
     )
     runtime.start_round({1: args.prompt_1, 2: args.prompt_2})
     for _ in range(max(1, args.turns)):
         runtime.run_turn({1: args.prompt_1, 2: args.prompt_2})
-    output = write_session_v3(runtime.session_payload(), args.output)
+    output = runtime.seal(args.output)
+    journal.unlink()
     print(output)
     return 0
 
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import sys
-from pathlib import Path
 
 from kivy.config import Config
 from kivy.core.window import Window
@@ -13,7 +12,6 @@ from kivy.uix.screenmanager import ScreenManager, SlideTransition
 from kivymd.app import MDApp
 
 from configs.app_config import config
-from game.session_schema import SessionFormatError, load_session_payload
 from util.paths import asset_path, register_kivy_resource_paths, repo_path, view_path
 from util.version import current_app_version
 from view.analyzer_load_screen import AnalyzerLoadScreen
@@ -56,17 +54,8 @@ class GameAnalyzerApp(MDApp):
             return
         load_screen = self.root.get_screen("analyzer_load")
         load_screen.load_preview(self.initial_session)
-        try:
-            payload = load_session_payload(Path(self.initial_session))
-        except SessionFormatError as exc:
-            load_screen.status_text = f"Compatibility: {exc}"
-            return
-
-        review = self.root.get_screen("analyzer_review")
-        from analyzer_model import AnalyzerSessionModel
-
-        review.load_session(AnalyzerSessionModel(payload, self.initial_session))
-        self.root.current = "analyzer_review"
+        # Large sessions are indexed in the background before the review opens.
+        load_screen.open_selected_session()
 
 
 def main(argv: list[str] | None = None) -> int:
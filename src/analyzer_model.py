@@ -2,14 +2,19 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from game.replay_engine import GameplaySettingsSnapshot, ReplayEvent, TurnReplay, replay_turn
+from game.session_archive import split_archive_reference
+from game.session_index import ROUND_CACHE_SIZE, LazySessionSource, ProgressCallback
+from game.session_schema import SessionFormatError, load_session_payload
 
 
 BOT_FILTER_BOTH = "Both"
+LAZY_SESSION_THRESHOLD_BYTES = 8 * 1024 * 1024
 
 
 def _as_int(value: Any, fallback: int = 0) -> int:
@@ -19,6 +24,77 @@ def _as_int(value: Any, fallback: int = 0) -> int:
         return fallback
 
 
+def _build_round_steps(round_entry: dict[str, Any]) -> list[dict[str, Any]]:
+    """Replay one round into flat navigation steps (turn starts and plays)."""
+    rules = GameplaySettingsSnapshot.from_mapping(round_entry.get("gameplay_settings_snapshot"))
+    steps: list[dict[str, Any]] = []
+    for turn_index, turn in enumerate(round_entry.get("turns", [])):
+        replay = replay_turn(
+            turn.get("pre_state", {}),
+            turn.get("plays", []),
+            rules,
+            saved_post_state=turn.get("post_state", {}),
+        )
+        badge_parts: list[str] = []
+        badge_tokens: list[str] = []
+        if any(
+            event.type == "damage"
+            for resolution in replay.play_results
+            for event in resolution.events
+        ):
+            badge_parts.append("[DMG]")
+            badge_tokens.append("damage")
+        if any(
+            event.type == "invalid_command"
+            for resolution in replay.play_results
+            for event in resolution.events
+        ):
+            badge_parts.append("[ERR]")
+            badge_tokens.append("errors")
+        if any(
+            event.type in {"shield", "shield_block"}
+            for resolution in replay.play_results
+            for event in resolution.events
+        ):
+            badge_parts.append("[SHD]")
+            badge_tokens.append("shield")
+        if replay.mismatch:
+            badge_parts.append("[!]")
+            badge_tokens.append("mismatch")
+        badge_token_tuple = tuple(badge_tokens)
+
+        steps.append(
+            {
+                "label": f"Turn {turn.get('turn', turn_index + 1)} start",
+                "turn_index": turn_index,
+                "step_index": 0,
+                "state_by_bot": replay.initial_state,
+                "events": [ReplayEvent(type="turn_start", label="Turn start")],
+                "shot_path": [],
+                "turn_replay": replay,
+                "play": None,
+                "badge_text": "".join(badge_parts),
+                "badge_tokens": badge_token_tuple,
+            }
+        )
+        for play_index, resolution in enumerate(replay.play_results, start=1):
+            steps.append(
+                {
+                    "label": f"Turn {turn.get('turn', turn_index + 1)} play {play_index}",
+                    "turn_index": turn_index,
+                    "step_index": play_index,
+                    "state_by_bot": resolution.state_by_bot,
+                    "events": resolution.events,
+                    "shot_path": resolution.shot_path,
+                    "turn_replay": replay,
+                    "play": (turn.get("plays", []) or [])[play_index - 1],
+                    "badge_text": "".join(badge_parts),
+                    "badge_tokens": badge_token_tuple,
+                }
+            )
+    return steps
+
+
 @dataclass(frozen=True)
 class AnalyzerTreeRow:
     kind: str
@@ -30,31 +106,68 @@ class AnalyzerTreeRow:
     badge_tokens: tuple[str, ...] = ()
 
 
-class AnalyzerSessionModel:
-    """Stateful helper around a validated analyzer session payload."""
+class PayloadSessionSource:
+    """Session source backed by a fully loaded and validated payload."""
 
-    def __init__(self, payload: dict[str, Any], source_path: str | Path):
+    def __init__(self, payload: dict[str, Any]):
         self.payload = payload
+        self.on_round_loaded = None
+
+    def _games(self) -> list[dict[str, Any]]:
+        return list(self.payload.get("games", []))
+
+    def game_count(self) -> int:
+        return len(self._games())
+
+    def round_count(self, game_index: int) -> int:
+        return len(self._games()[game_index].get("rounds", []))
+
+    def game(self, game_index: int) -> dict[str, Any]:
+        return self._games()[game_index]
+
+    def peek_round(self, game_index: int, round_index: int) -> dict[str, Any] | None:
+        return self.round(game_index, round_index)
+
+    def round(self, game_index: int, round_index: int) -> dict[str, Any]:
+        return self._games()[game_index]["rounds"][round_index]
+
+    def close(self) -> None:
+        return None
+
+
+class AnalyzerSessionModel:
+    """Stateful helper around a validated analyzer session payload or lazy source."""
+
+    def __init__(
+        self,
+        payload: dict[str, Any] | LazySessionSource | PayloadSessionSource,
+        source_path: str | Path,
+    ):
+        self.source = PayloadSessionSource(payload) if isinstance(payload, dict) else payload
+        self.payload = self.source.payload
         self.source_path = Path(source_path)
         self.game_index = 0
         self.round_index = 0
         self.flat_index = 0
         self.bot_filter = BOT_FILTER_BOTH
-        self._round_step_cache: dict[tuple[int, int], list[dict[str, Any]]] = {}
+        self._round_step_cache: OrderedDict[tuple[int, int], list[dict[str, Any]]] = OrderedDict()
 
     @property
     def source_name(self) -> str:
         return self.source_path.name
 
     @property
-    def games(self) -> list[dict[str, Any]]:
-        return list(self.payload.get("games", []))
+    def is_lazy(self) -> bool:
+        return isinstance(self.source, LazySessionSource)
+
+    def close(self) -> None:
+        self.source.close()
 
     def current_game(self) -> dict[str, Any]:
-        return self.games[self.game_index]
+        return self.source.game(self.game_index)
 
     def current_round(self) -> dict[str, Any]:
-        return self.current_game()["rounds"][self.round_index]
+        return self.source.round(self.game_index, self.round_index)
 
     def current_turns(self) -> list[dict[str, Any]]:
         return list(self.current_round().get("turns", []))
@@ -67,25 +180,27 @@ class AnalyzerSessionModel:
         return turns[current_turn_index]
 
     def game_labels(self) -> list[str]:
-        return [f"Game {index + 1}" for index, _game in enumerate(self.games)]
+        return [f"Game {index + 1}" for index in range(self.source.game_count())]
 
     def round_labels(self) -> list[str]:
-        return [
-            f"Round {round_entry.get('round', index + 1)}"
-            for index, round_entry in enumerate(self.current_game().get("rounds", []))
-        ]
+        return [self._round_label(self.game_index, index)
+                for index in range(self.source.round_count(self.game_index))]
+
+    def _round_label(self, game_index: int, round_index: int) -> str:
+        # Lazy sources only know a round's saved number once it has been decoded.
+        round_entry = self.source.peek_round(game_index, round_index) or {}
+        return f"Round {round_entry.get('round', round_index + 1)}"
 
     def bot_filter_labels(self) -> list[str]:
         return [BOT_FILTER_BOTH, "Bot 1", "Bot 2"]
 
     def set_game_index(self, index: int) -> None:
-        self.game_index = max(0, min(index, len(self.games) - 1))
+        self.game_index = max(0, min(index, self.source.game_count() - 1))
         self.round_index = 0
         self.flat_index = 0
 
     def set_round_index(self, index: int) -> None:
-        rounds = self.current_game().get("rounds", [])
-        self.round_index = max(0, min(index, len(rounds) - 1))
+        self.round_index = max(0, min(index, self.source.round_count(self.game_index) - 1))
         self.flat_index = 0
 
     def set_flat_index(self, index: int) -> None:
@@ -126,79 +241,25 @@ class AnalyzerSessionModel:
 
     def round_steps(self) -> list[dict[str, Any]]:
         key = (self.game_index, self.round_index)
-        cached = self._round_step_cache.get(key)
+        cached = self._cached_round_steps(key)
         if cached is not None:
             return cached
+        return self._store_round_steps(key, _build_round_steps(self.current_round()))
 
-        round_entry = self.current_round()
-        rules = GameplaySettingsSnapshot.from_mapping(round_entry.get("gameplay_settings_snapshot"))
-        steps: list[dict[str, Any]] = []
-        for turn_index, turn in enumerate(round_entry.get("turns", [])):
-            replay = replay_turn(
-                turn.get("pre_state", {}),
-                turn.get("plays", []),
-                rules,
-                saved_post_state=turn.get("post_state", {}),
-            )
-            badge_parts: list[str] = []
-            badge_tokens: list[str] = []
-            if any(
-                event.type == "damage"
-                for resolution in replay.play_results
-                for event in resolution.events
-            ):
-                badge_parts.append("[DMG]")
-                badge_tokens.append("damage")
-            if any(
-                event.type == "invalid_command"
-                for resolution in replay.play_results
-                for event in resolution.events
-            ):
-                badge_parts.append("[ERR]")
-                badge_tokens.append("errors")
-            if any(
-                event.type in {"shield", "shield_block"}
-                for resolution in replay.play_results
-                for event in resolution.events
-            ):
-                badge_parts.append("[SHD]")
-                badge_tokens.append("shield")
-            if replay.mismatch:
-                badge_parts.append("[!]")
-                badge_tokens.append("mismatch")
-            badge_token_tuple = tuple(badge_tokens)
-
-            steps.append(
-                {
-                    "label": f"Turn {turn.get('turn', turn_index + 1)} start",
-                    "turn_index": turn_index,
-                    "step_index": 0,
-                    "state_by_bot": replay.initial_state,
-                    "events": [ReplayEvent(type="turn_start", label="Turn start")],
-                    "shot_path": [],
-                    "turn_replay": replay,
-                    "play": None,
-                    "badge_text": "".join(badge_parts),
-                    "badge_tokens": badge_token_tuple,
-                }
-            )
-            for play_index, resolution in enumerate(replay.play_results, start=1):
-                steps.append(
-                    {
-                        "label": f"Turn {turn.get('turn', turn_index + 1)} play {play_index}",
-                        "turn_index": turn_index,
-                        "step_index": play_index,
-                        "state_by_bot": resolution.state_by_bot,
-                        "events": resolution.events,
-                        "shot_path": resolution.shot_path,
-                        "turn_replay": replay,
-                        "play": (turn.get("plays", []) or [])[play_index - 1],
-                        "badge_text": "".join(badge_parts),
-                        "badge_tokens": badge_token_tuple,
-                    }
-                )
+    def _cached_round_steps(self, key: tuple[int, int]) -> list[dict[str, Any]] | None:
+        cached = self._round_step_cache.get(key)
+        if cached is not None:
+            self._round_step_cache.move_to_end(key)
+        return cached
 
+    def _store_round_steps(
+        self, key: tuple[int, int], steps: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
         self._round_step_cache[key] = steps
+        # Lazy sources keep a bounded round LRU; replayed steps follow the same bound.
+        if self.is_lazy:
+            while len(self._round_step_cache) > ROUND_CACHE_SIZE:
+                self._round_step_cache.popitem(last=False)
         return steps
 
     def timeline_label(self) -> str:
@@ -350,27 +411,32 @@ class AnalyzerSessionModel:
         return "\n".join(lines).strip() or "No saved model metadata was recorded for this session."
 
     def session_tree_rows(self) -> list[AnalyzerTreeRow]:
-        original_game_index = self.game_index
-        original_round_index = self.round_index
-        original_flat_index = self.flat_index
+        """Return navigation rows; lazy sessions list turns only for decoded rounds.
+
+        Building the rows never decodes a round or moves the current selection,
+        so refreshing the tree after a prefetch cannot trigger more prefetches.
+        """
         rows: list[AnalyzerTreeRow] = []
-        for game_index, game in enumerate(self.games):
+        for game_index in range(self.source.game_count()):
             rows.append(AnalyzerTreeRow(kind="header", label=f"Game {game_index + 1}"))
-            for round_index, round_entry in enumerate(game.get("rounds", [])):
+            for round_index in range(self.source.round_count(game_index)):
                 rows.append(
                     AnalyzerTreeRow(
                         kind="subheader",
-                        label=f"Round {round_entry.get('round', round_index + 1)}",
+                        label=self._round_label(game_index, round_index),
                         game_index=game_index,
                         round_index=round_index,
                         flat_index=0,
                     )
                 )
-                if (game_index, round_index) not in self._round_step_cache:
-                    self.set_game_index(game_index)
-                    self.set_round_index(round_index)
-                    self.round_steps()
-                for step_index, step in enumerate(self._round_step_cache[(game_index, round_index)]):
+                key = (game_index, round_index)
+                steps = self._cached_round_steps(key)
+                if steps is None:
+                    round_entry = self.source.peek_round(game_index, round_index)
+                    if round_entry is None:
+                        continue
+                    steps = self._store_round_steps(key, _build_round_steps(round_entry))
+                for step_index, step in enumerate(steps):
                     if step["step_index"] != 0:
                         continue
                     rows.append(
@@ -384,7 +450,25 @@ class AnalyzerSessionModel:
                             badge_tokens=tuple(step.get("badge_tokens", ())),
                         )
                     )
-        self.set_game_index(original_game_index)
-        self.set_round_index(original_round_index)
-        self.set_flat_index(original_flat_index)
         return rows
+
+def open_session_model(
+    path: str | Path,
+    *,
+    catalog: Any = None,
+    progress: ProgressCallback | None = None,
+    lazy_threshold: int = LAZY_SESSION_THRESHOLD_BYTES,
+) -> AnalyzerSessionModel:
+    """Open a saved session, indexing large files instead of decoding them whole."""
+    path = Path(path)
+    if split_archive_reference(path) is not None:
+        return AnalyzerSessionModel(load_session_payload(path), path)
+    try:
+        size = path.stat().st_size
+    except OSError as exc:
+        raise SessionFormatError(str(exc)) from exc
+    if size < lazy_threshold:
+        return AnalyzerSessionModel(load_session_payload(path), path)
+    return AnalyzerSessionModel(
+        LazySessionSource(path, catalog=catalog, progress=progress), path
+    )
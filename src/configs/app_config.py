@@ -1,19 +1,30 @@
 """Configuration loader module"""
+import atexit
 import copy
+import logging
 import os
 import tempfile
 import threading
+import weakref
 from pathlib import Path
+from typing import Callable
 
 import yaml
 from kivy.config import Config as KivyConfig
 
+from configs.config_cache import read_yaml, thaw
 from util.paths import resolve_config_path
 
 APP_NAME = "BatLLM"
 SHIPPED_CONFIG_PATH = Path(__file__).parent / "config.yaml"
 CONFIG_PATH = resolve_config_path(SHIPPED_CONFIG_PATH)
 _SAVE_LOCK = threading.Lock()
+SAVE_DELAY_S = 1.0
+"""Seconds :meth:`AppConfig.save_later` waits, so a burst of changes is written once."""
+
+_logger = logging.getLogger(__name__)
+
+ConfigListener = Callable[[str | None, str | None], None]
 
 # Maximize the window on startup
 KivyConfig.set("graphics", "window_state", "maximized")
@@ -25,6 +36,8 @@ DEFAULTS = {
         "turns_per_round": 8,
         "independent_contexts": True,
         "prompt_augmentation": True,
+        "speculative_prefetch": False,
+        "prefill_warmup": False,
         "initial_health": 30,
         "bullet_damage": 5,
         "bullet_diameter": 0.02,
@@ -43,17 +56,29 @@ DEFAULTS = {
         "timeout": None,
         "model_timeouts": {},
         "warmup_timeout": 30.0,
+        "stream_commands": False,
+        "command_constraint": "off",
+        "response_cache": "passthrough",
+        "response_cache_dir": "cache/responses",
+        "async_transport": False,
+        "adaptive_timeouts": False,
+        "endpoints": [],
+        "max_attempts": 2,
+        "retry_backoff": 0.25,
+        "hedge_after": "off",
+        "hedge_model": "",
+        "state_encoding": "json",
+        "state_encodings": {},
     },
 }
 
 
 def _read_yaml(path: Path) -> dict:
-    """Read a YAML mapping, returning an empty mapping for missing or empty files."""
-    if not path.exists():
-        return {}
-    with path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
-    return data if isinstance(data, dict) else {}
+    """Read a YAML mapping, returning an empty mapping for missing or empty files.
+
+    Files are parsed once per change through the shared `configs.config_cache`.
+    """
+    return thaw(read_yaml(path))
 
 
 def _merge_config(target: dict, overlay: dict) -> None:
@@ -84,11 +109,21 @@ def load_config_data(
 class AppConfig:
     """This class handles the application configuration.
     It loads the configuration from a YAML file and provides methods to get and set configuration values.
+
+    Every change bumps :attr:`version` and notifies the listeners added with
+    :meth:`subscribe`, so consumers can cache what they derive from the
+    configuration and recompute it only when a relevant key changed.
     """
 
     def __init__(self, path: Path | None = None, default_path: Path = SHIPPED_CONFIG_PATH):
         self._default_path = default_path
         self._config = copy.deepcopy(DEFAULTS)
+        self._version = 0
+        self._changed: dict[tuple[str, str | None], int] = {}
+        self._listeners: list[weakref.ref] = []
+        self._listeners_lock = threading.Lock()
+        self._save_timer: threading.Timer | None = None
+        self._save_timer_lock = threading.Lock()
         self._path = resolve_config_path(default_path) if path is None else path
         self.load(self._path)
 
@@ -99,7 +134,14 @@ class AppConfig:
         """
         resolved_path = resolve_config_path(self._default_path) if path is None else path
         self._path = resolved_path
-        self._config = load_config_data(resolved_path, shipped_path=self._default_path)
+        self.restore(load_config_data(resolved_path, shipped_path=self._default_path))
+
+
+    def restore(self, data: dict):
+        """Replaces the whole configuration; every key counts as changed."""
+        self._config = data
+        self._changed.clear()
+        self._bump(None, None)
 
 
 
@@ -129,6 +171,42 @@ class AppConfig:
                 raise
 
 
+    def save_later(self, delay: float = SAVE_DELAY_S):
+        """Saves the configuration from a background thread after ``delay`` seconds.
+
+        Calls made while a save is pending join it, so code on a hot path
+        (such as the inference thread) never waits for the disk and a burst
+        of changes is written once. Pending saves are flushed at exit.
+        """
+        with self._save_timer_lock:
+            if self._save_timer is not None:
+                return
+            timer = threading.Timer(delay, self._deferred_save)
+            timer.daemon = True
+            self._save_timer = timer
+        timer.start()
+
+
+    def flush(self):
+        """Writes a save requested with :meth:`save_later` now, if one is pending."""
+        with self._save_timer_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+
+
+    def _deferred_save(self):
+        with self._save_timer_lock:
+            if self._save_timer is None:
+                return
+            self._save_timer = None
+        try:
+            self.save()
+        except OSError as exc:
+            _logger.warning("Could not save the configuration to %s: %s", self._path, exc)
+
+
 
     def get(self, section, key):
         """Gets a configuration value from the specified section and key."""
@@ -140,12 +218,73 @@ class AppConfig:
     def set(self, section, key, value):
         """Sets a configuration value for the specified section and key.
         If the section does not exist, it creates it.
+        Setting a key to the value it already has is not a change, except for
+        mappings and lists, which the caller may have edited in place.
         """
 
         if section not in self._config:
             self._config[section] = {}
 
-        self._config[section][key] = value
+        values = self._config[section]
+        if key in values and values[key] == value and not isinstance(value, (dict, list)):
+            return
+        values[key] = value
+        self._bump(section, key)
+
+
+    @property
+    def version(self) -> int:
+        """A counter that grows with every change to the configuration."""
+        return self._version
+
+
+    def version_of(self, section: str, *keys: str) -> int:
+        """Returns the version at which ``keys`` of ``section`` last changed.
+
+        Without ``keys`` any key of the section counts. Comparing the result
+        with a remembered one tells whether state derived from those keys is stale.
+        """
+        changed = self._changed
+        latest = changed.get((None, None), 0)
+        if keys:
+            return max([latest, *(changed.get((section, key), 0) for key in keys)])
+        return max(latest, changed.get((section, None), 0))
+
+
+    def subscribe(self, listener: ConfigListener):
+        """Calls ``listener(section, key)`` after each change.
+
+        ``section`` and ``key`` are ``None`` when the whole configuration was
+        replaced. Listeners run on the thread that made the change and are
+        held weakly, so subscribing does not keep an object alive.
+        """
+        try:
+            ref = weakref.WeakMethod(listener)
+        except TypeError:
+            ref = weakref.ref(listener)
+        with self._listeners_lock:
+            self._listeners.append(ref)
+
+
+    def unsubscribe(self, listener: ConfigListener):
+        """Stops calling ``listener``."""
+        with self._listeners_lock:
+            self._listeners = [
+                ref for ref in self._listeners if ref() is not None and ref() != listener
+            ]
+
+
+    def _bump(self, section, key):
+        self._version += 1
+        self._changed[(section, key)] = self._version
+        if section is not None:
+            self._changed[(section, None)] = self._version
+        with self._listeners_lock:
+            self._listeners = [ref for ref in self._listeners if ref() is not None]
+            listeners = [ref() for ref in self._listeners]
+        for listener in listeners:
+            if listener is not None:
+                listener(section, key)
 
 
     def as_dict(self):
@@ -155,3 +294,4 @@ class AppConfig:
 
 # Singleton instance
 config = AppConfig()
+atexit.register(config.flush)
@@ -0,0 +1,114 @@
+"""Process-wide cache of parsed YAML configuration files.
+
+The shipped config and the user overlay are read by `configs.app_config` and
+`llm.service`, the latter several times per UI refresh. Each version of a file
+is parsed once: entries are keyed on the path and revalidated against the
+file's modification time and size, which costs one ``stat`` per read.
+
+Callers get read-only views (mappings are ``MappingProxyType`` and lists are
+tuples), so no caller can change what the others see; :func:`thaw` returns a
+mutable copy.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import yaml
+
+EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """How often the cache parsed a file and how often it served a parsed one."""
+
+    parses: int
+    hits: int
+
+
+_lock = threading.Lock()
+_entries: dict[Path, tuple[tuple[int, int], Mapping[str, Any]]] = {}
+_parses = 0
+_hits = 0
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only deep copy of parsed YAML data."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a mutable deep copy of a frozen view, with dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def read_yaml(path: Path) -> Mapping[str, Any]:
+    """Return the YAML mapping in ``path`` as a read-only view.
+
+    Missing, empty and non-mapping files give an empty mapping. The file is
+    parsed again only when its modification time or size changed.
+    """
+    global _parses, _hits  # pylint: disable=global-statement
+    key = Path(path)
+    try:
+        stat = key.stat()
+    except FileNotFoundError:
+        with _lock:
+            _entries.pop(key, None)
+        return EMPTY
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+            _hits += 1
+            return entry[1]
+    with key.open("r", encoding="utf-8") as handle:
+        # The stamp of what was read, in case the file changed since the stat.
+        opened = os.fstat(handle.fileno())
+        data = yaml.safe_load(handle) or {}
+    view = freeze(data) if isinstance(data, dict) else EMPTY
+    with _lock:
+        _parses += 1
+        _entries[key] = ((opened.st_mtime_ns, opened.st_size), view)
+    return view
+
+
+def merge_sections(*layers: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Return the read-only merge of sectioned configs; later layers win key by key."""
+    merged: dict[str, Any] = {}
+    for layer in layers:
+        for section, values in layer.items():
+            current = merged.get(section)
+            if isinstance(values, Mapping) and isinstance(current, Mapping):
+                merged[section] = MappingProxyType({**current, **values})
+            else:
+                merged[section] = freeze(values)
+    return MappingProxyType(merged)
+
+
+def cache_stats() -> CacheStats:
+    """Return the parse and hit counts since the process started or :func:`clear_cache`."""
+    with _lock:
+        return CacheStats(parses=_parses, hits=_hits)
+
+
+def clear_cache() -> None:
+    """Forget every parsed file and reset the counts."""
+    global _parses, _hits  # pylint: disable=global-statement
+    with _lock:
+        _entries.clear()
+        _parses = 0
+        _hits = 0
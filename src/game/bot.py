@@ -7,6 +7,7 @@ import math
 import json
 import os
 import random
+import time
 from math import cos, sin
 from typing import Any
 
@@ -28,7 +29,7 @@ from kivy.uix.widget import Widget
 
 from configs.app_config import config
 from game.bullet import Bullet
-from game.ollama_connector import LLMRequestError, LLMTimeoutError
+from game.ollama_connector import LLMRequestError, LLMTimeoutError, SpeculativeReply
 from game.ollama_singleton import get_executor
 from kivy.clock import Clock
 from game.replay_engine import GameplaySettingsSnapshot, compute_move_target, parse_model_response
@@ -56,6 +57,9 @@ class Bot(Widget):
 
     # LLM related
     last_llm_response: str | None = None
+    last_stream: dict | None = None
+    last_context: dict | None = None
+    last_telemetry: dict | None = None
 
 
 
@@ -98,6 +102,15 @@ class Bot(Widget):
         self.rot = random.uniform(0, 359)  # degrees
 
 
+    def _gameplay_rules(self) -> GameplaySettingsSnapshot:
+        """Return the board's current rules, or the configured ones without a board."""
+        rules = getattr(self.board_widget, "gameplay_rules", None)
+        if rules is not None:
+            return rules()
+        return getattr(self.board_widget, "current_round_settings",
+                       None) or GameplaySettingsSnapshot.from_config()
+
+
     def rot_rad(self):
         """Returns the rotation in radians."""
         return math.radians(self.rot)
@@ -178,8 +191,7 @@ class Bot(Widget):
         animated over 'duration' seconds.
         """
 
-        rules = getattr(self.board_widget, "current_round_settings",
-                        None) or GameplaySettingsSnapshot.from_config()
+        rules = self._gameplay_rules()
         self.default_step = rules.bot_step_length
         nx, ny = compute_move_target(
             {"x": self.x, "y": self.y, "rot": self.rot},
@@ -245,8 +257,7 @@ class Bot(Widget):
         Bot hit by a bullet, loses health.
         """
         if amount is None:
-            rules = getattr(self.board_widget, "current_round_settings",
-                            None) or GameplaySettingsSnapshot.from_config()
+            rules = self._gameplay_rules()
             amount = rules.bullet_damage
         self.health -= int(amount)
         self.health = max(self.health, 0)
@@ -309,32 +320,81 @@ class Bot(Widget):
 
 
 
-    def submit_prompt_to_llm(self):
-        """Submit inference off the Kivy thread and marshal completion through Clock."""
+    def submit_prompt_to_llm(self, deliver=None, future=None):
+        """Submit inference off the Kivy thread and marshal completion through Clock.
+
+        When ``deliver`` is given it receives the completion as a zero-argument
+        callable on the Kivy thread instead of it being run immediately, so the
+        board can apply concurrently requested plays in turn order. The
+        exchange then enters the bot's history only when that callable runs,
+        so a turn cancelled before the play is applied leaves no trace of it.
+        ``future`` replaces the request with one already in flight, such as an
+        adopted speculative request.
+        """
         board = self.board_widget
         token = board.current_callback_token()
-        future = get_executor().submit(
-            board.ollama_connector.send_prompt_to_llm_sync,
-            self.id,
-            game_state=self.get_game_state(),
-            user_text=self.get_current_prompt(),
-        )
+        if future is None and deliver is not None:
+            future = get_executor().submit(
+                board.ollama_connector.speculate_prompt_to_llm_sync,
+                self.id,
+                game_state=self.get_game_state(),
+                user_text=self.get_current_prompt(),
+                submitted_at=time.monotonic(),
+            )
+        elif future is None:
+            future = get_executor().submit(
+                board.ollama_connector.send_prompt_to_llm_sync,
+                self.id,
+                game_state=self.get_game_state(),
+                user_text=self.get_current_prompt(),
+                submitted_at=time.monotonic(),
+            )
+
+        def finish(outcome):
+            Clock.schedule_once(lambda _dt: deliver(outcome) if deliver else outcome())
 
         def completed(done):
             try:
                 result = done.result()
             except LLMTimeoutError as exc:
-                Clock.schedule_once(lambda _dt, error=exc: board.handle_bot_llm_timeout(self, error, token=token))
+                finish(lambda error=exc: board.handle_bot_llm_timeout(self, error, token=token))
             except Exception as exc:
                 error = exc if isinstance(exc, LLMRequestError) else LLMRequestError(str(exc), exc)
-                Clock.schedule_once(lambda _dt, failure=error: board.handle_bot_llm_error(self, failure, token=token))
+                finish(lambda failure=error: board.handle_bot_llm_error(self, failure, token=token))
             else:
-                Clock.schedule_once(
-                    lambda _dt: self.process_llm_response(result) if board.callback_token_is_current(token) else None
+                if isinstance(result, SpeculativeReply):
+                    finish(lambda reply=result: self._apply_held_reply(reply, token))
+                    return
+                stream = board.ollama_connector.pop_stream_record(self.id)
+                context = board.ollama_connector.pop_context_record(self.id)
+                telemetry = board.ollama_connector.pop_telemetry_record(self.id)
+                finish(
+                    lambda: self.process_llm_response(
+                        result, stream=stream, context=context, telemetry=telemetry
+                    )
+                    if board.callback_token_is_current(token) else None
                 )
 
         future.add_done_callback(completed)
 
+    def _apply_held_reply(self, reply: SpeculativeReply, token) -> None:
+        """Commit a reply held for its turn position, then play it."""
+        board = self.board_widget
+        if not board.callback_token_is_current(token):
+            return
+        connector = board.ollama_connector
+        if not connector.commit_speculative_reply(reply):
+            board.handle_bot_llm_error(
+                self, LLMRequestError("The reply no longer matches the bot's history."), token=token
+            )
+            return
+        self.process_llm_response(
+            reply.content,
+            stream=connector.pop_stream_record(self.id),
+            context=connector.pop_context_record(self.id),
+            telemetry=connector.pop_telemetry_record(self.id),
+        )
+
 
 
 
@@ -352,15 +412,27 @@ class Bot(Widget):
         return self.current_prompt or ""
 
 
-    def process_llm_response(self, res: str):
+    def process_llm_response(
+        self,
+        res: str,
+        stream: dict | None = None,
+        context: dict | None = None,
+        telemetry: dict | None = None,
+    ):
         """
         Handles the LLM response by parsing it, executing the command, recording history, and finishing the turn.
 
         Args:
             raw_response (str): The raw response from the LLM.
+            stream (dict | None): Early-termination record of a streamed response, if any.
+            context (dict | None): Prefix-reuse and cache record of the request, if any.
+            telemetry (dict | None): Latency record of the request, if any.
 
         """
         self.last_llm_response = res
+        self.last_stream = stream
+        self.last_context = context
+        self.last_telemetry = telemetry
         parsed = parse_model_response(res)
         self.last_cmd = parsed.normalized_cmd
         command_ok = parsed.valid
@@ -368,7 +440,7 @@ class Bot(Widget):
         if parsed.valid:
             match parsed.kind:
                 case "move":
-                    rules = self.board_widget.current_round_settings or GameplaySettingsSnapshot.from_config()
+                    rules = self._gameplay_rules()
                     self.x, self.y = compute_move_target(
                         {"x": self.x, "y": self.y, "rot": self.rot}, rules, parsed.value
                     )
@@ -404,6 +476,9 @@ class Bot(Widget):
     def finish_turn_with_error(self, raw_response: str, command: str = "ERR"):
         """Finish a turn without executing gameplay when the model could not return a usable command."""
         self.last_llm_response = raw_response
+        self.last_stream = None
+        self.last_context = None
+        self.last_telemetry = None
         self.last_cmd = command
         self.board_widget.add_cmd_to_home_screen_cmd_history(
             self.id,
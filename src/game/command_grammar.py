@@ -0,0 +1,123 @@
+"""Decoding constraints derived from BatLLM's command language.
+
+Replies are parsed by :func:`game.replay_engine.parse_model_response`, which
+accepts one bare command (``M``, ``M<x>``, ``C<x>``, ``A<x>``, ``B``, ``S``,
+``S0``, ``S1``) and turns anything else into ``ERR``. Because the language is a
+small regular grammar, a request can tell the server what a reply may look like
+instead of discovering an invalid or verbose reply after the whole turn's
+tokens were generated.
+
+Two constraint modes are supported:
+
+``schema``
+    Send a JSON schema as the request's structured-output ``format``. Servers
+    with grammar-constrained decoding (Ollama and compatible servers) can then
+    only produce ``{"command": "<command>"}``; the command is unwrapped from
+    the reply before parsing.
+``limits``
+    For servers without structured output, stop at the first newline and cap
+    ``num_predict`` at the length of the longest command, so verbose replies
+    are cut short instead of generated in full.
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+import json
+import re
+from typing import Any, Mapping
+
+CONSTRAINT_OFF = "off"
+CONSTRAINT_SCHEMA = "schema"
+CONSTRAINT_LIMITS = "limits"
+CONSTRAINT_MODES = (CONSTRAINT_OFF, CONSTRAINT_SCHEMA, CONSTRAINT_LIMITS)
+
+COMMAND_PATTERN = (
+    r"^(M(-?[0-9]{1,3}(\.[0-9]{1,2})?)?|[CA]-?[0-9]{1,3}(\.[0-9]{1,2})?|B|S[01]?)$"
+)
+"""Uppercase subset of the accepted commands with bounded arguments."""
+
+COMMAND_TOKEN_LIMIT = 8
+"""Tokens needed for the longest command, one token per character."""
+
+SCHEMA_TOKEN_LIMIT = 24
+"""Tokens needed for the longest command wrapped in its JSON object."""
+
+COMMAND_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {"command": {"type": "string", "pattern": COMMAND_PATTERN}},
+    "required": ["command"],
+    "additionalProperties": False,
+}
+
+_COMMAND_RE = re.compile(COMMAND_PATTERN)
+
+
+class CommandConstraintError(ValueError):
+    """Raised for an unknown command-constraint mode."""
+
+
+def normalize_constraint_mode(mode: Any) -> str:
+    """Return a known constraint mode; ``None``/``False`` mean ``off``."""
+    if mode in (None, False, ""):
+        return CONSTRAINT_OFF
+    text = str(mode).strip().lower()
+    if text not in CONSTRAINT_MODES:
+        raise CommandConstraintError(
+            f"Unknown command constraint {mode!r}; expected one of {', '.join(CONSTRAINT_MODES)}."
+        )
+    return text
+
+
+def is_grammar_command(text: str) -> bool:
+    """Return True when ``text`` is a command the constrained grammar can emit."""
+    return _COMMAND_RE.fullmatch(text) is not None
+
+
+def constrain_request(
+    mode: Any, options: Mapping[str, Any] | None
+) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    """Return ``(options, format)`` for a request under ``mode``.
+
+    ``options`` is copied and tightened: ``num_predict`` never rises above a
+    value set by the caller, and ``limits`` adds a newline stop sequence to any
+    configured ones. ``format`` is the structured-output schema, or ``None``.
+    """
+    mode = normalize_constraint_mode(mode)
+    constrained = dict(options or {})
+    if mode == CONSTRAINT_OFF:
+        return constrained, None
+
+    limit = COMMAND_TOKEN_LIMIT if mode == CONSTRAINT_LIMITS else SCHEMA_TOKEN_LIMIT
+    requested = constrained.get("num_predict")
+    if isinstance(requested, int) and not isinstance(requested, bool) and 0 < requested < limit:
+        limit = requested
+    constrained["num_predict"] = limit
+
+    if mode == CONSTRAINT_SCHEMA:
+        return constrained, deepcopy(COMMAND_SCHEMA)
+
+    stop = constrained.get("stop") or []
+    stop = [stop] if isinstance(stop, str) else list(stop)
+    if "\n" not in stop:
+        stop.append("\n")
+    constrained["stop"] = stop
+    return constrained, None
+
+
+def unwrap_command_reply(text: str) -> str:
+    """Return the command inside a ``{"command": ...}`` reply.
+
+    Any other text, including malformed JSON from a server that ignored the
+    schema, is returned unchanged so it is parsed (and usually rejected) as is.
+    """
+    stripped = str(text or "").strip()
+    if not stripped.startswith("{"):
+        return text
+    try:
+        payload = json.loads(stripped)
+    except ValueError:
+        return text
+    if isinstance(payload, dict) and isinstance(payload.get("command"), str):
+        return payload["command"]
+    return text
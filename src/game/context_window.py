@@ -0,0 +1,168 @@
+"""Token-budgeted, prefix-stable trimming of chat histories.
+
+Ollama keeps the key/value cache of the previous request and only prefills the
+part of a new request that differs from it. Appending to a history therefore
+costs little, while dropping its oldest message changes every position after
+the system message and forces the whole context to be prefilled again. Trimming
+one message per request, as a plain sliding window does, makes that happen on
+every turn once the window is full.
+
+:class:`ContextBudget` instead lets a history grow until it exceeds the message
+limit or the estimated token budget of ``num_ctx``, then drops a large block of
+the oldest exchanges at once, so the requests between two trims all extend the
+same prefix. :class:`PrefixTracker` measures how much of each request repeats
+the previous one.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+import threading
+from typing import Any, Hashable, Mapping, Sequence
+
+CHARS_PER_TOKEN = 4
+"""Rough characters per token used when the model's tokenizer is unknown."""
+
+MESSAGE_OVERHEAD_TOKENS = 4
+"""Template tokens around each chat message (role markers and separators)."""
+
+DEFAULT_REPLY_RESERVE = 256
+"""Context tokens kept free for the reply when ``num_predict`` is unset."""
+
+TRIM_TARGET = 0.5
+"""Share of the message limit and token budget a trimmed history is cut to."""
+
+
+def estimate_message_tokens(message: Mapping[str, Any]) -> int:
+    content = str(message.get("content") or "")
+    return MESSAGE_OVERHEAD_TOKENS + math.ceil(len(content) / CHARS_PER_TOKEN)
+
+
+def estimate_tokens(messages: Sequence[Mapping[str, Any]]) -> int:
+    """Estimate the prompt tokens of a chat request."""
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+@dataclass(frozen=True)
+class ContextBudget:
+    """Limits a history is trimmed against.
+
+    ``max_messages`` and ``num_ctx`` of ``None`` or below one disable that
+    limit. ``reply_reserve`` is subtracted from ``num_ctx`` so the reply still
+    fits after the prompt.
+    """
+
+    max_messages: int | None = None
+    num_ctx: int | None = None
+    reply_reserve: int = DEFAULT_REPLY_RESERVE
+
+    @property
+    def token_budget(self) -> int | None:
+        if not self.num_ctx or self.num_ctx <= 0:
+            return None
+        return max(1, self.num_ctx - max(0, self.reply_reserve))
+
+    @property
+    def message_limit(self) -> int | None:
+        if not self.max_messages or self.max_messages <= 0:
+            return None
+        return self.max_messages
+
+    def exceeded(self, history: Sequence[Mapping[str, Any]]) -> bool:
+        limit = self.message_limit
+        if limit is not None and len(history) > limit:
+            return True
+        budget = self.token_budget
+        return budget is not None and estimate_tokens(history) > budget
+
+    def trim(self, history: list[dict[str, str]]) -> int:
+        """Trim ``history`` in place once it exceeds a limit; return messages dropped.
+
+        A leading system message is always kept. The newest messages are kept
+        up to :data:`TRIM_TARGET` of each limit, the newest one in any case, and
+        the kept part never starts with an assistant reply.
+        """
+        if not self.exceeded(history):
+            return 0
+        system = history[0] if history and history[0].get("role") == "system" else None
+        tail = history[1:] if system is not None else history[:]
+        reserved = 1 if system is not None else 0
+        limit = self.message_limit
+        budget = self.token_budget
+        keep_messages = (
+            max(0, math.floor(limit * TRIM_TARGET) - reserved) if limit is not None else None
+        )
+        keep_tokens = (
+            math.floor(budget * TRIM_TARGET)
+            - (estimate_message_tokens(system) if system is not None else 0)
+            if budget is not None
+            else None
+        )
+
+        kept: list[dict[str, str]] = []
+        tokens = 0
+        for message in reversed(tail):
+            cost = estimate_message_tokens(message)
+            if kept and (
+                (keep_messages is not None and len(kept) >= keep_messages)
+                or (keep_tokens is not None and tokens + cost > keep_tokens)
+            ):
+                break
+            kept.append(message)
+            tokens += cost
+        kept.reverse()
+        while len(kept) > 1 and kept[0].get("role") == "assistant":
+            kept.pop(0)
+
+        dropped = len(history) - len(kept) - reserved
+        history[reserved:] = kept
+        return dropped
+
+
+def shared_prefix_length(
+    previous: Sequence[Mapping[str, Any]], current: Sequence[Mapping[str, Any]]
+) -> int:
+    """Return how many leading messages two requests have in common."""
+    shared = 0
+    for before, now in zip(previous, current):
+        if before.get("role") != now.get("role") or before.get("content") != now.get("content"):
+            break
+        shared += 1
+    return shared
+
+
+class PrefixTracker:
+    """Compare each request with the previous one sent for the same context."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._previous: dict[Hashable, tuple[dict[str, str], ...]] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._previous.clear()
+
+    def observe(self, key: Hashable, messages: Sequence[Mapping[str, Any]]) -> dict[str, Any]:
+        """Record ``messages`` as the latest request for ``key`` and return its metrics.
+
+        ``prefix_stable`` is True when the previous request is an exact prefix
+        of this one, which is when the server can reuse all of its cache.
+        """
+        snapshot = tuple(
+            {"role": str(message.get("role") or ""), "content": str(message.get("content") or "")}
+            for message in messages
+        )
+        with self._lock:
+            previous = self._previous.get(key)
+            self._previous[key] = snapshot
+        shared = shared_prefix_length(previous or (), snapshot)
+        prompt_tokens = estimate_tokens(snapshot)
+        shared_tokens = estimate_tokens(snapshot[:shared])
+        return {
+            "prompt_tokens_est": prompt_tokens,
+            "shared_prefix_messages": shared,
+            "shared_prefix_tokens_est": shared_tokens,
+            "prefix_stable": previous is not None and shared == len(previous),
+            "reused_ratio": round(shared_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+        }
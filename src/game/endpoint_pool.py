@@ -0,0 +1,276 @@
+"""Pool of Ollama endpoints with affinity, load balancing and failover.
+
+A lab machine can run several Ollama instances, on different ports or with a
+GPU each. :class:`EndpointPool` spreads requests over them:
+
+* A request with an affinity key (the bot, or the shared context) goes back to
+  the endpoint that served that key before, so the server that already holds
+  the context's KV cache prefills only the new messages.
+* A key without an endpoint, or whose endpoint is down, is given the healthy
+  endpoint with the fewest outstanding requests.
+* An endpoint that times out or refuses a connection is taken out of rotation
+  for :data:`RETRY_AFTER` seconds and its keys move elsewhere. After that, the
+  next request starts a background probe of ``/api/version``, and the endpoint
+  rejoins the rotation once it answers; requests never wait for the probe.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable, Mapping
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+from game.research_runtime import extract_response_text
+
+HEALTH_PATH = "/api/version"
+HEALTH_TIMEOUT = 1.0
+RETRY_AFTER = 10.0
+"""Seconds a failed endpoint stays out of rotation before it is probed again."""
+
+DEFAULT_PORT = 11434
+
+
+class EndpointPoolError(ValueError):
+    """Raised for an endpoint list that cannot be parsed."""
+
+
+def normalize_endpoint(raw: Any) -> str:
+    """Return ``scheme://host:port`` for an endpoint such as ``localhost:11435``."""
+    text = str(raw or "").strip().rstrip("/")
+    if not text:
+        raise EndpointPoolError("Empty Ollama endpoint.")
+    parsed = urlparse(text if "://" in text else f"http://{text}")
+    try:
+        port = parsed.port or DEFAULT_PORT
+    except ValueError as exc:
+        raise EndpointPoolError(f"Invalid port in Ollama endpoint {raw!r}.") from exc
+    if not parsed.hostname or parsed.path not in ("", "/"):
+        raise EndpointPoolError(f"Invalid Ollama endpoint {raw!r}; expected host:port.")
+    return f"{parsed.scheme or 'http'}://{parsed.hostname}:{port}"
+
+
+def parse_endpoints(raw: Any) -> list[str]:
+    """Return configured endpoints (a list or comma-separated text) in order, without duplicates."""
+    if isinstance(raw, str):
+        raw = [part for part in raw.split(",") if part.strip()]
+    if not isinstance(raw, (list, tuple)):
+        raw = []
+    endpoints: list[str] = []
+    for item in raw:
+        endpoint = normalize_endpoint(item)
+        if endpoint not in endpoints:
+            endpoints.append(endpoint)
+    return endpoints
+
+
+def probe_endpoint(host: str, timeout: float = HEALTH_TIMEOUT) -> bool:
+    """Return True if ``host`` answers Ollama's version endpoint."""
+    try:
+        with urllib.request.urlopen(f"{host}{HEALTH_PATH}", timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except OSError:
+        return False
+
+
+@dataclass
+class EndpointState:
+    """Load and health of one endpoint."""
+
+    host: str
+    outstanding: int = 0
+    served: int = 0
+    failures: int = 0
+    down_until: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "host": self.host,
+            "healthy": self.down_until is None,
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "failures": self.failures,
+        }
+
+
+class EndpointPool:
+    """Choose an endpoint per request and track outstanding requests and failures."""
+
+    def __init__(
+        self,
+        hosts: Iterable[str],
+        *,
+        probe: Callable[[str], bool] = probe_endpoint,
+        retry_after: float = RETRY_AFTER,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._states = [EndpointState(normalize_endpoint(host)) for host in hosts]
+        if not self._states:
+            raise EndpointPoolError("An endpoint pool needs at least one endpoint.")
+        self._probe = probe
+        self.retry_after = float(retry_after)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._affinity: dict[Hashable, str] = {}
+        self._probing: dict[str, threading.Thread] = {}
+
+    @property
+    def hosts(self) -> list[str]:
+        return [state.host for state in self._states]
+
+    def _state(self, host: str) -> EndpointState | None:
+        return next((state for state in self._states if state.host == host), None)
+
+    def _recover_due(self, exclude: Iterable[str]) -> None:
+        """Start probing endpoints whose time out of rotation has passed, off the request thread."""
+        now = self._clock()
+        with self._lock:
+            for state in self._states:
+                if (
+                    state.down_until is not None
+                    and state.down_until <= now
+                    and state.host not in exclude
+                    and state.host not in self._probing
+                ):
+                    thread = threading.Thread(
+                        target=self._readmit_if_healthy,
+                        args=(state.host,),
+                        name="endpoint-probe",
+                        daemon=True,
+                    )
+                    self._probing[state.host] = thread
+                    thread.start()
+
+    def _readmit_if_healthy(self, host: str) -> None:
+        try:
+            healthy = self._probe(host)
+        except Exception:  # pylint: disable=broad-exception-caught
+            healthy = False
+        with self._lock:
+            self._probing.pop(host, None)
+            state = self._state(host)
+            if state is not None and state.down_until is not None:
+                state.down_until = None if healthy else self._clock() + self.retry_after
+
+    def wait_for_probes(self, timeout: float | None = None) -> None:
+        """Wait for the recovery probes running now to finish."""
+        with self._lock:
+            threads = list(self._probing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def acquire(self, key: Hashable = None, *, exclude: Iterable[str] = ()) -> str:
+        """Reserve an endpoint for one request; pair every call with :meth:`release`.
+
+        ``exclude`` lists endpoints that already failed this request. If every
+        other endpoint is down, the one back soonest is used anyway. Endpoints
+        due for recovery are probed in the background, not before choosing.
+        """
+        exclude = set(exclude)
+        self._recover_due(exclude)
+        with self._lock:
+            candidates = [state for state in self._states if state.host not in exclude]
+            if not candidates:
+                candidates = list(self._states)
+            healthy = [state for state in candidates if state.down_until is None]
+            pinned = self._state(self._affinity.get(key, "")) if key is not None else None
+            if pinned is not None and pinned in healthy:
+                chosen = pinned
+            elif healthy:
+                chosen = min(healthy, key=lambda state: state.outstanding)
+            else:
+                chosen = min(candidates, key=lambda state: state.down_until or 0.0)
+            if key is not None:
+                self._affinity[key] = chosen.host
+            chosen.outstanding += 1
+            return chosen.host
+
+    def release(self, host: str, *, failed: bool = False) -> None:
+        """End a request on ``host``; a failed one takes the endpoint out of rotation."""
+        with self._lock:
+            state = self._state(host)
+            if state is None:
+                return
+            state.outstanding = max(0, state.outstanding - 1)
+            if not failed:
+                state.served += 1
+                state.failures = 0
+                return
+            state.failures += 1
+            state.down_until = self._clock() + self.retry_after
+            for key in [key for key, pinned in self._affinity.items() if pinned == host]:
+                del self._affinity[key]
+
+    def check_health(self) -> dict[str, bool]:
+        """Probe every endpoint now and return which ones answered."""
+        results = {host: self._probe(host) for host in self.hosts}
+        with self._lock:
+            for state in self._states:
+                if results[state.host]:
+                    state.down_until = None
+                elif state.down_until is None:
+                    state.down_until = self._clock() + self.retry_after
+        return results
+
+    def reset_affinity(self) -> None:
+        with self._lock:
+            self._affinity.clear()
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [state.to_dict() for state in self._states]
+
+
+def split_endpoint(endpoint: str) -> tuple[str, int]:
+    """Return the ``scheme://host`` and port of a normalised endpoint."""
+    base, _, port = normalize_endpoint(endpoint).rpartition(":")
+    return base, int(port)
+
+
+class PooledChatClient:
+    """Spread research :class:`~game.research_runtime.ChatClient` requests over a pool.
+
+    ``clients`` maps each endpoint of ``pool`` to the client that talks to it.
+    Replies gain an ``endpoint`` entry so the runtime can record which server
+    answered. Requests with the same ``affinity`` (the runtime passes the
+    bot's context) go back to the same endpoint, which holds that context's KV
+    cache. A timeout or refused connection takes the endpoint out of
+    rotation, so the runtime's retry goes elsewhere.
+    """
+
+    def __init__(self, clients: Mapping[str, Any], pool: EndpointPool):
+        self.clients = {normalize_endpoint(host): client for host, client in clients.items()}
+        missing = set(pool.hosts) - set(self.clients)
+        if missing:
+            raise EndpointPoolError(f"No client for endpoints: {', '.join(sorted(missing))}.")
+        self.pool = pool
+
+    def chat(
+        self,
+        *,
+        model: str,
+        messages: list[dict[str, str]],
+        options: dict[str, Any],
+        stream: bool = False,
+        format: dict[str, Any] | None = None,  # pylint: disable=redefined-builtin
+        affinity: Hashable = None,
+    ) -> Any:
+        constraint = {"format": format} if format is not None else {}
+        host = self.pool.acquire(affinity)
+        failed = False
+        try:
+            response = self.clients[host].chat(
+                model=model, messages=messages, options=options, stream=stream, **constraint
+            )
+        except (TimeoutError, ConnectionError, urllib.error.URLError):
+            failed = True
+            raise
+        finally:
+            self.pool.release(host, failed=failed)
+        if isinstance(response, Mapping):
+            return {**response, "endpoint": host}
+        text = extract_response_text(response)
+        return {"message": {"role": "assistant", "content": text}, "response": text, "endpoint": host}
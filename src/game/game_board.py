@@ -26,9 +26,10 @@ HistoryManager. UI updates are handled through a small set of helper methods.
 
 from __future__ import annotations
 
+import logging
 import os
 import random
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
 from kivy.clock import Clock
 from kivy.core.audio import SoundLoader
@@ -46,9 +47,11 @@ from configs.app_config import config
 from game.bot import Bot
 from game.history_manager import HistoryManager
 from game.ollama_connector import LLMRequestError, LLMTimeoutError, OllamaConnector
-from game.ollama_singleton import reset_executor
+from game.ollama_singleton import get_executor, reset_executor
 from game.prompt_store import PromptStore
 from game.replay_engine import GameplaySettingsSnapshot, resolve_shot
+from game.speculation import SpeculationStats, SpeculativeRequest
+from llm.supervisor import active_supervisor
 from util.paths import asset_path
 from util.utils import (
     find_id_in_parents,
@@ -58,6 +61,8 @@ from util.utils import (
 )
 from view.normalized_canvas import NormalizedCanvas
 
+_logger = logging.getLogger(__name__)
+
 
 class GameBoard(Widget):
     """
@@ -85,8 +90,15 @@ class GameBoard(Widget):
         self.bullet = None
         self.shuffled_bots: Optional[list[Bot]] = None
         self.current_round_settings: Optional[GameplaySettingsSnapshot] = None
+        # The configured rules between rounds, with the config version they were read at.
+        self._configured_rules: Optional[Tuple[int, GameplaySettingsSnapshot]] = None
         self._turn_submission_queue: list[Bot] = []
         self._turn_submission_index: int = 0
+        self._turn_requests_concurrent = False
+        self._turn_outcomes: dict[int, Callable[[], None]] = {}
+        self._turn_outcome_in_progress = False
+        self._turn_speculation: Optional[SpeculativeRequest] = None
+        self.speculation_stats = SpeculationStats()
         self._round_timeout_action: str | None = None
         self._timeout_popup: Optional[Popup] = None
         self._game_generation = 0
@@ -142,6 +154,9 @@ class GameBoard(Widget):
             self.history_manager.end_game(self)
 
         self._game_generation += 1
+        # Close requests still running for the retired game so the server stops
+        # generating for them (only possible with the async transport).
+        self.ollama_connector.cancel_requests()
         reset_executor()
         # A running request can outlive its retired executor. Every transition
         # after the initial game gets a distinct connector so obsolete work can
@@ -154,6 +169,9 @@ class GameBoard(Widget):
         self.current_round_settings = None
         self._turn_submission_queue = []
         self._turn_submission_index = 0
+        self._turn_requests_concurrent = False
+        self._turn_outcomes = {}
+        self._discard_turn_speculation()
         self._round_timeout_action = None
         self._timeout_popup = None
 
@@ -174,6 +192,7 @@ class GameBoard(Widget):
 
         self.games_started += 1
         self.history_manager.start_game(self)
+        self._start_prefill_warmup()
 
     def current_callback_token(self) -> tuple[int, int]:
         return self._game_generation, self._turn_generation
@@ -197,13 +216,26 @@ class GameBoard(Widget):
         )
         popup.open()
 
+    def gameplay_rules(self) -> GameplaySettingsSnapshot:
+        """Return the rules of the current round, or the configured ones between rounds.
+
+        The configured rules are re-read only after a change to the game settings.
+        """
+        if self.current_round_settings is not None:
+            return self.current_round_settings
+        version = config.version_of("game")
+        if self._configured_rules is None or self._configured_rules[0] != version:
+            self._configured_rules = (version, GameplaySettingsSnapshot.from_config())
+        return self._configured_rules[1]
+
+
     def game_is_over(self) -> bool:
         """Return True iff the game is over."""
         for b in self.bots:
             if b.health <= 0:
                 return True
 
-        rules = self.current_round_settings or GameplaySettingsSnapshot.from_config()
+        rules = self.gameplay_rules()
         total_rounds = int(rules.total_rounds)
         if self.current_round >= total_rounds:
             return True
@@ -490,15 +522,31 @@ class GameBoard(Widget):
 
     def play_turn(self, dt):
         """Executes one turn. Game logic advances frame-by-frame via Kivy's Clock. TODO: does it?"""
-        rules = self.current_round_settings or GameplaySettingsSnapshot.from_config()
+        rules = self.gameplay_rules()
         turns_per_round = int(rules.turns_per_round)
 
         if not self.current_turn < turns_per_round:
             # Round ended
             self._turn_submission_queue = []
             self._turn_submission_index = 0
+            self._turn_requests_concurrent = False
+            self._turn_outcomes = {}
+            self._discard_turn_speculation()
             self._round_timeout_action = None
             self.history_manager.end_round()
+            if self.speculation_stats.attempts:
+                _logger.info("Speculative prefetch: %s", self.speculation_stats.summary())
+            transport = getattr(self.ollama_connector.client, "transport", None)
+            if transport is not None:
+                _logger.info("LLM transport: %s", transport.stats.summary())
+            latency = self.ollama_connector.telemetry.summary()
+            if latency:
+                _logger.info("LLM latency: %s", latency)
+            if self.ollama_connector.endpoint_pool is not None:
+                _logger.info("LLM endpoints: %s", self.ollama_connector.endpoint_pool.snapshot())
+            supervisor = active_supervisor()
+            if supervisor is not None:
+                _logger.info("Ollama serving: %s", supervisor.state)
             # Insert visual separation and summary
             for b in self.bots:
                 self.add_text_to_home_screen_cmd_history(b.id, "\n")
@@ -523,6 +571,7 @@ class GameBoard(Widget):
                 duration=1,
                 fade_duration=0.8,
             )
+            self._start_prefill_warmup()
             return
 
         # Round is not over → start a turn
@@ -537,7 +586,12 @@ class GameBoard(Widget):
         # Submission goes in the shuffled order
         self._turn_submission_queue = list(self.shuffled_bots or self.bots)
         self._turn_submission_index = 0
-        self._submit_next_bot_for_turn()
+        self._turn_requests_concurrent = self._turn_is_order_independent()
+        if self._turn_requests_concurrent:
+            self._submit_turn_concurrently()
+        else:
+            self._start_turn_speculation()
+            self._submit_next_bot_for_turn()
 
 
 
@@ -568,14 +622,126 @@ class GameBoard(Widget):
 
         self._submit_next_bot_for_turn()
 
+    def _turn_is_order_independent(self) -> bool:
+        """Return True when no bot's request depends on another bot's play this turn.
+
+        Without prompt augmentation the request does not carry the game state,
+        and with independent contexts each bot has its own history, so the
+        requests of a turn can be in flight together.
+        """
+        return (
+            not config.get("game", "prompt_augmentation")
+            and bool(config.get("game", "independent_contexts"))
+        )
+
+    def _submit_turn_concurrently(self):
+        """Request every bot's play at once; results are applied in turn order."""
+        self._turn_outcomes = {}
+        self._turn_outcome_in_progress = False
+        token = self.current_callback_token()
+        for position, bot in enumerate(self._turn_submission_queue):
+            bot.submit_prompt_to_llm(
+                deliver=lambda outcome, position=position: self._deliver_turn_outcome(
+                    token, position, outcome
+                )
+            )
+
+    def _deliver_turn_outcome(self, token, position: int, outcome: Callable[[], None]):
+        """Hold a finished request until every bot before it in the turn has played."""
+        if not self._turn_requests_concurrent or not self.callback_token_is_current(token):
+            return
+        self._turn_outcomes[position] = outcome
+        self._apply_next_turn_outcome()
+
+    def _apply_next_turn_outcome(self):
+        if self._turn_outcome_in_progress:
+            return
+        outcome = self._turn_outcomes.pop(self._turn_submission_index, None)
+        if outcome is None:
+            return
+        self._turn_submission_index += 1
+        self._turn_outcome_in_progress = True
+        outcome()
+
     def _submit_next_bot_for_turn(self):
         """Submit the next bot in the current turn order, if any remain."""
+        if self._turn_requests_concurrent:
+            # The previous bot has finished its play; apply the next result if it arrived.
+            self._turn_outcome_in_progress = False
+            self._apply_next_turn_outcome()
+            return
         if self._turn_submission_index >= len(self._turn_submission_queue):
             return
         bot = self._turn_submission_queue[self._turn_submission_index]
         self._turn_submission_index += 1
+        speculation = self._turn_speculation
+        if speculation is not None and speculation.bot_id == bot.id:
+            self._turn_speculation = None
+            if speculation.matches(bot.id, bot.get_game_state()):
+                bot.submit_prompt_to_llm(
+                    future=speculation.adopt(self.ollama_connector, self.speculation_stats)
+                )
+                return
+            speculation.discard()
+            self.speculation_stats.record_miss()
         bot.submit_prompt_to_llm()
 
+    def _start_turn_speculation(self):
+        """Send the second bot's request early against the pre-turn state, if enabled.
+
+        Only augmented turns with independent contexts qualify: the request
+        then depends on the earlier plays only through the game state, which
+        is compared exactly before the speculative reply is adopted.
+        """
+        self._discard_turn_speculation()
+        queue = self._turn_submission_queue
+        if (
+            len(queue) < 2
+            or not config.get("game", "speculative_prefetch")
+            or not config.get("game", "prompt_augmentation")
+            or not config.get("game", "independent_contexts")
+        ):
+            return
+        bot = queue[1]
+        game_state = bot.get_game_state()
+        future = get_executor().submit(
+            self.ollama_connector.speculate_prompt_to_llm_sync,
+            bot.id,
+            user_text=bot.get_current_prompt(),
+            game_state=game_state,
+        )
+        self._turn_speculation = SpeculativeRequest(bot.id, game_state, future)
+        self.speculation_stats.record_attempt()
+
+    def _discard_turn_speculation(self):
+        speculation, self._turn_speculation = self._turn_speculation, None
+        if speculation is not None:
+            speculation.discard()
+
+    def _start_prefill_warmup(self):
+        """Prefill the model's prompt cache while the players write their prompts.
+
+        The warm-up sends each context's system instructions and history, the
+        prefix the round's first requests extend; nothing enters the game
+        history. Plays that follow a warm-up are marked ``warmed`` in their
+        context record, so first-turn latency can be compared.
+        """
+        if not config.get("game", "prefill_warmup"):
+            return
+        future = get_executor().submit(
+            self.ollama_connector.warm_up, [bot.id for bot in self.bots]
+        )
+
+        def report(done):
+            if done.cancelled():
+                return
+            try:
+                _logger.info("Prefill warm-up: %s", done.result())
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                _logger.warning("Prefill warm-up failed: %s", exc)
+
+        future.add_done_callback(report)
+
     def _clear_timeout_popup(self, *_args):
         self._timeout_popup = None
 
@@ -605,9 +771,17 @@ class GameBoard(Widget):
         model_name = exc.model or self.ollama_connector.model or "the selected model"
         return (
             f"Bot {bot.id} timed out waiting for {model_name}{timeout_suffix}. "
-            f"BatLLM already retried once."
+            f"{self._format_retries(exc)}"
         )
 
+    @staticmethod
+    def _format_retries(exc: LLMTimeoutError) -> str:
+        """Describe the retries behind a timeout, from `InvocationFailed.attempts`."""
+        retries = max(0, int(exc.attempts or 1) - 1)
+        if retries == 0:
+            return "BatLLM did not retry it."
+        return f"BatLLM already retried {'once' if retries == 1 else f'{retries} times'}."
+
     def handle_bot_llm_timeout(self, bot: Bot, exc: LLMTimeoutError, *, token=None):
         """Resolve an LLM timeout using the round policy or a user choice popup."""
         if token is not None and not self.callback_token_is_current(token):
@@ -645,7 +819,11 @@ class GameBoard(Widget):
         if action == "err":
             self.add_text_to_home_screen_cmd_history(
                 bot.id,
-                markup("Timeout after retry -> ERR\n", color="#a00000", bold=True),
+                markup(
+                    f"Timeout after {exc.attempts} attempt{'s' if exc.attempts != 1 else ''} -> ERR\n",
+                    color="#a00000",
+                    bold=True,
+                ),
             )
             bot.finish_turn_with_error(timeout_message)
             return
@@ -755,8 +933,12 @@ class GameBoard(Widget):
             cancelled_by_bot_id=bot.id,
             rollback_state=rollback_state,
         )
+        self.ollama_connector.cancel_requests()
         self._turn_submission_queue = []
         self._turn_submission_index = 0
+        self._turn_requests_concurrent = False
+        self._turn_outcomes = {}
+        self._discard_turn_speculation()
         self._round_timeout_action = None
         self.current_turn = 0
         self.current_round_settings = None
@@ -800,7 +982,7 @@ class GameBoard(Widget):
             return
 
         self.bullet_alpha = 1.0
-        rules = self.current_round_settings or GameplaySettingsSnapshot.from_config()
+        rules = self.gameplay_rules()
         shot = resolve_shot(self.snapshot(), bot_id, rules)
         if shot.reason == "no_shot":
             return
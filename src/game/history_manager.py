@@ -359,6 +359,22 @@ class HistoryManager:
             "llm_response": bot.last_llm_response,
             "cmd": bot.last_cmd,
         }
+        stream = getattr(bot, "last_stream", None)
+        if stream:
+            # Streamed replies stop once the command is settled; llm_response is the received text.
+            play["stream"] = dict(stream)
+        context = getattr(bot, "last_context", None)
+        if context:
+            # How much of the request repeated the previous one, for KV-cache reuse.
+            play["context"] = dict(context)
+        telemetry = getattr(bot, "last_telemetry", None)
+        if telemetry:
+            # Where the request's time went; latency and attempts feed the play table.
+            play["telemetry"] = dict(telemetry)
+            if telemetry.get("latency_ms") is not None:
+                play["latency_ms"] = telemetry["latency_ms"]
+            if telemetry.get("attempts") is not None:
+                play["attempts"] = telemetry["attempts"]
         self.current_turn.setdefault("plays", []).append(play)
 
 
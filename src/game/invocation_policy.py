@@ -0,0 +1,356 @@
+"""Retries, backoff, retry budgets and hedging for model requests.
+
+Gameplay (:class:`~game.ollama_connector.OllamaConnector`) and research runs
+(:class:`~game.research_runtime.MediatedGameRuntime`) send requests through the
+same :class:`InvocationEngine`:
+
+* A transient failure (timeout, refused or dropped connection) is retried up to
+  :attr:`RetryPolicy.max_attempts` times. Failures that return quickly wait an
+  exponential backoff with full jitter first; a timeout has already waited, so
+  its retry starts at once. Other errors are not retried.
+* With hedging, a request still running after the hedge delay (a fixed time,
+  or the model's p95 latency) gets a duplicate, normally on another endpoint
+  or model, and the first answer wins. The loser is cancelled (see
+  :class:`CancelToken`); a request that cannot be interrupted runs to
+  completion in the background and its reply is discarded. With a single
+  endpoint a hedge is only sent to a different model, since a duplicate of
+  the same request would queue behind it.
+* Retries and hedges spend a shared :class:`RetryBudget`, which every request
+  refills by a fraction of a token, so an outage cannot multiply the load on
+  the servers.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import random
+import threading
+import time
+from typing import Any, Callable, Generic, Iterable, TypeVar
+import urllib.error
+
+from game.llm_telemetry import percentile
+
+T = TypeVar("T")
+
+HEDGE_OFF = "off"
+HEDGE_P95 = "p95"
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 8
+"""Latencies a model needs before its p95 is trusted as the hedge delay."""
+
+RETRY_BUDGET_RATIO = 0.2
+"""Retry tokens each request adds to the budget."""
+
+RETRY_BUDGET_CAPACITY = 5.0
+
+TRANSIENT_EXCEPTIONS: tuple[type[BaseException], ...] = (
+    TimeoutError,
+    ConnectionError,
+    urllib.error.URLError,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dependency is normally present via ollama
+    httpx = None
+if httpx is not None:
+    TRANSIENT_EXCEPTIONS += (httpx.TransportError,)
+
+
+class InvocationPolicyError(ValueError):
+    """Raised for an invalid retry or hedging setting."""
+
+
+def normalize_hedge_after(value: Any) -> str | float:
+    """Return ``"off"``, ``"p95"`` or a positive delay in seconds."""
+    if value in (None, False, "", 0):
+        return HEDGE_OFF
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in (HEDGE_OFF, HEDGE_P95):
+            return text
+        value = text
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError) as exc:
+        raise InvocationPolicyError(
+            f"Invalid hedge_after {value!r}; expected off, p95, or seconds."
+        ) from exc
+    if seconds < 0:
+        raise InvocationPolicyError(f"hedge_after must not be negative, got {value!r}.")
+    return seconds if seconds > 0 else HEDGE_OFF
+
+
+def can_hedge(endpoints: int, model: str, hedge_model: str | None) -> bool:
+    """Return whether a hedge could reach another endpoint or another model."""
+    return endpoints > 1 or bool(hedge_model and hedge_model != model)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often a request is retried and when it is hedged."""
+
+    max_attempts: int = 2
+    backoff_base_s: float = 0.25
+    backoff_max_s: float = 4.0
+    hedge_after: str | float = HEDGE_OFF
+
+    def backoff(self, retry: int, rng: random.Random) -> float:
+        """Return the full-jitter wait before retry number ``retry`` (1-based)."""
+        if self.backoff_base_s <= 0:
+            return 0.0
+        ceiling = min(self.backoff_max_s, self.backoff_base_s * 2 ** max(0, retry - 1))
+        return rng.uniform(0.0, ceiling)
+
+    def hedge_delay(self, latencies_ms: Iterable[float] = ()) -> float | None:
+        """Return seconds to wait before hedging, or None when hedging is off or unknown."""
+        if self.hedge_after == HEDGE_OFF:
+            return None
+        if self.hedge_after == HEDGE_P95:
+            values = list(latencies_ms)
+            if len(values) < HEDGE_MIN_SAMPLES:
+                return None
+            return (percentile(values, HEDGE_PERCENTILE) or 0.0) / 1000.0
+        return float(self.hedge_after)
+
+
+class RetryBudget:
+    """Token bucket limiting retries and hedges to a share of requests."""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, capacity: float = RETRY_BUDGET_CAPACITY):
+        self.ratio = max(0.0, float(ratio))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class CancelToken:
+    """Tells a running request that its reply is no longer wanted.
+
+    The request registers how to stop itself with :meth:`on_cancel`, or checks
+    :attr:`cancelled` as it goes; a callback registered after :meth:`cancel`
+    runs at once.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], Any]] = []
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        with self._lock:
+            return self._cancelled
+
+    def on_cancel(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+@dataclass(frozen=True)
+class InvocationResult(Generic[T]):
+    """The winning reply and what it took to get it.
+
+    ``attempts`` counts every request sent, hedges included. ``errors`` lists
+    the exception type of each failed request in order.
+    """
+
+    value: T
+    attempts: int
+    hedged: bool = False
+    hedge_won: bool = False
+    backoff_ms: float = 0.0
+    errors: tuple[str, ...] = ()
+
+
+class InvocationFailed(Exception):
+    """Raised when every attempt failed; ``last_error`` is the final failure."""
+
+    def __init__(
+        self,
+        last_error: BaseException,
+        *,
+        attempts: int,
+        hedged: bool = False,
+        backoff_ms: float = 0.0,
+        errors: tuple[str, ...] = (),
+    ):
+        super().__init__(str(last_error))
+        self.last_error = last_error
+        self.attempts = attempts
+        self.hedged = hedged
+        self.backoff_ms = backoff_ms
+        self.errors = errors
+
+
+_hedge_executor: ThreadPoolExecutor | None = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _hedge_executor  # pylint: disable=global-statement
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+        return _hedge_executor
+
+
+class InvocationEngine:
+    """Run a request under a :class:`RetryPolicy` and a shared :class:`RetryBudget`."""
+
+    def __init__(
+        self,
+        policy: RetryPolicy | None = None,
+        *,
+        budget: RetryBudget | None = None,
+        transient: tuple[type[BaseException], ...] = TRANSIENT_EXCEPTIONS,
+        timeouts: tuple[type[BaseException], ...] = (TimeoutError,),
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+    ):
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.transient = transient
+        self.timeouts = timeouts
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+
+    def invoke(
+        self,
+        call: Callable[[], T],
+        *,
+        hedge: Callable[[], T] | None = None,
+        hedge_delay: float | None = None,
+        cancel: Callable[[bool], Any] | None = None,
+    ) -> InvocationResult[T]:
+        """Return the first successful reply of ``call`` (or of ``hedge``).
+
+        ``hedge`` sends the duplicate request; it is only used when
+        ``hedge_delay`` is set. ``cancel`` stops the request that lost the
+        race while it is still running: it is called with ``True`` for the
+        hedge and ``False`` for the primary request. Raises
+        :class:`InvocationFailed` once a non-transient error occurs, the
+        attempts run out, or the budget does.
+        """
+        self.budget.deposit()
+        errors: list[str] = []
+        attempts = 0
+        backoff_s = 0.0
+        hedged = False
+        last_error: BaseException | None = None
+        for attempt in range(1, max(1, self.policy.max_attempts) + 1):
+            if attempt > 1:
+                if not self.budget.try_spend():
+                    break
+                if not isinstance(last_error, self.timeouts):
+                    wait_s = self.policy.backoff(attempt - 1, self._rng)
+                    backoff_s += wait_s
+                    self._sleep(wait_s)
+            if hedge is not None and hedge_delay is not None:
+                outcome = self._hedged_round(call, hedge, hedge_delay, cancel)
+            else:
+                outcome = self._single_round(call)
+            attempts += outcome.sent
+            hedged = hedged or outcome.sent > 1
+            errors.extend(outcome.errors)
+            if outcome.error is None:
+                return InvocationResult(
+                    value=outcome.value,
+                    attempts=attempts,
+                    hedged=hedged,
+                    hedge_won=outcome.hedge_won,
+                    backoff_ms=round(backoff_s * 1000.0, 3),
+                    errors=tuple(errors),
+                )
+            last_error = outcome.error
+            if not isinstance(last_error, self.transient):
+                break
+        assert last_error is not None
+        raise InvocationFailed(
+            last_error,
+            attempts=attempts,
+            hedged=hedged,
+            backoff_ms=round(backoff_s * 1000.0, 3),
+            errors=tuple(errors),
+        ) from last_error
+
+    @staticmethod
+    def _single_round(call: Callable[[], Any]) -> "_Round":
+        try:
+            return _Round(value=call())
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            return _Round(error=exc, errors=[type(exc).__name__])
+
+    def _hedged_round(
+        self,
+        call: Callable[[], Any],
+        hedge: Callable[[], Any],
+        delay: float,
+        cancel: Callable[[bool], Any] | None = None,
+    ) -> "_Round":
+        """Run ``call``, adding ``hedge`` after ``delay``; the first success wins."""
+        executor = _executor()
+        primary = executor.submit(call)
+        done, _pending = wait([primary], timeout=max(0.0, delay))
+        futures: dict[Future, bool] = {primary: False}
+        if not done and self.budget.try_spend():
+            futures[executor.submit(hedge)] = True
+        outcome = _Round(sent=len(futures))
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    outcome.value, outcome.error = future.result(), None
+                    outcome.hedge_won = futures[future]
+                    for loser in pending:
+                        if not loser.cancel() and cancel is not None:
+                            cancel(futures[loser])
+                    return outcome
+                outcome.errors.append(type(error).__name__)
+                # Report the primary request's failure in preference to the hedge's.
+                if outcome.error is None or not futures[future]:
+                    outcome.error = error
+        return outcome
+
+
+@dataclass
+class _Round:
+    """One attempt: a request, or a request and its hedge."""
+
+    value: Any = None
+    error: BaseException | None = None
+    sent: int = 1
+    hedge_won: bool = False
+    errors: list[str] = field(default_factory=list)
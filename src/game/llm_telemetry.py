@@ -0,0 +1,115 @@
+"""Per-request latency telemetry for model requests.
+
+A play's latency is split into the phases that can dominate it: waiting for an
+inference worker (``queue_ms``), opening a connection (``connect_ms``, async
+transport only), the server loading the model (``load_ms``), prefilling the
+prompt (``prefill_ms``), and generating the reply (``generation_ms``), with
+``ttft_ms`` for streamed replies. Server-side phases come from the counters
+Ollama returns with a reply (in the final chunk of a streamed one); they are
+absent when a streamed reply is cut short before that chunk.
+
+:class:`LatencyTelemetry` keeps a rolling window of records per model and
+summarises them as percentiles and generation throughput.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+import threading
+from typing import Any, Iterable, Mapping
+
+WINDOW = 200
+"""Recent requests per model kept for the live summary."""
+
+_SERVER_DURATIONS = {
+    "load_duration": "load_ms",
+    "prompt_eval_duration": "prefill_ms",
+    "eval_duration": "generation_ms",
+    "total_duration": "server_total_ms",
+}
+_SERVER_COUNTS = ("prompt_eval_count", "eval_count")
+
+
+def server_timings(res: Any) -> dict[str, Any]:
+    """Return Ollama's token counts and phase durations (in ms) from a reply, if any."""
+    if not isinstance(res, Mapping):
+        return {}
+    timings: dict[str, Any] = {}
+    for key in _SERVER_COUNTS:
+        value = res.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            timings[key] = value
+    for key, name in _SERVER_DURATIONS.items():
+        value = res.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            timings[name] = round(value / 1e6, 3)
+    if timings.get("eval_count") and timings.get("generation_ms"):
+        timings["tokens_per_second"] = round(
+            timings["eval_count"] / (timings["generation_ms"] / 1000.0), 3
+        )
+    return timings
+
+
+def percentile(values: Iterable[float], q: float) -> float | None:
+    """Return the nearest-rank ``q`` percentile (0-100) of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyTelemetry:
+    """Rolling per-model summary of request telemetry records."""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = max(1, int(window))
+        self._lock = threading.Lock()
+        self._records: dict[str, deque[dict[str, Any]]] = {}
+
+    def record(self, model: str, telemetry: Mapping[str, Any]) -> None:
+        with self._lock:
+            records = self._records.setdefault(str(model), deque(maxlen=self.window))
+            records.append(dict(telemetry))
+
+    def latencies(self, model: str) -> list[float]:
+        """Return the recent latencies (ms) of ``model``'s requests that reached the server."""
+        with self._lock:
+            records = list(self._records.get(str(model), ()))
+        return [
+            float(row["latency_ms"])
+            for row in records
+            if row.get("latency_ms") is not None and row.get("attempts") != 0
+        ]
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Return p50/p95 latency, median phase times and throughput per model."""
+        with self._lock:
+            snapshot = {model: list(records) for model, records in self._records.items()}
+        result: dict[str, dict[str, Any]] = {}
+        for model, records in snapshot.items():
+            def values(key: str, rows: list[dict[str, Any]] = records) -> list[float]:
+                return [float(row[key]) for row in rows if row.get(key) is not None]
+
+            latency = values("latency_ms")
+            tokens = sum(values("eval_count"))
+            generation_s = sum(values("generation_ms")) / 1000.0
+            phases = {
+                phase: percentile(values(f"{phase}_ms"), 50)
+                for phase in ("queue", "connect", "ttft", "prefill", "generation")
+            }
+            measured = {phase: value for phase, value in phases.items() if value and phase != "ttft"}
+            result[model] = {
+                "requests": len(records),
+                "latency_p50_ms": percentile(latency, 50),
+                "latency_p95_ms": percentile(latency, 95),
+                **{f"{phase}_p50_ms": value for phase, value in phases.items()},
+                "tokens_per_second": round(tokens / generation_s, 3) if generation_s else None,
+                "dominant_phase": max(measured, key=measured.__getitem__) if measured else None,
+            }
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
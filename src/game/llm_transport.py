@@ -0,0 +1,215 @@
+"""Asyncio transport for Ollama chat requests on a dedicated event-loop thread.
+
+The inference executor can only abandon a request that is already running: the
+HTTP request stays open, so Ollama keeps generating for a game that no longer
+exists and the next game's first request queues behind it. This transport runs
+requests as asyncio tasks over one pooled keep-alive ``httpx.AsyncClient``.
+Cancelling a request cancels its task, which closes the connection and makes
+Ollama stop generating.
+
+Requests are submitted from any thread and return a
+:class:`concurrent.futures.Future`, so callers marshal completion onto Kivy's
+``Clock`` exactly as they do for executor futures. Every request belongs to a
+group (normally its connector) so a game, round or turn can cancel all of its
+requests at once. :class:`TransportStats` measures how long the first response
+takes after such a cancellation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Hashable
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dependency is normally present via ollama
+    httpx = None
+
+MAX_CONNECTIONS = 4
+"""Pooled connections; enough for both bots plus a speculative or warm-up request."""
+
+
+class TransportUnavailableError(RuntimeError):
+    """Raised when the async transport cannot be used (``httpx`` is missing)."""
+
+
+@dataclass
+class TransportStats:
+    """Counters of the async transport, including time-to-response after a reset."""
+
+    completed: int = 0
+    cancelled: int = 0
+    last_reset_to_response_ms: float | None = None
+    _reset_at: float | None = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def mark_reset(self) -> None:
+        with self._lock:
+            self._reset_at = time.monotonic()
+
+    def record_cancelled(self, count: int) -> None:
+        with self._lock:
+            self.cancelled += count
+
+    def record_completed(self) -> None:
+        with self._lock:
+            self.completed += 1
+            if self._reset_at is not None:
+                self.last_reset_to_response_ms = round(
+                    (time.monotonic() - self._reset_at) * 1000.0, 3
+                )
+                self._reset_at = None
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "last_reset_to_response_ms": self.last_reset_to_response_ms,
+            }
+
+
+class AsyncChatTransport:
+    """Pooled asyncio HTTP client for ``/api/chat`` on its own event-loop thread."""
+
+    def __init__(self, *, max_connections: int = MAX_CONNECTIONS):
+        if httpx is None:
+            raise TransportUnavailableError("The async transport requires httpx.")
+        self.max_connections = max(1, int(max_connections))
+        self.stats = TransportStats()
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._client: Any = None
+        self._pending: dict[Hashable, set[Future]] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                    timeout=None,
+                )
+                ready.set()
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name="ollama-transport", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread = loop, thread
+            return loop
+
+    async def _post(self, url: str, payload: dict[str, Any], timeout: float | None) -> dict[str, Any]:
+        """POST ``payload``; the reply gains ``connect_ms`` (0 on a reused connection)."""
+        connect: dict[str, float] = {}
+
+        async def trace(event: str, _info: dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.started":
+                connect["started"] = time.monotonic()
+            elif event == "connection.connect_tcp.complete":
+                connect["complete"] = time.monotonic()
+
+        try:
+            response = await asyncio.wait_for(
+                self._client.post(url, json=payload, extensions={"trace": trace}), timeout
+            )
+        except asyncio.TimeoutError as exc:
+            # asyncio.TimeoutError is only an alias of TimeoutError from Python 3.11.
+            raise TimeoutError(f"No reply from {url} within {timeout} s.") from exc
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, dict) and data.get("error"):
+            raise RuntimeError(str(data["error"]))
+        if isinstance(data, dict):
+            data["connect_ms"] = round(
+                (connect["complete"] - connect["started"]) * 1000.0, 3
+            ) if "complete" in connect and "started" in connect else 0.0
+        return data
+
+    def submit(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        *,
+        timeout: float | None = None,
+        group: Hashable = None,
+    ) -> Future:
+        """Start a POST of ``payload`` and return a future of the decoded JSON reply.
+
+        ``timeout`` is the deadline for the whole request. Cancelling the
+        future cancels the request and closes its connection.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._post(url, payload, timeout), loop)
+        with self._lock:
+            self._pending.setdefault(group, set()).add(future)
+
+        def settled(done: Future) -> None:
+            with self._lock:
+                pending = self._pending.get(group)
+                if pending is not None:
+                    pending.discard(done)
+                    if not pending:
+                        self._pending.pop(group, None)
+            if not done.cancelled() and done.exception() is None:
+                self.stats.record_completed()
+
+        future.add_done_callback(settled)
+        return future
+
+    def cancel_group(self, group: Hashable) -> int:
+        """Cancel every in-flight request of ``group`` and return how many were cancelled."""
+        with self._lock:
+            pending = list(self._pending.pop(group, ()))
+        cancelled = sum(1 for future in pending if future.cancel())
+        self.stats.record_cancelled(cancelled)
+        self.stats.mark_reset()
+        return cancelled
+
+    def in_flight(self, group: Hashable = None) -> int:
+        with self._lock:
+            return len(self._pending.get(group, ()))
+
+    def close(self) -> None:
+        """Cancel all requests, close the connection pool and stop the loop thread."""
+        with self._lock:
+            loop, thread, client = self._loop, self._thread, self._client
+            pending = [future for futures in self._pending.values() for future in futures]
+            self._pending.clear()
+            self._loop = self._thread = self._client = None
+        for future in pending:
+            future.cancel()
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+_shared: AsyncChatTransport | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport() -> AsyncChatTransport:
+    """Return the process-wide transport, so every connector shares one pool."""
+    global _shared  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared is None:
+            _shared = AsyncChatTransport()
+        return _shared
@@ -0,0 +1,139 @@
+"""Immutable chat histories that share their messages.
+
+A history grows by one message per request and reply, and every request,
+speculative request and trace record used to copy all of it, so a game's
+copying grew with the square of its length. :class:`MessageHistory` is an
+immutable sequence of frozen messages: appending returns a new history and
+leaves the old one intact, so a snapshot is just a reference.
+
+Histories that extend one another share a buffer. Appending to a history that
+ends the buffer adds the message in place, in O(1); appending to an older
+snapshot (a branch, such as a speculative request) copies the shared part
+once. Messages are read-only mappings; :meth:`MessageHistory.materialize`
+returns plain dicts for the HTTP request or a trace record.
+"""
+
+from __future__ import annotations
+
+from itertools import islice
+import threading
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, Mapping, Sequence, overload
+
+Message = Mapping[str, str]
+
+
+def freeze_message(message: Mapping[str, Any]) -> Message:
+    """Return ``message`` as a read-only mapping; frozen messages are returned as is."""
+    if isinstance(message, MappingProxyType):
+        return message
+    return MappingProxyType(dict(message))
+
+
+class _Buffer:
+    """Append-only message storage shared by the histories that extend each other."""
+
+    __slots__ = ("items", "lock")
+
+    def __init__(self, items: list[Message]) -> None:
+        self.items = items
+        self.lock = threading.Lock()
+
+
+class MessageHistory(Sequence[Message]):
+    """An immutable sequence of frozen chat messages with O(1) append and snapshots."""
+
+    __slots__ = ("_buffer", "_length")
+
+    def __init__(self, messages: Iterable[Mapping[str, Any]] = ()) -> None:
+        self._buffer = _Buffer([freeze_message(message) for message in messages])
+        self._length = len(self._buffer.items)
+
+    @classmethod
+    def _view(cls, buffer: _Buffer, length: int) -> "MessageHistory":
+        history = cls.__new__(cls)
+        history._buffer = buffer
+        history._length = length
+        return history
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Message: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "MessageHistory": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if start == 0 and step == 1:
+                # A prefix shares the buffer.
+                return self._view(self._buffer, max(0, stop))
+            return MessageHistory(self._buffer.items[: self._length][index])
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MessageHistory index out of range")
+        return self._buffer.items[index]
+
+    def __iter__(self) -> Iterator[Message]:
+        return islice(self._buffer.items, self._length)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MessageHistory):
+            return self is other or (
+                self._length == other._length and list(self) == list(other)
+            )
+        if isinstance(other, (list, tuple)):
+            return self._length == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"MessageHistory({self.materialize()!r})"
+
+    def append(self, message: Mapping[str, Any]) -> "MessageHistory":
+        """Return this history followed by ``message``."""
+        frozen = freeze_message(message)
+        buffer = self._buffer
+        with buffer.lock:
+            if len(buffer.items) == self._length:
+                buffer.items.append(frozen)
+                return self._view(buffer, self._length + 1)
+        # Another history already extends this one: branch off with a copy.
+        return self._view(_Buffer(buffer.items[: self._length] + [frozen]), self._length + 1)
+
+    def prepend(self, message: Mapping[str, Any]) -> "MessageHistory":
+        """Return ``message`` followed by this history (copies it)."""
+        return self._view(_Buffer([freeze_message(message), *self]), self._length + 1)
+
+    def replace(self, index: int, message: Mapping[str, Any]) -> "MessageHistory":
+        """Return this history with the message at ``index`` replaced (copies it)."""
+        items = list(self)
+        items[index] = freeze_message(message)
+        return self._view(_Buffer(items), self._length)
+
+    def without(self, message: Message) -> "MessageHistory":
+        """Return this history without the last occurrence of the ``message`` object."""
+        if self._length and self[-1] is message:
+            return self[:-1]
+        items = list(self)
+        for index in range(len(items) - 1, -1, -1):
+            if items[index] is message:
+                del items[index]
+                return self._view(_Buffer(items), len(items))
+        return self
+
+    def materialize(self) -> list[dict[str, str]]:
+        """Return the messages as a new list of plain dicts."""
+        return [dict(message) for message in self]
+
+
+def as_history(messages: Sequence[Mapping[str, Any]] | None) -> MessageHistory:
+    """Return ``messages`` as a :class:`MessageHistory`, without copying one that already is."""
+    if isinstance(messages, MessageHistory):
+        return messages
+    return MessageHistory(messages or ())
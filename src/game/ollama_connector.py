@@ -7,16 +7,64 @@ This connector targets Ollama's /api/chat contract. It does NOT use the deprecat
 
 from __future__ import annotations
 from util.utils import _maybe_float, _maybe_int
-from util.paths import resolve_repo_relative
+from util.paths import resolve_repo_relative, resolve_user_data_dir
 from configs.app_config import config
+from game.command_grammar import (
+    CONSTRAINT_OFF,
+    CONSTRAINT_SCHEMA,
+    constrain_request,
+    normalize_constraint_mode,
+    unwrap_command_reply,
+)
+from game.endpoint_pool import EndpointPool, parse_endpoints
+from game.invocation_policy import (
+    CancelToken,
+    InvocationEngine,
+    InvocationFailed,
+    RetryBudget,
+    RetryPolicy,
+    can_hedge,
+    normalize_hedge_after,
+)
+from game.llm_telemetry import LatencyTelemetry, server_timings
+from game.llm_transport import AsyncChatTransport, shared_transport
+from game.context_window import (
+    DEFAULT_REPLY_RESERVE,
+    ContextBudget,
+    PrefixTracker,
+    estimate_tokens,
+)
+from game.message_history import MessageHistory, as_history, freeze_message
+from game.replay_engine import CommandRecognizer
+from game.state_encoding import STATE_JSON, render_user_content, resolve_state_encoding
+from game.response_cache import (
+    CACHE_HIT,
+    CACHE_MISS,
+    CACHE_PASSTHROUGH,
+    CACHE_REPLAY,
+    ResponseCache,
+    ResponseCacheError,
+    ResponseCacheMiss,
+    is_replayable,
+    normalize_cache_mode,
+    request_key,
+)
 from llm import service as ollama_service
+from llm.latency_model import LatencyModel, shared_latency_model
+from llm.supervisor import active_supervisor
 from modelito import Client as ModelitoClient
 from modelito import Message as ModelitoMessage, OllamaProvider
 
+from dataclasses import dataclass
 import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
 
 from collections.abc import Mapping
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from urllib.parse import urlparse
 
 try:
@@ -29,6 +77,8 @@ try:
 except ImportError:  # pragma: no cover - dependency is normally present via ollama/httpx
     httpx = None
 
+_logger = logging.getLogger(__name__)
+
 def _normalize_host_and_port(host: str) -> tuple[str, int]:
     raw_host = str(host or "http://127.0.0.1").strip()
     parsed = urlparse(raw_host if "://" in raw_host else f"http://{raw_host}")
@@ -48,15 +98,51 @@ def _to_modelito_messages(messages: List[Dict[str, str]]) -> List[ModelitoMessag
     ]
 
 
+def _chat_payload(
+    model: str,
+    messages: List[Dict[str, str]],
+    options: Optional[Dict[str, Any]],
+    format: Optional[Dict[str, Any]],  # pylint: disable=redefined-builtin
+    *,
+    stream: bool,
+) -> Dict[str, Any]:
+    """Build an Ollama ``/api/chat`` body; ``timeout`` is a client setting, not an option."""
+    payload: Dict[str, Any] = {
+        "model": model,
+        "messages": [
+            {"role": str(message.get("role") or "user"), "content": str(message.get("content") or "")}
+            for message in messages
+        ],
+        "stream": stream,
+    }
+    settings = {key: value for key, value in (options or {}).items() if key != "timeout"}
+    if settings:
+        payload["options"] = settings
+    if format is not None:
+        payload["format"] = format
+    return payload
+
+
 class Client:
     """Thin internal seam over modelito for BatLLM gameplay requests."""
 
-    def __init__(self, host: str, timeout: Optional[float | str] = None) -> None:
+    def __init__(
+        self,
+        host: str,
+        timeout: Optional[float | str] = None,
+        *,
+        transport: AsyncChatTransport | None = None,
+        group: Any = None,
+    ) -> None:
         self.host = host.rstrip("/")
         try:
             self.timeout = float(timeout) if timeout is not None else None
         except (TypeError, ValueError):
             self.timeout = None
+        # With an async transport, non-streaming requests run on its event loop
+        # and can be cancelled as a group; otherwise they go through modelito.
+        self.transport = transport
+        self.group = group
         base_host, port = _normalize_host_and_port(self.host)
         self._provider = OllamaProvider(host=base_host, port=port)
         self._client = ModelitoClient(provider=self._provider)
@@ -68,32 +154,168 @@ class Client:
         messages: List[Dict[str, str]],
         options: Optional[Dict[str, Any]] = None,
         stream: bool = False,
+        cancel: CancelToken | None = None,
     ) -> Dict[str, Any]:
+        """Send one chat request and return the reply.
+
+        Non-streaming requests post directly, as modelito's ``summarize()``
+        returns the text alone; the server's token counters and phase
+        durations are needed for latency telemetry.
+        """
+        if not stream:
+            return self.constrained_chat(
+                model=model, messages=messages, options=options, cancel=cancel
+            )
         settings: Dict[str, Any] = dict(options or {})
         if self.timeout is not None and "timeout" not in settings:
             settings["timeout"] = self.timeout
         self._provider.model = model
         self._client.model = model
-        normalized_messages = _to_modelito_messages(messages)
-        if stream:
-            text = "".join(self._client.stream(normalized_messages, settings=settings))
-        else:
-            text = self._client.summarize(normalized_messages, settings=settings)
+        text = "".join(self._client.stream(_to_modelito_messages(messages), settings=settings))
         return {"message": {"content": text}, "response": text}
 
+    def stream_chat(
+        self,
+        *,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Dict[str, Any]] = None,  # pylint: disable=redefined-builtin
+        stats: Optional[Dict[str, Any]] = None,
+        cancel: CancelToken | None = None,
+    ) -> Iterator[str]:
+        """Yield reply text chunks from Ollama's streaming ``/api/chat`` endpoint.
+
+        modelito's stream does not forward generation options, so this posts the
+        request directly. Closing the generator, or cancelling ``cancel``,
+        closes the connection, which makes Ollama stop generating. When the
+        final chunk is read, its token counters and phase durations are copied
+        into ``stats``.
+        """
+        response = self._post_chat(
+            model=model, messages=messages, options=options, format=format, stream=True
+        )
+        with response:
+            for line in response:
+                if cancel is not None and cancel.cancelled:
+                    return
+                line = line.strip()
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(str(data["error"]))
+                text = (data.get("message") or {}).get("content") or ""
+                if text:
+                    yield text
+                if data.get("done"):
+                    if stats is not None:
+                        stats.update(
+                            (key, value) for key, value in data.items() if key != "message"
+                        )
+                    return
+
+    def constrained_chat(
+        self,
+        *,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Dict[str, Any]] = None,  # pylint: disable=redefined-builtin
+        cancel: CancelToken | None = None,
+    ) -> Dict[str, Any]:
+        """Send one non-streaming chat request carrying ``options`` and ``format``.
+
+        modelito's chat path drops generation options, so constrained requests
+        post directly. The server's response is returned whole, including its
+        ``eval_count`` when reported. Only requests on the async transport stop
+        when ``cancel`` is cancelled.
+        """
+        if self.transport is not None:
+            return self._transport_chat(
+                model=model, messages=messages, options=options, format=format, cancel=cancel
+            )
+        response = self._post_chat(
+            model=model, messages=messages, options=options, format=format, stream=False
+        )
+        with response:
+            data = json.loads(response.read() or b"{}")
+        if data.get("error"):
+            raise RuntimeError(str(data["error"]))
+        text = str((data.get("message") or {}).get("content") or "")
+        return {**data, "message": {"role": "assistant", "content": text}, "response": text}
+
+    def _transport_chat(
+        self,
+        *,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Dict[str, Any]] = None,  # pylint: disable=redefined-builtin
+        cancel: CancelToken | None = None,
+    ) -> Dict[str, Any]:
+        """Send a request through the async transport and wait for its reply.
+
+        A cancelled request raises :class:`concurrent.futures.CancelledError`.
+        """
+        assert self.transport is not None
+        future = self.transport.submit(
+            f"{self.host}/api/chat",
+            _chat_payload(model, messages, options, format, stream=False),
+            timeout=self._request_timeout(options),
+            group=self.group,
+        )
+        if cancel is not None:
+            cancel.on_cancel(future.cancel)
+        data = future.result()
+        text = str((data.get("message") or {}).get("content") or "")
+        return {**data, "message": {"role": "assistant", "content": text}, "response": text}
+
+    def _request_timeout(self, options: Optional[Dict[str, Any]]) -> Optional[float]:
+        """Return the per-request ``timeout`` option if set, else the client's."""
+        timeout = _maybe_float((options or {}).get("timeout"))
+        return timeout if timeout is not None and timeout > 0 else self.timeout
+
+    def _post_chat(
+        self,
+        *,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]],
+        format: Optional[Dict[str, Any]],  # pylint: disable=redefined-builtin
+        stream: bool,
+    ):
+        payload = _chat_payload(model, messages, options, format, stream=stream)
+        request = urllib.request.Request(
+            f"{self.host}/api/chat",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self._request_timeout(options))
+        except urllib.error.URLError as exc:
+            if isinstance(exc.reason, TimeoutError):
+                raise TimeoutError(str(exc.reason)) from exc
+            raise
+
 
 Message = Dict[str, str]  # {"role": "system"|"user"|"assistant", "content": str}
 
 
 TIMEOUT_EXCEPTIONS: tuple[type[BaseException], ...] = (TimeoutError,)
+# Failures of the endpoint rather than the request; a pool fails over on them.
+CONNECTION_EXCEPTIONS: tuple[type[BaseException], ...] = (ConnectionError, urllib.error.URLError)
 if httpx is not None:
     TIMEOUT_EXCEPTIONS += (httpx.TimeoutException,)
+    CONNECTION_EXCEPTIONS += (httpx.ConnectError,)
 if httpcore is not None:
     TIMEOUT_EXCEPTIONS += (httpcore.TimeoutException,)
+    CONNECTION_EXCEPTIONS += (httpcore.ConnectError,)
 
 
 class LLMTimeoutError(RuntimeError):
-    """Raised when Ollama times out even after a retry."""
+    """Raised when Ollama times out on every attempt the retry policy allows."""
 
     def __init__(
         self,
@@ -125,6 +347,19 @@ class LLMRequestError(RuntimeError):
         self.original_exception = original_exception
 
 
+@dataclass(frozen=True)
+class SpeculativeReply:
+    """A reply to a speculative request, not yet part of any history."""
+
+    bot_id: int
+    base: MessageHistory
+    user_message: Mapping[str, str]
+    content: str
+    stream: dict[str, Any] | None = None
+    context: dict[str, Any] | None = None
+    telemetry: dict[str, Any] | None = None
+
+
 class OllamaConnector:
     """
     Lean sync connector for Ollama.
@@ -148,139 +383,187 @@ class OllamaConnector:
         self.model: str = ""
         self.num_ctx: int | None = None
         self.num_predict: int | None = None
+        self.stream_commands: bool = False
+        self.command_constraint: str = CONSTRAINT_OFF
+        self.response_cache_mode: str = CACHE_PASSTHROUGH
+        self.async_transport: bool = False
+        self._response_cache: ResponseCache | None = None
+        self._warned_not_replayable = False
+        self.latency_model: LatencyModel | None = None
+        self.hedge_model: str = ""
+        self.state_encoding: str = STATE_JSON
+        self._retry_budget = RetryBudget()
+        self._invocation: InvocationEngine | None = None
+        self._timeout_settings: dict[str, Any] = {}
 
         self.client = None
+        self._clients: dict[str, Any] = {}
+        self.endpoint_pool: EndpointPool | None = None
         self._client_host: str | None = None
         self._client_timeout: float | str | None = None
         self._system_instructions: str = ""
-        self._history_by_bot: dict[int, list[Message]] = {}
-        self._history_shared: list[Message] = []
+        # Instruction text and state encoding per instructions key; see process_settings.
+        self._instructions_cache: dict[str, tuple[str, str]] = {}
+        self._options: Dict[str, Any] = {}
+        self._settings_stale = True
+        # Immutable histories (see game.message_history): a request sends a
+        # snapshot, so later turns cannot change a request in flight.
+        self._history_by_bot: dict[int, MessageHistory] = {}
+        self._history_shared: MessageHistory = MessageHistory()
+        self._stream_records: dict[int, dict[str, Any]] = {}
+        self._context_records: dict[int, dict[str, Any]] = {}
+        self._telemetry_records: dict[int, dict[str, Any]] = {}
+        self.telemetry = LatencyTelemetry()
+        self._prefix_tracker = PrefixTracker()
+        self._warmed_contexts: set[Any] = set()
+        # Order-independent turns send both bots' requests from separate
+        # workers; settings, history edits and config writes are serialised.
+        self._state_lock = threading.RLock()
 
         turns_per_round = config.get("game", "turns_per_round") or 10
         max_hist_cfg = config.get("llm", "max_history_messages")
         self._max_history_messages: int = int(max_hist_cfg or (int(turns_per_round) * 2))
 
+        config.subscribe(self._on_config_change)
         self.load_options(force=True)
 
+    def _on_config_change(self, section: str | None, key: str | None) -> None:
+        """Mark the settings derived from the configuration stale when theirs change."""
+        if (section, key) == ("llm", "last_served_model"):
+            return  # Written by this connector; nothing is derived from it.
+        if section in (None, "llm"):
+            self._instructions_cache.clear()
+            self._settings_stale = True
+        elif section == "game" and key in ("independent_contexts", "prompt_augmentation"):
+            self._settings_stale = True
 
-    def _ensure_system_message(self, history) -> None:
-        """Ensure the system header (if any) is at messages[0]."""
+
+    def _ensure_system_message(self, history: MessageHistory) -> MessageHistory:
+        """Return the history with the system header (if any) at messages[0]."""
 
         # if self._system_instructions is None or empty string
         if self._system_instructions is None or not self._system_instructions.strip():
             # If we don't have system instructions we remove it from the history
             if history and history[0].get("role") == "system":
-                del history[0]
-            return
-
-        if len(history) == 0:
-            history.insert(0, {"role": "system", "content": self._system_instructions})
+                return history[1:]
+            return history
 
-        elif history[0].get("role") != "system":
-            history.insert(0, {"role": "system", "content": self._system_instructions})
+        system_message = {"role": "system", "content": self._system_instructions}
+        if len(history) == 0 or history[0].get("role") != "system":
+            return history.prepend(system_message)
 
-        elif history[0].get("content") != self._system_instructions:
-            history[0]["content"] = self._system_instructions
+        if history[0].get("content") != self._system_instructions:
+            return history.replace(0, system_message)
+        return history
 
 
     def reset_histories(self) -> None:
         """Drop all accumulated message histories."""
         self._history_by_bot.clear()
-        self._history_shared.clear()  # type: ignore[attr-defined]
+        self._history_shared = MessageHistory()
+        self._prefix_tracker.reset()
+        self._warmed_contexts.clear()
 
 
 
-    def _build_user_message(self, *, game_state: Dict[str, Any], player_text: str) -> Message:
+    def _build_user_message(
+        self, *, game_state: Dict[str, Any], player_text: str, bot_id: int | None = None
+    ) -> Mapping[str, str]:
         """Build the user message content for the game mode
 
         Args:
             game_state (Dict[str, Any]): The state of the game as a dict
             player_text (str): The user prompt
+            bot_id (int | None): The requesting bot, for encodings relative to it
 
         Returns:
-            Message: The user message to send to the llm
+            Mapping[str, str]: The (frozen) user message to send to the llm
         """
 
-        if self.augmenting_prompt:
-            # Compact JSON for token efficiency;
-            game_state_json = json.dumps(
-                game_state,
-                separators=(",", ":"),
-                ensure_ascii=False,
-            )
-            content = f"[GAME_STATE]\n{game_state_json}\n[PLAYER_INPUT]\n{player_text}"
-
-        else:
-            # if not augmenting then the message content is the user prompt as-is
-            content = player_text
-
-        return {"role": "user", "content": content}
+        # If not augmenting then the message content is the user prompt as-is;
+        # otherwise the state is encoded as configured for the system instructions.
+        content = render_user_content(
+            player_text,
+            game_state,
+            augmented=self.augmenting_prompt,
+            encoding=self.state_encoding,
+            bot_id=bot_id,
+        )
+        return freeze_message({"role": "user", "content": content})
 
 
-    def _get_history_ref(self, bot_id: int) -> List[Message]:
-        """Return a reference to the current history (a messages[] list), taking into account if the
-        context is shared or not"""
+    def _get_history(self, bot_id: int) -> MessageHistory:
+        """Return the current history of the bot's context, taking into account if the
+        context is shared or not. The history is immutable; see `_set_history`."""
 
         if self.independent_contexts:
-            lst = self._history_by_bot.get(bot_id)
-            if lst is None:
-                lst = []
-                self._history_by_bot[bot_id] = lst
-            return lst
+            return as_history(self._history_by_bot.get(bot_id))
+        return as_history(self._history_shared)
 
+    def _set_history(self, bot_id: int, history: MessageHistory) -> None:
+        """Make ``history`` the current history of the bot's context."""
+        if self.independent_contexts:
+            self._history_by_bot[bot_id] = history
         else:
-            his = self._history_shared
-            if self._history_shared is None:
-                his = []
-                self._history_shared = his
-            return his
-
+            self._history_shared = history
 
 
 
-    def _trim_history_inplace(self, history: List[Message]) -> None:
-        """Enforme maximum length of the history list in place.
+    def _trim_history(self, history: MessageHistory) -> MessageHistory:
+        """Return the history within its limits.
 
         Policy:
-          - Keep at most `_max_history_messages` entries.
+          - Let the history grow until it exceeds `_max_history_messages` or the
+            estimated token budget of `num_ctx`, then drop a block of the oldest
+            exchanges at once (see `game.context_window`), so the requests between
+            trims share their prefix and Ollama can reuse its KV cache.
           - ensure_system_message()
         """
+        budget = ContextBudget(
+            max_messages=self._max_history_messages,
+            num_ctx=self.num_ctx,
+            reply_reserve=self.num_predict or DEFAULT_REPLY_RESERVE,
+        )
+        if not budget.exceeded(history):
+            return history
+        messages = list(history)
+        budget.trim(messages)
+        # ensure system message is at index 0
+        return self._ensure_system_message(MessageHistory(messages))
+
+    def _context_key(self, bot_id: int) -> Any:
+        """Return the key of the history a request for ``bot_id`` extends."""
+        return bot_id if self.independent_contexts else "shared"
+
+    def _observe_request(self, bot_id: int, messages: MessageHistory) -> dict[str, Any]:
+        """Return prefix-reuse metrics of a request about to be sent for ``bot_id``."""
+        key = self._context_key(bot_id)
+        record = self._prefix_tracker.observe(key, messages)
+        record["num_ctx"] = self.num_ctx
+        if key in self._warmed_contexts:
+            # The first request after a prefill warm-up of its context.
+            self._warmed_contexts.discard(key)
+            record["warmed"] = True
+        if self.augmenting_prompt:
+            record["state_encoding"] = self.state_encoding
+        return record
 
-        #  negative limit or None means no limit.
-        if not self._max_history_messages or self._max_history_messages <= 0:
-            return
-
-        max_n = max(1, self._max_history_messages)
-
-        if len(history) <= max_n:
-            return
-
-
-        system = history[0] if history and history[0].get("role") == "system" else None
-        available = max_n - (1 if system else 0)
-        tail = history[1:] if system else history[:]
-        tail = tail[-available:] if available > 0 else []
-        if tail and tail[0].get("role") == "assistant":
-            tail = tail[1:]
-        history.clear()
-        if system:
-            history.append(system)
-        history.extend(tail)
-        self._ensure_system_message(history)  # ensure system message is at index 0
-        # TODO verify this works OK
-
-    def _remove_message_instance(self, history: List[Message], message: Message) -> None:
-        """Remove a specific message object from a history list if it is still present."""
-        for index in range(len(history) - 1, -1, -1):
-            if history[index] is message:
-                del history[index]
-                break
+    def _remove_message_instance(self, bot_id: int, message: Mapping[str, str]) -> None:
+        """Remove a specific message object from the bot's history if it is still present."""
+        self._set_history(bot_id, self._get_history(bot_id).without(message))
 
 
 
     def load_options(self, force: bool = False) -> None:
-        """Load configuration and ensure client and contexts are consistent."""
+        """Load configuration and ensure client and contexts are consistent.
+
+        The options are only re-read after a change to the ``llm`` section or
+        the context modes (see `_on_config_change`), or when ``force`` is set.
+        """
         # TODO create a yaml for default settings
+        if not (force or self._settings_stale):
+            return
+        self._settings_stale = False
 
         # Read from config (cast to proper types)
         self.temperature = _maybe_float(config.get("llm", "temperature"))
@@ -288,20 +571,50 @@ class OllamaConnector:
         self.top_k = _maybe_int(config.get("llm", "top_k"))
 
         self.model = str(config.get("llm", "model") or "").strip()
+        self.num_ctx = _maybe_int(config.get("llm", "num_ctx"))
+        self._timeout_settings = {
+            "model": self.model,
+            "model_timeouts": config.get("llm", "model_timeouts"),
+            "timeout": config.get("llm", "timeout"),
+            "num_ctx": self.num_ctx,
+        }
+        # The client keeps the static timeout; learned ones are set per request.
         self.timeout = ollama_service.resolve_request_timeout(
-            {
-                "model": self.model,
-                "model_timeouts": config.get("llm", "model_timeouts"),
-                "timeout": config.get("llm", "timeout"),
-            },
-            model=self.model,
+            self._timeout_settings, model=self.model
+        )
+        self.latency_model = (
+            shared_latency_model() if config.get("llm", "adaptive_timeouts") else None
         )
 
+        retry_backoff = _maybe_float(config.get("llm", "retry_backoff"))
+        retry_policy = RetryPolicy(
+            max_attempts=max(1, _maybe_int(config.get("llm", "max_attempts")) or 2),
+            backoff_base_s=retry_backoff if retry_backoff is not None else 0.25,
+            hedge_after=normalize_hedge_after(config.get("llm", "hedge_after")),
+        )
+        if self._invocation is None or self._invocation.policy != retry_policy:
+            self._invocation = InvocationEngine(
+                retry_policy,
+                budget=self._retry_budget,
+                transient=TIMEOUT_EXCEPTIONS + CONNECTION_EXCEPTIONS,
+                timeouts=TIMEOUT_EXCEPTIONS,
+            )
+        self.hedge_model = str(config.get("llm", "hedge_model") or "").strip()
+
         self.num_thread = _maybe_int(config.get("llm", "num_thread"))
         self.seed = _maybe_int(config.get("llm", "seed"))
 
-        self.num_ctx = _maybe_int(config.get("llm", "num_ctx"))
         self.num_predict = _maybe_int(config.get("llm", "num_predict"))
+        self.stream_commands = bool(config.get("llm", "stream_commands"))
+        self.command_constraint = normalize_constraint_mode(config.get("llm", "command_constraint"))
+        self.response_cache_mode = normalize_cache_mode(config.get("llm", "response_cache"))
+        async_transport = bool(config.get("llm", "async_transport"))
+        if self.response_cache_mode != CACHE_PASSTHROUGH:
+            cache_dir = resolve_user_data_dir(
+                config.get("llm", "response_cache_dir") or "cache/responses"
+            )
+            if self._response_cache is None or self._response_cache.directory != cache_dir:
+                self._response_cache = ResponseCache(cache_dir)
 
         self.max_tokens = config.get("llm", "max_tokens") or None
         self.stop = config.get("llm", "stop") or None
@@ -311,6 +624,10 @@ class OllamaConnector:
         path = config.get("llm", "path")
         self.endpoint = f"{url}:{port}{path}"
         host = f"{url}:{port}"
+        # With several endpoints the first is the primary; see game.endpoint_pool.
+        endpoints = parse_endpoints(config.get("llm", "endpoints")) or [host]
+        if len(endpoints) > 1:
+            host = endpoints[0]
 
         self.independent_contexts = config.get("game", "independent_contexts")
         self.augmenting_prompt = config.get("game", "prompt_augmentation")
@@ -325,12 +642,35 @@ class OllamaConnector:
             or force
             or host != self._client_host
             or self.timeout != self._client_timeout
+            or async_transport != self.async_transport
         ):
-            # Use the module-level `Client` symbol so tests can monkeypatch
-            # `game.ollama_connector.Client` as the legacy code did.
-            self.client = Client(host=host, timeout=self.timeout)
+            self.client = self._new_client(host, async_transport)
             self._client_host = host
             self._client_timeout = self.timeout
+            self._clients = {}
+        if len(endpoints) > 1:
+            if self.endpoint_pool is None or self.endpoint_pool.hosts != endpoints:
+                self.endpoint_pool = EndpointPool(endpoints)
+            clients = {host: self.client}
+            for endpoint in endpoints[1:]:
+                clients[endpoint] = self._clients.get(endpoint) or self._new_client(
+                    endpoint, async_transport
+                )
+            self._clients = clients
+        else:
+            self.endpoint_pool = None
+            self._clients = {}
+        self.async_transport = async_transport
+        self._options = self._generation_options()
+
+    def _new_client(self, host: str, async_transport: bool):
+        # Use the module-level `Client` symbol so tests can monkeypatch
+        # `game.ollama_connector.Client` as the legacy code did.
+        if async_transport:
+            return Client(
+                host=host, timeout=self.timeout, transport=shared_transport(), group=id(self)
+            )
+        return Client(host=host, timeout=self.timeout)
 
 
 
@@ -365,16 +705,32 @@ class OllamaConnector:
         if reset_histories_on_mode_change and mode_changed:
             self.reset_histories()
 
-        # Reload system instructions
-        self._system_instructions = self._get_system_instructions_text()
-        self._ensure_system_message(self._get_history_ref(bot_id))
+        # Reload system instructions, unless the llm settings are unchanged since the last read
+        key = self._system_instructions_key()
+        cached = self._instructions_cache.get(key)
+        if cached is None:
+            # The state encoding belongs to the instruction set, which describes it.
+            cached = (
+                self._get_system_instructions_text(),
+                resolve_state_encoding(
+                    config.get("llm", key),
+                    config.get("llm", "state_encoding"),
+                    config.get("llm", "state_encodings"),
+                ),
+            )
+            self._instructions_cache[key] = cached
+        self._system_instructions, self.state_encoding = cached
+        self._set_history(bot_id, self._ensure_system_message(self._get_history(bot_id)))
 
     def gen_options(self) -> Dict[str, Any]:
         """Refresh connector options and return generation options for chat."""
 
         # Load or refresh the options from the config and the UI
         self.load_options()
+        return dict(self._options)
 
+    def _generation_options(self) -> Dict[str, Any]:
+        """Return the generation options of the loaded settings."""
         res: Dict[str, Any] = {}
 
         if self.temperature is not None:
@@ -419,6 +775,7 @@ class OllamaConnector:
         reset: bool = False,
         new_augmenting_prompt: Optional[bool] = None,
         new_independent_contexts: Optional[bool] = None,
+        submitted_at: Optional[float] = None,
 
     ) -> str:
         """Send a synchronous chat request using message histories.
@@ -430,6 +787,7 @@ class OllamaConnector:
             reset: If True, reset the context (clear history) before sending.
             new_augmenting_prompt: If provided, update mode and reset history.
             new_independent_contexts:  If provided, update mode and reset history.
+            submitted_at: ``time.monotonic()`` when the request was queued, to measure queue wait.
 
         Returns:
             The assistant's text content (single command if your header/player prompt enforces it).
@@ -438,51 +796,329 @@ class OllamaConnector:
 
 
 
-        self.process_settings(bot_id=bot_id,
-                              augmenting_prompt=new_augmenting_prompt,
-                              independent_contexts=new_independent_contexts,
-                              reset_histories_on_mode_change=True
-                              )
+        started = time.monotonic()
+        with self._state_lock:
+            # Options first, so the system instructions match the configured mode.
+            self.load_options()
+            self.process_settings(bot_id=bot_id,
+                                  augmenting_prompt=new_augmenting_prompt,
+                                  independent_contexts=new_independent_contexts,
+                                  reset_histories_on_mode_change=True
+                                  )
 
+            if reset:
+                self.reset_histories()
 
-        if reset:
-            self.reset_histories()
+            user_message = self._build_user_message(
+                game_state=game_state, player_text=user_text, bot_id=bot_id
+            )
+            history = self._trim_history(
+                self._ensure_system_message(self._get_history(bot_id).append(user_message))
+            )
+            self._set_history(bot_id, history)
+            context = self._observe_request(bot_id, history)
 
-        self.load_options()
+            options = self.gen_options()
+        try:
+            content, stream, usage = self._request_content(
+                history, options, affinity=self._context_key(bot_id)
+            )
+        except (LLMTimeoutError, LLMRequestError):
+            with self._state_lock:
+                self._remove_message_instance(bot_id, user_message)
+            raise
+
+        context, telemetry = self._request_records(context, usage, stream, started, submitted_at)
+        with self._state_lock:
+            self._commit_reply(bot_id, content, stream, context, telemetry)
+
+        return content
+
+    def speculate_prompt_to_llm_sync(
+        self,
+        bot_id: int,
+        *,
+        user_text: str,
+        game_state: dict[str, Any],
+        submitted_at: Optional[float] = None,
+    ) -> SpeculativeReply:
+        """Send a request against a predicted game state without touching history.
 
+        The request carries exactly the messages :meth:`send_prompt_to_llm_sync`
+        would send for the same state. The reply only enters the bot's history
+        through :meth:`commit_speculative_reply`.
+        """
+        started = time.monotonic()
+        with self._state_lock:
+            self.load_options()
+            self.process_settings(bot_id=bot_id)
+            base = self._get_history(bot_id)
+            user_message = self._build_user_message(
+                game_state=game_state, player_text=user_text, bot_id=bot_id
+            )
+            messages = self._trim_history(self._ensure_system_message(base.append(user_message)))
+            options = self.gen_options()
 
-        history = self._get_history_ref(bot_id)
-        user_message = self._build_user_message(game_state=game_state, player_text=user_text)
-        history.append(user_message)
-        self._ensure_system_message(history)
-        self._trim_history_inplace(history)
+        content, stream, usage = self._request_content(
+            messages, options, affinity=self._context_key(bot_id)
+        )
+        # Prefix reuse is observed when the reply is committed: a discarded
+        # speculation must not count as a request of the bot's context.
+        context, telemetry = self._request_records({}, usage, stream, started, submitted_at)
+        return SpeculativeReply(
+            bot_id=bot_id,
+            base=base,
+            user_message=user_message,
+            content=content,
+            stream=stream,
+            context=context,
+            telemetry=telemetry,
+        )
 
-        options = self.gen_options()
-        res: dict[str, Any] | Any
-        last_timeout: BaseException | None = None
+    def commit_speculative_reply(self, reply: SpeculativeReply) -> bool:
+        """Record an adopted speculative exchange as if it had been sent normally.
 
-        try:
-            for attempt in range(1, 3):
-                try:
-                    res = self.client.chat(
-                        model=self.model, messages=history, options=options, stream=False
+        Returns False, leaving history untouched, when the bot's history changed
+        after the speculative request was built.
+        """
+        with self._state_lock:
+            if self._get_history(reply.bot_id) is not reply.base:
+                return False
+            messages = self._trim_history(
+                self._ensure_system_message(reply.base.append(reply.user_message))
+            )
+            self._set_history(reply.bot_id, messages)
+            context = {**self._observe_request(reply.bot_id, messages), **(reply.context or {})}
+            self._commit_reply(reply.bot_id, reply.content, reply.stream, context, reply.telemetry)
+            return True
+
+    def pop_stream_record(self, bot_id: int) -> dict[str, Any] | None:
+        """Return and forget the streaming record of the bot's last committed reply."""
+        with self._state_lock:
+            return self._stream_records.pop(bot_id, None)
+
+    def cancel_requests(self) -> int:
+        """Cancel this connector's in-flight requests on the async transport.
+
+        Cancelled requests close their connections, so Ollama stops generating
+        for them; their callers see an :class:`LLMRequestError`. Without the
+        async transport running requests cannot be interrupted and 0 is returned.
+        """
+        transport = getattr(self.client, "transport", None)
+        if transport is None:
+            return 0
+        return transport.cancel_group(id(self))
+
+    def warm_up(self, bot_ids: List[int]) -> List[dict[str, Any]]:
+        """Prefill the server's prompt cache with the next request of each context.
+
+        Sends the system instructions and the current history of each distinct
+        context of ``bot_ids`` with a one-token reply, so the first request of
+        the round only prefills the new user message. Nothing is added to the
+        histories or recorded for a play, and failures are only logged.
+        Returns the server timings of each warm-up that succeeded.
+        """
+        results: List[dict[str, Any]] = []
+        warmed: set[Any] = set()
+        for bot_id in bot_ids:
+            with self._state_lock:
+                self.load_options()
+                self.process_settings(bot_id=bot_id)
+                key = self._context_key(bot_id)
+                if key in warmed:
+                    continue
+                messages = self._ensure_system_message(self._get_history(bot_id))
+                options = {**self.gen_options(), "num_predict": 1}
+            warmed.add(key)
+            if not messages:
+                continue
+            endpoint, client = self._acquire_client(key, [])
+            failed = False
+            started = time.monotonic()
+            try:
+                # modelito's chat path would drop num_predict and generate a whole reply.
+                res = client.constrained_chat(
+                    model=self.model, messages=messages.materialize(), options=options
+                )
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                failed = isinstance(exc, TIMEOUT_EXCEPTIONS + CONNECTION_EXCEPTIONS)
+                _logger.info("Prefill warm-up failed for %s: %s", key, exc)
+                continue
+            finally:
+                if self.endpoint_pool is not None:
+                    self.endpoint_pool.release(endpoint, failed=failed)
+            with self._state_lock:
+                self._prefix_tracker.observe(key, messages)
+                self._warmed_contexts.add(key)
+            results.append(
+                {
+                    "context": key,
+                    "endpoint": endpoint,
+                    "latency_ms": round((time.monotonic() - started) * 1000.0, 3),
+                    **server_timings(res),
+                }
+            )
+        return results
+
+    def pop_context_record(self, bot_id: int) -> dict[str, Any] | None:
+        """Return and forget the prefix-reuse record of the bot's last committed request."""
+        with self._state_lock:
+            return self._context_records.pop(bot_id, None)
+
+    def pop_telemetry_record(self, bot_id: int) -> dict[str, Any] | None:
+        """Return and forget the latency record of the bot's last committed request."""
+        with self._state_lock:
+            return self._telemetry_records.pop(bot_id, None)
+
+    def _request_records(
+        self,
+        context: dict[str, Any],
+        usage: dict[str, Any],
+        stream: dict[str, Any] | None,
+        started: float,
+        submitted_at: float | None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Split request usage into the prefix-reuse record and the latency record."""
+        usage = dict(usage)
+        context = dict(context)
+        if "cache" in usage:
+            context["cache"] = usage.pop("cache")
+        telemetry: dict[str, Any] = {
+            "model": self.model,
+            "latency_ms": round((time.monotonic() - started) * 1000.0, 3),
+            **usage,
+        }
+        if submitted_at is not None:
+            telemetry["queue_ms"] = round(max(0.0, started - submitted_at) * 1000.0, 3)
+        if stream and stream.get("ttft_ms") is not None:
+            telemetry["ttft_ms"] = stream["ttft_ms"]
+        supervisor = active_supervisor()
+        if supervisor is not None:
+            # Sizes the model's keep-alive and counts requests that found it unloaded.
+            supervisor.record_activity(self.model, telemetry.get("load_ms"))
+        return context, telemetry
+
+    def _request_content(
+        self, history: MessageHistory, options: Dict[str, Any], *, affinity: Any = None
+    ) -> tuple[str, dict[str, Any] | None, dict[str, Any]]:
+        """Run one chat request under the connector's retry and hedging policy.
+
+        Transient failures are retried (see `game.invocation_policy`). With an
+        endpoint pool the request goes to the endpoint ``affinity`` used
+        before, and a retry after a timeout or refused connection, or a hedge,
+        goes to another endpoint.
+
+        Returns the reply text; for streamed requests, a record of whether
+        generation was cut short and how long the command took to settle; and
+        the prompt-evaluation (prefill) counters when the server reports them.
+        """
+        # The HTTP request is where the history becomes plain messages again.
+        messages = history.materialize()
+        constrained = self.command_constraint != CONSTRAINT_OFF
+        if constrained:
+            options, schema = constrain_request(self.command_constraint, options)
+
+        key = None
+        if self.response_cache_mode != CACHE_PASSTHROUGH and not is_replayable(options):
+            # A sampled reply must not be frozen into the cache: see `game.response_cache`.
+            if self.response_cache_mode == CACHE_REPLAY:
+                error = ResponseCacheError("Replay mode needs a fixed seed and temperature 0.")
+                raise LLMRequestError(str(error), error)
+            if not self._warned_not_replayable:
+                self._warned_not_replayable = True
+                _logger.warning(
+                    "Replies are recorded only with llm.seed set and llm.temperature 0."
+                )
+        elif self.response_cache_mode != CACHE_PASSTHROUGH and self._response_cache is not None:
+            key = request_key(
+                model=self.model,
+                messages=messages,
+                options=options,
+                format=schema if constrained else None,
+                stream=self.stream_commands,
+            )
+            entry = self._response_cache.get(key)
+            if entry is not None:
+                reply = entry["reply"]
+                # One request, answered by the cache.
+                return str(reply["content"]), reply.get("stream"), {"cache": CACHE_HIT, "attempts": 1}
+            if self.response_cache_mode == CACHE_REPLAY:
+                miss = ResponseCacheMiss(key)
+                raise LLMRequestError(str(miss), miss)
+
+        prompt_tokens = estimate_tokens(messages)
+        timeout = self._adaptive_timeout(prompt_tokens)
+        if timeout != self.timeout:
+            options = {**options, "timeout": timeout}
+        failed_endpoints: list[str] = []
+        busy_endpoints: list[str] = []
+
+        # One token per side of a hedge, so the engine can stop the loser.
+        cancels = {False: CancelToken(), True: CancelToken()}
+
+        def send(
+            model: str, pin: Any, cancel: CancelToken
+        ) -> tuple[Any, dict[str, Any] | None, str, str]:
+            # A hedge avoids the endpoint its primary request is still waiting on.
+            endpoint, client = self._acquire_client(pin, failed_endpoints + busy_endpoints)
+            busy_endpoints.append(endpoint)
+            endpoint_failed = False
+            attempt_started = time.monotonic()
+            stream: dict[str, Any] | None = None
+            try:
+                if self.stream_commands:
+                    res, stream = self._stream_until_settled(
+                        messages, options, schema if constrained else None,
+                        client=client, model=model, cancel=cancel,
                     )
-                    break
-                except TIMEOUT_EXCEPTIONS as exc:
-                    last_timeout = exc
-                    if attempt == 2:
-                        raise LLMTimeoutError(
-                            model=self.model, timeout=self.timeout, attempts=attempt,
-                            original_exception=exc,
-                        ) from exc
-            else:  # pragma: no cover
-                raise AssertionError("Unreachable Ollama retry state.")
-        except LLMTimeoutError:
-            self._remove_message_instance(history, user_message)
-            raise
-        except Exception as exc:
-            self._remove_message_instance(history, user_message)
+                elif constrained:
+                    res = client.constrained_chat(
+                        model=model, messages=messages, options=options, format=schema,
+                        cancel=cancel,
+                    )
+                else:
+                    res = client.chat(
+                        model=model, messages=messages, options=options, stream=False,
+                        cancel=cancel,
+                    )
+            except TIMEOUT_EXCEPTIONS + CONNECTION_EXCEPTIONS:
+                # A timeout is not a duration sample: see `llm.latency_model`.
+                endpoint_failed = True
+                raise
+            finally:
+                busy_endpoints.remove(endpoint)
+                if self.endpoint_pool is not None:
+                    self.endpoint_pool.release(endpoint, failed=endpoint_failed)
+                if endpoint_failed:
+                    failed_endpoints.append(endpoint)
+            self._record_latency(prompt_tokens, time.monotonic() - attempt_started, model)
+            return res, stream, endpoint, model
+
+        hedge_model = self.hedge_model or self.model
+        endpoints = len(self.endpoint_pool.hosts) if self.endpoint_pool is not None else 1
+        assert self._invocation is not None
+        try:
+            result = self._invocation.invoke(
+                lambda: send(self.model, affinity, cancels[False]),
+                hedge=(
+                    (lambda: send(hedge_model, None, cancels[True]))
+                    if can_hedge(endpoints, self.model, hedge_model)
+                    else None
+                ),
+                hedge_delay=self._invocation.policy.hedge_delay(
+                    self.telemetry.latencies(self.model)
+                ),
+                cancel=lambda hedge: cancels[hedge].cancel(),
+            )
+        except InvocationFailed as failure:
+            exc = failure.last_error
+            if isinstance(exc, TIMEOUT_EXCEPTIONS):
+                raise LLMTimeoutError(
+                    model=self.model, timeout=timeout, attempts=failure.attempts,
+                    original_exception=exc,
+                ) from exc
             raise LLMRequestError(f"LLM request failed: {exc}", exc) from exc
+        res, stream, endpoint, served_model = result.value
 
         # ---- Extract assistant text ----
         content = ""
@@ -506,24 +1142,152 @@ class OllamaConnector:
         if not content:
             # Helpful debug info without dumping the entire object
             typename = type(res).__name__
-            self._remove_message_instance(history, user_message)
             raise LLMRequestError(f"Empty or unparseable content from model (type={typename}).")
 
+        if self.command_constraint == CONSTRAINT_SCHEMA:
+            content = unwrap_command_reply(content).strip() or content
+        usage = server_timings(res)
+        usage["attempts"] = result.attempts
+        usage["endpoint"] = endpoint
+        if served_model != self.model:
+            usage["served_model"] = served_model
+        if result.hedged:
+            usage["hedged"] = True
+            usage["hedge_won"] = result.hedge_won
+        if result.backoff_ms:
+            usage["backoff_ms"] = result.backoff_ms
+        if result.errors:
+            usage["errors"] = list(result.errors)
+        if timeout is not None:
+            usage["timeout_s"] = timeout
+        if isinstance(res, Mapping) and res.get("connect_ms") is not None:
+            usage["connect_ms"] = res["connect_ms"]
+        if key is not None and served_model == self.model:
+            self._response_cache.put(key, {"content": content, "stream": stream}, model=self.model)
+            usage["cache"] = CACHE_MISS
+        return content, stream, usage
+
+    def _acquire_client(self, affinity: Any, exclude: List[str]) -> tuple[str, Any]:
+        """Return the endpoint and client for the next attempt of a request."""
+        if self.endpoint_pool is None:
+            return str(self._client_host), self.client
+        endpoint = self.endpoint_pool.acquire(affinity, exclude=exclude)
+        return endpoint, self._clients[endpoint]
+
+    def _adaptive_timeout(self, prompt_tokens: int) -> float | None:
+        """Return the timeout for a request of ``prompt_tokens``, learned when enabled."""
+        if self.latency_model is None:
+            return self.timeout
+        return ollama_service.resolve_request_timeout(
+            {**self._timeout_settings, "adaptive_timeouts": True},
+            model=self.model,
+            prompt_tokens=prompt_tokens,
+            latency_model=self.latency_model,
+        )
+
+    def _record_latency(self, prompt_tokens: int, seconds: float, model: str) -> None:
+        if self.latency_model is None:
+            return
+        self.latency_model.record(model, self.num_ctx, prompt_tokens, seconds)
+        self.latency_model.save_later()
+
+    def _stream_until_settled(
+        self,
+        messages: List[Message],
+        options: Dict[str, Any],
+        schema: Dict[str, Any] | None = None,
+        *,
+        client: Any = None,
+        model: str | None = None,
+        cancel: CancelToken | None = None,
+    ) -> tuple[Dict[str, Any], dict[str, Any]]:
+        """Stream a reply, stopping generation once it can only parse as ERR.
+
+        Schema-constrained replies are JSON until the end, so they are read in
+        full; the grammar already bounds their length.
+        """
+        started = time.monotonic()
+        recognizer = CommandRecognizer()
+        client = client if client is not None else self.client
+        model = model or self.model
+        # Filled from the final chunk, which a reply cut short never reaches.
+        stats: Dict[str, Any] = {}
+        if schema is None:
+            chunks = client.stream_chat(
+                model=model, messages=messages, options=options, stats=stats, cancel=cancel
+            )
+        else:
+            chunks = client.stream_chat(
+                model=model, messages=messages, options=options, format=schema, stats=stats,
+                cancel=cancel,
+            )
+        received: list[str] = []
+        first_chunk_at: float | None = None
+        try:
+            for chunk in chunks:
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                if schema is not None:
+                    received.append(chunk)
+                elif recognizer.feed(chunk):
+                    break
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        text = recognizer.text if schema is None else "".join(received)
+        record = {
+            "truncated": recognizer.settled,
+            "time_to_command_ms": round((time.monotonic() - started) * 1000.0, 3),
+        }
+        if first_chunk_at is not None:
+            record["ttft_ms"] = round((first_chunk_at - started) * 1000.0, 3)
+        return {**stats, "message": {"content": text}, "response": text}, record
+
+    def _commit_reply(
+        self,
+        bot_id: int,
+        content: str,
+        stream: dict[str, Any] | None = None,
+        context: dict[str, Any] | None = None,
+        telemetry: dict[str, Any] | None = None,
+    ) -> None:
+        """Persist a successful reply; callers hold the state lock."""
+        if stream is None:
+            self._stream_records.pop(bot_id, None)
+        else:
+            self._stream_records[bot_id] = dict(stream)
+        if context is None:
+            self._context_records.pop(bot_id, None)
+        else:
+            self._context_records[bot_id] = dict(context)
+        if telemetry is None:
+            self._telemetry_records.pop(bot_id, None)
+        else:
+            self._telemetry_records[bot_id] = dict(telemetry)
+            self.telemetry.record(telemetry.get("model") or self.model, telemetry)
+
         last_served_model = str(config.get("llm", "last_served_model") or "").strip()
         if self.model and self.model != last_served_model:
             config.set("llm", "last_served_model", self.model)
-            config.save()
+            # Written from a background thread, so the reply is not held up by the disk.
+            config.save_later()
 
         # Persist llm reply into our history
-        history.append({"role": "assistant", "content": content})
-        self._trim_history_inplace(history)
+        history = self._get_history(bot_id).append({"role": "assistant", "content": content})
+        self._set_history(bot_id, self._trim_history(history))
 
-        # Optionally trim again if you enforce a hard cap:
-        # self._trim_history_inplace(history)
-
-        return content
 
 
+    def _system_instructions_key(self) -> str:
+        """Return the config key of the system instructions for the mode (2x2 matrix)."""
+        if not self.augmenting_prompt:
+            if self.independent_contexts:
+                return "system_instructions_not_augmented_independent"
+            return "system_instructions_not_augmented_shared"
+        if self.independent_contexts:
+            return "system_instructions_augmented_independent"
+        return "system_instructions_augmented_shared"
 
     def _get_system_instructions_text(self) -> str:
         """Loads from assets/headers the header (system prompt) text for the LLM request based on the mode.
@@ -534,21 +1298,8 @@ class OllamaConnector:
 
 
 
-        # Determine the key based on the mode and context type (2x2 matrix)
-        if not self.augmenting_prompt:
-            if self.independent_contexts:
-                key = "system_instructions_not_augmented_independent"
-            else:
-                key = "system_instructions_not_augmented_shared"
-        else:
-            if self.independent_contexts:
-                key = "system_instructions_augmented_independent"
-            else:
-                key = "system_instructions_augmented_shared"
-
-
         # Get the path to the augmentation header text file from the config
-        filename = config.get("llm", key)
+        filename = config.get("llm", self._system_instructions_key())
         path = resolve_repo_relative(filename)
 
         try:
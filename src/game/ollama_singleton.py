@@ -7,6 +7,10 @@ from configs.app_config import config
 from game.ollama_connector import OllamaConnector
 
 
+# One worker per bot: serial turns submit one request at a time, while
+# order-independent turns keep both bots' requests in flight together.
+INFERENCE_WORKERS = 2
+
 # TODO call reset_contexts() or reset_singletons() after any changes in Settings_Screen
 # TODO add a button "refresh to Settings_Screen to reload parameters for the connector
 # TODO add a button in home screen to open a new window with the contet and a CLI conversation so that the players can investigate the LLM
@@ -23,7 +27,7 @@ def get_connector() -> OllamaConnector:
 @lru_cache(maxsize=1)
 def get_executor(*_args, **_kwargs) -> ThreadPoolExecutor:
     """Singleton for the Ollama connector thread pool executor."""
-    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ollama")
+    pool = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="ollama")
     atexit.register(pool.shutdown, wait=False, cancel_futures=True)
     return pool
 
@@ -0,0 +1,507 @@
+"""Columnar per-play export of saved sessions for bulk analysis.
+
+Research questions such as "which commands does each model emit" or "how slow
+is each model" only need a handful of fields per play, yet answering them from
+saved sessions means decoding every nested JSON document again. This module
+flattens v2 saved sessions and v3 research traces into one row per play and
+stores each session as a compact columnar shard: a zip archive holding one
+:mod:`array` blob per column plus a JSON manifest, in the spirit of NumPy's
+``.npz`` but without adding NumPy as a dependency. String columns are
+dictionary encoded, so loading a column is a single ``array.frombytes`` call.
+
+Shards are written independently by a process pool and are skipped on later
+runs while the source file is unchanged, so an export directory can be kept up
+to date incrementally.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import json
+import math
+import os
+from pathlib import Path
+import sys
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+import zipfile
+
+from game.replay_engine import (
+    GameplaySettingsSnapshot,
+    normalize_state_map,
+    replay_turn,
+)
+from game.session_archive import SessionArchiveError, read_session_bytes
+from game.session_schema import SESSION_TYPE, SessionFormatError, parse_session_payload
+from game.session_v3 import SessionV3Error, validate_session_v3
+from game.trace_contract import TRACE_SESSION_TYPE, sha256_text
+
+PLAY_TABLE_FORMAT = "batllm-play-table"
+PLAY_TABLE_VERSION = 1
+SHARD_SUFFIX = ".plays.zip"
+MANIFEST_NAME = "manifest.json"
+
+# Column name -> storage type: an ``array`` typecode or "str" for dictionary
+# encoded text.
+PLAY_COLUMNS: dict[str, str] = {
+    "session": "str",
+    "schema_version": "q",
+    "game": "q",
+    "round": "q",
+    "turn": "q",
+    "sequence": "q",
+    "bot": "q",
+    "command": "str",
+    "events": "str",
+    "health_before": "d",
+    "x_before": "d",
+    "y_before": "d",
+    "rot_before": "d",
+    "health_after": "d",
+    "x_after": "d",
+    "y_after": "d",
+    "rot_after": "d",
+    "latency_ms": "d",
+    "attempts": "q",
+    "model": "str",
+}
+_STATE_FIELDS = (("health", "health"), ("x", "x"), ("y", "y"), ("rot", "rot"))
+_MISSING_INT = -1
+_MISSING_FLOAT = math.nan
+
+
+class PlayTableError(ValueError):
+    """Raised when a session cannot be flattened or a shard cannot be read."""
+
+
+def _as_int(value: Any, fallback: int = _MISSING_INT) -> int:
+    if isinstance(value, bool) or value is None:
+        return fallback
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return fallback
+
+
+def _as_float(value: Any) -> float:
+    if isinstance(value, bool) or value is None:
+        return _MISSING_FLOAT
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _MISSING_FLOAT
+
+
+def _empty_columns() -> dict[str, list[Any]]:
+    return {name: [] for name in PLAY_COLUMNS}
+
+
+def _append_row(
+    columns: dict[str, list[Any]],
+    *,
+    session: str,
+    schema_version: int,
+    game: int,
+    round_number: int,
+    turn: int,
+    sequence: int,
+    bot: int,
+    command: str,
+    event_types: Iterable[str],
+    before: Mapping[str, Any],
+    after: Mapping[str, Any],
+    latency_ms: Any,
+    attempts: Any,
+    model: str,
+) -> None:
+    columns["session"].append(session)
+    columns["schema_version"].append(schema_version)
+    columns["game"].append(game)
+    columns["round"].append(round_number)
+    columns["turn"].append(turn)
+    columns["sequence"].append(sequence)
+    columns["bot"].append(bot)
+    columns["command"].append(command)
+    columns["events"].append("|".join(event_types))
+    for name, key in _STATE_FIELDS:
+        columns[f"{name}_before"].append(_as_float(before.get(key)))
+        columns[f"{name}_after"].append(_as_float(after.get(key)))
+    columns["latency_ms"].append(_as_float(latency_ms))
+    columns["attempts"].append(_as_int(attempts))
+    columns["model"].append(model)
+
+
+def _v2_model(payload: Mapping[str, Any]) -> str:
+    metadata = payload.get("llm_metadata")
+    if not isinstance(metadata, Mapping):
+        return ""
+    return str(metadata.get("last_served_model") or metadata.get("configured_model") or "")
+
+
+def _flatten_v2(payload: Mapping[str, Any], session: str) -> dict[str, list[Any]]:
+    columns = _empty_columns()
+    model = _v2_model(payload)
+    sequence = 0
+    for game_index, game in enumerate(payload.get("games", []), start=1):
+        for round_index, round_entry in enumerate(game.get("rounds", []), start=1):
+            rules = GameplaySettingsSnapshot.from_mapping(
+                round_entry.get("gameplay_settings_snapshot")
+            )
+            for turn_index, turn in enumerate(round_entry.get("turns", []), start=1):
+                plays = turn.get("plays", []) or []
+                replay = replay_turn(turn.get("pre_state", {}), plays, rules)
+                before_state = replay.initial_state
+                for play, resolution in zip(plays, replay.play_results):
+                    sequence += 1
+                    bot = resolution.bot_id
+                    _append_row(
+                        columns,
+                        session=session,
+                        schema_version=2,
+                        game=_as_int(game.get("game_id"), game_index),
+                        round_number=_as_int(round_entry.get("round"), round_index),
+                        turn=_as_int(turn.get("turn"), turn_index),
+                        sequence=sequence,
+                        bot=bot,
+                        command=resolution.normalized_cmd,
+                        event_types=(event.type for event in resolution.events),
+                        before=before_state.get(bot, {}),
+                        after=resolution.state_by_bot.get(bot, {}),
+                        latency_ms=play.get("latency_ms"),
+                        attempts=play.get("attempts"),
+                        model=model,
+                    )
+                    before_state = resolution.state_by_bot
+    return columns
+
+
+def _v3_model(play: Mapping[str, Any], session_model: str) -> str:
+    request = play.get("request")
+    if isinstance(request, Mapping) and isinstance(request.get("payload"), Mapping):
+        model = request["payload"].get("model")
+        if model:
+            return str(model)
+    return session_model
+
+
+def _flatten_v3(payload: Mapping[str, Any], session: str) -> dict[str, list[Any]]:
+    columns = _empty_columns()
+    provenance = payload.get("model_provenance")
+    provenance = provenance if isinstance(provenance, Mapping) else {}
+    session_model = str(provenance.get("requested_model") or "")
+    for game_index, game in enumerate(payload.get("games", []), start=1):
+        for round_index, round_entry in enumerate(game.get("rounds", []), start=1):
+            # v3 rounds store plays flat; a turn ends when a bot plays again.
+            turn = 1
+            seen_in_turn: set[int] = set()
+            for play in round_entry.get("plays", []):
+                bot = _as_int(play.get("bot_id"), 0)
+                if bot in seen_in_turn:
+                    turn += 1
+                    seen_in_turn.clear()
+                seen_in_turn.add(bot)
+                pre_state = normalize_state_map(play.get("pre_state"))
+                post_state = normalize_state_map(play.get("post_state"))
+                _append_row(
+                    columns,
+                    session=session,
+                    schema_version=3,
+                    game=_as_int(game.get("game_id"), game_index),
+                    round_number=_as_int(round_entry.get("round"), round_index),
+                    turn=turn,
+                    sequence=_as_int(play.get("sequence")),
+                    bot=bot,
+                    command=str(play.get("normalized_command") or ""),
+                    event_types=(
+                        str(event.get("type", ""))
+                        for event in play.get("events", [])
+                        if isinstance(event, Mapping)
+                    ),
+                    before=pre_state.get(bot, {}),
+                    after=post_state.get(bot, {}),
+                    latency_ms=play.get("latency_ms"),
+                    attempts=play.get("attempts"),
+                    model=_v3_model(play, session_model),
+                )
+    return columns
+
+
+def flatten_session(payload: Mapping[str, Any], session: str) -> dict[str, list[Any]]:
+    """Return one list per :data:`PLAY_COLUMNS` entry for a validated session."""
+    session_type = payload.get("session_type")
+    if session_type == SESSION_TYPE:
+        return _flatten_v2(payload, session)
+    if session_type == TRACE_SESSION_TYPE:
+        return _flatten_v3(payload, session)
+    raise PlayTableError(f"Unsupported session_type: {session_type!r}")
+
+
+def load_any_session(path: str | Path) -> dict[str, Any]:
+    """Read and validate either a v2 saved session or a v3 research trace."""
+    try:
+        data = read_session_bytes(path)
+    except (OSError, SessionArchiveError) as exc:
+        raise PlayTableError(str(exc)) from exc
+    try:
+        payload = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise PlayTableError(f"Invalid JSON: {exc}") from exc
+    try:
+        if isinstance(payload, dict) and payload.get("session_type") == TRACE_SESSION_TYPE:
+            return validate_session_v3(payload)
+        return parse_session_payload(data)
+    except (SessionFormatError, SessionV3Error) as exc:
+        raise PlayTableError(str(exc)) from exc
+
+
+def _encode_column(kind: str, values: Sequence[Any]) -> tuple[bytes, dict[str, Any]]:
+    spec: dict[str, Any] = {"type": kind}
+    if kind == "str":
+        vocabulary: dict[str, int] = {}
+        codes = array("q", (vocabulary.setdefault(value, len(vocabulary)) for value in values))
+        spec["typecode"] = "q"
+        spec["values"] = list(vocabulary)
+        return codes.tobytes(), spec
+    spec["typecode"] = kind
+    return array(kind, values).tobytes(), spec
+
+
+def _decode_column(spec: Mapping[str, Any], data: bytes, byteorder: str) -> Any:
+    values = array(str(spec["typecode"]))
+    values.frombytes(data)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    if spec.get("type") == "str":
+        vocabulary = list(spec.get("values", []))
+        return [vocabulary[code] for code in values]
+    return values
+
+
+def shard_name(source: str | Path) -> str:
+    """Return the shard filename used for one source session."""
+    source = Path(source)
+    digest = sha256_text(str(source.resolve()))[:10]
+    return f"{source.stem}-{digest}{SHARD_SUFFIX}"
+
+
+def write_shard(
+    columns: Mapping[str, Sequence[Any]],
+    path: str | Path,
+    *,
+    source: Mapping[str, Any] | None = None,
+) -> Path:
+    """Atomically write flattened columns to one shard file."""
+    path = Path(path)
+    row_counts = {len(columns[name]) for name in PLAY_COLUMNS}
+    if len(row_counts) > 1:
+        raise PlayTableError("All play-table columns must have the same length.")
+    manifest: dict[str, Any] = {
+        "format": PLAY_TABLE_FORMAT,
+        "version": PLAY_TABLE_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": row_counts.pop() if row_counts else 0,
+        "source": dict(source or {}),
+        "columns": {},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, kind in PLAY_COLUMNS.items():
+            data, spec = _encode_column(kind, columns[name])
+            manifest["columns"][name] = spec
+            archive.writestr(f"{name}.bin", data)
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, sort_keys=True))
+    os.replace(temp_path, path)
+    return path
+
+
+def read_shard_manifest(path: str | Path) -> dict[str, Any]:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as exc:
+        raise PlayTableError(f"Unreadable play-table shard {Path(path).name}: {exc}") from exc
+    if manifest.get("format") != PLAY_TABLE_FORMAT or manifest.get("version") != PLAY_TABLE_VERSION:
+        raise PlayTableError(f"Unsupported play-table shard {Path(path).name}.")
+    return manifest
+
+
+def _read_shard(path: Path, names: Sequence[str]) -> tuple[int, dict[str, Any]]:
+    manifest = read_shard_manifest(path)
+    byteorder = str(manifest.get("byteorder") or sys.byteorder)
+    with zipfile.ZipFile(path) as archive:
+        columns = {
+            name: _decode_column(manifest["columns"][name], archive.read(f"{name}.bin"), byteorder)
+            for name in names
+        }
+    return int(manifest["rows"]), columns
+
+
+@dataclass(frozen=True)
+class ExportReport:
+    """Outcome of :func:`export_sessions`."""
+
+    written: tuple[Path, ...] = ()
+    skipped: tuple[Path, ...] = ()
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def _source_stamp(path: Path) -> dict[str, Any]:
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def export_session(source: str | Path, out_dir: str | Path, *, force: bool = False) -> tuple[Path, bool]:
+    """Flatten one session into ``out_dir``; return ``(shard, written)``."""
+    source = Path(source)
+    shard = Path(out_dir) / shard_name(source)
+    try:
+        stamp = _source_stamp(source)
+    except OSError as exc:
+        raise PlayTableError(str(exc)) from exc
+    if not force and shard.exists():
+        try:
+            if read_shard_manifest(shard).get("source") == stamp:
+                return shard, False
+        except PlayTableError:
+            pass
+    payload = load_any_session(source)
+    try:
+        columns = flatten_session(payload, source.stem)
+    except (OverflowError, TypeError, ValueError) as exc:
+        raise PlayTableError(f"{source.name}: {exc}") from exc
+    write_shard(columns, shard, source=stamp)
+    return shard, True
+
+
+def _export_worker(source: str, out_dir: str, force: bool) -> tuple[str, str, str]:
+    try:
+        shard, written = export_session(source, out_dir, force=force)
+    except PlayTableError as exc:
+        return source, "failed", str(exc)
+    return source, "written" if written else "skipped", str(shard)
+
+
+def iter_session_files(paths: Iterable[str | Path]) -> Iterator[Path]:
+    """Expand files and folders into the session JSON files they contain."""
+    for item in paths:
+        path = Path(item)
+        if path.is_dir():
+            yield from sorted(
+                child for child in path.glob("*.json") if not child.name.startswith(".")
+            )
+        else:
+            yield path
+
+
+def export_sessions(
+    paths: Iterable[str | Path],
+    out_dir: str | Path,
+    *,
+    workers: int | None = None,
+    force: bool = False,
+) -> ExportReport:
+    """Export sessions to per-session shards, in parallel when ``workers != 1``."""
+    sources = [str(path) for path in iter_session_files(paths)]
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    results: list[tuple[str, str, str]] = []
+    if workers == 1 or len(sources) <= 1:
+        results = [_export_worker(source, str(out_dir), force) for source in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_export_worker, source, str(out_dir), force)
+                for source in sources
+            ]
+            results = [future.result() for future in as_completed(futures)]
+
+    written: list[Path] = []
+    skipped: list[Path] = []
+    failed: dict[str, str] = {}
+    for source, status, detail in sorted(results):
+        if status == "failed":
+            failed[source] = detail
+        elif status == "written":
+            written.append(Path(detail))
+        else:
+            skipped.append(Path(detail))
+    return ExportReport(written=tuple(written), skipped=tuple(skipped), failed=failed)
+
+
+class PlayTable:
+    """In-memory columns loaded from one or more shards."""
+
+    def __init__(self, columns: Mapping[str, Sequence[Any]], rows: int):
+        self._columns = dict(columns)
+        self._rows = int(rows)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        return tuple(self._columns)
+
+    def column(self, name: str) -> Sequence[Any]:
+        try:
+            return self._columns[name]
+        except KeyError as exc:
+            raise PlayTableError(f"Column {name!r} was not loaded.") from exc
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        names = self.column_names
+        for values in zip(*(self._columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def count_by(self, *names: str) -> Counter:
+        """Count rows per distinct combination of the given columns."""
+        if len(names) == 1:
+            return Counter(self.column(names[0]))
+        return Counter(zip(*(self.column(name) for name in names)))
+
+    def mean_by(self, key: str, value: str) -> dict[Any, float]:
+        """Mean of a numeric column per ``key`` value, skipping missing values.
+
+        Missing values are NaN in float columns and ``-1`` in integer columns; a
+        float ``-1.0`` is a real value.
+        """
+        integer = PLAY_COLUMNS.get(value) == "q"
+        totals: dict[Any, list[float]] = {}
+        for group, number in zip(self.column(key), self.column(value)):
+            if number == _MISSING_INT if integer else math.isnan(number):
+                continue
+            bucket = totals.setdefault(group, [0.0, 0])
+            bucket[0] += number
+            bucket[1] += 1
+        return {group: total / count for group, (total, count) in totals.items() if count}
+
+
+def load_play_table(
+    location: str | Path | Iterable[str | Path],
+    *,
+    columns: Sequence[str] | None = None,
+) -> PlayTable:
+    """Load selected columns from a shard, a folder of shards, or a list of shards."""
+    if isinstance(location, (str, Path)):
+        location = Path(location)
+        shards = sorted(location.glob(f"*{SHARD_SUFFIX}")) if location.is_dir() else [location]
+    else:
+        shards = [Path(item) for item in location]
+    names = list(columns or PLAY_COLUMNS)
+    unknown = [name for name in names if name not in PLAY_COLUMNS]
+    if unknown:
+        raise PlayTableError(f"Unknown play-table columns: {', '.join(unknown)}")
+
+    merged: dict[str, Any] = {
+        name: [] if PLAY_COLUMNS[name] == "str" else array(PLAY_COLUMNS[name]) for name in names
+    }
+    total = 0
+    for shard in shards:
+        rows, loaded = _read_shard(shard, names)
+        total += rows
+        for name in names:
+            merged[name].extend(loaded[name])
+    return PlayTable(merged, total)
@@ -23,6 +23,19 @@ GAMEPLAY_SNAPSHOT_KEYS = (
 )
 
 BOT_STATE_KEYS = ("health", "x", "y", "rot", "shield")
+REPLAY_EVENT_TYPES = frozenset(
+    {
+        "move",
+        "no_op",
+        "rotate",
+        "shield",
+        "shot",
+        "shield_block",
+        "damage",
+        "invalid_command",
+        "missing_bot",
+    }
+)
 
 
 def validate_state_map(
@@ -354,6 +367,47 @@ def parse_model_response(response: Any) -> ParsedCommand:
     )
 
 
+def command_prefix_is_viable(prefix: Any) -> bool:
+    """Return True while some continuation of ``prefix`` still parses as a valid command.
+
+    The grammar accepts a whole response only, so trailing text after a command
+    turns it into ``ERR``. A valid command is therefore never settled before
+    the response ends, but ``ERR`` often is: once this returns False, every
+    continuation, including none, parses as ``ERR``.
+    """
+    text = str(prefix or "").lstrip()
+    core = text.rstrip()
+    if not core:
+        return True
+    if core != text:
+        # No valid command contains whitespace, so only more whitespace may follow.
+        return parse_model_response(core).valid
+    # Every unfinished command or number is completed by at most one more digit.
+    return any(parse_model_response(core + suffix).valid for suffix in ("", "0"))
+
+
+class CommandRecognizer:
+    """Accumulate a streamed response until its parsed command is settled."""
+
+    def __init__(self) -> None:
+        self._chunks: list[str] = []
+        self.settled = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> bool:
+        """Add one streamed chunk and return True once the response can only be ``ERR``."""
+        if not self.settled:
+            self._chunks.append(str(chunk or ""))
+            self.settled = not command_prefix_is_viable(self.text)
+        return self.settled
+
+    def result(self) -> ParsedCommand:
+        return parse_model_response(self.text)
+
+
 def compute_move_target(state: Mapping[str, Any], rules: GameplaySettingsSnapshot, distance: float | None = None) -> tuple[float, float]:
     """Return the movement target for the given bot state."""
     step = rules.bot_step_length if distance is None else float(distance)
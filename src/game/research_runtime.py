@@ -9,14 +9,34 @@ transition semantics used by the verifier.
 
 from __future__ import annotations
 
+from collections import deque
 from copy import deepcopy
 from dataclasses import dataclass
 import json
+from pathlib import Path
 from time import perf_counter
-from typing import Any, Mapping, Protocol
-
+from typing import Any, Hashable, Mapping, Protocol
+
+from game.command_grammar import (
+    CONSTRAINT_OFF,
+    CONSTRAINT_SCHEMA,
+    constrain_request,
+    normalize_constraint_mode,
+    unwrap_command_reply,
+)
+from game.invocation_policy import (
+    HEDGE_OFF,
+    InvocationEngine,
+    InvocationFailed,
+    RetryBudget,
+    RetryPolicy,
+    normalize_hedge_after,
+)
+from game.message_history import MessageHistory
 from game.replay_engine import GameplaySettingsSnapshot, apply_play, normalize_state_map
-from game.session_v3 import build_session_v3
+from game.session_journal import SessionJournal
+from game.session_v3 import build_session_v3, write_session_v3
+from game.state_encoding import STATE_JSON, normalize_state_encoding, render_user_content
 from game.trace_contract import (
     PrivacyMode,
     event_to_dict,
@@ -27,6 +47,7 @@ from game.trace_contract import (
     transition_hash,
     utc_now_iso,
 )
+from llm.service import load_llm_config, resolve_request_timeout
 
 
 class ChatClient(Protocol):
@@ -39,7 +60,12 @@ class ChatClient(Protocol):
         messages: list[dict[str, str]],
         options: dict[str, Any],
         stream: bool = False,
-    ) -> Any: ...
+        format: dict[str, Any] | None = None,  # pylint: disable=redefined-builtin
+        affinity: Hashable = None,
+    ) -> Any:
+        """``affinity`` names the conversation a request extends (a bot, or
+        the shared context), for clients that route by it."""
+        ...
 
 
 @dataclass(frozen=True)
@@ -51,6 +77,10 @@ class InvocationPolicy:
     endpoint: str = "http://localhost:11434/api/chat"
     options: Mapping[str, Any] | None = None
     max_attempts: int = 2
+    command_constraint: str = CONSTRAINT_OFF
+    retry_backoff_s: float = 0.25
+    hedge_after: str | float = HEDGE_OFF
+    hedge_model: str | None = None
 
 
 @dataclass(frozen=True)
@@ -64,12 +94,34 @@ class InvocationOutcome:
     completed_at: str
     error_type: str | None = None
     error_message: str | None = None
+    cache: str | None = None
+    endpoint: str | None = None
+    served_model: str | None = None
+    hedged: bool = False
+    hedge_won: bool = False
+    backoff_ms: float = 0.0
+    errors: tuple[str, ...] = ()
 
     @property
     def succeeded(self) -> bool:
         return self.error_type is None
 
 
+def invocation_record(outcome: InvocationOutcome) -> dict[str, Any]:
+    """Return how a reply was obtained, or ``{}`` when one request sufficed."""
+    record: dict[str, Any] = {}
+    if outcome.errors:
+        record["errors"] = list(outcome.errors)
+    if outcome.backoff_ms:
+        record["backoff_ms"] = outcome.backoff_ms
+    if outcome.hedged:
+        record["hedged"] = True
+        record["hedge_won"] = outcome.hedge_won
+    if outcome.served_model is not None:
+        record["served_model"] = outcome.served_model
+    return record
+
+
 def extract_response_text(response: Any) -> str:
     """Extract text from strings, Modelito/Ollama objects, or dictionaries."""
 
@@ -109,31 +161,50 @@ class ScriptedClient:
         messages: list[dict[str, str]],
         options: dict[str, Any],
         stream: bool = False,
+        format: dict[str, Any] | None = None,  # pylint: disable=redefined-builtin
+        affinity: Hashable = None,  # pylint: disable=unused-argument
     ) -> str:
-        self.requests.append(
-            {
-                "model": model,
-                "messages": deepcopy(messages),
-                "options": deepcopy(options),
-                "stream": bool(stream),
-            }
-        )
+        request = {
+            "model": model,
+            "messages": deepcopy(messages),
+            "options": deepcopy(options),
+            "stream": bool(stream),
+        }
+        if format is not None:
+            request["format"] = deepcopy(format)
+        self.requests.append(request)
         command = self.commands[self.index % len(self.commands)]
         self.index += 1
+        if format is not None:
+            return json.dumps({"command": command})
         return command
 
 
 class ModelitoChatClient:
     """Optional adapter for local Ollama models through Modelito."""
 
-    def __init__(self, *, host: str = "http://localhost", port: int = 11434):
+    def __init__(
+        self,
+        *,
+        host: str = "http://localhost",
+        port: int = 11434,
+        timeout: float | None = None,
+    ):
+        """``timeout`` applies to structured-output requests; by default it is
+        the request timeout BatLLM's configuration resolves for the model.
+        """
         try:
             from modelito import Client, Message, OllamaProvider
+            from modelito.ollama_service import json_post
         except Exception as exc:  # pragma: no cover - optional live integration
             raise RuntimeError(
                 "Modelito is required for live Ollama research runs."
             ) from exc
         self._Message = Message
+        self._json_post = json_post
+        self._chat_url = f"{host.rstrip('/')}:{port}/api/chat"
+        self._timeout = timeout
+        self._timeouts: dict[str, float] = {}
         self._provider = OllamaProvider(host=host, port=port)
         self._client = Client(provider=self._provider)
 
@@ -144,7 +215,22 @@ class ModelitoChatClient:
         messages: list[dict[str, str]],
         options: dict[str, Any],
         stream: bool = False,
-    ) -> str:
+        format: dict[str, Any] | None = None,  # pylint: disable=redefined-builtin
+        affinity: Hashable = None,  # pylint: disable=unused-argument
+    ) -> Any:
+        if format is not None:
+            # Modelito's chat drops structured-output formats, so constrained
+            # requests go to /api/chat directly.
+            payload: dict[str, Any] = {
+                "model": model,
+                "messages": [dict(message) for message in messages],
+                "stream": False,
+            }
+            if options:
+                payload["options"] = dict(options)
+            if format is not None:
+                payload["format"] = format
+            return self._json_post(self._chat_url, payload, timeout=self._request_timeout(model))
         self._provider.model = model
         self._client.model = model
         converted = [
@@ -155,6 +241,13 @@ class ModelitoChatClient:
             return "".join(self._client.stream(converted, settings=options))
         return self._client.summarize(converted, settings=options)
 
+    def _request_timeout(self, model: str) -> float:
+        if self._timeout is not None:
+            return float(self._timeout)
+        if model not in self._timeouts:
+            self._timeouts[model] = resolve_request_timeout(load_llm_config(), model=model)
+        return self._timeouts[model]
+
 
 class MediatedGameRuntime:
     """Record exact invocations and replayable transitions for BatLLM."""
@@ -169,10 +262,12 @@ class MediatedGameRuntime:
         system_instructions: str = "",
         prompt_augmentation: bool = True,
         independent_contexts: bool = True,
+        state_encoding: str = STATE_JSON,
         privacy_mode: PrivacyMode | str = PrivacyMode.FULL,
         app_version: str = "0.3.6",
         git_commit: str | None = None,
         model_provenance: Mapping[str, Any] | None = None,
+        journal_path: str | Path | None = None,
     ) -> None:
         self.client = client
         self.state = normalize_state_map(initial_state)
@@ -181,6 +276,7 @@ class MediatedGameRuntime:
         self.system_instructions = str(system_instructions)
         self.prompt_augmentation = bool(prompt_augmentation)
         self.independent_contexts = bool(independent_contexts)
+        self.state_encoding = normalize_state_encoding(state_encoding)
         self.privacy_mode = PrivacyMode(privacy_mode)
         self.app_version = app_version
         self.git_commit = git_commit
@@ -188,43 +284,70 @@ class MediatedGameRuntime:
         self.model_provenance.setdefault("provider", self.policy.provider)
         self.model_provenance.setdefault("requested_model", self.policy.model)
         self.model_provenance.setdefault("endpoint", self.policy.endpoint)
-        self._shared_history: list[dict[str, str]] = []
-        self._history_by_bot: dict[int, list[dict[str, str]]] = {}
+        self.session_id = new_id("session")
+        self.created_at = utc_now_iso()
+        # Streams each finalised record to disk, so a crash keeps the plays so far.
+        self.journal = (
+            SessionJournal(
+                journal_path,
+                app_version=self.app_version,
+                privacy_mode=self.privacy_mode,
+                git_commit=self.git_commit,
+                model_provenance=self.model_provenance,
+                session_id=self.session_id,
+                created_at=self.created_at,
+            )
+            if journal_path is not None
+            else None
+        )
+        # Immutable histories: each play's request keeps a snapshot without copying.
+        self._shared_history = MessageHistory()
+        self._history_by_bot: dict[int, MessageHistory] = {}
         self._previous_play_sha256: str | None = None
         self._sequence = 0
         self._rounds: list[dict[str, Any]] = []
         self._active_round: dict[str, Any] | None = None
+        self._engine = InvocationEngine(
+            RetryPolicy(
+                max_attempts=max(1, self.policy.max_attempts),
+                backoff_base_s=self.policy.retry_backoff_s,
+                hedge_after=normalize_hedge_after(self.policy.hedge_after),
+            ),
+            budget=RetryBudget(),
+            # Any provider error is retried, as clients raise their own types.
+            transient=(Exception,),
+        )
+        self._latencies_ms: deque[float] = deque(maxlen=200)
 
-    def _history(self, bot_id: int) -> list[dict[str, str]]:
+    def _history(self, bot_id: int) -> MessageHistory:
         history = (
-            self._history_by_bot.setdefault(int(bot_id), [])
+            self._history_by_bot.get(int(bot_id), MessageHistory())
             if self.independent_contexts
             else self._shared_history
         )
         if self.system_instructions:
             system_message = {"role": "system", "content": self.system_instructions}
             if not history or history[0].get("role") != "system":
-                history.insert(0, system_message)
+                history = history.prepend(system_message)
             elif history[0] != system_message:
-                history[0] = system_message
+                history = history.replace(0, system_message)
         return history
 
-    def _user_content(self, prompt: str) -> tuple[str, dict[str, Any]]:
-        game_state = {"bots": deepcopy(self.state)}
-        if self.prompt_augmentation:
-            rendered = (
-                "[GAME_STATE]\n"
-                + json.dumps(
-                    game_state,
-                    separators=(",", ":"),
-                    ensure_ascii=False,
-                    sort_keys=True,
-                )
-                + "\n[PLAYER_INPUT]\n"
-                + prompt
-            )
+    def _set_history(self, bot_id: int, history: MessageHistory) -> None:
+        if self.independent_contexts:
+            self._history_by_bot[int(bot_id)] = history
         else:
-            rendered = prompt
+            self._shared_history = history
+
+    def _user_content(self, prompt: str, bot_id: int) -> tuple[str, dict[str, Any]]:
+        game_state = {"bots": deepcopy(self.state)}
+        rendered = render_user_content(
+            prompt,
+            game_state,
+            augmented=self.prompt_augmentation,
+            encoding=self.state_encoding,
+            bot_id=bot_id,
+        )
         return rendered, game_state
 
     def start_round(
@@ -246,6 +369,8 @@ class MediatedGameRuntime:
             ],
             "plays": [],
         }
+        if self.journal is not None:
+            self.journal.start_round(round_entry)
         self._rounds.append(round_entry)
         self._active_round = round_entry
         return round_entry
@@ -255,41 +380,73 @@ class MediatedGameRuntime:
             raise RuntimeError("No round is active.")
         self._active_round["ended_at"] = utc_now_iso()
         self._active_round["final_state"] = deepcopy(self.state)
+        if self.journal is not None:
+            self.journal.end_round(
+                final_state=self.state, ended_at=self._active_round["ended_at"]
+            )
         completed = self._active_round
         self._active_round = None
         return completed
 
-    def _invoke(self, request_payload: dict[str, Any]) -> InvocationOutcome:
-        attempts = 0
+    def _invoke(
+        self, request_payload: dict[str, Any], affinity: Hashable = None
+    ) -> InvocationOutcome:
         started_at = utc_now_iso()
         started = perf_counter()
-        last_error: BaseException | None = None
-        for attempts in range(1, max(1, self.policy.max_attempts) + 1):
-            try:
-                response = self.client.chat(
-                    model=request_payload["model"],
-                    messages=deepcopy(request_payload["messages"]),
-                    options=deepcopy(request_payload["options"]),
-                    stream=False,
-                )
-                return InvocationOutcome(
-                    response_text=extract_response_text(response),
-                    attempts=attempts,
-                    latency_ms=(perf_counter() - started) * 1000.0,
-                    started_at=started_at,
-                    completed_at=utc_now_iso(),
-                )
-            except Exception as exc:  # provider-neutral retry boundary
-                last_error = exc
-        assert last_error is not None
+
+        def send(model: str) -> tuple[Any, str]:
+            constraint = (
+                {"format": deepcopy(request_payload["format"])}
+                if "format" in request_payload
+                else {}
+            )
+            response = self.client.chat(
+                model=model,
+                messages=request_payload["messages"].materialize(),
+                options=deepcopy(request_payload["options"]),
+                stream=False,
+                affinity=affinity,
+                **constraint,
+            )
+            return response, model
+
+        requested = request_payload["model"]
+        hedge_model = self.policy.hedge_model or requested
+        try:
+            result = self._engine.invoke(
+                lambda: send(requested),
+                hedge=lambda: send(hedge_model),
+                hedge_delay=self._engine.policy.hedge_delay(self._latencies_ms),
+            )
+        except InvocationFailed as failure:
+            return InvocationOutcome(
+                response_text=None,
+                attempts=failure.attempts,
+                latency_ms=(perf_counter() - started) * 1000.0,
+                started_at=started_at,
+                completed_at=utc_now_iso(),
+                error_type=type(failure.last_error).__name__,
+                error_message=str(failure.last_error),
+                hedged=failure.hedged,
+                backoff_ms=failure.backoff_ms,
+                errors=failure.errors,
+            )
+        response, served_model = result.value
+        latency_ms = (perf_counter() - started) * 1000.0
+        self._latencies_ms.append(latency_ms)
         return InvocationOutcome(
-            response_text=None,
-            attempts=attempts,
-            latency_ms=(perf_counter() - started) * 1000.0,
+            response_text=extract_response_text(response),
+            attempts=result.attempts,
+            latency_ms=latency_ms,
             started_at=started_at,
             completed_at=utc_now_iso(),
-            error_type=type(last_error).__name__,
-            error_message=str(last_error),
+            cache=response.get("cache") if isinstance(response, Mapping) else None,
+            endpoint=response.get("endpoint") if isinstance(response, Mapping) else None,
+            served_model=served_model if served_model != requested else None,
+            hedged=result.hedged,
+            hedge_won=result.hedge_won,
+            backoff_ms=result.backoff_ms,
+            errors=result.errors,
         )
 
     def play(self, *, bot_id: int, human_prompt: str) -> dict[str, Any]:
@@ -297,28 +454,37 @@ class MediatedGameRuntime:
             self.start_round({int(bot_id): human_prompt})
         self._sequence += 1
         pre_state = deepcopy(self.state)
-        rendered, game_state = self._user_content(str(human_prompt))
-        history = self._history(int(bot_id))
-        user_message = {"role": "user", "content": rendered}
-        history.append(user_message)
+        rendered, game_state = self._user_content(str(human_prompt), int(bot_id))
+        history = self._history(int(bot_id)).append({"role": "user", "content": rendered})
+        constraint = normalize_constraint_mode(self.policy.command_constraint)
+        options, schema = constrain_request(constraint, self.policy.options)
         request_payload = {
             "provider": self.policy.provider,
             "endpoint": self.policy.endpoint,
             "model": self.policy.model,
-            "messages": deepcopy(history),
-            "options": dict(self.policy.options or {}),
+            "messages": history,
+            "options": options,
             "stream": False,
         }
-        outcome = self._invoke(request_payload)
+        if schema is not None:
+            request_payload["format"] = schema
+        # The conversation this request extends; pooled clients keep it on one endpoint.
+        affinity = int(bot_id) if self.independent_contexts else "shared"
+        outcome = self._invoke(request_payload, affinity)
         if outcome.succeeded:
             raw_response = str(outcome.response_text)
-            history.append({"role": "assistant", "content": raw_response})
-            command_source = raw_response
+            self._set_history(
+                int(bot_id), history.append({"role": "assistant", "content": raw_response})
+            )
+            command_source = (
+                unwrap_command_reply(raw_response)
+                if constraint == CONSTRAINT_SCHEMA
+                else raw_response
+            )
             status = "ok"
             error_record = None
         else:
-            if history and history[-1] is user_message:
-                history.pop()
+            # A failed request leaves the history as it was.
             raw_response = ""
             command_source = "ERR"
             status = "invocation-error"
@@ -358,9 +524,16 @@ class MediatedGameRuntime:
             "context_policy": {
                 "prompt_augmentation": self.prompt_augmentation,
                 "independent_contexts": self.independent_contexts,
+                **(
+                    {"state_encoding": self.state_encoding}
+                    if self.state_encoding != STATE_JSON
+                    else {}
+                ),
             },
-            "game_state_supplied_to_model": deepcopy(game_state),
-            "request": store_request_payload(request_payload, self.privacy_mode),
+            "game_state_supplied_to_model": game_state,
+            "request": store_request_payload(
+                {**request_payload, "messages": history.materialize()}, self.privacy_mode
+            ),
             "request_started_at": outcome.started_at,
             "request_completed_at": outcome.completed_at,
             "latency_ms": outcome.latency_ms,
@@ -375,7 +548,20 @@ class MediatedGameRuntime:
         }
         if error_record is not None:
             play["error"] = error_record
+        if constraint != CONSTRAINT_OFF:
+            play["command_constraint"] = constraint
+        if outcome.cache is not None:
+            # Replies served by a response cache were recorded from an earlier run.
+            play["cache"] = outcome.cache
+        if outcome.endpoint is not None:
+            # The server an endpoint pool chose; request.endpoint is the policy's.
+            play["endpoint"] = outcome.endpoint
+        invocation = invocation_record(outcome)
+        if invocation:
+            play["invocation"] = invocation
         play = finalise_play_hash(play, self._previous_play_sha256)
+        if self.journal is not None:
+            self.journal.append_play(play)
         self._previous_play_sha256 = play["play_sha256"]
         assert self._active_round is not None
         self._active_round["plays"].append(play)
@@ -414,4 +600,21 @@ class MediatedGameRuntime:
             privacy_mode=self.privacy_mode,
             git_commit=self.git_commit,
             model_provenance=self.model_provenance,
+            session_id=self.session_id,
+            created_at=self.created_at,
         )
+
+    def seal(self, path: str | Path) -> Path:
+        """End the active round and write the session to ``path``.
+
+        With a journal the session is sealed from it, without copying or
+        re-validating the rounds; otherwise it is built and written whole.
+        """
+        if self.journal is None:
+            return write_session_v3(self.session_payload(), path)
+        if self._active_round is not None:
+            self.end_round()
+        self.journal.end_game(final_state=self.state)
+        output = self.journal.seal(path)
+        self.journal.close()
+        return output
@@ -0,0 +1,247 @@
+"""Content-addressed cache of model replies for record and replay.
+
+With a fixed ``seed`` and ``temperature`` 0, a chat request with the same
+model, options, and messages yields the same reply, so a reply recorded once can
+stand in for the model afterwards. Replies are keyed by the canonical SHA-256 of
+the request (:func:`game.trace_contract.sha256_json`) and kept in an in-memory
+LRU in front of a directory of one JSON file per request.
+
+Three modes decide how a client uses the cache:
+
+``passthrough``
+    Every request goes to the model; the cache is neither read nor written.
+``record``
+    Cached replies are served; other requests go to the model and their
+    replies are stored.
+``replay``
+    Only cached replies are served; any other request raises
+    :class:`ResponseCacheMiss`, so a recorded game can be re-executed offline.
+
+Only requests that :func:`is_replayable` (a ``seed`` and ``temperature`` 0)
+use the cache. In record mode other requests go to the model uncached, with a
+warning, since freezing one sampled reply would change the game; replay mode
+refuses them with :class:`ResponseCacheError`.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from copy import deepcopy
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Any, Hashable, Mapping
+
+from game.research_runtime import extract_response_text
+from game.trace_contract import sha256_json, utc_now_iso
+
+CACHE_PASSTHROUGH = "passthrough"
+CACHE_RECORD = "record"
+CACHE_REPLAY = "replay"
+CACHE_MODES = (CACHE_PASSTHROUGH, CACHE_RECORD, CACHE_REPLAY)
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+
+DEFAULT_CAPACITY = 512
+
+_logger = logging.getLogger(__name__)
+
+# Options that change how a request is delivered, not what the model generates.
+_TRANSPORT_OPTIONS = frozenset({"timeout"})
+
+
+class ResponseCacheError(ValueError):
+    """Raised for an unknown cache mode or an unreadable cache entry."""
+
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay mode when a request has no recorded reply."""
+
+    def __init__(self, key: str):
+        super().__init__(f"No recorded reply for request {key[:12]} in replay mode.")
+        self.key = key
+
+
+def normalize_cache_mode(mode: Any) -> str:
+    """Return a known cache mode; empty values mean ``passthrough``."""
+    if mode in (None, False, ""):
+        return CACHE_PASSTHROUGH
+    text = str(mode).strip().lower()
+    if text not in CACHE_MODES:
+        raise ResponseCacheError(
+            f"Unknown response cache mode {mode!r}; expected one of {', '.join(CACHE_MODES)}."
+        )
+    return text
+
+
+def is_replayable(options: Mapping[str, Any] | None) -> bool:
+    """Return True when ``options`` fix a ``seed`` and set ``temperature`` to 0."""
+    options = options or {}
+    temperature = options.get("temperature")
+    return (
+        options.get("seed") is not None
+        and isinstance(temperature, (int, float))
+        and not isinstance(temperature, bool)
+        and temperature == 0
+    )
+
+
+def request_key(
+    *,
+    model: str,
+    messages: list[Mapping[str, Any]],
+    options: Mapping[str, Any] | None = None,
+    format: Mapping[str, Any] | None = None,  # pylint: disable=redefined-builtin
+    stream: bool = False,
+) -> str:
+    """Return the canonical digest identifying a chat request."""
+    request: dict[str, Any] = {
+        "model": str(model),
+        "messages": [
+            {"role": str(message.get("role") or ""), "content": str(message.get("content") or "")}
+            for message in messages
+        ],
+        "options": {
+            key: value for key, value in (options or {}).items() if key not in _TRANSPORT_OPTIONS
+        },
+        "stream": bool(stream),
+    }
+    if format is not None:
+        request["format"] = format
+    return sha256_json(request)
+
+
+class ResponseCache:
+    """In-memory LRU of recorded replies, backed by an optional directory."""
+
+    def __init__(self, directory: str | Path | None = None, *, capacity: int = DEFAULT_CAPACITY):
+        self.directory = Path(directory) if directory is not None else None
+        self.capacity = max(1, int(capacity))
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, entry: dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the recorded entry for ``key`` (``reply`` plus metadata), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return deepcopy(entry)
+        entry = self._read(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+        return deepcopy(entry)
+
+    def _read(self, key: str) -> dict[str, Any] | None:
+        if self.directory is None:
+            return None
+        try:
+            entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            raise ResponseCacheError(f"Cannot read cached reply {key[:12]}: {exc}") from exc
+        if not isinstance(entry, dict) or entry.get("key") != key or "reply" not in entry:
+            raise ResponseCacheError(f"Cached reply {key[:12]} is malformed.")
+        return entry
+
+    def put(self, key: str, reply: Any, **metadata: Any) -> None:
+        """Record ``reply`` (JSON-serialisable) for ``key``."""
+        entry = {"key": key, "reply": deepcopy(reply), "recorded_at": utc_now_iso(), **metadata}
+        with self._lock:
+            self._remember(key, entry)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(prefix=".batllm-reply-", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle, sort_keys=True)
+            os.replace(temporary, path)
+        except Exception:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+class CachedChatClient:
+    """Wrap a research :class:`~game.research_runtime.ChatClient` with a response cache.
+
+    Replies come back as ``{"message": {"content": ...}, "cache": "hit"|"miss"}``
+    so the runtime can tag each play with where its reply came from.
+    """
+
+    def __init__(self, client: Any, cache: ResponseCache, mode: str = CACHE_RECORD):
+        self.client = client
+        self.cache = cache
+        self.mode = normalize_cache_mode(mode)
+        self._warned = False
+
+    def chat(
+        self,
+        *,
+        model: str,
+        messages: list[dict[str, str]],
+        options: dict[str, Any],
+        stream: bool = False,
+        format: dict[str, Any] | None = None,  # pylint: disable=redefined-builtin
+        affinity: Hashable = None,
+    ) -> Any:
+        constraint = {"format": format} if format is not None else {}
+        replayable = is_replayable(options)
+        if self.mode == CACHE_REPLAY and not replayable:
+            raise ResponseCacheError("Replay mode needs a fixed seed and temperature 0.")
+        if self.mode == CACHE_RECORD and not replayable and not self._warned:
+            self._warned = True
+            _logger.warning("Replies are recorded only for requests with a seed and temperature 0.")
+        if self.mode == CACHE_PASSTHROUGH or not replayable:
+            return self.client.chat(
+                model=model, messages=messages, options=options, stream=stream,
+                affinity=affinity, **constraint,
+            )
+        key = request_key(
+            model=model, messages=messages, options=options, format=format, stream=stream
+        )
+        entry = self.cache.get(key)
+        if entry is not None:
+            return _tagged(entry["reply"], CACHE_HIT)
+        if self.mode == CACHE_REPLAY:
+            raise ResponseCacheMiss(key)
+        response = self.client.chat(
+            model=model, messages=messages, options=options, stream=stream,
+            affinity=affinity, **constraint,
+        )
+        text = extract_response_text(response)
+        self.cache.put(key, text, model=model)
+        tagged = _tagged(text, CACHE_MISS)
+        if isinstance(response, Mapping) and response.get("endpoint"):
+            tagged["endpoint"] = response["endpoint"]
+        return tagged
+
+
+def _tagged(text: str, cache: str) -> dict[str, Any]:
+    return {"message": {"role": "assistant", "content": text}, "response": text, "cache": cache}
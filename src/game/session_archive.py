@@ -0,0 +1,324 @@
+"""Packed archives of saved BatLLM sessions.
+
+A saved-sessions folder holds one pretty-printed JSON file per session, so
+backup, sync, and directory listings grow with the number of files. A session
+archive packs many sessions into a single ``.pack`` file: a ZIP container whose
+central directory is the content index, with each entry compressed on its own
+and annotated with its SHA-256 digest and session type. Entries can be appended
+without rewriting the existing ones and read back individually without
+unpacking the archive.
+
+Sessions inside an archive are addressed as ``archive.pack#entry.json``. The
+session loaders accept such references wherever they accept a file path.
+"""
+
+from __future__ import annotations
+
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import Any, Iterable, Iterator
+import zipfile
+
+from game.trace_contract import sha256_bytes
+
+ARCHIVE_SUFFIX = ".pack"
+ARCHIVE_FORMAT = "batllm_session_archive"
+ARCHIVE_VERSION = 1
+REFERENCE_SEPARATOR = "#"
+
+_ARCHIVE_COMMENT = json.dumps(
+    {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION}, sort_keys=True
+).encode("utf-8")
+
+
+class SessionArchiveError(ValueError):
+    """Raised when a session archive or archive entry cannot be used."""
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """Index record of one session stored in an archive."""
+
+    name: str
+    size: int
+    compressed_size: int
+    sha256: str
+    mtime_ns: int
+    session_type: str | None = None
+    schema_version: int | None = None
+
+    def reference(self, archive: str | Path) -> str:
+        return archive_reference(archive, self.name)
+
+
+def archive_reference(archive: str | Path, entry: str) -> str:
+    """Return the ``archive.pack#entry`` reference of one archived session."""
+    return f"{archive}{REFERENCE_SEPARATOR}{entry}"
+
+
+def split_archive_reference(path: str | Path) -> tuple[Path, str] | None:
+    """Split ``archive.pack#entry`` into its archive path and entry name.
+
+    Return ``None`` for anything that is not an archive reference, including
+    plain files whose names happen to contain ``#``.
+    """
+    text = os.fspath(path)
+    archive, separator, entry = text.rpartition(REFERENCE_SEPARATOR)
+    if not separator or not entry or not archive.lower().endswith(ARCHIVE_SUFFIX):
+        return None
+    if "/" in entry or "\\" in entry:
+        return None
+    return Path(archive), entry
+
+
+def is_session_archive(path: str | Path) -> bool:
+    """Return True when ``path`` is an existing session archive file."""
+    path = Path(path)
+    return path.suffix.lower() == ARCHIVE_SUFFIX and path.is_file()
+
+
+def read_session_bytes(path: str | Path) -> bytes:
+    """Read a session file or an ``archive.pack#entry`` reference.
+
+    Raises :class:`OSError` for unreadable files and
+    :class:`SessionArchiveError` for invalid archives or missing entries.
+    """
+    reference = split_archive_reference(path)
+    if reference is None:
+        return Path(path).read_bytes()
+    archive, entry = reference
+    return open_session_archive(archive).read_bytes(entry)
+
+
+def session_source_stat(path: str | Path) -> tuple[int, int]:
+    """Return ``(size, mtime_ns)`` of a session file or archive reference."""
+    reference = split_archive_reference(path)
+    if reference is None:
+        stat = Path(path).stat()
+        return stat.st_size, stat.st_mtime_ns
+    archive, entry = reference
+    record = open_session_archive(archive).entry(entry)
+    return record.size, record.mtime_ns
+
+
+def _validate_entry_name(name: str) -> str:
+    name = str(name or "").strip()
+    if not name or name.startswith("."):
+        raise SessionArchiveError(f"Invalid archive entry name: {name!r}")
+    if any(character in name for character in ("/", "\\", REFERENCE_SEPARATOR)):
+        raise SessionArchiveError(
+            f"Archive entry names cannot contain '/', '\\' or '#': {name!r}"
+        )
+    return name
+
+
+def _entry_metadata(data: bytes) -> dict[str, Any]:
+    try:
+        payload = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise SessionArchiveError(f"Archived sessions must be JSON: {exc}") from exc
+    if not isinstance(payload, dict):
+        raise SessionArchiveError("Archived sessions must be JSON objects.")
+    session_type = payload.get("session_type")
+    schema_version = payload.get("schema_version")
+    return {
+        "session_type": session_type if isinstance(session_type, str) else None,
+        "schema_version": (
+            schema_version
+            if isinstance(schema_version, int) and not isinstance(schema_version, bool)
+            else None
+        ),
+    }
+
+
+def _record(info: zipfile.ZipInfo) -> ArchiveEntry:
+    try:
+        meta = json.loads(info.comment or b"{}")
+    except ValueError:
+        meta = {}
+    if not isinstance(meta, dict):
+        meta = {}
+    return ArchiveEntry(
+        name=info.filename,
+        size=info.file_size,
+        compressed_size=info.compress_size,
+        sha256=str(meta.get("sha256") or ""),
+        mtime_ns=int(meta.get("mtime_ns") or 0),
+        session_type=meta.get("session_type"),
+        schema_version=meta.get("schema_version"),
+    )
+
+
+class SessionArchive:
+    """Random-access reader and appender for one ``.pack`` session archive.
+
+    The archive's index is read once per file version and cached; reading an
+    entry seeks straight to its compressed bytes.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._entries: dict[str, ArchiveEntry] = {}
+
+    @contextmanager
+    def _open(self, mode: str = "r") -> Iterator[zipfile.ZipFile]:
+        with ExitStack() as stack:
+            try:
+                archive = stack.enter_context(zipfile.ZipFile(self.path, mode))
+            except zipfile.BadZipFile as exc:
+                raise SessionArchiveError(f"{self.path.name} is not a session archive.") from exc
+            except FileNotFoundError as exc:
+                raise SessionArchiveError(f"Session archive not found: {self.path}") from exc
+            if archive.comment != _ARCHIVE_COMMENT:
+                raise SessionArchiveError(f"{self.path.name} is not a BatLLM session archive.")
+            yield archive
+
+    def _index(self) -> dict[str, ArchiveEntry]:
+        try:
+            stat = self.path.stat()
+        except OSError as exc:
+            raise SessionArchiveError(f"Session archive not found: {self.path}") from exc
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if stamp != self._stamp:
+                with self._open() as archive:
+                    self._entries = {
+                        info.filename: _record(info) for info in archive.infolist()
+                    }
+                self._stamp = stamp
+            return self._entries
+
+    def entries(self) -> list[ArchiveEntry]:
+        """Return the archive index in insertion order."""
+        return list(self._index().values())
+
+    def entry(self, name: str) -> ArchiveEntry:
+        record = self._index().get(name)
+        if record is None:
+            raise SessionArchiveError(f"{self.path.name} has no entry named {name!r}.")
+        return record
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index()
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def read_bytes(self, name: str) -> bytes:
+        """Decompress one entry and check it against its recorded digest."""
+        record = self.entry(name)
+        with self._open() as archive:
+            try:
+                data = archive.read(name)
+            except (zipfile.BadZipFile, OSError) as exc:
+                raise SessionArchiveError(f"Cannot read {name!r}: {exc}") from exc
+        if record.sha256 and sha256_bytes(data) != record.sha256:
+            raise SessionArchiveError(f"Archive entry {name!r} failed its digest check.")
+        return data
+
+    def append(
+        self,
+        name: str,
+        data: bytes,
+        *,
+        mtime_ns: int | None = None,
+        compress: bool = True,
+    ) -> tuple[ArchiveEntry, bool]:
+        """Append one session and return ``(entry, written)``.
+
+        Re-adding identical bytes under an existing name is a no-op; different
+        bytes under an existing name are rejected because entries are immutable.
+        """
+        name = _validate_entry_name(name)
+        digest = sha256_bytes(data)
+        if self.path.exists():
+            existing = self._index().get(name)
+            if existing is not None:
+                if existing.sha256 == digest:
+                    return existing, False
+                raise SessionArchiveError(
+                    f"{self.path.name} already holds a different {name!r}."
+                )
+        meta = _entry_metadata(data)
+        meta.update(
+            sha256=digest,
+            mtime_ns=int(mtime_ns if mtime_ns is not None else time.time_ns()),
+        )
+        info = zipfile.ZipInfo(name, date_time=time.localtime(meta["mtime_ns"] / 1e9)[:6])
+        info.comment = json.dumps(meta, sort_keys=True).encode("utf-8")
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+
+        if self.path.exists():
+            with self._open("a") as archive:
+                self._write(archive, info, data)
+        else:
+            self._create(info, data)
+        return self.entry(name), True
+
+    @staticmethod
+    def _write(archive: zipfile.ZipFile, info: zipfile.ZipInfo, data: bytes) -> None:
+        archive.writestr(info, data, compresslevel=6)
+        archive.comment = _ARCHIVE_COMMENT
+
+    def _create(self, info: zipfile.ZipInfo, data: bytes) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(
+            prefix=".batllm-pack-", suffix=".tmp", dir=self.path.parent
+        )
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(temporary, "w") as archive:
+                self._write(archive, info, data)
+            os.replace(temporary, self.path)
+        except Exception:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def append_file(
+        self, source: str | Path, *, name: str | None = None, compress: bool = True
+    ) -> tuple[ArchiveEntry, bool]:
+        """Append a session file under its own file name unless ``name`` is given."""
+        source = Path(source)
+        try:
+            stat = source.stat()
+            data = source.read_bytes()
+        except OSError as exc:
+            raise SessionArchiveError(str(exc)) from exc
+        return self.append(
+            name or source.name, data, mtime_ns=stat.st_mtime_ns, compress=compress
+        )
+
+
+def pack_sessions(
+    sources: Iterable[str | Path], archive: str | Path
+) -> tuple[list[ArchiveEntry], list[ArchiveEntry]]:
+    """Append session files to ``archive``; return ``(written, already_present)``."""
+    target = SessionArchive(archive)
+    written: list[ArchiveEntry] = []
+    present: list[ArchiveEntry] = []
+    for source in sources:
+        record, added = target.append_file(source)
+        (written if added else present).append(record)
+    return written, present
+
+
+@lru_cache(maxsize=16)
+def _cached_archive(path: str) -> SessionArchive:
+    return SessionArchive(path)
+
+
+def open_session_archive(path: str | Path) -> SessionArchive:
+    """Return a shared reader for ``path`` so its index is parsed once per version."""
+    return _cached_archive(os.path.abspath(os.fspath(path)))
@@ -0,0 +1,448 @@
+"""SQLite sidecar index of saved-session summaries for the Game Analyzer.
+
+Listing a saved-sessions folder used to parse every selected file just to show
+its counts. The catalog stores the preview summary of each session next to the
+files and only re-reads a file when its size or modification time changes. A
+changed timestamp with unchanged bytes (for example after a copy or sync) is
+detected through the content hash and does not trigger a parse. The catalog
+also caches the byte-offset indexes that :mod:`game.session_index` uses to open
+large sessions lazily. Sessions packed into ``.pack`` archives in the folder are
+listed individually as ``archive.pack#entry`` references.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Any, Iterator
+
+from game.session_archive import (
+    ARCHIVE_SUFFIX,
+    SessionArchiveError,
+    archive_reference,
+    open_session_archive,
+    read_session_bytes,
+    session_source_stat,
+)
+from game.session_schema import (
+    SessionFormatError,
+    parse_session_payload,
+    summarize_session_payload,
+)
+from game.trace_contract import sha256_bytes
+
+CATALOG_FILENAME = ".batllm-catalog.sqlite3"
+CATALOG_SCHEMA_VERSION = 1
+SORT_COLUMNS = {
+    "mtime": "mtime_ns",
+    "name": "name",
+    "saved_at": "saved_at",
+    "size": "size",
+    "games": "game_count",
+    "rounds": "round_count",
+    "turns": "turn_count",
+}
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    compatible INTEGER NOT NULL,
+    error TEXT NOT NULL DEFAULT '',
+    schema_version INTEGER,
+    app_version TEXT,
+    saved_at TEXT,
+    models TEXT NOT NULL DEFAULT '[]',
+    game_count INTEGER NOT NULL DEFAULT 0,
+    round_count INTEGER NOT NULL DEFAULT 0,
+    turn_count INTEGER NOT NULL DEFAULT 0,
+    winner INTEGER
+)
+"""
+_CREATE_OFFSETS_TABLE = """
+CREATE TABLE IF NOT EXISTS offset_indexes (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offsets TEXT NOT NULL
+)
+"""
+_COLUMNS = (
+    "name",
+    "size",
+    "mtime_ns",
+    "sha256",
+    "compatible",
+    "error",
+    "schema_version",
+    "app_version",
+    "saved_at",
+    "models",
+    "game_count",
+    "round_count",
+    "turn_count",
+    "winner",
+)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Indexed preview summary of one saved-session file."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+    sha256: str
+    compatible: bool
+    error: str = ""
+    schema_version: int | None = None
+    app_version: str | None = None
+    saved_at: str | None = None
+    models: tuple[str, ...] = ()
+    game_count: int = 0
+    round_count: int = 0
+    turn_count: int = 0
+    winner: int | None = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def summary(self) -> dict[str, Any]:
+        """Return the same keys as :func:`summarize_session_payload`."""
+        return {
+            "schema_version": self.schema_version,
+            "app_version": self.app_version,
+            "saved_at": self.saved_at,
+            "configured_model": self.models[0] if self.models else None,
+            "models": list(self.models),
+            "game_count": self.game_count,
+            "round_count": self.round_count,
+            "turn_count": self.turn_count,
+            "winner": self.winner,
+        }
+
+
+def _as_optional_int(value: Any) -> int | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_session_bytes(
+    path: Path, data: bytes, *, size: int, mtime_ns: int
+) -> CatalogEntry:
+    """Parse session bytes once and return their catalog entry."""
+    digest = sha256_bytes(data)
+    try:
+        payload = parse_session_payload(data)
+    except SessionFormatError as exc:
+        return CatalogEntry(
+            path=path,
+            size=size,
+            mtime_ns=mtime_ns,
+            sha256=digest,
+            compatible=False,
+            error=str(exc),
+        )
+
+    summary = summarize_session_payload(payload)
+    return CatalogEntry(
+        path=path,
+        size=size,
+        mtime_ns=mtime_ns,
+        sha256=digest,
+        compatible=True,
+        schema_version=_as_optional_int(summary.get("schema_version")),
+        app_version=summary.get("app_version"),
+        saved_at=summary.get("saved_at"),
+        models=tuple(summary.get("models") or ()),
+        game_count=int(summary.get("game_count") or 0),
+        round_count=int(summary.get("round_count") or 0),
+        turn_count=int(summary.get("turn_count") or 0),
+        winner=_as_optional_int(summary.get("winner")),
+    )
+
+
+def summarize_session_file(path: str | Path) -> CatalogEntry:
+    """Summarise a session file or archive entry without touching any catalog."""
+    path = Path(path)
+    try:
+        size, mtime_ns = session_source_stat(path)
+        data = read_session_bytes(path)
+    except (OSError, SessionArchiveError) as exc:
+        return CatalogEntry(
+            path=path, size=0, mtime_ns=0, sha256="", compatible=False, error=str(exc)
+        )
+    return summarize_session_bytes(path, data, size=size, mtime_ns=mtime_ns)
+
+
+class SessionCatalog:
+    """Incrementally maintained index of the sessions stored in one folder."""
+
+    def __init__(self, folder: str | Path, *, index_path: str | Path | None = None):
+        self.folder = Path(folder)
+        self.index_path = Path(index_path) if index_path else self.folder / CATALOG_FILENAME
+        self._lock = threading.Lock()
+        self._memory_connection: sqlite3.Connection | None = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open the sidecar index, degrading to memory on read-only folders."""
+        with self._lock:
+            connection: sqlite3.Connection | None = None
+            if self._memory_connection is None:
+                try:
+                    connection = sqlite3.connect(self.index_path, timeout=5.0)
+                    self._prepare(connection)
+                except sqlite3.Error:
+                    if connection is not None:
+                        connection.close()
+                    connection = None
+            if connection is None:
+                if self._memory_connection is None:
+                    self._memory_connection = sqlite3.connect(
+                        ":memory:", check_same_thread=False
+                    )
+                    self._prepare(self._memory_connection)
+                yield self._memory_connection
+                return
+            try:
+                with connection:
+                    yield connection
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _prepare(connection: sqlite3.Connection) -> None:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_SCHEMA_VERSION:
+            connection.execute("DROP TABLE IF EXISTS sessions")
+            connection.execute("DROP TABLE IF EXISTS offset_indexes")
+            connection.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+        connection.execute(_CREATE_TABLE)
+        connection.execute(_CREATE_OFFSETS_TABLE)
+        connection.commit()
+
+    def _row_to_entry(self, row: tuple[Any, ...]) -> CatalogEntry:
+        values = dict(zip(_COLUMNS, row))
+        try:
+            models = tuple(json.loads(values["models"] or "[]"))
+        except ValueError:
+            models = ()
+        return CatalogEntry(
+            path=self.folder / values["name"],
+            size=int(values["size"]),
+            mtime_ns=int(values["mtime_ns"]),
+            sha256=str(values["sha256"]),
+            compatible=bool(values["compatible"]),
+            error=str(values["error"] or ""),
+            schema_version=values["schema_version"],
+            app_version=values["app_version"],
+            saved_at=values["saved_at"],
+            models=models,
+            game_count=int(values["game_count"]),
+            round_count=int(values["round_count"]),
+            turn_count=int(values["turn_count"]),
+            winner=values["winner"],
+        )
+
+    @staticmethod
+    def _entry_row(entry: CatalogEntry) -> tuple[Any, ...]:
+        return (
+            entry.name,
+            entry.size,
+            entry.mtime_ns,
+            entry.sha256,
+            int(entry.compatible),
+            entry.error,
+            entry.schema_version,
+            entry.app_version,
+            entry.saved_at,
+            json.dumps(list(entry.models)),
+            entry.game_count,
+            entry.round_count,
+            entry.turn_count,
+            entry.winner,
+        )
+
+    def _store(self, connection: sqlite3.Connection, entry: CatalogEntry) -> None:
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        connection.execute(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+            self._entry_row(entry),
+        )
+
+    def _index_file(
+        self,
+        connection: sqlite3.Connection,
+        path: Path,
+        stamp: tuple[int, int],
+        known: tuple[int, int, str] | None,
+    ) -> bool:
+        """Bring one file's row up to date. Return True when it was re-parsed."""
+        if known is not None and known[:2] == stamp:
+            return False
+        try:
+            data = read_session_bytes(path)
+        except (OSError, SessionArchiveError):
+            return False
+        size, mtime_ns = stamp
+        if known is not None and known[2] == sha256_bytes(data):
+            connection.execute(
+                "UPDATE sessions SET size = ?, mtime_ns = ? WHERE name = ?",
+                (size, mtime_ns, path.name),
+            )
+            return False
+        self._store(
+            connection, summarize_session_bytes(path, data, size=size, mtime_ns=mtime_ns)
+        )
+        return True
+
+    def _owns(self, path: Path) -> bool:
+        return path.parent.resolve() == self.folder.resolve()
+
+    def refresh(self) -> int:
+        """Synchronise the index with the folder and return the number of parsed files."""
+        if not self.folder.is_dir():
+            return 0
+        on_disk: dict[str, tuple[Path, tuple[int, int]]] = {}
+        with os.scandir(self.folder) as iterator:
+            for item in iterator:
+                lowered = item.name.lower()
+                if item.name.startswith("."):
+                    continue
+                try:
+                    if not item.is_file():
+                        continue
+                    if lowered.endswith(".json"):
+                        stat = item.stat()
+                        on_disk[item.name] = (
+                            Path(item.path),
+                            (stat.st_size, stat.st_mtime_ns),
+                        )
+                    elif lowered.endswith(ARCHIVE_SUFFIX):
+                        for record in open_session_archive(item.path).entries():
+                            reference = Path(archive_reference(item.path, record.name))
+                            on_disk[reference.name] = (
+                                reference,
+                                (record.size, record.mtime_ns),
+                            )
+                except (OSError, SessionArchiveError):
+                    continue
+
+        parsed = 0
+        with self._connect() as connection:
+            known = {
+                name: (size, mtime_ns, sha256)
+                for name, size, mtime_ns, sha256 in connection.execute(
+                    "SELECT name, size, mtime_ns, sha256 FROM sessions"
+                )
+            }
+            stale = [(name,) for name in known if name not in on_disk]
+            if stale:
+                connection.executemany("DELETE FROM sessions WHERE name = ?", stale)
+                connection.executemany("DELETE FROM offset_indexes WHERE name = ?", stale)
+            for name, (path, stamp) in on_disk.items():
+                if self._index_file(connection, path, stamp, known.get(name)):
+                    parsed += 1
+            connection.commit()
+        return parsed
+
+    def entries(
+        self,
+        *,
+        sort_by: str = "mtime",
+        descending: bool = True,
+        query: str = "",
+        compatible_only: bool = False,
+        limit: int | None = None,
+    ) -> list[CatalogEntry]:
+        """Return indexed entries without touching the session files."""
+        column = SORT_COLUMNS.get(sort_by)
+        if column is None:
+            raise ValueError(f"Unsupported catalog sort key: {sort_by!r}")
+        clauses: list[str] = []
+        parameters: list[Any] = []
+        needle = str(query or "").strip().lower()
+        if needle:
+            clauses.append(
+                "(lower(name) LIKE ? OR lower(models) LIKE ? OR lower(coalesce(app_version, '')) LIKE ?)"
+            )
+            parameters.extend([f"%{needle}%"] * 3)
+        if compatible_only:
+            clauses.append("compatible = 1")
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {column} {'DESC' if descending else 'ASC'}, name ASC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(max(0, int(limit)))
+        with self._connect() as connection:
+            return [self._row_to_entry(row) for row in connection.execute(sql, parameters)]
+
+    def entry_for(self, path: str | Path) -> CatalogEntry:
+        """Return an up-to-date entry for one file, re-indexing only that file."""
+        path = Path(path)
+        if not self._owns(path):
+            return summarize_session_file(path)
+        try:
+            stamp = session_source_stat(path)
+        except (OSError, SessionArchiveError) as exc:
+            return CatalogEntry(
+                path=path, size=0, mtime_ns=0, sha256="", compatible=False, error=str(exc)
+            )
+        with self._connect() as connection:
+            known = connection.execute(
+                "SELECT size, mtime_ns, sha256 FROM sessions WHERE name = ?", (path.name,)
+            ).fetchone()
+            self._index_file(connection, path, stamp, known)
+            connection.commit()
+            row = connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE name = ?", (path.name,)
+            ).fetchone()
+        if row is None:
+            return summarize_session_file(path)
+        return self._row_to_entry(row)
+
+    def load_offset_index(
+        self, path: str | Path, *, size: int, mtime_ns: int
+    ) -> dict[str, Any] | None:
+        """Return the cached byte-offset index for ``path`` if it is still current."""
+        path = Path(path)
+        if not self._owns(path):
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT offsets FROM offset_indexes WHERE name = ? AND size = ? AND mtime_ns = ?",
+                (path.name, size, mtime_ns),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def store_offset_index(self, path: str | Path, offsets: dict[str, Any]) -> None:
+        """Cache a byte-offset index built by :mod:`game.session_index`."""
+        path = Path(path)
+        if not self._owns(path):
+            return
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO offset_indexes (name, size, mtime_ns, offsets) VALUES (?, ?, ?, ?)",
+                (path.name, int(offsets["size"]), int(offsets["mtime_ns"]), json.dumps(offsets)),
+            )
+            connection.commit()
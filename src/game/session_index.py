@@ -0,0 +1,441 @@
+"""Byte-offset index and lazy round access for large saved sessions.
+
+``load_session_payload`` decodes and validates a whole session before the
+analyzer can show anything, which makes opening a multi-hour session slow and
+memory hungry. This module scans the file once (through ``mmap``) for the byte
+span of every game and round without decoding them, caches that index in the
+saved-session catalog, and afterwards decodes and validates only the rounds
+that are actually reviewed. Neighbouring rounds are decoded on a background
+thread so stepping through a session rarely waits on the parser.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import json
+import mmap
+from pathlib import Path
+import re
+import threading
+from typing import Any, Callable
+
+from game.session_schema import (
+    SESSION_SCHEMA_VERSION,
+    SESSION_TYPE,
+    SessionFormatError,
+    UnsupportedLegacySession,
+    validate_round_entry,
+)
+
+OFFSET_INDEX_VERSION = 1
+ROUND_CACHE_SIZE = 32
+
+ProgressCallback = Callable[[float], None]
+Span = tuple[int, int]
+
+_WHITESPACE = re.compile(rb"[ \t\r\n]*")
+_STRING_TAIL = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_CONTAINER_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]', re.S)
+_OPENERS = frozenset(b"[{")
+_SCALAR_END = re.compile(rb"[,\]}\s]")
+
+
+def _skip_whitespace(buf: Any, pos: int) -> int:
+    return _WHITESPACE.match(buf, pos).end()
+
+
+def _char(buf: Any, pos: int) -> bytes:
+    return bytes(buf[pos:pos + 1])
+
+
+def _string_end(buf: Any, pos: int) -> int:
+    match = _STRING_TAIL.match(buf, pos + 1)
+    if match is None:
+        raise SessionFormatError(f"Invalid JSON: unterminated string at byte {pos}")
+    return match.end()
+
+
+def _value_end(buf: Any, pos: int) -> int:
+    """Return the offset just past the JSON value starting at ``pos``."""
+    first = _char(buf, pos)
+    if first == b'"':
+        return _string_end(buf, pos)
+    if first in (b"{", b"["):
+        depth = 0
+        for match in _CONTAINER_TOKEN.finditer(buf, pos):
+            token = buf[match.start()]
+            if token == 0x22:
+                continue
+            depth += 1 if token in _OPENERS else -1
+            if depth == 0:
+                return match.end()
+        raise SessionFormatError(f"Invalid JSON: unterminated value at byte {pos}")
+    if not first:
+        raise SessionFormatError(f"Invalid JSON: missing value at byte {pos}")
+    match = _SCALAR_END.search(buf, pos)
+    return match.start() if match else len(buf)
+
+
+def _object_members(
+    buf: Any,
+    pos: int,
+    value_end: Callable[[Any, str, int], int] | None = None,
+) -> tuple[list[tuple[str, int, int]], int]:
+    """Return ``(key, start, end)`` for each member of the object at ``pos``."""
+    if _char(buf, pos) != b"{":
+        raise SessionFormatError(f"Invalid JSON: expected an object at byte {pos}")
+    members: list[tuple[str, int, int]] = []
+    cursor = _skip_whitespace(buf, pos + 1)
+    if _char(buf, cursor) == b"}":
+        return members, cursor + 1
+    while True:
+        if _char(buf, cursor) != b'"':
+            raise SessionFormatError(f"Invalid JSON: expected a key at byte {cursor}")
+        key_end = _string_end(buf, cursor)
+        key = json.loads(bytes(buf[cursor:key_end]))
+        cursor = _skip_whitespace(buf, key_end)
+        if _char(buf, cursor) != b":":
+            raise SessionFormatError(f"Invalid JSON: expected ':' at byte {cursor}")
+        start = _skip_whitespace(buf, cursor + 1)
+        end = value_end(buf, key, start) if value_end else _value_end(buf, start)
+        members.append((key, start, end))
+        cursor = _skip_whitespace(buf, end)
+        separator = _char(buf, cursor)
+        if separator == b"}":
+            return members, cursor + 1
+        if separator != b",":
+            raise SessionFormatError(f"Invalid JSON: expected ',' or '}}' at byte {cursor}")
+        cursor = _skip_whitespace(buf, cursor + 1)
+
+
+def _array_items(
+    buf: Any,
+    pos: int,
+    item_end: Callable[[Any, int], int] = _value_end,
+) -> tuple[list[Span], int]:
+    """Return ``(start, end)`` for each item of the array at ``pos``."""
+    if _char(buf, pos) != b"[":
+        raise SessionFormatError(f"Invalid JSON: expected an array at byte {pos}")
+    items: list[Span] = []
+    cursor = _skip_whitespace(buf, pos + 1)
+    if _char(buf, cursor) == b"]":
+        return items, cursor + 1
+    while True:
+        end = item_end(buf, cursor)
+        items.append((cursor, end))
+        cursor = _skip_whitespace(buf, end)
+        separator = _char(buf, cursor)
+        if separator == b"]":
+            return items, cursor + 1
+        if separator != b",":
+            raise SessionFormatError(f"Invalid JSON: expected ',' or ']' at byte {cursor}")
+        cursor = _skip_whitespace(buf, cursor + 1)
+
+
+@dataclass(frozen=True)
+class GameOffsets:
+    """Byte spans of one game's scalar fields and of each of its rounds."""
+
+    fields: tuple[tuple[str, int, int], ...]
+    rounds: tuple[Span, ...]
+
+
+@dataclass(frozen=True)
+class SessionOffsetIndex:
+    """Byte spans of a saved session, valid for one file size and mtime."""
+
+    size: int
+    mtime_ns: int
+    header: tuple[tuple[str, int, int], ...]
+    games: tuple[GameOffsets, ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": OFFSET_INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "header": [list(field) for field in self.header],
+            "games": [
+                {
+                    "fields": [list(field) for field in game.fields],
+                    "rounds": [list(span) for span in game.rounds],
+                }
+                for game in self.games
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "SessionOffsetIndex":
+        if not isinstance(data, dict) or data.get("version") != OFFSET_INDEX_VERSION:
+            raise ValueError("Unsupported offset index.")
+        return cls(
+            size=int(data["size"]),
+            mtime_ns=int(data["mtime_ns"]),
+            header=tuple((str(k), int(s), int(e)) for k, s, e in data["header"]),
+            games=tuple(
+                GameOffsets(
+                    fields=tuple((str(k), int(s), int(e)) for k, s, e in game["fields"]),
+                    rounds=tuple((int(s), int(e)) for s, e in game["rounds"]),
+                )
+                for game in data["games"]
+            ),
+        )
+
+
+def build_offset_index(
+    buf: Any,
+    *,
+    size: int,
+    mtime_ns: int = 0,
+    progress: ProgressCallback | None = None,
+) -> SessionOffsetIndex:
+    """Scan session bytes once and record where every game and round lives."""
+    start = _skip_whitespace(buf, 0)
+    first = _char(buf, start)
+    if first == b"[":
+        raise UnsupportedLegacySession(
+            "This saved session uses the legacy BatLLM format. Save a new session to use Game Analyzer."
+        )
+    if first != b"{":
+        raise SessionFormatError("Saved session must be a JSON object.")
+
+    games: list[GameOffsets] = []
+
+    def game_end(data: Any, pos: int) -> int:
+        rounds: list[Span] = []
+
+        def member_end(inner: Any, key: str, value_start: int) -> int:
+            if key != "rounds" or _char(inner, value_start) != b"[":
+                return _value_end(inner, value_start)
+            spans, end = _array_items(inner, value_start)
+            rounds.extend(spans)
+            return end
+
+        members, end = _object_members(data, pos, member_end)
+        games.append(
+            GameOffsets(
+                fields=tuple(member for member in members if member[0] != "rounds"),
+                rounds=tuple(rounds),
+            )
+        )
+        if progress is not None and size:
+            progress(min(1.0, end / size))
+        return end
+
+    def top_level_end(data: Any, key: str, pos: int) -> int:
+        if key == "games" and _char(data, pos) == b"[":
+            return _array_items(data, pos, game_end)[1]
+        return _value_end(data, pos)
+
+    members, _end = _object_members(buf, start, top_level_end)
+    if progress is not None:
+        progress(1.0)
+    return SessionOffsetIndex(
+        size=size,
+        mtime_ns=mtime_ns,
+        header=tuple(member for member in members if member[0] != "games"),
+        games=tuple(games),
+    )
+
+
+class LazySessionSource:
+    """Read-only view of a v2 session that decodes rounds on demand.
+
+    The source exposes the same information as a loaded payload dictionary,
+    but ``round()`` decodes and validates one round at a time from the memory
+    mapped file. Call :meth:`close` when the session is no longer displayed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        catalog: Any = None,
+        progress: ProgressCallback | None = None,
+        prefetch: bool = True,
+        cache_size: int = ROUND_CACHE_SIZE,
+    ):
+        self.path = Path(path)
+        self.catalog = catalog
+        self.on_round_loaded: Callable[[int, int], None] | None = None
+        self._cache: OrderedDict[tuple[int, int], dict[str, Any]] = OrderedDict()
+        self._cache_size = max(1, int(cache_size))
+        self._lock = threading.RLock()
+        self._pending: dict[tuple[int, int], Future] = {}
+        self._game_fields: dict[int, dict[str, Any]] = {}
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="batllm-session-prefetch")
+            if prefetch
+            else None
+        )
+        try:
+            with self.path.open("rb") as handle:
+                stat = self.path.stat()
+                if stat.st_size == 0:
+                    raise SessionFormatError("Invalid JSON: the file is empty")
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as exc:
+            self._shutdown_executor()
+            raise SessionFormatError(str(exc)) from exc
+        except SessionFormatError:
+            self._shutdown_executor()
+            raise
+
+        try:
+            self.index = self._load_index(stat.st_size, stat.st_mtime_ns, catalog, progress)
+            self.header = {key: self._decode(start, end) for key, start, end in self.index.header}
+            self._validate_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def _load_index(
+        self,
+        size: int,
+        mtime_ns: int,
+        catalog: Any,
+        progress: ProgressCallback | None,
+    ) -> SessionOffsetIndex:
+        if catalog is not None:
+            cached = catalog.load_offset_index(self.path, size=size, mtime_ns=mtime_ns)
+            if cached is not None:
+                try:
+                    index = SessionOffsetIndex.from_dict(cached)
+                except (KeyError, TypeError, ValueError):
+                    index = None
+                if index is not None:
+                    if progress is not None:
+                        progress(1.0)
+                    return index
+        index = build_offset_index(self._mmap, size=size, mtime_ns=mtime_ns, progress=progress)
+        if catalog is not None:
+            catalog.store_offset_index(self.path, index.to_dict())
+        return index
+
+    def _decode(self, start: int, end: int) -> Any:
+        try:
+            return json.loads(self._mmap[start:end])
+        except json.JSONDecodeError as exc:
+            raise SessionFormatError(f"Invalid JSON: {exc.msg}") from exc
+        except UnicodeDecodeError as exc:
+            raise SessionFormatError(f"Invalid JSON: {exc.reason}") from exc
+
+    def _validate_header(self) -> None:
+        if self.header.get("schema_version") != SESSION_SCHEMA_VERSION:
+            raise SessionFormatError("Unsupported schema_version.")
+        if self.header.get("session_type") != SESSION_TYPE:
+            raise SessionFormatError("Unsupported session_type.")
+        if not self.index.games:
+            raise SessionFormatError("Saved session must contain at least one game.")
+        for game_index, game in enumerate(self.index.games, start=1):
+            if not game.rounds:
+                raise SessionFormatError(f"Game {game_index} must contain at least one round.")
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        """Session-level fields (everything except ``games``)."""
+        return self.header
+
+    def game_count(self) -> int:
+        return len(self.index.games)
+
+    def round_count(self, game_index: int) -> int:
+        return len(self.index.games[game_index].rounds)
+
+    def game(self, game_index: int) -> dict[str, Any]:
+        """Return one game's own fields, without its rounds."""
+        with self._lock:
+            fields = self._game_fields.get(game_index)
+            if fields is None:
+                fields = {
+                    key: self._decode(start, end)
+                    for key, start, end in self.index.games[game_index].fields
+                }
+                self._game_fields[game_index] = fields
+            return fields
+
+    def peek_round(self, game_index: int, round_index: int) -> dict[str, Any] | None:
+        """Return a round only if it is already decoded; never touches the file."""
+        with self._lock:
+            return self._cache.get((game_index, round_index))
+
+    def round(self, game_index: int, round_index: int) -> dict[str, Any]:
+        """Decode (or return the cached) round and prefetch its neighbours."""
+        round_entry = self._load_round(game_index, round_index)
+        self.prefetch_around(game_index, round_index)
+        return round_entry
+
+    def _load_round(self, game_index: int, round_index: int) -> dict[str, Any]:
+        key = (game_index, round_index)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        start, end = self.index.games[game_index].rounds[round_index]
+        round_entry = validate_round_entry(
+            self._decode(start, end), game_index + 1, round_index + 1
+        )
+        with self._lock:
+            round_entry = self._cache.setdefault(key, round_entry)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return round_entry
+
+    def _neighbours(self, game_index: int, round_index: int) -> list[tuple[int, int]]:
+        neighbours: list[tuple[int, int]] = []
+        if round_index + 1 < self.round_count(game_index):
+            neighbours.append((game_index, round_index + 1))
+        elif game_index + 1 < self.game_count():
+            neighbours.append((game_index + 1, 0))
+        if round_index > 0:
+            neighbours.append((game_index, round_index - 1))
+        return neighbours
+
+    def prefetch_around(self, game_index: int, round_index: int) -> None:
+        """Decode the rounds next to ``(game_index, round_index)`` in the background."""
+        if self._executor is None:
+            return
+        for key in self._neighbours(game_index, round_index):
+            with self._lock:
+                if key in self._cache or key in self._pending:
+                    continue
+                try:
+                    future = self._executor.submit(self._prefetch, key)
+                except RuntimeError:
+                    return
+                self._pending[key] = future
+
+    def _prefetch(self, key: tuple[int, int]) -> None:
+        try:
+            self._load_round(*key)
+        except (SessionFormatError, ValueError):
+            return
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        callback = self.on_round_loaded
+        if callback is not None:
+            callback(*key)
+
+    def wait_for_prefetch(self) -> None:
+        """Block until queued prefetches have finished (used by tests and tools)."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result()
+
+    def _shutdown_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def close(self) -> None:
+        self.on_round_loaded = None
+        self._shutdown_executor()
+        mapped = getattr(self, "_mmap", None)
+        if mapped is not None and not mapped.closed:
+            mapped.close()
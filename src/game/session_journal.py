@@ -0,0 +1,407 @@
+"""Append-only journal of a schema-v3 research session, sealed on completion.
+
+Writing a session at the end of a run copies, validates and re-serialises all
+of it at once, and a crash before that loses every play. A
+:class:`SessionJournal` instead appends each record as it is finalised, one
+line per record::
+
+    <kind>\\t<canonical JSON>\\n
+
+where ``kind`` is ``session`` (the envelope header), ``game``, ``round``
+(a round header without its plays), ``play``, ``round_end`` or ``game_end``.
+Each record is checked when it is appended, and the play chain, play ids and
+sequence numbers are tracked as they go, so the journal never holds a play
+that would fail :func:`game.session_v3.validate_session_v3`.
+
+:meth:`SessionJournal.seal` writes the session file: the envelope, game and
+round headers are small and kept in memory, and each play's canonical bytes
+are copied from the journal without being parsed again. The file is the
+session's canonical JSON, so ``session_sha256`` is computed while the bytes
+are written. :func:`recover_session_journal` seals a journal left by an
+interrupted run, up to its last complete play.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, BinaryIO, Mapping
+
+from game.replay_engine import validate_state_map
+from game.session_v3 import (
+    SessionV3Error,
+    session_header_v3,
+    validate_play_v3,
+    validate_round_start_v3,
+)
+from game.trace_contract import PrivacyMode, canonical_json, utc_now_iso, verify_play_hashes
+
+JOURNAL_SUFFIX = ".journal"
+
+# Stands in for a list while a header is serialised; the list is spliced in.
+_SLOT = "\x00slot\x00"
+_SLOT_JSON = json.dumps(_SLOT)
+
+
+class SessionJournalError(SessionV3Error):
+    """Raised when a journal record is out of order or a journal cannot be sealed."""
+
+
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise SessionJournalError(message)
+
+
+def _split_slot(value: Mapping[str, Any], key: str) -> tuple[bytes, bytes]:
+    """Return the canonical bytes of ``value`` before and after its ``key`` list."""
+    parts = canonical_json({**value, key: _SLOT}).split(_SLOT_JSON)
+    _require(len(parts) == 2, f"Cannot place {key} in the canonical session.")
+    return parts[0].encode("utf-8"), parts[1].encode("utf-8")
+
+
+def _check_state(state: Any, label: str) -> None:
+    _require(isinstance(state, dict), f"{label} must be an object.")
+    try:
+        validate_state_map(state, label, require_id=True)
+    except (OverflowError, TypeError, ValueError) as exc:
+        raise SessionJournalError(str(exc)) from exc
+
+
+class _Round:
+    __slots__ = ("header", "plays", "end")
+
+    def __init__(self, header: dict[str, Any]) -> None:
+        self.header = header
+        # (offset, length) of each play's canonical JSON in the journal.
+        self.plays: list[tuple[int, int]] = []
+        self.end: dict[str, Any] | None = None
+
+
+class _Game:
+    __slots__ = ("header", "rounds", "end")
+
+    def __init__(self, header: dict[str, Any]) -> None:
+        self.header = header
+        self.rounds: list[_Round] = []
+        self.end: dict[str, Any] | None = None
+
+
+class SessionJournal:
+    """Stream a research session's records to an append-only file."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        app_version: str,
+        privacy_mode: PrivacyMode | str = PrivacyMode.FULL,
+        git_commit: str | None = None,
+        model_provenance: Mapping[str, Any] | None = None,
+        runtime: Mapping[str, Any] | None = None,
+        session_id: str | None = None,
+        created_at: str | None = None,
+        fsync: bool = True,
+    ) -> None:
+        self._init_state(Path(path), fsync)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("xb")
+        self._apply_session(
+            session_header_v3(
+                app_version=app_version,
+                privacy_mode=privacy_mode,
+                git_commit=git_commit,
+                model_provenance=model_provenance,
+                runtime=runtime,
+                session_id=session_id,
+                created_at=created_at,
+            )
+        )
+        self._write("session", self.header)
+
+    def _init_state(self, path: Path, fsync: bool) -> None:
+        self.path = path
+        self.fsync = fsync
+        self.header: dict[str, Any] = {}
+        self.privacy = PrivacyMode.FULL
+        self._handle: BinaryIO | None = None
+        self._offset = 0
+        self._games: list[_Game] = []
+        self._last_play: dict[str, Any] | None = None
+        self._previous_play_sha256: str | None = None
+        self._play_ids: set[str] = set()
+        self._sequences: set[int] = set()
+
+    @property
+    def play_count(self) -> int:
+        return len(self._play_ids)
+
+    @property
+    def previous_play_sha256(self) -> str | None:
+        """The ``play_sha256`` the next play must chain to."""
+        return self._previous_play_sha256
+
+    def _write(self, kind: str, value: Mapping[str, Any]) -> tuple[int, int]:
+        """Append one record and return the offset and length of its JSON."""
+        _require(self._handle is not None, "The journal is closed.")
+        assert self._handle is not None
+        text = canonical_json(value).encode("utf-8")
+        self._handle.write(kind.encode("ascii") + b"\t" + text + b"\n")
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+        start = self._offset + len(kind) + 1
+        self._offset = start + len(text) + 1
+        return start, len(text)
+
+    def _open_game(self) -> _Game | None:
+        if self._games and self._games[-1].end is None:
+            return self._games[-1]
+        return None
+
+    def _open_round(self) -> _Round | None:
+        game = self._open_game()
+        if game is not None and game.rounds and game.rounds[-1].end is None:
+            return game.rounds[-1]
+        return None
+
+    # Each ``_apply_*`` checks a record and adds it to the in-memory index;
+    # appends and recovery share them.
+
+    def _apply_session(self, header: dict[str, Any]) -> None:
+        _require(not self.header, "The journal already has a session header.")
+        _require(
+            header.get("privacy_mode") in {mode.value for mode in PrivacyMode},
+            "privacy_mode is invalid.",
+        )
+        _require("games" not in header, "The session header must not hold games.")
+        self.header = header
+        self.privacy = PrivacyMode(header["privacy_mode"])
+
+    def _apply_game(self, header: dict[str, Any]) -> None:
+        _require(bool(self.header), "The journal has no session header.")
+        _require(self._open_game() is None, "A game is already open.")
+        _require("rounds" not in header, "A game header must not hold rounds.")
+        self._games.append(_Game(header))
+
+    def _apply_round(self, header: dict[str, Any]) -> None:
+        game = self._open_game()
+        _require(game is not None, "No game is open.")
+        _require(self._open_round() is None, "A round is already open.")
+        _require("plays" not in header, "A round header must not hold plays.")
+        assert game is not None
+        validate_round_start_v3(header, self.privacy, f"Round {len(game.rounds) + 1}")
+        game.rounds.append(_Round(header))
+
+    def _apply_play(self, play: dict[str, Any], span: tuple[int, int] | None) -> None:
+        round_entry = self._open_round()
+        _require(round_entry is not None, "No round is open.")
+        assert round_entry is not None
+        label = f"Play {self.play_count + 1}"
+        validate_play_v3(play, self.privacy, label)
+        _require(
+            play["previous_play_sha256"] == self._previous_play_sha256,
+            f"{label} does not chain to the previous play.",
+        )
+        _require(play["play_id"] not in self._play_ids, f"Duplicate play_id: {play['play_id']}")
+        _require(play["sequence"] not in self._sequences, f"Duplicate sequence: {play['sequence']}")
+        if span is None:
+            span = self._write("play", play)
+        round_entry.plays.append(span)
+        self._play_ids.add(play["play_id"])
+        self._sequences.add(play["sequence"])
+        self._previous_play_sha256 = play["play_sha256"]
+        self._last_play = play
+
+    def _apply_round_end(self, end: dict[str, Any]) -> None:
+        round_entry = self._open_round()
+        _require(round_entry is not None, "No round is open.")
+        assert round_entry is not None
+        _require(bool(round_entry.plays), "A round needs at least one play.")
+        _check_state(end.get("final_state"), "Round final_state")
+        round_entry.end = end
+
+    def _apply_game_end(self, end: dict[str, Any]) -> None:
+        game = self._open_game()
+        _require(game is not None, "No game is open.")
+        assert game is not None
+        _require(self._open_round() is None, "A round is still open.")
+        _require(bool(game.rounds), "A game needs at least one round.")
+        _check_state(end.get("final_state"), "Game final_state")
+        game.end = end
+
+    def start_game(self, *, started_at: str | None = None) -> None:
+        header = {"game_id": len(self._games) + 1, "started_at": started_at or utc_now_iso()}
+        self._apply_game(header)
+        self._write("game", header)
+
+    def start_round(self, header: Mapping[str, Any]) -> None:
+        """Record a round's header (everything but ``plays``, ``ended_at`` and ``final_state``).
+
+        Opens a game, starting when the round does, if none is open.
+        """
+        header = {key: value for key, value in header.items() if key != "plays"}
+        if self._open_game() is None:
+            self.start_game(started_at=header.get("started_at"))
+        self._apply_round(json.loads(canonical_json(header)))
+        self._write("round", header)
+
+    def append_play(self, play: Mapping[str, Any]) -> None:
+        """Record a play finalised by :func:`game.trace_contract.finalise_play_hash`."""
+        # Checked in its canonical form, as it will be read back.
+        self._apply_play(json.loads(canonical_json(play)), None)
+
+    def end_round(self, *, final_state: Mapping[Any, Any], ended_at: str | None = None) -> None:
+        end = json.loads(
+            canonical_json({"ended_at": ended_at or utc_now_iso(), "final_state": final_state})
+        )
+        self._apply_round_end(end)
+        self._write("round_end", end)
+
+    def end_game(self, *, final_state: Mapping[Any, Any]) -> None:
+        end = json.loads(canonical_json({"final_state": final_state}))
+        self._apply_game_end(end)
+        self._write("game_end", end)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def seal(self, output: str | Path) -> Path:
+        """Write the session to ``output`` and return its path.
+
+        Every game and round must be closed. The journal is left in place.
+        """
+        _require(bool(self._games), "games must be a non-empty list.")
+        _require(self._open_game() is None, "A game is still open.")
+        return self._seal(output)
+
+    def _seal(self, output: str | Path) -> Path:
+        target = Path(output)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temporary = tempfile.mkstemp(prefix=".batllm-v3-", suffix=".tmp", dir=target.parent)
+        try:
+            with os.fdopen(fd, "wb") as handle, self.path.open("rb") as source:
+
+                def emit(data: bytes) -> None:
+                    digest.update(data)
+                    handle.write(data)
+
+                before, after = _split_slot(self.header, "games")
+                emit(before + b"[")
+                for game_index, game in enumerate(self._games):
+                    if game_index:
+                        emit(b",")
+                    self._emit_game(game, source, emit)
+                emit(b"]")
+                # session_sha256 sorts after games, so it goes in the tail,
+                # which is hashed without it and then written with it.
+                digest.update(after)
+                sealed_before, sealed_after = _split_slot(
+                    {**self.header, "session_sha256": digest.hexdigest()}, "games"
+                )
+                _require(sealed_before == before, "session_sha256 must follow games.")
+                handle.write(sealed_after + b"\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temporary, target)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+        return target
+
+    @staticmethod
+    def _emit_game(game: _Game, source: BinaryIO, emit: Any) -> None:
+        assert game.end is not None
+        before, after = _split_slot({**game.header, **game.end}, "rounds")
+        emit(before + b"[")
+        for round_index, round_entry in enumerate(game.rounds):
+            assert round_entry.end is not None
+            round_before, round_after = _split_slot(
+                {**round_entry.header, **round_entry.end}, "plays"
+            )
+            emit((b"," if round_index else b"") + round_before + b"[")
+            for play_index, (offset, length) in enumerate(round_entry.plays):
+                source.seek(offset)
+                emit((b"," if play_index else b"") + source.read(length))
+            emit(b"]" + round_after)
+        emit(b"]" + after)
+
+    @classmethod
+    def _read(cls, path: str | Path) -> tuple["SessionJournal", int]:
+        """Index the valid records of a journal; return it and the bytes ignored."""
+        journal = cls.__new__(cls)
+        journal._init_state(Path(path), fsync=False)
+        appliers = {
+            "session": journal._apply_session,
+            "game": journal._apply_game,
+            "round": journal._apply_round,
+            "round_end": journal._apply_round_end,
+            "game_end": journal._apply_game_end,
+        }
+        with journal.path.open("rb") as handle:
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break  # A record cut short by the interruption.
+                kind, _, text = line[:-1].partition(b"\t")
+                try:
+                    record = json.loads(text)
+                    _require(isinstance(record, dict), "A record must be an object.")
+                    if kind == b"play":
+                        ok, errors = verify_play_hashes(record, journal._previous_play_sha256)
+                        _require(ok, ", ".join(errors))
+                        journal._apply_play(record, (journal._offset + len(kind) + 1, len(text)))
+                    else:
+                        _require(kind.decode("ascii", "replace") in appliers, "Unknown record.")
+                        appliers[kind.decode("ascii")](record)
+                except (ValueError, KeyError, TypeError):
+                    break  # Anything after a damaged record is not trusted.
+                journal._offset += len(line)
+        return journal, journal.path.stat().st_size - journal._offset
+
+    def _close_interrupted(self) -> None:
+        """Close what an interruption left open, from the last complete play."""
+        game = self._open_game()
+        if game is None:
+            return
+        round_entry = self._open_round()
+        if round_entry is not None:
+            if round_entry.plays:
+                assert self._last_play is not None
+                round_entry.end = {
+                    "ended_at": self._last_play["request_completed_at"],
+                    "final_state": self._last_play["post_state"],
+                }
+            else:
+                game.rounds.pop()
+        if game.rounds:
+            last_round_end = game.rounds[-1].end
+            assert last_round_end is not None
+            game.end = {"final_state": last_round_end["final_state"]}
+        else:
+            self._games.pop()
+
+
+def recover_session_journal(journal: str | Path, output: str | Path) -> Path:
+    """Seal the complete plays of an interrupted journal into ``output``.
+
+    Records after the last one that is complete and valid are ignored; a round
+    left open ends with its last play, and empty rounds and games are dropped.
+    ``runtime_provenance.journal_recovery`` records what was kept.
+    """
+    recovered, ignored = SessionJournal._read(journal)  # pylint: disable=protected-access
+    _require(bool(recovered.header), f"{journal} has no session header.")
+    recovered._close_interrupted()  # pylint: disable=protected-access
+    _require(recovered.play_count > 0, f"{journal} holds no complete play.")
+    recovered.header["runtime_provenance"] = {
+        **recovered.header["runtime_provenance"],
+        "journal_recovery": {"plays": recovered.play_count, "ignored_bytes": ignored},
+    }
+    return recovered.seal(output)
@@ -0,0 +1,455 @@
+"""Cross-session query index over saved sessions and research traces.
+
+The index is a SQLite database holding one row per play (as flattened by
+:mod:`game.play_table`, so commands and event types are the ones the replay
+engine and the analyzer report) plus the prompt commitments of every round.
+Rows are keyed by source file and are rebuilt only for files whose size or
+modification time changed, so questions such as "plays where a model's shot
+was blocked while its health was below 10" or "prompts reused across sessions"
+are answered without opening the session files again.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import math
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+from game.play_table import (
+    PlayTableError,
+    flatten_session,
+    iter_session_files,
+    load_any_session,
+)
+from game.replay_engine import REPLAY_EVENT_TYPES, parse_model_response
+from game.session_schema import SESSION_TYPE
+from game.trace_contract import sha256_text
+
+QUERY_INDEX_SCHEMA_VERSION = 1
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sources (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        schema_version INTEGER,
+        error TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS plays (
+        id INTEGER PRIMARY KEY,
+        source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+        game INTEGER NOT NULL,
+        round INTEGER NOT NULL,
+        turn INTEGER NOT NULL,
+        sequence INTEGER NOT NULL,
+        bot INTEGER NOT NULL,
+        command TEXT NOT NULL,
+        model TEXT NOT NULL,
+        prompt_sha256 TEXT,
+        health_before REAL,
+        health_after REAL,
+        latency_ms REAL,
+        attempts INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS play_events (
+        play_id INTEGER NOT NULL REFERENCES plays(id) ON DELETE CASCADE,
+        event_type TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS round_prompts (
+        source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+        game INTEGER NOT NULL,
+        round INTEGER NOT NULL,
+        bot INTEGER NOT NULL,
+        prompt_sha256 TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS plays_command ON plays(command)",
+    "CREATE INDEX IF NOT EXISTS plays_model ON plays(model)",
+    "CREATE INDEX IF NOT EXISTS plays_bot ON plays(bot)",
+    "CREATE INDEX IF NOT EXISTS plays_prompt ON plays(prompt_sha256)",
+    "CREATE INDEX IF NOT EXISTS plays_source ON plays(source_id)",
+    "CREATE INDEX IF NOT EXISTS play_events_type ON play_events(event_type, play_id)",
+    "CREATE INDEX IF NOT EXISTS play_events_play ON play_events(play_id)",
+    "CREATE INDEX IF NOT EXISTS round_prompts_hash ON round_prompts(prompt_sha256)",
+    "CREATE INDEX IF NOT EXISTS round_prompts_source ON round_prompts(source_id)",
+)
+_TABLES = ("round_prompts", "play_events", "plays", "sources")
+
+
+@dataclass(frozen=True)
+class PlayMatch:
+    """One indexed play returned by :meth:`SessionQueryIndex.plays`."""
+
+    path: Path
+    game: int
+    round: int
+    turn: int
+    sequence: int
+    bot: int
+    command: str
+    events: tuple[str, ...]
+    model: str
+    prompt_sha256: str | None
+    health_before: float | None
+    health_after: float | None
+    latency_ms: float | None
+    attempts: int | None
+
+
+@dataclass(frozen=True)
+class PromptOccurrence:
+    path: Path
+    game: int
+    round: int
+    bot: int
+
+
+@dataclass(frozen=True)
+class SharedPrompt:
+    """A prompt commitment that appears in rounds of several sessions."""
+
+    prompt_sha256: str
+    session_count: int
+    occurrences: tuple[PromptOccurrence, ...]
+
+
+def normalize_command_filter(command: str) -> str:
+    """Normalise a command filter with the gameplay grammar (``c90`` -> ``C90.0``)."""
+    text = str(command or "").strip()
+    if text.upper() == "ERR":
+        return "ERR"
+    parsed = parse_model_response(text)
+    if not parsed.valid:
+        raise ValueError(f"Not a BatLLM command: {command!r}")
+    return parsed.normalized_cmd
+
+
+def _protected_sha(value: Any) -> str | None:
+    if isinstance(value, Mapping):
+        digest = value.get("sha256")
+        return str(digest) if digest else None
+    if isinstance(value, str):
+        return sha256_text(value)
+    return None
+
+
+def _round_prompts(payload: Mapping[str, Any]) -> list[tuple[int, int, int, str]]:
+    """Return ``(game, round, bot, sha256)`` for every recorded round prompt."""
+    prompts: list[tuple[int, int, int, str]] = []
+    for game_index, game in enumerate(payload.get("games", []), start=1):
+        for round_index, round_entry in enumerate(game.get("rounds", []), start=1):
+            for prompt in round_entry.get("prompts", []) or []:
+                if not isinstance(prompt, Mapping):
+                    continue
+                digest = _protected_sha(prompt.get("prompt"))
+                if digest is None:
+                    continue
+                try:
+                    bot = int(prompt.get("bot_id"))
+                except (TypeError, ValueError):
+                    continue
+                prompts.append((game_index, round_index, bot, digest))
+    return prompts
+
+
+def _play_prompt_hashes(payload: Mapping[str, Any]) -> list[str | None]:
+    """Return the prompt commitment behind each play, in flattening order."""
+    hashes: list[str | None] = []
+    v2 = payload.get("session_type") == SESSION_TYPE
+    for game in payload.get("games", []):
+        for round_entry in game.get("rounds", []):
+            if v2:
+                by_bot = {}
+                for prompt in round_entry.get("prompts", []) or []:
+                    if isinstance(prompt, Mapping):
+                        by_bot[str(prompt.get("bot_id"))] = _protected_sha(prompt.get("prompt"))
+                for turn in round_entry.get("turns", []):
+                    for play in turn.get("plays", []) or []:
+                        hashes.append(by_bot.get(str(play.get("bot_id"))))
+            else:
+                for play in round_entry.get("plays", []):
+                    hashes.append(_protected_sha(play.get("human_prompt")))
+    return hashes
+
+
+def _optional_float(value: Any) -> float | None:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return float(value)
+
+
+class SessionQueryIndex:
+    """Incrementally maintained SQLite index of plays across many sessions."""
+
+    def __init__(self, index_path: str | Path):
+        self.index_path = Path(index_path)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.index_path, timeout=5.0)
+            try:
+                connection.execute("PRAGMA foreign_keys = ON")
+                self._prepare(connection)
+                with connection:
+                    yield connection
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _prepare(connection: sqlite3.Connection) -> None:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != QUERY_INDEX_SCHEMA_VERSION:
+            for table in _TABLES:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.execute(f"PRAGMA user_version = {QUERY_INDEX_SCHEMA_VERSION}")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+
+    def _index_source(self, connection: sqlite3.Connection, path: Path, stat: os.stat_result) -> None:
+        connection.execute("DELETE FROM sources WHERE path = ?", (str(path),))
+        try:
+            payload = load_any_session(path)
+            columns = flatten_session(payload, path.stem)
+        except (PlayTableError, OverflowError, TypeError, ValueError) as exc:
+            connection.execute(
+                "INSERT INTO sources (path, size, mtime_ns, error) VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, str(exc) or type(exc).__name__),
+            )
+            return
+
+        source_id = connection.execute(
+            "INSERT INTO sources (path, size, mtime_ns, schema_version) VALUES (?, ?, ?, ?)",
+            (str(path), stat.st_size, stat.st_mtime_ns, payload.get("schema_version")),
+        ).lastrowid
+        prompt_hashes = _play_prompt_hashes(payload)
+        for index in range(len(columns["sequence"])):
+            play_id = connection.execute(
+                """
+                INSERT INTO plays (
+                    source_id, game, round, turn, sequence, bot, command, model,
+                    prompt_sha256, health_before, health_after, latency_ms, attempts
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    source_id,
+                    columns["game"][index],
+                    columns["round"][index],
+                    columns["turn"][index],
+                    columns["sequence"][index],
+                    columns["bot"][index],
+                    columns["command"][index],
+                    columns["model"][index],
+                    prompt_hashes[index] if index < len(prompt_hashes) else None,
+                    _optional_float(columns["health_before"][index]),
+                    _optional_float(columns["health_after"][index]),
+                    _optional_float(columns["latency_ms"][index]),
+                    columns["attempts"][index] if columns["attempts"][index] >= 0 else None,
+                ),
+            ).lastrowid
+            event_types = {event for event in columns["events"][index].split("|") if event}
+            connection.executemany(
+                "INSERT INTO play_events (play_id, event_type) VALUES (?, ?)",
+                [(play_id, event) for event in sorted(event_types)],
+            )
+        connection.executemany(
+            "INSERT INTO round_prompts (source_id, game, round, bot, prompt_sha256) VALUES (?, ?, ?, ?, ?)",
+            [(source_id, *prompt) for prompt in _round_prompts(payload)],
+        )
+
+    def refresh(self, paths: Iterable[str | Path]) -> int:
+        """Index new or changed session files and drop removed ones.
+
+        ``paths`` may mix files and folders. Sources previously indexed from a
+        listed folder are removed when the file no longer exists. Returns the
+        number of files (re)indexed.
+        """
+        paths = [Path(path) for path in paths]
+        on_disk: dict[str, tuple[Path, os.stat_result]] = {}
+        for path in iter_session_files(paths):
+            try:
+                resolved = path.resolve()
+                on_disk[str(resolved)] = (resolved, resolved.stat())
+            except OSError:
+                continue
+        folders = [str(path.resolve()) for path in paths if path.is_dir()]
+
+        indexed = 0
+        with self._connect() as connection:
+            known = {
+                path: (size, mtime_ns)
+                for path, size, mtime_ns in connection.execute(
+                    "SELECT path, size, mtime_ns FROM sources"
+                )
+            }
+            for known_path in known:
+                if known_path in on_disk:
+                    continue
+                removed = not Path(known_path).exists()
+                if removed or str(Path(known_path).parent) in folders:
+                    connection.execute("DELETE FROM sources WHERE path = ?", (known_path,))
+            for key, (path, stat) in on_disk.items():
+                if known.get(key) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                self._index_source(connection, path, stat)
+                indexed += 1
+        return indexed
+
+    def sources(self) -> list[tuple[Path, str]]:
+        """Return every indexed file with its indexing error ('' when valid)."""
+        with self._connect() as connection:
+            return [
+                (Path(path), error)
+                for path, error in connection.execute("SELECT path, error FROM sources ORDER BY path")
+            ]
+
+    def plays(
+        self,
+        *,
+        model: str | None = None,
+        command: str | None = None,
+        event: str | None = None,
+        events: Sequence[str] = (),
+        bot: int | None = None,
+        prompt_sha256: str | None = None,
+        health_below: float | None = None,
+        health_at_least: float | None = None,
+        session: str | None = None,
+        limit: int | None = None,
+    ) -> list[PlayMatch]:
+        """Return plays matching every given filter.
+
+        ``event``/``events`` match replay event types (for example
+        ``shield_block``); every listed type must occur in the play. Health
+        filters apply to the acting bot's health before the play.
+        """
+        wanted_events = [event] if event else []
+        wanted_events.extend(events)
+        unknown = [name for name in wanted_events if name not in REPLAY_EVENT_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown replay event types: {', '.join(sorted(unknown))}")
+
+        clauses: list[str] = []
+        parameters: list[Any] = []
+        if model:
+            clauses.append("plays.model = ?")
+            parameters.append(model)
+        if command:
+            clauses.append("plays.command = ?")
+            parameters.append(normalize_command_filter(command))
+        if bot is not None:
+            clauses.append("plays.bot = ?")
+            parameters.append(int(bot))
+        if prompt_sha256:
+            clauses.append("plays.prompt_sha256 = ?")
+            parameters.append(prompt_sha256)
+        if health_below is not None:
+            clauses.append("plays.health_before < ?")
+            parameters.append(float(health_below))
+        if health_at_least is not None:
+            clauses.append("plays.health_before >= ?")
+            parameters.append(float(health_at_least))
+        if session:
+            clauses.append("sources.path LIKE ?")
+            parameters.append(f"%{session}%")
+        for name in dict.fromkeys(wanted_events):
+            clauses.append(
+                "EXISTS (SELECT 1 FROM play_events WHERE play_events.play_id = plays.id "
+                "AND play_events.event_type = ?)"
+            )
+            parameters.append(name)
+
+        sql = (
+            "SELECT sources.path, plays.id, plays.game, plays.round, plays.turn, plays.sequence, "
+            "plays.bot, plays.command, plays.model, plays.prompt_sha256, plays.health_before, "
+            "plays.health_after, plays.latency_ms, plays.attempts "
+            "FROM plays JOIN sources ON sources.id = plays.source_id"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY sources.path, plays.game, plays.round, plays.sequence"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(max(0, int(limit)))
+
+        with self._connect() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+            play_events: dict[int, list[str]] = {}
+            ids = [row[1] for row in rows]
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for play_id, event_type in connection.execute(
+                    f"SELECT play_id, event_type FROM play_events WHERE play_id IN ({placeholders})",
+                    chunk,
+                ):
+                    play_events.setdefault(play_id, []).append(event_type)
+
+        return [
+            PlayMatch(
+                path=Path(row[0]),
+                game=row[2],
+                round=row[3],
+                turn=row[4],
+                sequence=row[5],
+                bot=row[6],
+                command=row[7],
+                events=tuple(sorted(play_events.get(row[1], ()))),
+                model=row[8],
+                prompt_sha256=row[9],
+                health_before=row[10],
+                health_after=row[11],
+                latency_ms=row[12],
+                attempts=row[13],
+            )
+            for row in rows
+        ]
+
+    def shared_prompts(self, *, min_sessions: int = 2) -> list[SharedPrompt]:
+        """Return round prompts whose hash appears in at least ``min_sessions`` files."""
+        with self._connect() as connection:
+            digests = [
+                (digest, count)
+                for digest, count in connection.execute(
+                    """
+                    SELECT prompt_sha256, COUNT(DISTINCT source_id) AS sessions
+                    FROM round_prompts
+                    GROUP BY prompt_sha256
+                    HAVING sessions >= ?
+                    ORDER BY sessions DESC, prompt_sha256
+                    """,
+                    (max(1, int(min_sessions)),),
+                )
+            ]
+            shared: list[SharedPrompt] = []
+            for digest, count in digests:
+                occurrences = tuple(
+                    PromptOccurrence(path=Path(path), game=game, round=round_number, bot=bot)
+                    for path, game, round_number, bot in connection.execute(
+                        """
+                        SELECT sources.path, round_prompts.game, round_prompts.round, round_prompts.bot
+                        FROM round_prompts JOIN sources ON sources.id = round_prompts.source_id
+                        WHERE round_prompts.prompt_sha256 = ?
+                        ORDER BY sources.path, round_prompts.game, round_prompts.round, round_prompts.bot
+                        """,
+                        (digest,),
+                    )
+                )
+                shared.append(SharedPrompt(prompt_sha256=digest, session_count=count, occurrences=occurrences))
+        return shared
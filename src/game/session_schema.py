@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Any
 
 from game.replay_engine import GameplaySettingsSnapshot, validate_state_map
+from game.session_archive import SessionArchiveError, read_session_bytes
 
 SESSION_SCHEMA_VERSION = 2
 SESSION_TYPE = "batllm_saved_session"
@@ -45,6 +46,55 @@ def _ensure(condition: bool, message: str) -> None:
         raise SessionFormatError(message)
 
 
+def validate_round_entry(round_entry: Any, game_index: int, round_index: int) -> dict[str, Any]:
+    """Validate one saved round; ``game_index`` and ``round_index`` are 1-based labels."""
+    _ensure(isinstance(round_entry, dict),
+            f"Game {game_index} round {round_index} must be an object.")
+    _ensure(
+        isinstance(round_entry.get("gameplay_settings_snapshot"), dict),
+        f"Game {game_index} round {round_index} is missing gameplay_settings_snapshot.",
+    )
+    _ensure(
+        isinstance(round_entry.get("initial_state"), dict),
+        f"Game {game_index} round {round_index} is missing initial_state.",
+    )
+    try:
+        GameplaySettingsSnapshot.from_mapping(
+            round_entry["gameplay_settings_snapshot"]
+        )
+        validate_state_map(
+            round_entry["initial_state"],
+            f"Game {game_index} round {round_index} initial_state",
+            require_id=True,
+        )
+    except (OverflowError, TypeError, ValueError) as exc:
+        raise SessionFormatError(str(exc)) from exc
+    turns = round_entry.get("turns")
+    _ensure(isinstance(turns, list) and bool(turns),
+            f"Game {game_index} round {round_index} must contain at least one turn.")
+    for turn_index, turn in enumerate(turns, start=1):
+        _ensure(isinstance(turn, dict), f"Turn {turn_index} must be an object.")
+        _ensure(isinstance(turn.get("pre_state"), dict),
+                f"Turn {turn_index} missing pre_state.")
+        _ensure(isinstance(turn.get("post_state"), dict),
+                f"Turn {turn_index} missing post_state.")
+        _ensure(isinstance(turn.get("plays"), list), f"Turn {turn_index} missing plays.")
+        try:
+            validate_state_map(
+                turn["pre_state"],
+                f"Game {game_index} round {round_index} turn {turn_index} pre_state",
+                require_id=True,
+            )
+            validate_state_map(
+                turn["post_state"],
+                f"Game {game_index} round {round_index} turn {turn_index} post_state",
+                require_id=True,
+            )
+        except (OverflowError, TypeError, ValueError) as exc:
+            raise SessionFormatError(str(exc)) from exc
+    return round_entry
+
+
 def validate_session_payload(payload: Any) -> dict[str, Any]:
     """Validate and return a v2 BatLLM saved-session payload."""
     if isinstance(payload, list):
@@ -64,67 +114,35 @@ def validate_session_payload(payload: Any) -> dict[str, Any]:
         rounds = game.get("rounds")
         _ensure(isinstance(rounds, list) and bool(rounds), f"Game {game_index} must contain at least one round.")
         for round_index, round_entry in enumerate(rounds, start=1):
-            _ensure(isinstance(round_entry, dict),
-                    f"Game {game_index} round {round_index} must be an object.")
-            _ensure(
-                isinstance(round_entry.get("gameplay_settings_snapshot"), dict),
-                f"Game {game_index} round {round_index} is missing gameplay_settings_snapshot.",
-            )
-            _ensure(
-                isinstance(round_entry.get("initial_state"), dict),
-                f"Game {game_index} round {round_index} is missing initial_state.",
-            )
-            try:
-                GameplaySettingsSnapshot.from_mapping(
-                    round_entry["gameplay_settings_snapshot"]
-                )
-                validate_state_map(
-                    round_entry["initial_state"],
-                    f"Game {game_index} round {round_index} initial_state",
-                    require_id=True,
-                )
-            except (OverflowError, TypeError, ValueError) as exc:
-                raise SessionFormatError(str(exc)) from exc
-            turns = round_entry.get("turns")
-            _ensure(isinstance(turns, list) and bool(turns),
-                    f"Game {game_index} round {round_index} must contain at least one turn.")
-            for turn_index, turn in enumerate(turns, start=1):
-                _ensure(isinstance(turn, dict), f"Turn {turn_index} must be an object.")
-                _ensure(isinstance(turn.get("pre_state"), dict),
-                        f"Turn {turn_index} missing pre_state.")
-                _ensure(isinstance(turn.get("post_state"), dict),
-                        f"Turn {turn_index} missing post_state.")
-                _ensure(isinstance(turn.get("plays"), list), f"Turn {turn_index} missing plays.")
-                try:
-                    validate_state_map(
-                        turn["pre_state"],
-                        f"Game {game_index} round {round_index} turn {turn_index} pre_state",
-                        require_id=True,
-                    )
-                    validate_state_map(
-                        turn["post_state"],
-                        f"Game {game_index} round {round_index} turn {turn_index} post_state",
-                        require_id=True,
-                    )
-                except (OverflowError, TypeError, ValueError) as exc:
-                    raise SessionFormatError(str(exc)) from exc
+            validate_round_entry(round_entry, game_index, round_index)
 
     return payload
 
 
-def load_session_payload(path: str | Path) -> dict[str, Any]:
-    """Read and validate a saved-session payload."""
-    path = Path(path)
+def parse_session_payload(data: str | bytes) -> dict[str, Any]:
+    """Decode and validate saved-session JSON that has already been read."""
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = json.loads(data)
     except json.JSONDecodeError as exc:
         raise SessionFormatError(f"Invalid JSON: {exc.msg}") from exc
-    except OSError as exc:
-        raise SessionFormatError(str(exc)) from exc
+    except UnicodeDecodeError as exc:
+        raise SessionFormatError(f"Invalid JSON: {exc.reason}") from exc
 
     return validate_session_payload(payload)
 
 
+def load_session_payload(path: str | Path) -> dict[str, Any]:
+    """Read and validate a saved-session file or ``archive.pack#entry`` payload."""
+    try:
+        data = read_session_bytes(path).decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise SessionFormatError(f"Invalid JSON: {exc.reason}") from exc
+    except (OSError, SessionArchiveError) as exc:
+        raise SessionFormatError(str(exc)) from exc
+
+    return parse_session_payload(data)
+
+
 def summarize_session_payload(payload: dict[str, Any]) -> dict[str, Any]:
     """Return a small preview summary for analyzer UIs."""
     games = payload.get("games", [])
@@ -134,13 +152,25 @@ def summarize_session_payload(payload: dict[str, Any]) -> dict[str, Any]:
         for game in games
         for round_entry in (game or {}).get("rounds", [])
     )
+    llm_metadata = payload.get("llm_metadata")
+    llm_metadata = llm_metadata if isinstance(llm_metadata, dict) else {}
+    models = sorted(
+        {
+            str(llm_metadata.get(key) or "").strip()
+            for key in ("configured_model", "last_served_model")
+        }
+        - {""}
+    )
+    winners = [(game or {}).get("winner") for game in games]
     return {
         "schema_version": payload.get("schema_version"),
         "session_type": payload.get("session_type"),
         "app_version": payload.get("app_version"),
         "saved_at": payload.get("saved_at"),
-        "configured_model": ((payload.get("llm_metadata") or {}).get("configured_model") if isinstance(payload.get("llm_metadata"), dict) else None),
+        "configured_model": llm_metadata.get("configured_model") if llm_metadata else None,
+        "models": models,
         "game_count": len(games),
         "round_count": round_count,
         "turn_count": turn_count,
+        "winner": winners[-1] if winners else None,
     }
@@ -14,6 +14,7 @@ import sys
 import tempfile
 from typing import Any, Mapping
 
+from game.command_grammar import CONSTRAINT_MODES, CONSTRAINT_OFF
 from game.trace_contract import (
     PrivacyMode,
     TRACE_SCHEMA_VERSION,
@@ -23,6 +24,7 @@ from game.trace_contract import (
     utc_now_iso,
 )
 from game.replay_engine import validate_state_map
+from game.session_archive import SessionArchiveError, read_session_bytes
 
 _SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
 
@@ -77,7 +79,33 @@ def build_session_v3(
 ) -> dict[str, Any]:
     """Build a schema-v3 envelope and commit to its complete contents."""
 
-    payload: dict[str, Any] = {
+    payload = session_header_v3(
+        app_version=app_version,
+        privacy_mode=privacy_mode,
+        git_commit=git_commit,
+        model_provenance=model_provenance,
+        runtime=runtime,
+        session_id=session_id,
+        created_at=created_at,
+    )
+    payload["games"] = deepcopy(games)
+    payload["session_sha256"] = sha256_json(payload)
+    return payload
+
+
+def session_header_v3(
+    *,
+    app_version: str,
+    privacy_mode: PrivacyMode | str = PrivacyMode.FULL,
+    git_commit: str | None = None,
+    model_provenance: Mapping[str, Any] | None = None,
+    runtime: Mapping[str, Any] | None = None,
+    session_id: str | None = None,
+    created_at: str | None = None,
+) -> dict[str, Any]:
+    """Return the envelope fields of a schema-v3 session, without games or hash."""
+
+    return {
         "schema_version": TRACE_SCHEMA_VERSION,
         "session_type": TRACE_SESSION_TYPE,
         "session_id": session_id or new_id("session"),
@@ -88,10 +116,7 @@ def build_session_v3(
         ),
         "runtime_provenance": runtime_provenance(runtime),
         "model_provenance": dict(model_provenance or {}),
-        "games": deepcopy(games),
     }
-    payload["session_sha256"] = sha256_json(payload)
-    return payload
 
 
 def _require(condition: bool, message: str) -> None:
@@ -140,6 +165,189 @@ def _require_content_mode(
         )
 
 
+def validate_round_start_v3(round_entry: Any, privacy: PrivacyMode, prefix: str = "Round") -> None:
+    """Check what a round record holds when it starts: rules, initial state and prompts."""
+
+    _require(isinstance(round_entry, dict), f"{prefix} must be an object.")
+    _require(
+        isinstance(round_entry.get("gameplay_settings_snapshot"), dict),
+        f"{prefix} lacks gameplay_settings_snapshot.",
+    )
+    _require(
+        isinstance(round_entry.get("initial_state"), dict),
+        f"{prefix} lacks initial_state.",
+    )
+    try:
+        validate_state_map(
+            round_entry["initial_state"], f"{prefix} initial_state", require_id=True
+        )
+    except (OverflowError, TypeError, ValueError) as exc:
+        raise SessionV3Error(str(exc)) from exc
+    for prompt_index, prompt in enumerate(round_entry.get("prompts", []), start=1):
+        _require(isinstance(prompt, dict), f"{prefix}, prompt {prompt_index} must be an object.")
+        _require(
+            isinstance(prompt.get("bot_id"), int) and prompt["bot_id"] > 0,
+            f"{prefix}, prompt {prompt_index}: bot_id is invalid.",
+        )
+        _validate_protected_text(prompt.get("prompt"), f"{prefix}, prompt {prompt_index}.prompt")
+        _require_content_mode(prompt["prompt"], privacy, f"{prefix}, prompt {prompt_index}.prompt")
+
+
+def validate_play_v3(play: Any, privacy: PrivacyMode, play_prefix: str = "Play") -> None:
+    """Check one finalised play record; ``play_prefix`` names it in error messages."""
+
+    _require(isinstance(play, dict), f"{play_prefix} must be an object.")
+    required = {
+        "play_id": str,
+        "sequence": int,
+        "bot_id": int,
+        "human_prompt": dict,
+        "system_instructions": dict,
+        "context_policy": dict,
+        "game_state_supplied_to_model": dict,
+        "request": dict,
+        "request_started_at": str,
+        "request_completed_at": str,
+        "latency_ms": (int, float),
+        "attempts": int,
+        "response": dict,
+        "normalized_command": str,
+        "pre_state": dict,
+        "post_state": dict,
+        "events": list,
+        "transition_sha256": str,
+        "play_sha256": str,
+        "chain_sha256": str,
+        "status": str,
+    }
+    for key, expected_type in required.items():
+        _require(
+            isinstance(play.get(key), expected_type),
+            f"{play_prefix}: {key} has an invalid type.",
+        )
+    for state_name in ("pre_state", "post_state"):
+        try:
+            validate_state_map(
+                play[state_name],
+                f"{play_prefix} {state_name}",
+                require_id=True,
+            )
+        except (OverflowError, TypeError, ValueError) as exc:
+            raise SessionV3Error(str(exc)) from exc
+    _require(play["sequence"] > 0, f"{play_prefix}: sequence must be positive.")
+    _require(play["bot_id"] > 0, f"{play_prefix}: bot_id must be positive.")
+    # Requests made for the play; a reply served from the response cache counts as one.
+    _require(play["attempts"] > 0, f"{play_prefix}: attempts must be positive.")
+    _require(play["latency_ms"] >= 0, f"{play_prefix}: latency_ms cannot be negative.")
+    _require(
+        play["status"] in {"ok", "invalid-command", "invocation-error"},
+        f"{play_prefix}: status is invalid.",
+    )
+    _validate_protected_text(play["human_prompt"], f"{play_prefix}.human_prompt")
+    _validate_protected_text(play["system_instructions"], f"{play_prefix}.system_instructions")
+    _validate_protected_text(play["response"], f"{play_prefix}.response")
+    _require_content_mode(play["human_prompt"], privacy, f"{play_prefix}.human_prompt")
+    _require_content_mode(play["system_instructions"], privacy, f"{play_prefix}.system_instructions")
+    _require_content_mode(play["response"], privacy, f"{play_prefix}.response")
+    context_policy = play["context_policy"]
+    context_flags = {
+        key: value for key, value in context_policy.items() if key != "state_encoding"
+    }
+    _require(
+        set(context_flags) == {"prompt_augmentation", "independent_contexts"}
+        and all(isinstance(value, bool) for value in context_flags.values())
+        and isinstance(context_policy.get("state_encoding", ""), str),
+        f"{play_prefix}: context_policy is invalid.",
+    )
+    _require(
+        play.get("command_constraint", CONSTRAINT_OFF) in CONSTRAINT_MODES,
+        f"{play_prefix}: command_constraint is invalid.",
+    )
+    _require(
+        play.get("cache", "miss") in {"hit", "miss"},
+        f"{play_prefix}: cache is invalid.",
+    )
+    _require(
+        isinstance(play.get("endpoint", ""), str),
+        f"{play_prefix}: endpoint is invalid.",
+    )
+    invocation = play.get("invocation", {})
+    _require(
+        isinstance(invocation, Mapping)
+        and isinstance(invocation.get("errors", []), list)
+        and isinstance(invocation.get("hedged", False), bool)
+        and isinstance(invocation.get("backoff_ms", 0.0), (int, float)),
+        f"{play_prefix}: invocation is invalid.",
+    )
+    _require(
+        play.get("cache") != "hit" or (play["attempts"] == 1 and not invocation),
+        f"{play_prefix}: a cached reply is one attempt without retries or hedging.",
+    )
+    request = play["request"]
+    _require(
+        request.get("privacy_mode") in {mode.value for mode in PrivacyMode},
+        f"{play_prefix}: request privacy_mode is invalid.",
+    )
+    _require(
+        request.get("privacy_mode") == privacy.value,
+        f"{play_prefix}: request privacy mode does not match the session.",
+    )
+    if privacy is PrivacyMode.HASHED:
+        _require(
+            "payload" not in request and "stored_sha256" not in request,
+            f"{play_prefix}: hash-only request must not retain a payload.",
+        )
+    else:
+        _require(
+            isinstance(request.get("payload"), dict),
+            f"{play_prefix}: retained request payload is required.",
+        )
+        _require("stored_sha256" in request, f"{play_prefix}: retained request hash is required.")
+    _require_sha(
+        request.get("canonical_sha256"),
+        f"{play_prefix}.request.canonical_sha256",
+    )
+    if "stored_sha256" in request:
+        _require_sha(
+            request["stored_sha256"],
+            f"{play_prefix}.request.stored_sha256",
+        )
+    _require_sha(
+        play["transition_sha256"],
+        f"{play_prefix}.transition_sha256",
+    )
+    _require_sha(play["play_sha256"], f"{play_prefix}.play_sha256")
+    _require_sha(play["chain_sha256"], f"{play_prefix}.chain_sha256")
+    _require_sha(
+        play.get("previous_play_sha256"),
+        f"{play_prefix}.previous_play_sha256",
+        nullable=True,
+    )
+    if play["status"] == "invocation-error":
+        _require(
+            play["normalized_command"] == "ERR",
+            f"{play_prefix}: invocation errors must ground to ERR.",
+        )
+        _require(
+            play["response"].get("length") == 0,
+            f"{play_prefix}: invocation errors must not claim a model response.",
+        )
+        _require(isinstance(play.get("error"), dict), f"{play_prefix}: error is required.")
+        _require(
+            isinstance(play["error"].get("type"), str)
+            and bool(play["error"]["type"]),
+            f"{play_prefix}: error.type is required.",
+        )
+        _validate_protected_text(play["error"].get("message"), f"{play_prefix}.error.message")
+        _require_content_mode(play["error"]["message"], privacy, f"{play_prefix}.error.message")
+    else:
+        _require("error" not in play, f"{play_prefix}: error is only valid for invocation-error status.")
+        if play["status"] == "ok":
+            _require(play["normalized_command"] != "ERR", f"{play_prefix}: ok status cannot store ERR.")
+        if play["status"] == "invalid-command":
+            _require(play["normalized_command"] == "ERR", f"{play_prefix}: invalid-command must store ERR.")
+
+
 def validate_session_v3(payload: Any) -> dict[str, Any]:
     """Perform structural checks before the verifier evaluates semantics."""
 
@@ -190,161 +398,21 @@ def validate_session_v3(payload: Any) -> dict[str, Any]:
         )
         for round_index, round_entry in enumerate(game["rounds"], start=1):
             prefix = f"Game {game_index}, round {round_index}"
-            _require(isinstance(round_entry, dict), f"{prefix} must be an object.")
-            _require(
-                isinstance(round_entry.get("gameplay_settings_snapshot"), dict),
-                f"{prefix} lacks gameplay_settings_snapshot.",
-            )
-            _require(
-                isinstance(round_entry.get("initial_state"), dict),
-                f"{prefix} lacks initial_state.",
-            )
+            validate_round_start_v3(round_entry, privacy, prefix)
             _require(isinstance(round_entry.get("final_state"), dict), f"{prefix} lacks final_state.")
-            for state_name in ("initial_state", "final_state"):
-                try:
-                    validate_state_map(
-                        round_entry[state_name],
-                        f"{prefix} {state_name}",
-                        require_id=True,
-                    )
-                except (OverflowError, TypeError, ValueError) as exc:
-                    raise SessionV3Error(str(exc)) from exc
+            try:
+                validate_state_map(
+                    round_entry["final_state"], f"{prefix} final_state", require_id=True
+                )
+            except (OverflowError, TypeError, ValueError) as exc:
+                raise SessionV3Error(str(exc)) from exc
             _require(
                 isinstance(round_entry.get("plays"), list) and bool(round_entry["plays"]),
                 f"{prefix} needs at least one play.",
             )
-            for prompt_index, prompt in enumerate(round_entry.get("prompts", []), start=1):
-                _require(isinstance(prompt, dict), f"{prefix}, prompt {prompt_index} must be an object.")
-                _require(
-                    isinstance(prompt.get("bot_id"), int) and prompt["bot_id"] > 0,
-                    f"{prefix}, prompt {prompt_index}: bot_id is invalid.",
-                )
-                _validate_protected_text(prompt.get("prompt"), f"{prefix}, prompt {prompt_index}.prompt")
-                _require_content_mode(prompt["prompt"], privacy, f"{prefix}, prompt {prompt_index}.prompt")
             for play_index, play in enumerate(round_entry["plays"], start=1):
                 play_prefix = f"{prefix}, play {play_index}"
-                _require(isinstance(play, dict), f"{play_prefix} must be an object.")
-                required = {
-                    "play_id": str,
-                    "sequence": int,
-                    "bot_id": int,
-                    "human_prompt": dict,
-                    "system_instructions": dict,
-                    "context_policy": dict,
-                    "game_state_supplied_to_model": dict,
-                    "request": dict,
-                    "request_started_at": str,
-                    "request_completed_at": str,
-                    "latency_ms": (int, float),
-                    "attempts": int,
-                    "response": dict,
-                    "normalized_command": str,
-                    "pre_state": dict,
-                    "post_state": dict,
-                    "events": list,
-                    "transition_sha256": str,
-                    "play_sha256": str,
-                    "chain_sha256": str,
-                    "status": str,
-                }
-                for key, expected_type in required.items():
-                    _require(
-                        isinstance(play.get(key), expected_type),
-                        f"{play_prefix}: {key} has an invalid type.",
-                    )
-                for state_name in ("pre_state", "post_state"):
-                    try:
-                        validate_state_map(
-                            play[state_name],
-                            f"{play_prefix} {state_name}",
-                            require_id=True,
-                        )
-                    except (OverflowError, TypeError, ValueError) as exc:
-                        raise SessionV3Error(str(exc)) from exc
-                _require(play["sequence"] > 0, f"{play_prefix}: sequence must be positive.")
-                _require(play["bot_id"] > 0, f"{play_prefix}: bot_id must be positive.")
-                _require(play["attempts"] > 0, f"{play_prefix}: attempts must be positive.")
-                _require(play["latency_ms"] >= 0, f"{play_prefix}: latency_ms cannot be negative.")
-                _require(
-                    play["status"] in {"ok", "invalid-command", "invocation-error"},
-                    f"{play_prefix}: status is invalid.",
-                )
-                _validate_protected_text(play["human_prompt"], f"{play_prefix}.human_prompt")
-                _validate_protected_text(play["system_instructions"], f"{play_prefix}.system_instructions")
-                _validate_protected_text(play["response"], f"{play_prefix}.response")
-                _require_content_mode(play["human_prompt"], privacy, f"{play_prefix}.human_prompt")
-                _require_content_mode(play["system_instructions"], privacy, f"{play_prefix}.system_instructions")
-                _require_content_mode(play["response"], privacy, f"{play_prefix}.response")
-                context_policy = play["context_policy"]
-                _require(
-                    set(context_policy) == {"prompt_augmentation", "independent_contexts"}
-                    and all(isinstance(value, bool) for value in context_policy.values()),
-                    f"{play_prefix}: context_policy is invalid.",
-                )
-                request = play["request"]
-                _require(
-                    request.get("privacy_mode") in {mode.value for mode in PrivacyMode},
-                    f"{play_prefix}: request privacy_mode is invalid.",
-                )
-                _require(
-                    request.get("privacy_mode") == privacy.value,
-                    f"{play_prefix}: request privacy mode does not match the session.",
-                )
-                if privacy is PrivacyMode.HASHED:
-                    _require(
-                        "payload" not in request and "stored_sha256" not in request,
-                        f"{play_prefix}: hash-only request must not retain a payload.",
-                    )
-                else:
-                    _require(
-                        isinstance(request.get("payload"), dict),
-                        f"{play_prefix}: retained request payload is required.",
-                    )
-                    _require("stored_sha256" in request, f"{play_prefix}: retained request hash is required.")
-                _require_sha(
-                    request.get("canonical_sha256"),
-                    f"{play_prefix}.request.canonical_sha256",
-                )
-                if "stored_sha256" in request:
-                    _require_sha(
-                        request["stored_sha256"],
-                        f"{play_prefix}.request.stored_sha256",
-                    )
-                _require_sha(
-                    play["transition_sha256"],
-                    f"{play_prefix}.transition_sha256",
-                )
-                _require_sha(play["play_sha256"], f"{play_prefix}.play_sha256")
-                _require_sha(play["chain_sha256"], f"{play_prefix}.chain_sha256")
-                _require_sha(
-                    play.get("previous_play_sha256"),
-                    f"{play_prefix}.previous_play_sha256",
-                    nullable=True,
-                )
-                if play["status"] == "invocation-error":
-                    _require(
-                        play["normalized_command"] == "ERR",
-                        f"{play_prefix}: invocation errors must ground to ERR.",
-                    )
-                    _require(
-                        play["response"].get("length") == 0,
-                        f"{play_prefix}: invocation errors must not claim a model response.",
-                    )
-                    _require(isinstance(play.get("error"), dict), f"{play_prefix}: error is required.")
-                    _require(
-                        isinstance(play["error"].get("type"), str)
-                        and bool(play["error"]["type"]),
-                        f"{play_prefix}: error.type is required.",
-                    )
-                    _validate_protected_text(play["error"].get("message"), f"{play_prefix}.error.message")
-                    _require_content_mode(play["error"]["message"], privacy, f"{play_prefix}.error.message")
-                else:
-                    _require("error" not in play, f"{play_prefix}: error is only valid for invocation-error status.")
-                    if play["status"] == "ok":
-                        _require(play["normalized_command"] != "ERR", f"{play_prefix}: ok status cannot store ERR.")
-                    if play["status"] == "invalid-command":
-                        _require(play["normalized_command"] == "ERR", f"{play_prefix}: invalid-command must store ERR.")
-
+                validate_play_v3(play, privacy, play_prefix)
                 play_id = play["play_id"]
                 _require(play_id not in seen_play_ids, f"Duplicate play_id: {play_id}")
                 seen_play_ids.add(play_id)
@@ -387,7 +455,7 @@ def write_session_v3(payload: Mapping[str, Any], path: str | Path) -> Path:
 
 def load_session_v3(path: str | Path) -> dict[str, Any]:
     try:
-        payload = json.loads(Path(path).read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError) as exc:
+        payload = json.loads(read_session_bytes(path).decode("utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError, SessionArchiveError) as exc:
         raise SessionV3Error(str(exc)) from exc
     return validate_session_v3(payload)
@@ -0,0 +1,101 @@
+"""Speculative prefetch of the next bot's request in augmented turns.
+
+With prompt augmentation on, a bot's request carries the game state left by the
+bots before it in the turn, so requests are normally sent one after another.
+Many plays (``ERR``, missed or blocked shots, setting a shield to its current
+state) leave that state unchanged. A speculative request sends the next bot's
+prompt against the pre-turn state while the current bot is still waiting for
+its model. When the next bot's turn comes and its actual state matches, the
+speculative reply is adopted and committed to history. Otherwise it is dropped
+and the request is sent normally. Speculative requests never touch a bot's
+history until adopted, so recorded sessions only hold requests that were used.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any
+
+from game.ollama_connector import LLMRequestError, OllamaConnector, SpeculativeReply
+
+
+@dataclass
+class SpeculationStats:
+    """Running hit rate and latency saved by speculative prefetch."""
+
+    attempts: int = 0
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def hit_rate(self) -> float:
+        resolved = self.hits + self.misses
+        return self.hits / resolved if resolved else 0.0
+
+    def record_attempt(self) -> None:
+        with self._lock:
+            self.attempts += 1
+
+    def record_hit(self, saved_seconds: float) -> None:
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += max(0.0, saved_seconds)
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hit_rate, 4),
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+@dataclass
+class SpeculativeRequest:
+    """A next-bot request sent early against a predicted game state."""
+
+    bot_id: int
+    game_state: dict[str, Any]
+    future: Future
+    started_at: float = field(default_factory=time.monotonic)
+
+    def matches(self, bot_id: int, game_state: dict[str, Any]) -> bool:
+        return bot_id == self.bot_id and game_state == self.game_state
+
+    def discard(self) -> None:
+        """Drop the request; a reply that still arrives is never committed."""
+        self.future.cancel()
+
+    def adopt(self, connector: OllamaConnector, stats: SpeculationStats) -> Future:
+        """Return a future of the reply text, committing the reply to history first."""
+        accepted: Future = Future()
+        accepted_at = time.monotonic()
+
+        def transfer(done: Future) -> None:
+            finished_at = time.monotonic()
+            try:
+                reply: SpeculativeReply = done.result()
+            except BaseException as exc:  # Deliver provider failures as a real request would.
+                accepted.set_exception(exc)
+                return
+            if not connector.commit_speculative_reply(reply):
+                accepted.set_exception(
+                    LLMRequestError("Speculative reply no longer matches the bot's history.")
+                )
+                return
+            stats.record_hit(min(accepted_at, finished_at) - self.started_at)
+            accepted.set_result(reply.content)
+
+        self.future.add_done_callback(transfer)
+        return accepted
@@ -0,0 +1,215 @@
+"""Encodings of the game state embedded in augmented prompts.
+
+With prompt augmentation every user message carries the game state, and in
+shared-context mode those messages accumulate in the history, so the size of
+the state drives prefill time. An encoder turns the state into the text placed
+between ``[GAME_STATE]`` and ``[PLAYER_INPUT]``:
+
+``json``
+    Compact JSON of the full state (the original format).
+``quantized``
+    The same JSON with floats rounded to :data:`DECIMALS` places.
+``short``
+    Quantized, with one- or two-letter keys (:data:`SHORT_KEYS`), booleans as
+    0/1, and the redundant bot ``id`` and empty values dropped.
+``relative``
+    Short keys for the requesting bot under ``me``, and the opponent under
+    ``foe`` as health, shield, distance ``d`` and bearings: ``b`` is how far
+    clockwise the opponent is from the bot's heading (``C<b>`` faces it) and
+    ``fb`` the same from the opponent's heading to the bot.
+
+The encoding is chosen per system-instruction set, since the instructions must
+describe the format the model receives, and is recorded with each request so
+traces can be reconstructed exactly. :func:`register_state_encoder` adds more.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Callable, Mapping
+
+STATE_JSON = "json"
+STATE_QUANTIZED = "quantized"
+STATE_SHORT = "short"
+STATE_RELATIVE = "relative"
+
+DECIMALS = 3
+"""Decimal places kept by the compact encoders; positions are fractions of the arena."""
+
+SHORT_KEYS = {
+    "bots": "b",
+    "health": "h",
+    "rot": "r",
+    "shield": "s",
+    "current_turn": "t",
+    "current_round": "rd",
+    "current_prompt": "p",
+    "last_llm_response": "l",
+}
+
+StateEncoder = Callable[[Mapping[str, Any], "int | None"], Any]
+
+
+class StateEncodingError(ValueError):
+    """Raised for an unknown state encoding."""
+
+
+def _quantize(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float):
+        rounded = round(value, DECIMALS)
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, Mapping):
+        return {key: _quantize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_quantize(item) for item in value]
+    return value
+
+
+def _shorten(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, Mapping):
+        return {
+            SHORT_KEYS.get(str(key), key): _shorten(item)
+            for key, item in value.items()
+            if key != "id" and item not in (None, "")
+        }
+    if isinstance(value, list):
+        return [_shorten(item) for item in value]
+    return value
+
+
+def _bearing_cw(from_state: Mapping[str, Any], to_state: Mapping[str, Any]) -> float:
+    """Degrees clockwise from ``from_state``'s heading to ``to_state``, in (-180, 180]."""
+    angle = math.degrees(
+        math.atan2(
+            float(to_state.get("y", 0.0)) - float(from_state.get("y", 0.0)),
+            float(to_state.get("x", 0.0)) - float(from_state.get("x", 0.0)),
+        )
+    )
+    # Rotation angles grow anticlockwise, so a clockwise bearing is heading minus angle.
+    bearing = (float(from_state.get("rot", 0.0)) - angle) % 360.0
+    return bearing - 360.0 if bearing > 180.0 else bearing
+
+
+def encode_json(game_state: Mapping[str, Any], bot_id: int | None = None) -> Any:
+    return game_state
+
+
+def encode_quantized(game_state: Mapping[str, Any], bot_id: int | None = None) -> Any:
+    return _quantize(game_state)
+
+
+def encode_short(game_state: Mapping[str, Any], bot_id: int | None = None) -> Any:
+    return _shorten(_quantize(game_state))
+
+
+def encode_relative(game_state: Mapping[str, Any], bot_id: int | None = None) -> Any:
+    """Encode the requesting bot's state and the opponent relative to it."""
+    bots = game_state.get("bots")
+    if not isinstance(bots, Mapping) or bot_id is None:
+        return encode_short(game_state)
+    by_id = {int(key): value for key, value in bots.items()}
+    me = by_id.get(int(bot_id))
+    if me is None:
+        return encode_short(game_state)
+    encoded = encode_short({key: value for key, value in game_state.items() if key != "bots"})
+    encoded["me"] = encode_short(me)
+    for other_id, other in sorted(by_id.items()):
+        if other_id == int(bot_id):
+            continue
+        distance = math.hypot(
+            float(other.get("x", 0.0)) - float(me.get("x", 0.0)),
+            float(other.get("y", 0.0)) - float(me.get("y", 0.0)),
+        )
+        encoded["foe"] = _quantize(
+            {
+                "h": other.get("health"),
+                "s": int(bool(other.get("shield"))),
+                "d": distance,
+                "b": round(_bearing_cw(me, other), 1),
+                "fb": round(_bearing_cw(other, me), 1),
+            }
+        )
+        break
+    return encoded
+
+
+STATE_ENCODERS: dict[str, StateEncoder] = {
+    STATE_JSON: encode_json,
+    STATE_QUANTIZED: encode_quantized,
+    STATE_SHORT: encode_short,
+    STATE_RELATIVE: encode_relative,
+}
+
+
+def register_state_encoder(name: str, encoder: StateEncoder) -> None:
+    """Make ``encoder`` selectable as ``name``; it returns a JSON-serialisable value."""
+    key = str(name).strip().lower()
+    if not key:
+        raise StateEncodingError("A state encoding needs a name.")
+    STATE_ENCODERS[key] = encoder
+
+
+def normalize_state_encoding(name: Any) -> str:
+    """Return a registered encoding name; ``None`` or empty means ``json``."""
+    if name in (None, False, ""):
+        return STATE_JSON
+    key = str(name).strip().lower()
+    if key not in STATE_ENCODERS:
+        raise StateEncodingError(
+            f"Unknown state encoding {name!r}; expected one of {', '.join(STATE_ENCODERS)}."
+        )
+    return key
+
+
+def resolve_state_encoding(
+    instructions: str | None, default: Any = STATE_JSON, by_instructions: Any = None
+) -> str:
+    """Return the encoding for a system-instruction file.
+
+    ``by_instructions`` maps instruction files, as configured or by file
+    name, to encodings; other files use ``default``.
+    """
+    mapping = by_instructions if isinstance(by_instructions, Mapping) else {}
+    if instructions:
+        name = str(instructions).replace("\\", "/").rsplit("/", 1)[-1]
+        for key in (str(instructions), name):
+            if key in mapping:
+                return normalize_state_encoding(mapping[key])
+    return normalize_state_encoding(default)
+
+
+def encode_game_state(
+    game_state: Mapping[str, Any], encoding: str = STATE_JSON, *, bot_id: int | None = None
+) -> str:
+    """Return the compact JSON text of ``game_state`` under ``encoding``."""
+    encoder = STATE_ENCODERS[normalize_state_encoding(encoding)]
+    return json.dumps(
+        encoder(game_state, bot_id),
+        separators=(",", ":"),
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+
+
+def render_user_content(
+    prompt: str,
+    game_state: Mapping[str, Any],
+    *,
+    augmented: bool,
+    encoding: str = STATE_JSON,
+    bot_id: int | None = None,
+) -> str:
+    """Return a user message: the player's prompt, after the encoded state when augmenting."""
+    if not augmented:
+        return prompt
+    return (
+        "[GAME_STATE]\n"
+        + encode_game_state(game_state, encoding, bot_id=bot_id)
+        + "\n[PLAYER_INPUT]\n"
+        + prompt
+    )
@@ -43,9 +43,19 @@ def new_id(prefix: str) -> str:
     return f"{prefix}_{uuid4().hex}"
 
 
+_PLAIN_TYPES = (str, int, bool, type(None))
+
+
 def _normalise(value: Any) -> Any:
     """Convert supported Python values into canonical JSON-compatible values."""
 
+    # Fast paths for the plain values that make up most of a request's messages.
+    if type(value) in _PLAIN_TYPES:
+        return value
+    if type(value) is dict and all(type(key) is str for key in value):
+        return {key: _normalise(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_normalise(item) for item in value]
     if is_dataclass(value):
         value = asdict(value)
     if isinstance(value, Enum):
@@ -77,8 +87,12 @@ def _normalise(value: Any) -> Any:
 def canonical_json(value: Any) -> str:
     """Serialise a value deterministically for hashing and comparison."""
 
+    return _dumps(_normalise(value))
+
+
+def _dumps(normalised: Any) -> str:
     return json.dumps(
-        _normalise(value),
+        normalised,
         ensure_ascii=False,
         allow_nan=False,
         sort_keys=True,
@@ -177,9 +191,10 @@ def store_request_payload(
 
     privacy = PrivacyMode(mode)
     exact = _normalise(payload)
+    exact_sha256 = sha256_text(_dumps(exact))
     record: dict[str, Any] = {
         "privacy_mode": privacy.value,
-        "canonical_sha256": sha256_json(exact),
+        "canonical_sha256": exact_sha256,
     }
 
     if privacy is PrivacyMode.FULL:
@@ -196,7 +211,9 @@ def store_request_payload(
 
     if stored is not None:
         record["payload"] = stored
-        record["stored_sha256"] = sha256_json(stored)
+        record["stored_sha256"] = (
+            exact_sha256 if stored is exact else sha256_text(_dumps(_normalise(stored)))
+        )
     return record
 
 
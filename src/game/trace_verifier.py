@@ -10,6 +10,7 @@ from pathlib import Path
 from time import perf_counter
 from typing import Any, Mapping
 
+from game.command_grammar import CONSTRAINT_SCHEMA, unwrap_command_reply
 from game.replay_engine import (
     GameplaySettingsSnapshot,
     apply_play,
@@ -22,6 +23,7 @@ from game.session_v3 import (
     validate_session_v3,
     verify_session_envelope_hash,
 )
+from game.state_encoding import STATE_ENCODERS, STATE_JSON, render_user_content
 from game.trace_contract import (
     PrivacyMode,
     canonical_json,
@@ -133,6 +135,8 @@ def _verify_grounding(
     if retained_response is None:
         report.commitment_only_groundings += 1
         return
+    if play.get("command_constraint") == CONSTRAINT_SCHEMA:
+        retained_response = unwrap_command_reply(retained_response)
     parsed = parse_model_response(retained_response)
     if parsed.normalized_cmd == command:
         report.verified_groundings += 1
@@ -156,24 +160,6 @@ def _verify_grounding(
         )
 
 
-def _request_user_content(
-    *, prompt: str, game_state: Mapping[str, Any], augmented: bool
-) -> str:
-    if not augmented:
-        return prompt
-    return (
-        "[GAME_STATE]\n"
-        + json.dumps(
-            game_state,
-            separators=(",", ":"),
-            ensure_ascii=False,
-            sort_keys=True,
-        )
-        + "\n[PLAYER_INPUT]\n"
-        + prompt
-    )
-
-
 def _ensure_system_message(
     history: list[dict[str, str]], system_instructions: str
 ) -> None:
@@ -258,10 +244,18 @@ def _verify_request_semantics(
         else shared_history
     )
     _ensure_system_message(history, system)
-    user_content = _request_user_content(
-        prompt=prompt,
-        game_state=play["game_state_supplied_to_model"],
+    encoding = context_policy.get("state_encoding", STATE_JSON)
+    if encoding not in STATE_ENCODERS:
+        report.add_issue(
+            "R2", location, "unknown-state-encoding", f"state encoding {encoding!r}"
+        )
+        return
+    user_content = render_user_content(
+        prompt,
+        play["game_state_supplied_to_model"],
         augmented=bool(context_policy["prompt_augmentation"]),
+        encoding=encoding,
+        bot_id=int(play["bot_id"]),
     )
     expected_messages = deepcopy(history)
     expected_messages.append({"role": "user", "content": user_content})
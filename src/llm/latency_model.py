@@ -0,0 +1,247 @@
+"""Request timeouts learned from the latency each model actually shows.
+
+Static timeouts either wait far too long on a hung request or cut off a
+healthy model that is simply slow on this machine. :class:`LatencyModel`
+records how long requests took per model, ``num_ctx`` and prompt-size bucket,
+persists the samples under the BatLLM data folder, and suggests a timeout from
+a high percentile of them with a safety margin.
+
+Only requests that completed are recorded. A timed-out request would enter
+at the timeout itself, and with a high percentile over few samples each hang
+would raise the next timeout, doubling it up to the cap.
+
+Samples are written with :meth:`LatencyModel.save_later`, which coalesces the
+writes of a burst of requests off the inference thread.
+"""
+
+from __future__ import annotations
+
+import atexit
+from collections import deque
+import json
+import logging
+import math
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Iterable
+
+from game.llm_telemetry import percentile
+from util.paths import resolve_user_data_dir
+
+_logger = logging.getLogger(__name__)
+
+LATENCY_MODEL_FILE = "latency_model.json"
+FORMAT_VERSION = 1
+
+MIN_SAMPLES = 8
+"""Observations needed before a bucket suggests a timeout."""
+
+MAX_SAMPLES = 64
+"""Most recent observations kept per bucket."""
+
+TIMEOUT_PERCENTILE = 99
+SAFETY_FACTOR = 2.0
+SAFETY_MARGIN_SECONDS = 5.0
+MIN_TIMEOUT_SECONDS = 10.0
+MAX_TIMEOUT_SECONDS = 600.0
+MIN_PROMPT_BUCKET = 256
+SAVE_DELAY_S = 5.0
+"""Seconds :meth:`LatencyModel.save_later` waits, so a burst of samples is written once."""
+
+
+def prompt_bucket(prompt_tokens: int | None) -> int:
+    """Return the power-of-two prompt-size bucket (in tokens) of a request."""
+    tokens = max(1, int(prompt_tokens or 0))
+    return max(MIN_PROMPT_BUCKET, 2 ** math.ceil(math.log2(tokens)))
+
+
+def timeout_from_samples(samples: Iterable[float]) -> float | None:
+    """Return a timeout for the given durations (seconds), or None below :data:`MIN_SAMPLES`."""
+    values = list(samples)
+    if len(values) < MIN_SAMPLES:
+        return None
+    high = percentile(values, TIMEOUT_PERCENTILE) or 0.0
+    timeout = max(high * SAFETY_FACTOR, high + SAFETY_MARGIN_SECONDS)
+    return round(min(MAX_TIMEOUT_SECONDS, max(MIN_TIMEOUT_SECONDS, timeout)), 1)
+
+
+def _key(model: str, num_ctx: int | None, bucket: int) -> str:
+    return f"{model}|{int(num_ctx or 0)}|{bucket}"
+
+
+def _split_key(key: str) -> tuple[str, int, int] | None:
+    model, _, rest = key.rpartition("|")
+    model, _, num_ctx = model.rpartition("|")
+    try:
+        return model, int(num_ctx), int(rest)
+    except ValueError:
+        return None
+
+
+def default_latency_model_path() -> Path:
+    return resolve_user_data_dir("cache") / LATENCY_MODEL_FILE
+
+
+class LatencyModel:
+    """Observed request durations per (model, ``num_ctx``, prompt bucket)."""
+
+    def __init__(self, path: str | Path | None = None, *, max_samples: int = MAX_SAMPLES):
+        self.path = Path(path) if path is not None else None
+        self.max_samples = max(MIN_SAMPLES, int(max_samples))
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+        self._dirty = False
+        self._save_timer_lock = threading.Lock()
+        self._save_timer: threading.Timer | None = None
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LatencyModel":
+        """Return the model stored at ``path``; a missing or unreadable file starts empty."""
+        model = cls(path)
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return model
+        except (OSError, ValueError) as exc:
+            _logger.warning("Ignoring unreadable latency model %s: %s", path, exc)
+            return model
+        samples = data.get("samples") if isinstance(data, dict) else None
+        if not isinstance(samples, dict) or data.get("version") != FORMAT_VERSION:
+            _logger.warning("Ignoring latency model %s with an unknown format.", path)
+            return model
+        for key, values in samples.items():
+            if _split_key(str(key)) is None or not isinstance(values, list):
+                continue
+            model._samples[str(key)] = deque(
+                (float(value) for value in values if isinstance(value, (int, float)) and value > 0),
+                maxlen=model.max_samples,
+            )
+        return model
+
+    def record(
+        self, model: str, num_ctx: int | None, prompt_tokens: int | None, seconds: float
+    ) -> None:
+        """Record that a completed request took ``seconds``."""
+        if not model or seconds <= 0:
+            return
+        key = _key(model, num_ctx, prompt_bucket(prompt_tokens))
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.max_samples)).append(
+                round(float(seconds), 3)
+            )
+            self._dirty = True
+
+    def samples(
+        self, model: str, num_ctx: int | None, prompt_tokens: int | None = None
+    ) -> list[float]:
+        """Return the durations a timeout for this request is derived from.
+
+        Without ``prompt_tokens`` every bucket of the model and ``num_ctx`` is
+        pooled. Otherwise the request's bucket is used, or the next larger one
+        with enough samples, since longer prompts only take longer.
+        """
+        with self._lock:
+            buckets = {
+                parts[2]: list(values)
+                for key, values in self._samples.items()
+                if (parts := _split_key(key)) is not None
+                and parts[0] == model
+                and parts[1] == int(num_ctx or 0)
+            }
+        if prompt_tokens is None:
+            return [value for values in buckets.values() for value in values]
+        wanted = prompt_bucket(prompt_tokens)
+        for bucket in sorted(bucket for bucket in buckets if bucket >= wanted):
+            if len(buckets[bucket]) >= MIN_SAMPLES:
+                return buckets[bucket]
+        return buckets.get(wanted, [])
+
+    def suggest_timeout(
+        self, model: str, num_ctx: int | None, prompt_tokens: int | None = None
+    ) -> float | None:
+        return timeout_from_samples(self.samples(model, num_ctx, prompt_tokens))
+
+    def save(self) -> None:
+        """Write the samples to :attr:`path` atomically if they changed since the last save."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": FORMAT_VERSION,
+                "samples": {key: list(values) for key, values in sorted(self._samples.items())},
+            }
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(
+            prefix=".batllm-latency-", suffix=".tmp", dir=self.path.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, sort_keys=True)
+            os.replace(temporary, self.path)
+        except Exception:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def save_later(self, delay: float = SAVE_DELAY_S) -> None:
+        """Save from a background thread after ``delay`` seconds.
+
+        Calls made while a save is pending join it, so recording a request
+        never waits for the disk. Pending saves are flushed at exit.
+        """
+        if self.path is None:
+            return
+        with self._save_timer_lock:
+            if self._save_timer is not None:
+                return
+            timer = threading.Timer(delay, self._deferred_save)
+            timer.daemon = True
+            self._save_timer = timer
+        timer.start()
+
+    def flush(self) -> None:
+        """Write a save requested with :meth:`save_later` now, if one is pending."""
+        with self._save_timer_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+
+    def _deferred_save(self) -> None:
+        with self._save_timer_lock:
+            if self._save_timer is None:
+                return
+            self._save_timer = None
+        try:
+            self.save()
+        except OSError as exc:
+            _logger.warning("Could not save the latency model to %s: %s", self.path, exc)
+
+
+_shared: LatencyModel | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_latency_model() -> LatencyModel:
+    """Return the process-wide latency model, loaded from the BatLLM data folder."""
+    global _shared  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared is None:
+            _shared = LatencyModel.load(default_latency_model_path())
+            atexit.register(_shared.flush)
+        return _shared
+
+
+def reset_shared_latency_model() -> None:
+    """Forget the process-wide model so the next use reloads it (for tests)."""
+    global _shared  # pylint: disable=global-statement
+    with _shared_lock:
+        _shared = None
+
@@ -0,0 +1,202 @@
+"""Model metadata kept in memory and on disk, refreshed in the background.
+
+Saving a session records the provider's metadata for the configured model,
+and asking the server for it took a new client and a round-trip on every
+save. The metadata of a model digest never changes, so
+:class:`ModelMetadataCache` keeps it per host and model together with the
+digest it describes, persists it under the BatLLM data folder, and serves it
+without touching the network.
+
+An entry older than the TTL, or a missing one, is refreshed on a background
+thread, one per host and model at a time. A refresh first asks for the
+model's digest, which is cheap, and fetches the metadata only when the digest
+changed, e.g. after a new pull of the same tag. After a failed refresh the
+entry is retried no sooner than ``RETRY_AFTER_S``.
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+from util.paths import resolve_user_data_dir
+
+_logger = logging.getLogger(__name__)
+
+METADATA_CACHE_FILE = "model_metadata.json"
+FORMAT_VERSION = 1
+
+DEFAULT_TTL_S = 3600.0
+"""How long an entry is served before its digest is checked again."""
+
+RETRY_AFTER_S = 60.0
+
+DigestLookup = Callable[[str, int, str], "str | None"]
+MetadataFetch = Callable[[str, int, str], dict[str, Any]]
+
+
+def default_metadata_cache_path() -> Path:
+    return resolve_user_data_dir("cache") / METADATA_CACHE_FILE
+
+
+def _key(url: str, port: int, model: str) -> str:
+    return f"{str(url).rstrip('/')}:{int(port)}|{model}"
+
+
+class ModelMetadataCache:
+    """Provider metadata per (host, model), tagged with the model digest it describes."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        fetch_digest: DigestLookup,
+        fetch_metadata: MetadataFetch,
+        ttl_s: float = DEFAULT_TTL_S,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """``fetch_digest(url, port, model)`` returns the model's digest, or
+        None when the server does not have it; ``fetch_metadata`` returns its
+        metadata. Both may raise.
+        """
+        self.path = Path(path) if path is not None else None
+        self.ttl_s = float(ttl_s)
+        self._fetch_digest = fetch_digest
+        self._fetch_metadata = fetch_metadata
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._failed_at: dict[str, float] = {}
+        self._refreshing: dict[str, threading.Thread] = {}
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs: Any) -> "ModelMetadataCache":
+        """Return the cache stored at ``path``; a missing or unreadable file starts empty."""
+        cache = cls(path, **kwargs)
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cache
+        except (OSError, ValueError) as exc:
+            _logger.warning("Ignoring unreadable model metadata cache %s: %s", path, exc)
+            return cache
+        entries = data.get("entries") if isinstance(data, dict) else None
+        if not isinstance(entries, dict) or data.get("version") != FORMAT_VERSION:
+            _logger.warning("Ignoring model metadata cache %s with an unknown format.", path)
+            return cache
+        for key, entry in entries.items():
+            if (
+                isinstance(entry, dict)
+                and isinstance(entry.get("digest"), str)
+                and isinstance(entry.get("metadata"), dict)
+                and isinstance(entry.get("checked_at"), (int, float))
+            ):
+                cache._entries[str(key)] = entry
+        return cache
+
+    def get(self, url: str, port: int, model: str) -> dict[str, Any]:
+        """Return the cached metadata of ``model``, or ``{}``; never waits for the server.
+
+        A missing or expired entry is refreshed in the background for later calls.
+        """
+        key = _key(url, port, model)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            stale = entry is None or now - entry["checked_at"] >= self.ttl_s
+            failed_at = self._failed_at.get(key)
+        if stale and (failed_at is None or now - failed_at >= RETRY_AFTER_S):
+            self.refresh_in_background(url, port, model)
+        return deepcopy(entry["metadata"]) if entry is not None else {}
+
+    def refresh(self, url: str, port: int, model: str) -> dict[str, Any]:
+        """Bring the entry of ``model`` up to date now and return its metadata."""
+        key = _key(url, port, model)
+        try:
+            digest = self._fetch_digest(url, port, model)
+            if not digest:
+                raise LookupError(f"{model} is not available at {url}:{port}")
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None or entry["digest"] != digest:
+                # Stored as JSON: values such as timestamps become strings now.
+                metadata = json.loads(
+                    json.dumps(dict(self._fetch_metadata(url, port, model) or {}), default=str)
+                )
+            else:
+                metadata = entry["metadata"]
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            with self._lock:
+                self._failed_at[key] = self._clock()
+                entry = self._entries.get(key)
+            _logger.info("Model metadata refresh for %s failed: %s", model, exc)
+            return deepcopy(entry["metadata"]) if entry is not None else {}
+        with self._lock:
+            self._entries[key] = {
+                "digest": digest,
+                "metadata": metadata,
+                "checked_at": self._clock(),
+            }
+            self._failed_at.pop(key, None)
+        try:
+            self.save()
+        except OSError as exc:
+            # The entry stays in memory; the next successful refresh saves it.
+            _logger.warning("Could not save the model metadata cache to %s: %s", self.path, exc)
+        return deepcopy(metadata)
+
+    def refresh_in_background(self, url: str, port: int, model: str) -> threading.Thread:
+        """Start refreshing ``model`` unless a refresh of it is already running."""
+        key = _key(url, port, model)
+        with self._lock:
+            running = self._refreshing.get(key)
+            if running is not None and running.is_alive():
+                return running
+
+            def work() -> None:
+                try:
+                    self.refresh(url, port, model)
+                finally:
+                    with self._lock:
+                        self._refreshing.pop(key, None)
+
+            thread = threading.Thread(target=work, name="model-metadata", daemon=True)
+            self._refreshing[key] = thread
+            thread.start()
+            return thread
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Wait for the refreshes running now to finish."""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def save(self) -> None:
+        """Write the entries to :attr:`path` atomically."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {"version": FORMAT_VERSION, "entries": dict(sorted(self._entries.items()))}
+            text = json.dumps(data, sort_keys=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(
+            prefix=".batllm-metadata-", suffix=".tmp", dir=self.path.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(text)
+            os.replace(temporary, self.path)
+        except Exception:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
@@ -19,11 +19,16 @@ import shlex
 import shutil
 import subprocess
 import sys
+import threading
 import time
 from pathlib import Path
 import yaml
 import argparse
 
+from configs.config_cache import merge_sections, read_yaml, thaw
+from llm.latency_model import LatencyModel, shared_latency_model
+from llm.metadata_cache import ModelMetadataCache, default_metadata_cache_path
+from llm.supervisor import ModelSupervisor, active_supervisor, set_active_supervisor
 from util.paths import resolve_config_path
 
 _logger = logging.getLogger(__name__)
@@ -73,21 +78,22 @@ def default_config_path() -> Path:
     return resolve_config_path(SHIPPED_CONFIG_PATH)
 
 
-def load_config_data(path: Path | None = None) -> dict[str, Any]:
-    """Load the shipped config plus any active user overlay config."""
+def load_config_view(path: Path | None = None) -> Mapping[str, Any]:
+    """Return the shipped config plus any active user overlay config, read-only.
+
+    Both files are parsed once per change through `configs.config_cache`,
+    which `configs.app_config` shares.
+    """
     resolved_path = default_config_path() if path is None else path
-    data = yaml.safe_load(SHIPPED_CONFIG_PATH.read_text(encoding="utf-8")) or {}
-    if resolved_path.exists() and resolved_path != SHIPPED_CONFIG_PATH:
-        overlay = yaml.safe_load(resolved_path.read_text(encoding="utf-8")) or {}
-        if isinstance(overlay, dict):
-            for section, values in overlay.items():
-                if section not in data:
-                    data[section] = {}
-                if isinstance(values, dict):
-                    data[section].update(values)
-                else:
-                    data[section] = values
-    return data if isinstance(data, dict) else {}
+    shipped = read_yaml(SHIPPED_CONFIG_PATH)
+    if resolved_path == SHIPPED_CONFIG_PATH:
+        return shipped
+    return merge_sections(shipped, read_yaml(resolved_path))
+
+
+def load_config_data(path: Path | None = None) -> dict[str, Any]:
+    """Load the shipped config plus any active user overlay config, as a mutable copy."""
+    return thaw(load_config_view(path))
 
 
 def load_llm_config(path: Path | None = None) -> dict[str, Any]:
@@ -111,10 +117,10 @@ def load_llm_config(path: Path | None = None) -> dict[str, Any]:
         except Exception:
             pass
 
-    data = load_config_data(path)
+    data = load_config_view(path)
     llm = data.get("llm") or {}
     model_timeouts = loaded_llm.get("model_timeouts", llm.get("model_timeouts"))
-    if not isinstance(model_timeouts, dict):
+    if not isinstance(model_timeouts, Mapping):
         model_timeouts = {}
     return {
         "last_served_model": str(loaded_llm.get("last_served_model") or llm.get("last_served_model") or "").strip(),
@@ -152,28 +158,85 @@ def resolve_warmup_timeout(llm: Mapping[str, Any], default: float = DEFAULT_WARM
     return float(default)
 
 
+def fetch_model_digest(url: str, port: int, model: str) -> str | None:
+    """Return the digest of ``model`` as listed by the server, or None if it lacks it."""
+    wanted = {model, model.removesuffix(":latest"), f"{model.removesuffix(':latest')}:latest"}
+    for entry in json_get(endpoint_url(url, port, "/api/tags")).get("models") or []:
+        if isinstance(entry, Mapping) and (entry.get("name") in wanted or entry.get("model") in wanted):
+            return str(entry.get("digest") or "") or None
+    return None
+
+
+def fetch_model_metadata(url: str, port: int, model: str) -> dict[str, Any]:
+    """Ask the server for ``model``'s metadata (a network round-trip)."""
+    client = Client(provider="ollama", model=model, host=url, port=port)
+    return normalize_metadata(client.model_metadata(model=model))
+
+
+_metadata_cache: ModelMetadataCache | None = None  # pylint: disable=invalid-name
+_metadata_cache_lock = threading.Lock()
+
+
+def model_metadata_cache() -> ModelMetadataCache:
+    """Return the process-wide model metadata cache, loaded from the BatLLM data folder."""
+    global _metadata_cache  # pylint: disable=global-statement
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = ModelMetadataCache.load(
+                default_metadata_cache_path(),
+                fetch_digest=fetch_model_digest,
+                fetch_metadata=fetch_model_metadata,
+            )
+        return _metadata_cache
+
+
+def reset_model_metadata_cache() -> None:
+    """Forget the process-wide cache so the next use reloads it (for tests)."""
+    global _metadata_cache  # pylint: disable=global-statement
+    with _metadata_cache_lock:
+        _metadata_cache = None
+
+
+def _metadata_target(
+    model: str | None, host: str | None, port: int | None
+) -> tuple[str, str, int]:
+    llm = load_llm_config()
+    selected_model = str(model or llm.get("model") or "").strip()
+    base_url = str(host or llm.get("url") or "http://localhost").rstrip("/")
+    return selected_model, base_url, int(port or llm.get("port") or 11434)
+
+
 def lookup_model_metadata(
     model: str | None = None,
     *,
     host: str | None = None,
     port: int | None = None,
 ) -> dict[str, Any]:
-    llm = load_llm_config()
-    selected_model = str(model or llm.get("model") or "").strip()
+    """Return the cached metadata of ``model`` without waiting for the server.
+
+    Until the cache has an entry this returns ``{}``; missing and expired
+    entries are refreshed in the background (see `llm.metadata_cache`).
+    """
+    selected_model, base_url, resolved_port = _metadata_target(model, host, port)
     if not selected_model:
         return {}
-    base_url = str(host or llm.get("url") or "http://localhost").rstrip("/")
-    resolved_port = int(port or llm.get("port") or 11434)
-    try:
-        client = Client(provider="ollama", model=selected_model, host=base_url, port=resolved_port)
-        raw = client.model_metadata(model=selected_model)
-        return normalize_metadata(raw)
-    except Exception:
-        return {}
+    return model_metadata_cache().get(base_url, resolved_port, selected_model)
+
+
+def prefetch_model_metadata(
+    model: str | None = None,
+    *,
+    host: str | None = None,
+    port: int | None = None,
+) -> None:
+    """Start caching ``model``'s metadata in the background, e.g. when it is selected."""
+    selected_model, base_url, resolved_port = _metadata_target(model, host, port)
+    if selected_model:
+        model_metadata_cache().get(base_url, resolved_port, selected_model)
 
 
 def build_saved_llm_metadata_snapshot(path: Path | None = None) -> dict[str, Any]:
-    data = load_config_data(path)
+    data = load_config_view(path)
     llm = data.get("llm") or {}
     config_llm = load_llm_config(path)
     selected_model = str(config_llm.get("model") or "").strip()
@@ -296,7 +359,15 @@ def resolve_request_timeout_details(
     default: float = 120.0,
     *,
     model: str | None = None,
+    prompt_tokens: int | None = None,
+    latency_model: LatencyModel | None = None,
 ) -> tuple[float, str]:
+    """Return the request timeout and where it came from.
+
+    Saved overrides win. With ``adaptive_timeouts`` enabled, a timeout learned
+    from observed latency (see :mod:`llm.latency_model`) for the model,
+    ``num_ctx`` and ``prompt_tokens`` comes next, then the static defaults.
+    """
     model_name = str(model or llm.get("model") or "").strip()
     model_timeouts = llm.get("model_timeouts")
     if isinstance(model_timeouts, dict) and model_name:
@@ -306,6 +377,15 @@ def resolve_request_timeout_details(
     configured_timeout = _parse_positive_timeout(llm.get("timeout"))
     if configured_timeout is not None:
         return configured_timeout, "global_override"
+    if llm.get("adaptive_timeouts") and model_name:
+        latency_model = latency_model if latency_model is not None else shared_latency_model()
+        try:
+            num_ctx = int(llm.get("num_ctx") or 0) or None
+        except (TypeError, ValueError):
+            num_ctx = None
+        learned = latency_model.suggest_timeout(model_name, num_ctx, prompt_tokens)
+        if learned is not None:
+            return learned, "adaptive"
     model_default = common_model_timeout(model_name)
     if model_default is not None:
         return model_default, "model_default"
@@ -317,8 +397,16 @@ def resolve_request_timeout(
     default: float = 120.0,
     *,
     model: str | None = None,
+    prompt_tokens: int | None = None,
+    latency_model: LatencyModel | None = None,
 ) -> float:
-    timeout, _source = resolve_request_timeout_details(llm, default=default, model=model)
+    timeout, _source = resolve_request_timeout_details(
+        llm,
+        default=default,
+        model=model,
+        prompt_tokens=prompt_tokens,
+        latency_model=latency_model,
+    )
     return timeout
 
 
@@ -516,6 +604,12 @@ def start_detached_ollama_serve(host: str) -> subprocess.Popen:
 
 
 def wait_until_ready(url: str, port: int, timeout_seconds: float = 60.0) -> None:
+    supervisor = active_supervisor()
+    if supervisor is not None and supervisor.endpoint == f"{url}:{port}":
+        # The supervisor is already checking the server; wait for it to say so.
+        if not supervisor.wait_ready(timeout_seconds):
+            raise RuntimeError(f"Ollama at {url}:{port} was not ready after {timeout_seconds:g}s")
+        return
     fn = getattr(_MODELITO, "wait_until_ready", None)
     if callable(fn):
         fn(url, port, timeout_seconds=timeout_seconds)
@@ -531,6 +625,46 @@ def preload_model(url: str, port: int, model: str, timeout: float = 120.0) -> No
     raise RuntimeError("modelito.preload_model is unavailable")
 
 
+def keep_model_alive(url: str, port: int, model: str, seconds: float, timeout: float = 120.0) -> None:
+    """Load ``model`` if needed and keep it loaded for ``seconds`` after this call."""
+    json_post(
+        endpoint_url(url, port, "/api/generate"),
+        {"model": model, "keep_alive": max(0, int(round(seconds)))},
+        timeout=timeout,
+    )
+
+
+def start_supervisor(
+    config_path: Path | None = None, *, overrides: Mapping[str, Any] | None = None
+) -> ModelSupervisor:
+    """Start the shared `llm.supervisor.ModelSupervisor` for the configured server and model.
+
+    ``overrides`` replaces saved ``llm`` settings, such as the ``url``, ``port``
+    and ``model`` of the running app's configuration, which may not be saved yet.
+    """
+    llm = {**load_llm_config(config_path), **(overrides or {})}
+    url = str(llm["url"])
+    port = int(llm["port"])
+    host = f"{url.removeprefix('http://').removeprefix('https://')}:{port}"
+
+    def keep_alive(model: str, seconds: float) -> None:
+        keep_model_alive(url, port, model, seconds, timeout=resolve_request_timeout(llm, model=model))
+
+    supervisor = ModelSupervisor(
+        model=str(llm["model"] or ""),
+        endpoint=f"{url}:{port}",
+        probe=lambda: server_is_up(url, port),
+        resident_models=lambda: running_model_names(host),
+        keep_alive=keep_alive,
+    )
+    set_active_supervisor(supervisor)
+    return supervisor.start()
+
+
+def stop_supervisor() -> None:
+    set_active_supervisor(None)
+
+
 def start_service(config_path: Path | None = None, warmup_timeout: float | None = None) -> int:
     # Prefer delegating to modelito when no explicit config path is provided; when
     # a `config_path` is given, run the local implementation so callers and tests
@@ -538,7 +672,8 @@ def start_service(config_path: Path | None = None, warmup_timeout: float | None
     llm = load_llm_config(config_path)
     resolved_warmup_timeout = resolve_warmup_timeout(
         llm, default=DEFAULT_WARMUP_TIMEOUT) if warmup_timeout is None else float(warmup_timeout)
-    if config_path is None:
+    # With a supervisor running, start locally so readiness comes from it.
+    if config_path is None and active_supervisor() is None:
         try:
             starter = getattr(_MODELITO, "start_service", None)
             if callable(starter):
@@ -728,8 +863,7 @@ def stop_service(config_path: Path | None = None, verbose: bool = False) -> int:
     return 0
 
 
-def build_parser() -> 'argparse.ArgumentParser':
-    import argparse
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Centralized Ollama/modelito helper")
     parser.add_argument("action", choices=("install", "start", "stop"))
     parser.add_argument(
@@ -0,0 +1,158 @@
+"""Concurrent, deadline-bounded and briefly cached status probes.
+
+The Ollama screen's status is made of independent checks: is the CLI
+installed, which version it is, whether the server answers, and which models
+it holds. Run one after another, a slow or absent server adds each check's
+timeout to the next. :func:`run_probes` starts every :class:`Probe` on its
+own daemon thread and reports each :class:`ProbeResult` as it arrives. A probe
+still running at its deadline is reported as timed out and left to finish in
+the background.
+
+Successful results are kept in a :class:`ProbeCache` for the probe's
+``ttl_s``, including those that arrive after their deadline, so refreshing
+the screen again shortly afterwards is immediate.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import queue
+import threading
+from time import monotonic, perf_counter
+from typing import Any, Callable, Hashable, Iterable
+
+
+@dataclass(frozen=True)
+class Probe:
+    """One status check; ``key`` separates cached results, e.g. by endpoint."""
+
+    name: str
+    run: Callable[[], Any]
+    deadline_s: float = 3.0
+    ttl_s: float = 5.0
+    key: Hashable = None
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """A probe's value or error and how long it took (the original time if cached)."""
+
+    name: str
+    value: Any = None
+    error: str = ""
+    elapsed_ms: float = 0.0
+    cached: bool = False
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and not self.timed_out
+
+
+class ProbeCache:
+    """Successful probe values with the time they were measured."""
+
+    def __init__(self, clock: Callable[[], float] = monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, tuple[float, Any, float]] = {}
+
+    def get(self, key: Hashable, ttl_s: float) -> tuple[Any, float] | None:
+        """Return ``(value, elapsed_ms)`` stored less than ``ttl_s`` ago, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or self._clock() - entry[0] >= ttl_s:
+            return None
+        return entry[1], entry[2]
+
+    def put(self, key: Hashable, value: Any, elapsed_ms: float) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value, elapsed_ms)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache = ProbeCache()
+
+
+def shared_probe_cache() -> ProbeCache:
+    return _shared_cache
+
+
+def clear_probe_cache() -> None:
+    """Forget every cached result, so the next probes ask again."""
+    _shared_cache.clear()
+
+
+def run_probes(
+    probes: Iterable[Probe],
+    *,
+    on_result: Callable[[ProbeResult], None] | None = None,
+    cache: ProbeCache | None = None,
+) -> dict[str, ProbeResult]:
+    """Run ``probes`` concurrently and return their results by name.
+
+    ``on_result`` is called on the calling thread with each result as it
+    arrives: cached ones first, then in order of completion or deadline.
+    ``cache`` defaults to the process-wide cache.
+    """
+    cache = shared_probe_cache() if cache is None else cache
+    results: dict[str, ProbeResult] = {}
+    arrivals: queue.Queue[ProbeResult] = queue.Queue()
+    pending: dict[str, Probe] = {}
+    started = perf_counter()
+
+    def report(result: ProbeResult) -> None:
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    def work(probe: Probe) -> None:
+        probe_started = perf_counter()
+        try:
+            value, error = probe.run(), ""
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            value, error = None, f"{type(exc).__name__}: {exc}"
+        elapsed_ms = round((perf_counter() - probe_started) * 1000.0, 1)
+        if not error and probe.ttl_s > 0:
+            cache.put((probe.name, probe.key), value, elapsed_ms)
+        arrivals.put(ProbeResult(probe.name, value, error, elapsed_ms))
+
+    for probe in probes:
+        hit = cache.get((probe.name, probe.key), probe.ttl_s) if probe.ttl_s > 0 else None
+        if hit is not None:
+            report(ProbeResult(probe.name, hit[0], elapsed_ms=hit[1], cached=True))
+            continue
+        pending[probe.name] = probe
+        threading.Thread(target=work, args=(probe,), name=f"probe-{probe.name}", daemon=True).start()
+
+    while pending:
+        next_deadline = min(started + probe.deadline_s for probe in pending.values())
+        try:
+            result = arrivals.get(timeout=max(0.0, next_deadline - perf_counter()))
+        except queue.Empty:
+            now = perf_counter()
+            for name, probe in list(pending.items()):
+                if now >= started + probe.deadline_s:
+                    del pending[name]
+                    report(ProbeResult(name, elapsed_ms=probe.deadline_s * 1000.0, timed_out=True))
+            continue
+        if pending.pop(result.name, None) is not None:
+            report(result)
+    return results
+
+
+def format_timings(results: Iterable[ProbeResult]) -> str:
+    """Describe how long each probe took, e.g. ``server 2 ms, version 3000 ms (timed out)``."""
+    parts = []
+    for result in results:
+        note = (
+            " (timed out)" if result.timed_out
+            else " (failed)" if result.error
+            else " (cached)" if result.cached
+            else ""
+        )
+        parts.append(f"{result.name} {result.elapsed_ms:.0f} ms{note}")
+    return ", ".join(parts)
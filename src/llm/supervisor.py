@@ -0,0 +1,381 @@
+"""Long-lived supervisor of the Ollama server and the model BatLLM plays with.
+
+Without it, BatLLM looks at the server only when asked: starting it polls
+until it answers, the Ollama screen probes on demand, and a model is preloaded
+once. Ollama unloads a model after five idle minutes by default, so a game
+whose players take longer than that over a round's prompts pays a cold load
+on its next request.
+
+:class:`ModelSupervisor` runs one background thread that
+
+* checks whether the server answers and which models it holds: every
+  ``READY_INTERVAL_S`` while it is up, and with doubling backoff (from
+  ``BACKOFF_MIN_S`` to ``BACKOFF_MAX_S``) while it is not;
+* keeps the configured model resident. It loads the model when the server
+  becomes ready and, while the game is active, when the server evicts it.
+  Idle gaps between the game's requests are recorded, and if they outgrow
+  Ollama's default keep-alive, one ping per idle period extends the model's
+  keep-alive to twice the 95th-percentile gap (at most ``MAX_KEEP_ALIVE_S``);
+* preloads the model a user is looking at on the Ollama screen, once they
+  have stayed on it for ``BROWSE_DELAY_S``;
+* publishes each change of :class:`ServingState` to its subscribers and wakes
+  threads waiting in :meth:`ModelSupervisor.wait_ready`.
+
+Requests whose reply reports a model load of at least ``COLD_LOAD_MS`` count
+as cold loads in the state, next to evictions and keep-alive pings.
+
+The server calls are injected, so the supervisor does not import
+`llm.service`; :func:`llm.service.start_supervisor` builds the shared one.
+Tests drive it without a thread through :meth:`ModelSupervisor.step`.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, replace
+import logging
+import threading
+import time
+from typing import Callable
+import weakref
+
+_logger = logging.getLogger(__name__)
+
+READY_INTERVAL_S = 10.0
+BACKOFF_MIN_S = 0.25
+BACKOFF_MAX_S = 30.0
+DEFAULT_KEEP_ALIVE_S = 300.0
+"""Ollama's own keep-alive: how long a model stays loaded after a request."""
+MAX_KEEP_ALIVE_S = 3600.0
+KEEP_ALIVE_MARGIN = 0.8
+"""Fraction of the current keep-alive after which an idle model is pinged."""
+COLD_LOAD_MS = 1000.0
+BROWSE_DELAY_S = 1.0
+GAP_WINDOW = 50
+
+PHASE_UNKNOWN = "unknown"
+PHASE_DOWN = "down"
+PHASE_STARTING = "starting"
+PHASE_READY = "ready"
+
+
+@dataclass(frozen=True)
+class ServingState:
+    """What the supervisor last saw of the server and the configured model."""
+
+    phase: str = PHASE_UNKNOWN
+    model: str = ""
+    resident: tuple[str, ...] = ()
+    keep_alive_s: float = DEFAULT_KEEP_ALIVE_S
+    preloaded: str = ""
+    failures: int = 0
+    error: str = ""
+    cold_loads: int = 0
+    evictions: int = 0
+    keep_alives: int = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == PHASE_READY
+
+    @property
+    def model_resident(self) -> bool:
+        return bool(self.model) and _is_resident(self.model, self.resident)
+
+
+def _is_resident(model: str, resident: tuple[str, ...]) -> bool:
+    """Return whether ``model`` is loaded; ``name`` matches ``name:latest``."""
+    names = {name.removesuffix(":latest") for name in resident}
+    return model.removesuffix(":latest") in names
+
+
+Probe = Callable[[], bool]
+ResidentModels = Callable[[], list[str]]
+KeepAlive = Callable[[str, float], None]
+StateListener = Callable[[ServingState], None]
+
+
+class ModelSupervisor:
+    """Watch the Ollama server and keep a model resident from one daemon thread."""
+
+    def __init__(
+        self,
+        *,
+        model: str,
+        endpoint: str = "",
+        probe: Probe,
+        resident_models: ResidentModels,
+        keep_alive: KeepAlive,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """``probe`` tells whether the server at ``endpoint`` (``url:port``)
+        answers, ``resident_models`` lists the loaded models, and
+        ``keep_alive(model, seconds)`` loads a model and keeps it for
+        ``seconds`` after the call.
+        """
+        self.endpoint = endpoint
+        self._probe = probe
+        self._resident_models = resident_models
+        self._keep_alive = keep_alive
+        self._clock = clock
+        self._state = ServingState(model=str(model or "").strip())
+        self._condition = threading.Condition()
+        self._listeners: list[weakref.ref] = []
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        now = clock()
+        self._next_check = now
+        self._backoff = BACKOFF_MIN_S
+        self._gaps: deque[float] = deque(maxlen=GAP_WINDOW)
+        self._last_activity: float | None = None
+        self._pinged_since_activity = False
+        self._browse: tuple[str, float] | None = None
+        self._load_pending = False
+
+    @property
+    def state(self) -> ServingState:
+        with self._condition:
+            return self._state
+
+    # Lifecycle
+
+    def start(self) -> "ModelSupervisor":
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="ollama-supervisor", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = 1.0) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                delay = self.step()
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                _logger.warning("Ollama supervisor step failed: %s", exc)
+                delay = BACKOFF_MAX_S
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    # Events from the app
+
+    def set_model(self, model: str) -> None:
+        """Make ``model`` the one kept resident; it is loaded on the next step."""
+        model = str(model or "").strip()
+        if model != self.state.model:
+            self._publish(model=model)
+            self._pinged_since_activity = False
+            self._load_pending = True
+            self._next_check = self._clock()
+            self._wake.set()
+
+    def notify_starting(self) -> None:
+        """Check the server at short intervals: it is being started."""
+        self._backoff = BACKOFF_MIN_S
+        self._next_check = self._clock()
+        if not self.state.ready:
+            self._publish(phase=PHASE_STARTING)
+        self._wake.set()
+
+    def record_activity(self, model: str, load_ms: float | None = None) -> None:
+        """Note a game request to ``model`` that completed, and its model load time."""
+        now = self._clock()
+        with self._condition:
+            if self._last_activity is not None:
+                self._gaps.append(now - self._last_activity)
+            self._last_activity = now
+            self._pinged_since_activity = False
+        if load_ms is not None and load_ms >= COLD_LOAD_MS:
+            _logger.info("Cold load of %s took %.0f ms.", model, load_ms)
+            self._publish(cold_loads=self.state.cold_loads + 1)
+        self._publish(keep_alive_s=self.keep_alive_target())
+        self._wake.set()
+
+    def browse(self, model: str) -> None:
+        """Preload ``model`` if it is still the one browsed after ``BROWSE_DELAY_S``."""
+        model = str(model or "").strip()
+        if model:
+            self._browse = (model, self._clock() + BROWSE_DELAY_S)
+            self._wake.set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Block until the server is ready or ``timeout`` seconds pass; return whether it is."""
+        self.notify_starting()
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._condition:
+            while not self._state.ready:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    # Publishing
+
+    def subscribe(self, listener: StateListener) -> None:
+        """Calls ``listener(state)`` after each change, on the supervisor's thread.
+
+        Listeners are held weakly, so subscribing does not keep an object alive.
+        """
+        try:
+            ref: weakref.ref = weakref.WeakMethod(listener)  # type: ignore[arg-type]
+        except TypeError:
+            ref = weakref.ref(listener)
+        with self._condition:
+            self._listeners.append(ref)
+
+    def unsubscribe(self, listener: StateListener) -> None:
+        with self._condition:
+            self._listeners = [
+                ref for ref in self._listeners if ref() is not None and ref() != listener
+            ]
+
+    def _publish(self, **changes) -> ServingState:
+        with self._condition:
+            previous = self._state
+            self._state = replace(previous, **changes)
+            current = self._state
+            if current == previous:
+                return current
+            self._condition.notify_all()
+            self._listeners = [ref for ref in self._listeners if ref() is not None]
+            listeners = [ref() for ref in self._listeners]
+        for listener in listeners:
+            if listener is not None:
+                try:
+                    listener(current)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    _logger.warning("Ollama state listener failed: %s", exc)
+        return current
+
+    # Work
+
+    def keep_alive_target(self) -> float:
+        """Twice the 95th-percentile idle gap, within Ollama's default and ``MAX_KEEP_ALIVE_S``."""
+        with self._condition:
+            gaps = sorted(self._gaps)
+        if not gaps:
+            return DEFAULT_KEEP_ALIVE_S
+        p95 = gaps[min(len(gaps) - 1, int(0.95 * len(gaps)))]
+        return min(MAX_KEEP_ALIVE_S, max(DEFAULT_KEEP_ALIVE_S, 2.0 * p95))
+
+    def _active(self, now: float) -> bool:
+        """Whether the game sent a request within the current keep-alive."""
+        return self._last_activity is not None and now - self._last_activity < self.keep_alive_target()
+
+    def _ping_due(self) -> float | None:
+        """When the idle model needs its keep-alive extended, if it does."""
+        target = self.keep_alive_target()
+        if self._last_activity is None or self._pinged_since_activity or target <= DEFAULT_KEEP_ALIVE_S:
+            return None
+        return self._last_activity + KEEP_ALIVE_MARGIN * DEFAULT_KEEP_ALIVE_S
+
+    def _load(self, model: str, seconds: float) -> bool:
+        try:
+            self._keep_alive(model, seconds)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self._publish(error=f"{type(exc).__name__}: {exc}")
+            return False
+        return True
+
+    def step(self) -> float:
+        """Do whatever is due now; return the seconds until something else is."""
+        now = self._clock()
+        if now >= self._next_check:
+            self._check(now)
+        state = self.state
+        if state.ready:
+            due = self._ping_due()
+            if state.model and due is not None and now >= due:
+                target = self.keep_alive_target()
+                if self._load(state.model, target):
+                    self._pinged_since_activity = True
+                    self._publish(keep_alives=state.keep_alives + 1)
+            browse = self._browse
+            if browse is not None and now >= browse[1]:
+                self._browse = None
+                if browse[0] != state.model and self._load(browse[0], DEFAULT_KEEP_ALIVE_S):
+                    self._publish(preloaded=browse[0])
+        upcoming = [self._next_check]
+        due = self._ping_due()
+        if due is not None:
+            upcoming.append(due)
+        if self._browse is not None:
+            upcoming.append(self._browse[1])
+        return max(0.0, min(upcoming) - self._clock())
+
+    def _check(self, now: float) -> None:
+        state = self.state
+        try:
+            up = bool(self._probe())
+            resident = tuple(self._resident_models()) if up else ()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            up, resident, error = False, (), f"{type(exc).__name__}: {exc}"
+        else:
+            error = ""
+        if not up:
+            self._next_check = now + self._backoff
+            self._backoff = min(BACKOFF_MAX_S, self._backoff * 2)
+            self._publish(
+                phase=PHASE_STARTING if state.phase == PHASE_STARTING else PHASE_DOWN,
+                resident=(),
+                failures=state.failures + 1,
+                error=error or state.error,
+            )
+            return
+        self._backoff = BACKOFF_MIN_S
+        self._next_check = now + READY_INTERVAL_S
+        became_ready = not state.ready
+        evicted = (
+            not became_ready
+            and state.model_resident
+            and not _is_resident(state.model, resident)
+        )
+        state = self._publish(
+            phase=PHASE_READY,
+            resident=resident,
+            failures=0,
+            error="",
+            evictions=state.evictions + 1 if evicted else state.evictions,
+        )
+        if evicted:
+            _logger.info("Ollama unloaded %s.", state.model)
+        # Load the model when the server comes up or the model changes, and
+        # again if it was evicted while a game is using it.
+        load = became_ready or self._load_pending or (evicted and self._active(now))
+        self._load_pending = False
+        if state.model and not state.model_resident and load:
+            if self._load(state.model, self.keep_alive_target()):
+                self._publish(resident=(*resident, state.model))
+
+
+_active_lock = threading.Lock()
+_active: ModelSupervisor | None = None
+
+
+def active_supervisor() -> ModelSupervisor | None:
+    """Return the process-wide supervisor if one is running."""
+    with _active_lock:
+        return _active if _active is not None and _active.running else None
+
+
+def set_active_supervisor(supervisor: ModelSupervisor | None) -> None:
+    """Register the process-wide supervisor, stopping the one it replaces."""
+    global _active  # pylint: disable=global-statement
+    with _active_lock:
+        previous, _active = _active, supervisor
+    if previous is not None and previous is not supervisor:
+        previous.stop()
@@ -8,6 +8,7 @@ from util.version import current_app_version
 from util.utils import show_confirmation_dialog, show_fading_alert
 from util.paths import asset_path, register_kivy_resource_paths, repo_path, theme_colors_path, view_path
 from configs.app_config import config
+import logging
 import os
 import sys
 import threading
@@ -25,6 +26,8 @@ from llm import service as ollama_service
 
 os.environ["KIVY_NO_CONSOLELOG"] = "1"
 
+_logger = logging.getLogger(__name__)
+
 
 
 register_kivy_resource_paths()
@@ -192,10 +195,51 @@ class BatLLM(MDApp):
         self._startup_ollama_flow_completed = True
         self._handle_startup_ollama_state(ollama_service.inspect_service_state())
 
+    def _start_supervisor(self) -> None:
+        # Subscribed even when off, so turning supervision on takes effect at once.
+        config.subscribe(self._on_llm_config_change)
+        if config.get("llm", "supervise"):
+            self._restart_supervisor()
+
+    def _restart_supervisor(self) -> None:
+        ollama_service.stop_supervisor()
+        # The in-memory settings, which the settings screens may not have saved yet.
+        overrides = {key: config.get("llm", key) for key in ("url", "port", "model")}
+        try:
+            ollama_service.start_supervisor(overrides=overrides)
+        except Exception:  # pylint: disable=broad-exception-caught
+            _logger.exception("Could not start the Ollama supervisor")
+
+    def _on_llm_config_change(self, section, key) -> None:
+        supervisor = ollama_service.active_supervisor()
+        if section not in ("llm", None):
+            return
+        if key in ("url", "port", "supervise", None):
+            # The supervisor watches one endpoint; start over for a new one.
+            if config.get("llm", "supervise"):
+                self._restart_supervisor()
+            else:
+                ollama_service.stop_supervisor()
+        elif key == "model" and supervisor is not None:
+            supervisor.set_model(str(config.get("llm", "model") or ""))
+
+    def _prefetch_model_metadata(self, section=None, key=None) -> None:
+        # Sessions record the model's metadata; fetch it now so saving never waits.
+        if section not in ("llm", None) or key not in ("model", "url", "port", None):
+            return
+        try:
+            ollama_service.prefetch_model_metadata()
+        except Exception:  # pylint: disable=broad-exception-caught
+            _logger.exception("Could not prefetch the model metadata")
+
     def on_start(self):
+        self._start_supervisor()
+        self._prefetch_model_metadata()
+        config.subscribe(self._prefetch_model_metadata)
         Clock.schedule_once(self._run_startup_ollama_flow, 0)
 
     def on_stop(self):
+        ollama_service.stop_supervisor()
         should_stop = bool(
             config.get("ui", "stop_ollama_on_exit")
             or config.get("ui", "auto_stop_ollama")
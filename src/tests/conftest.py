@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 from copy import deepcopy
+from http.server import ThreadingHTTPServer
+from importlib import import_module
 import os
 from pathlib import Path
+import sys
 import tempfile
+import threading
 from types import SimpleNamespace
 
 import pytest
@@ -13,6 +17,8 @@ _TEST_HOME = Path(tempfile.mkdtemp(prefix="batllm-pytest-"))
 os.environ["BATLLM_HOME"] = str(_TEST_HOME)
 
 from configs.app_config import config
+from llm.service import reset_model_metadata_cache
+from llm.status_probe import clear_probe_cache
 
 
 @pytest.fixture(autouse=True)
@@ -32,6 +38,9 @@ def _disable_kivy_window_requirement(monkeypatch) -> None:
         lambda *args, **kwargs: None,
         raising=False,
     )
+    # Status probes and model metadata are cached; each test asks afresh.
+    clear_probe_cache()
+    reset_model_metadata_cache()
 
 
 @pytest.fixture(autouse=True)
@@ -43,5 +52,32 @@ def _isolate_config_state(tmp_path) -> None:
 
     yield
 
-    setattr(config, "_config", deepcopy(original_config))
+    config.flush()
+    config.restore(deepcopy(original_config))
     setattr(config, "_path", original_path)
+
+
+@pytest.fixture
+def mock_endpoints():
+    """Start in-process mock Ollama servers; call with ``delay`` for a slow one.
+
+    ``load_time`` is the model load (in seconds) the first chat reply reports.
+    """
+    root = str(Path(__file__).resolve().parents[2])
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    handler = import_module("tools.ollama_mock_server").MockHandler
+    servers = []
+
+    def start(delay: float = 0.0, load_time: float = 0.0) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.chat_delay = delay
+        server.load_time = load_time
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from configs.app_config import AppConfig
+from configs.config_cache import cache_stats, clear_cache, read_yaml, thaw
+import llm.service as ollama_service
+
+
+def test_read_yaml_parses_each_version_once_and_returns_read_only_views(tmp_path: Path) -> None:
+    clear_cache()
+    path = tmp_path / "config.yaml"
+    path.write_text("llm:\n  stop: [X]\n", encoding="utf-8")
+
+    first = read_yaml(path)
+    assert read_yaml(path) is first
+    assert cache_stats().parses == 1 and cache_stats().hits == 1
+    with pytest.raises(TypeError):
+        first["llm"]["model"] = "other"  # type: ignore[index]
+    assert first["llm"]["stop"] == ("X",)
+
+    copy = thaw(first)
+    copy["llm"]["stop"].append("Y")
+    assert copy == {"llm": {"stop": ["X", "Y"]}} and read_yaml(path)["llm"]["stop"] == ("X",)
+
+    path.write_text("llm:\n  stop: [X, Y]\n", encoding="utf-8")
+    assert read_yaml(path)["llm"]["stop"] == ("X", "Y") and cache_stats().parses == 2
+    assert read_yaml(tmp_path / "missing.yaml") == {}
+
+
+def test_app_config_and_llm_service_share_parsed_files(monkeypatch, tmp_path: Path) -> None:
+    shipped_path = tmp_path / "shipped-config.yaml"
+    shipped_path.write_text("llm:\n  model: smollm2\n  port: 11434\n", encoding="utf-8")
+    runtime_path = tmp_path / "home" / "config.yaml"
+    runtime_path.parent.mkdir()
+    runtime_path.write_text("llm:\n  last_served_model: phi3\n", encoding="utf-8")
+    monkeypatch.setattr(ollama_service, "SHIPPED_CONFIG_PATH", shipped_path)
+    monkeypatch.setattr(ollama_service, "lookup_model_metadata", lambda *args, **kwargs: {})
+    clear_cache()
+
+    app_config = AppConfig(path=runtime_path, default_path=shipped_path)
+    for _ in range(3):
+        loaded = ollama_service.load_llm_config(runtime_path)
+        ollama_service.build_saved_llm_metadata_snapshot(runtime_path)
+    assert (loaded["model"], loaded["last_served_model"]) == ("smollm2", "phi3")
+    assert cache_stats().parses == 2
+
+    app_config.set("llm", "last_served_model", "mistral-small")
+    app_config.save()
+    assert ollama_service.load_llm_config(runtime_path)["last_served_model"] == "mistral-small"
+    assert cache_stats().parses == 3
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import gc
+import time
+from types import SimpleNamespace
+
+from configs.app_config import AppConfig, config
+from game.ollama_connector import OllamaConnector
+
+
+def test_config_versions_notify_listeners_and_coalesce_saves(tmp_path) -> None:
+    cfg = AppConfig(path=tmp_path / "config.yaml")
+    changes = []
+
+    class Listener:
+        def on_change(self, section, key):
+            changes.append((section, key))
+
+    listener = Listener()
+    cfg.subscribe(listener.on_change)
+    start, llm, game = cfg.version, cfg.version_of("llm"), cfg.version_of("game", "total_rounds")
+
+    cfg.set("llm", "model", "fixture")
+    cfg.set("llm", "model", "fixture")
+    assert changes == [("llm", "model")] and cfg.version == start + 1
+    assert cfg.version_of("llm") > llm and cfg.version_of("game", "total_rounds") == game
+    assert cfg.version_of("llm", "seed") == llm
+
+    cfg.load()
+    assert changes[-1] == (None, None) and cfg.version_of("game", "total_rounds") > game
+
+    # Listeners are held weakly.
+    del listener
+    gc.collect()
+    cfg.set("llm", "model", "other")
+    assert len(changes) == 2
+
+    saves = []
+    cfg.save = lambda path=None: saves.append(time.monotonic())
+    for _ in range(3):
+        cfg.save_later(0.05)
+    deadline = time.monotonic() + 5
+    while not saves:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert len(saves) == 1
+    cfg.flush()
+    assert len(saves) == 1
+
+
+def test_connector_rereads_settings_only_after_a_change(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(chat=lambda **kwargs: {"message": {"content": "M"}}),
+    )
+    saves = []
+    monkeypatch.setattr(config, "save", lambda path=None: saves.append("save"))
+    monkeypatch.setattr(config, "save_later", lambda delay=1.0: saves.append("later"))
+    config.set("llm", "model", "first")
+    connector = OllamaConnector()
+    reads = []
+    read_text = connector._get_system_instructions_text
+    monkeypatch.setattr(
+        connector, "_get_system_instructions_text", lambda: reads.append(1) or read_text()
+    )
+
+    for _ in range(3):
+        connector.send_prompt_to_llm_sync(1, user_text="go", game_state={})
+    assert len(reads) == 1
+    # Recording the served model is deferred to the background writer.
+    assert saves == ["later"]
+
+    config.set("llm", "temperature", 0.5)
+    connector.send_prompt_to_llm_sync(1, user_text="go", game_state={})
+    assert len(reads) == 2 and connector.gen_options()["temperature"] == 0.5
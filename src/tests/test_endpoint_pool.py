@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from configs.app_config import config
+from game.endpoint_pool import EndpointPool, EndpointPoolError, PooledChatClient, parse_endpoints
+from game.ollama_connector import OllamaConnector
+from game.replay_engine import GameplaySettingsSnapshot
+from game.research_runtime import MediatedGameRuntime
+
+
+def test_pool_keeps_affinity_balances_and_fails_over() -> None:
+    now = [0.0]
+    probes = []
+    pool = EndpointPool(
+        ["a:1", "b:2"],
+        probe=lambda host: probes.append(host) or True,
+        clock=lambda: now[0],
+    )
+    first = pool.acquire(1)
+    # Bot 2 arrives while bot 1's request is outstanding, so it gets the idle endpoint.
+    second = pool.acquire(2)
+    assert {first, second} == {"http://a:1", "http://b:2"}
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire(1) == first
+    pool.release(first, failed=True)
+
+    assert pool.acquire(1) == second
+    pool.release(second)
+    assert pool.snapshot()[0]["healthy"] is False and probes == []
+
+    now[0] = pool.retry_after + 1
+    assert pool.acquire(3, exclude=[second]) == first
+    pool.wait_for_probes(2.0)
+    assert probes == [first] and pool.snapshot()[0]["healthy"] is True
+    with pytest.raises(EndpointPoolError):
+        parse_endpoints(["localhost:notaport"])
+    assert parse_endpoints("localhost, localhost:11434,127.0.0.1:11435") == [
+        "http://localhost:11434",
+        "http://127.0.0.1:11435",
+    ]
+
+
+def test_connector_fails_over_to_a_healthy_mock_endpoint(mock_endpoints, monkeypatch) -> None:
+    slow = mock_endpoints(delay=2.0)
+    fast = mock_endpoints()
+    settings = {
+        ("llm", "endpoints"): [slow, fast],
+        ("llm", "timeout"): 0.5,
+        # modelito's chat path has no deadline; the async transport enforces it.
+        ("llm", "async_transport"): True,
+    }
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+    prompt = "Reply with exactly M"
+
+    assert connector.send_prompt_to_llm_sync(1, user_text=prompt, game_state={}) == "M"
+    telemetry = connector.pop_telemetry_record(1)
+    assert telemetry["endpoint"] == fast and telemetry["attempts"] == 2
+
+    # Bot 1 stays on the endpoint that holds its context while the slow one is out.
+    assert connector.send_prompt_to_llm_sync(1, user_text=prompt, game_state={}) == "M"
+    assert connector.pop_telemetry_record(1)["endpoint"] == fast
+    health = {entry["host"]: entry["healthy"] for entry in connector.endpoint_pool.snapshot()}
+    assert health == {slow: False, fast: True}
+
+
+def test_pooled_research_client_records_the_endpoint(mock_endpoints) -> None:
+    endpoints = [mock_endpoints(), mock_endpoints()]
+
+    class EchoClient:
+        def __init__(self, host: str):
+            self.host = host
+
+        def chat(self, **_kwargs):
+            return f"M from {self.host}"
+
+    client = PooledChatClient({host: EchoClient(host) for host in endpoints}, EndpointPool(endpoints))
+    reply = client.chat(model="m", messages=[], options={})
+    assert reply["endpoint"] in endpoints and reply["response"] == f"M from {reply['endpoint']}"
+
+
+def test_recovery_probes_run_off_the_request_thread() -> None:
+    now = [0.0]
+    release = threading.Event()
+    pool = EndpointPool(
+        ["a:1", "b:2"], probe=lambda host: release.wait(2.0), clock=lambda: now[0]
+    )
+    pool.release(pool.acquire(1), failed=True)
+    now[0] = pool.retry_after + 1
+
+    started = time.perf_counter()
+    assert pool.acquire(2) == "http://b:2"
+    assert time.perf_counter() - started < 0.5
+    release.set()
+    pool.wait_for_probes(2.0)
+    assert all(entry["healthy"] for entry in pool.snapshot())
+
+
+def test_research_runtime_keeps_each_bot_on_its_endpoint() -> None:
+    endpoints = ["a:1", "b:2"]
+    served: dict[int, set[str]] = {1: set(), 2: set()}
+
+    class EchoClient:
+        def __init__(self, host: str):
+            self.host = host
+
+        def chat(self, **_kwargs):
+            return "M"
+
+    pool = EndpointPool(endpoints, probe=lambda host: True)
+    runtime = MediatedGameRuntime(
+        client=PooledChatClient({host: EchoClient(host) for host in endpoints}, pool),
+        initial_state={
+            1: {"x": 0.25, "y": 0.5, "rot": 0, "health": 100, "shield": False},
+            2: {"x": 0.75, "y": 0.5, "rot": 180, "health": 100, "shield": False},
+        },
+        rules=GameplaySettingsSnapshot.from_mapping({}),
+    )
+    runtime.start_round({1: "advance", 2: "defend"})
+    # Another request holds endpoint a, so bot 1 starts on b; later it stays there.
+    busy = pool.acquire()
+    served[1].add(runtime.play(bot_id=1, human_prompt="advance")["endpoint"])
+    pool.release(busy)
+    for _ in range(3):
+        for bot_id in (1, 2):
+            served[bot_id].add(runtime.play(bot_id=bot_id, human_prompt="advance")["endpoint"])
+    assert served == {1: {"http://b:2"}, 2: {"http://a:1"}}
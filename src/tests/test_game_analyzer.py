@@ -11,7 +11,10 @@ from types import SimpleNamespace
 
 import pytest
 
-from analyzer_model import AnalyzerSessionModel
+from analyzer_model import AnalyzerSessionModel, open_session_model
+from game import session_catalog, session_index
+from game.session_index import LazySessionSource
+from game.session_catalog import SessionCatalog
 from game.session_schema import (
     SessionFormatError,
     UnsupportedLegacySession,
@@ -209,6 +212,227 @@ def test_analyzer_load_screen_opens_valid_session(tmp_path: Path) -> None:
     assert review_screen.model.source_name == "session.json"
 
 
+def test_session_catalog_reindexes_only_changed_files(tmp_path: Path, monkeypatch) -> None:
+    first = tmp_path / "first.json"
+    second = tmp_path / "second.json"
+    broken = tmp_path / "broken.json"
+    first.write_text(json.dumps(_sample_payload()), encoding="utf-8")
+    other = _sample_payload()
+    other["llm_metadata"]["configured_model"] = "llama3.2"
+    other["llm_metadata"]["last_served_model"] = "llama3.2"
+    second.write_text(json.dumps(other), encoding="utf-8")
+    broken.write_text("{not-json", encoding="utf-8")
+
+    parses = {"count": 0}
+    original_parse = session_catalog.parse_session_payload
+
+    def counting_parse(data):
+        parses["count"] += 1
+        return original_parse(data)
+
+    monkeypatch.setattr(session_catalog, "parse_session_payload", counting_parse)
+    catalog = SessionCatalog(tmp_path)
+
+    assert catalog.refresh() == 3
+    assert catalog.refresh() == 0
+    stat = first.stat()
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert catalog.refresh() == 0
+    assert parses["count"] == 3
+
+    entries = {entry.name: entry for entry in catalog.entries(sort_by="name", descending=False)}
+    assert list(entries) == ["broken.json", "first.json", "second.json"]
+    assert entries["broken.json"].compatible is False
+    assert "Invalid JSON" in entries["broken.json"].error
+    assert entries["first.json"].summary()["turn_count"] == 1
+    assert entries["first.json"].winner == 1
+    assert entries["first.json"].models == ("smollm2",)
+    assert [entry.name for entry in catalog.entries(query="llama")] == ["second.json"]
+
+    second.unlink()
+    assert catalog.refresh() == 0
+    assert [entry.name for entry in catalog.entries(compatible_only=True)] == ["first.json"]
+
+    # A fresh catalog object reuses the persisted sidecar index.
+    assert SessionCatalog(tmp_path).refresh() == 0
+
+
+def test_analyzer_load_screen_preview_reads_catalog(tmp_path: Path, monkeypatch) -> None:
+    session_path = tmp_path / "session.json"
+    session_path.write_text(json.dumps(_sample_payload()), encoding="utf-8")
+    screen = AnalyzerLoadScreen()
+    monkeypatch.setattr(screen, "default_saved_sessions_dir", lambda: tmp_path)
+    screen.session_catalog().refresh()
+    monkeypatch.setattr(
+        session_catalog,
+        "parse_session_payload",
+        lambda _data: pytest.fail("preview must not re-parse an indexed session"),
+    )
+
+    screen.load_preview(session_path)
+
+    assert screen.status_text == "Compatibility: analyzer-compatible"
+    assert "Models: smollm2" in screen.summary_text
+    assert "Winner: Bot 1" in screen.summary_text
+
+
+def test_analyzer_load_screen_recovers_from_unexpected_open_errors(tmp_path: Path, monkeypatch) -> None:
+    screen = AnalyzerLoadScreen()
+    monkeypatch.setattr(screen, "default_saved_sessions_dir", lambda: tmp_path)
+    monkeypatch.setattr("view.analyzer_load_screen.Clock.schedule_once", lambda callback, _delay: callback(0))
+
+    def fail(*_args, **_kwargs):
+        raise OSError("disk unplugged")
+
+    monkeypatch.setattr("view.analyzer_load_screen.open_session_model", fail)
+    started = []
+    monkeypatch.setattr(
+        "view.analyzer_load_screen.threading.Thread",
+        lambda target, daemon: SimpleNamespace(start=lambda: started.append(target())),
+    )
+
+    screen._open_large_session(tmp_path / "large.json")
+
+    assert started and screen.opening is False
+    assert screen.status_text == "Could not open the session: disk unplugged"
+
+
+def _multi_round_payload() -> dict:
+    payload = _sample_payload()
+    game = payload["games"][0]
+    second_round = deepcopy(game["rounds"][0])
+    second_round["round"] = 2
+    second_round["prompts"][0]["prompt"] = 'Escape "quotes" and [brackets] {too}'
+    game["rounds"].append(second_round)
+    second_game = deepcopy(game)
+    second_game["game_id"] = 2
+    second_game["winner"] = 2
+    payload["games"].append(second_game)
+    return payload
+
+
+def test_lazy_session_source_decodes_rounds_on_demand(tmp_path: Path) -> None:
+    payload = _multi_round_payload()
+    session_path = tmp_path / "large.json"
+    session_path.write_text(json.dumps(payload, indent=4), encoding="utf-8")
+
+    source = LazySessionSource(session_path)
+    try:
+        assert source.payload["llm_metadata"] == payload["llm_metadata"]
+        assert "games" not in source.payload
+        assert source.game_count() == 2
+        assert source.round_count(1) == 2
+        assert source.game(1) == {key: value for key, value in payload["games"][1].items() if key != "rounds"}
+        assert source.peek_round(0, 1) is None
+
+        assert source.round(0, 0) == payload["games"][0]["rounds"][0]
+        source.wait_for_prefetch()
+        assert source.peek_round(0, 1) == payload["games"][0]["rounds"][1]
+        assert source.round(1, 1) == payload["games"][1]["rounds"][1]
+
+        model = AnalyzerSessionModel(source, session_path)
+        full = AnalyzerSessionModel(payload, session_path)
+        model.set_game_index(1)
+        model.set_round_index(1)
+        full.set_game_index(1)
+        full.set_round_index(1)
+        assert [step["label"] for step in model.round_steps()] == [
+            step["label"] for step in full.round_steps()
+        ]
+        assert model.format_prompts() == full.format_prompts()
+        rows = model.session_tree_rows()
+        assert [row.label for row in rows if row.kind == "subheader"] == [
+            "Round 1", "Round 2", "Round 1", "Round 2"
+        ]
+    finally:
+        source.close()
+
+
+def test_lazy_session_tree_rows_do_not_decode_rounds(tmp_path: Path, monkeypatch) -> None:
+    session_path = tmp_path / "large.json"
+    session_path.write_text(json.dumps(_multi_round_payload()), encoding="utf-8")
+    source = LazySessionSource(session_path)
+    try:
+        model = AnalyzerSessionModel(source, session_path)
+        model.set_game_index(1)
+        model.set_round_index(1)
+        model.round_steps()
+        source.wait_for_prefetch()
+        monkeypatch.setattr(source, "round", lambda *_args: pytest.fail("tree rows must not decode rounds"))
+        monkeypatch.setattr(source, "prefetch_around", lambda *_args: pytest.fail("tree rows must not prefetch"))
+
+        rows = model.session_tree_rows()
+
+        assert {(row.game_index, row.round_index) for row in rows if row.kind == "turn"} == {(1, 0), (1, 1)}
+        assert (model.game_index, model.round_index) == (1, 1)
+    finally:
+        source.close()
+
+
+def test_lazy_session_step_cache_follows_round_cache_bound(tmp_path: Path, monkeypatch) -> None:
+    session_path = tmp_path / "large.json"
+    session_path.write_text(json.dumps(_multi_round_payload()), encoding="utf-8")
+    monkeypatch.setattr("analyzer_model.ROUND_CACHE_SIZE", 2)
+    source = LazySessionSource(session_path, prefetch=False)
+    try:
+        model = AnalyzerSessionModel(source, session_path)
+        for game_index in range(2):
+            model.set_game_index(game_index)
+            for round_index in range(2):
+                model.set_round_index(round_index)
+                model.round_steps()
+        assert list(model._round_step_cache) == [(1, 0), (1, 1)]
+    finally:
+        source.close()
+
+
+def test_lazy_session_offsets_are_cached_in_catalog(tmp_path: Path, monkeypatch) -> None:
+    session_path = tmp_path / "large.json"
+    session_path.write_text(json.dumps(_multi_round_payload()), encoding="utf-8")
+    catalog = SessionCatalog(tmp_path)
+    progress: list[float] = []
+
+    model = open_session_model(session_path, catalog=catalog, progress=progress.append, lazy_threshold=0)
+    assert model.is_lazy
+    assert progress and progress[-1] == 1.0
+    model.close()
+
+    monkeypatch.setattr(
+        session_index,
+        "build_offset_index",
+        lambda *_args, **_kwargs: pytest.fail("cached offsets must be reused"),
+    )
+    reopened = open_session_model(session_path, catalog=catalog, lazy_threshold=0)
+    try:
+        assert reopened.game_labels() == ["Game 1", "Game 2"]
+        assert reopened.current_round()["round"] == 1
+    finally:
+        reopened.close()
+
+
+def test_lazy_session_source_rejects_invalid_sessions(tmp_path: Path) -> None:
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text("[]", encoding="utf-8")
+    with pytest.raises(UnsupportedLegacySession):
+        LazySessionSource(legacy, prefetch=False)
+
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text(json.dumps(_sample_payload())[:-40], encoding="utf-8")
+    with pytest.raises(SessionFormatError, match="Invalid JSON"):
+        LazySessionSource(truncated, prefetch=False)
+
+    payload = _sample_payload()
+    del payload["games"][0]["rounds"][0]["initial_state"]
+    broken_round = tmp_path / "broken_round.json"
+    broken_round.write_text(json.dumps(payload), encoding="utf-8")
+    source = LazySessionSource(broken_round, prefetch=False)
+    try:
+        with pytest.raises(SessionFormatError, match="missing initial_state"):
+            source.round(0, 0)
+    finally:
+        source.close()
+
+
 def test_analyzer_load_screen_escape_goes_back(monkeypatch) -> None:
     screen = AnalyzerLoadScreen()
     go_back_called = {"value": False}
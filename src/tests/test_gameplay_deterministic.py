@@ -11,10 +11,14 @@ import pytest
 from configs.app_config import config
 from game.bot import Bot
 from game.bullet import Bullet
+from game.context_window import ContextBudget
 from game.game_board import GameBoard
-from game.ollama_connector import LLMTimeoutError, OllamaConnector
+from game.llm_telemetry import LatencyTelemetry, percentile
+from game.message_history import MessageHistory
+from game.ollama_connector import LLMRequestError, LLMTimeoutError, OllamaConnector, SpeculativeReply
 from game.prompt_store import PromptStore
 from game.session_schema import validate_session_payload
+from llm.latency_model import LatencyModel
 from view.home_screen import HomeScreen
 
 
@@ -61,6 +65,30 @@ class _ImmediateExecutor:
         return future
 
 
+class _DeferredExecutor:
+    """Hold submitted work until the test completes it, in any order."""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, function, *args, **kwargs):
+        future = Future()
+        self.pending.append((future, function, args, kwargs))
+        return future
+
+    def bot_ids(self) -> list[int]:
+        return [args[0] for _future, _function, args, _kwargs in self.pending]
+
+    def complete(self, index: int) -> None:
+        future, function, args, kwargs = self.pending[index]
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as exc:  # Delivered through the Future, as in production.
+            future.set_exception(exc)
+
+
 def _instant_move(self, distance=None, duration: float = 0.48, easing: str = "out_quad", on_complete=None):
     step = self.default_step if distance is None else distance
     rad = math.radians(self.rot)
@@ -180,9 +208,9 @@ def test_ollama_connector_ensure_system_message_inserts_header_once(monkeypatch)
     connector = OllamaConnector()
     connector._system_instructions = "SYSTEM HEADER"
 
-    history = [{"role": "user", "content": "move"}]
-    connector._ensure_system_message(history)
-    connector._ensure_system_message(history)
+    history = MessageHistory([{"role": "user", "content": "move"}])
+    history = connector._ensure_system_message(history)
+    assert connector._ensure_system_message(history) is history
 
     assert history[0] == {"role": "system", "content": "SYSTEM HEADER"}
     assert history[1] == {"role": "user", "content": "move"}
@@ -213,11 +241,264 @@ def test_ollama_connector_retries_once_after_timeout(monkeypatch) -> None:
 
     assert response == "M"
     assert calls["count"] == 2
-    history = connector._get_history_ref(1)
+    history = connector._get_history(1)
     assert [message["role"] for message in history].count("user") == 1
     assert history[-1] == {"role": "assistant", "content": "M"}
 
 
+def test_streamed_reply_stops_generation_once_the_command_is_err(monkeypatch) -> None:
+    closed = []
+
+    def fake_stream(*, messages, **_kwargs):
+        chunks = ["M0.5", ""] if messages[-1]["content"].endswith("move") else ["Su", "re, I'll", " move"]
+        try:
+            yield from chunks
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(stream_chat=fake_stream),
+    )
+    original_get = config.get
+    monkeypatch.setattr(
+        config,
+        "get",
+        lambda section, key: True if (section, key) == ("llm", "stream_commands")
+        else original_get(section, key),
+    )
+    connector = OllamaConnector()
+
+    assert connector.send_prompt_to_llm_sync(1, user_text="chat", game_state={}) == "Su"
+    record = connector.pop_stream_record(1)
+    assert record["truncated"] is True and record["time_to_command_ms"] >= 0
+    assert connector._get_history(1)[-1] == {"role": "assistant", "content": "Su"}
+    assert connector.pop_stream_record(1) is None
+
+    assert connector.send_prompt_to_llm_sync(2, user_text="move", game_state={}) == "M0.5"
+    assert connector.pop_stream_record(2)["truncated"] is False
+    assert closed == [True, True]
+
+
+def test_context_budget_trims_in_blocks_and_keeps_user_first() -> None:
+    history = [{"role": "system", "content": "rules"}]
+    for index in range(4):
+        history += [{"role": "user", "content": f"u{index}"}, {"role": "assistant", "content": "M"}]
+    budget = ContextBudget(max_messages=9)
+    assert budget.trim(history) == 0
+    history.append({"role": "user", "content": "u4"})
+
+    assert budget.trim(history) == 6
+    assert [message["content"] for message in history] == ["rules", "u3", "M", "u4"]
+
+    long_history = [{"role": "system", "content": "rules"}] + [
+        {"role": "user" if index % 2 == 0 else "assistant", "content": "x" * 400}
+        for index in range(9)
+    ]
+    assert ContextBudget(num_ctx=1000, reply_reserve=200).trim(long_history) == 6
+    assert long_history[1]["role"] == "user" and len(long_history) == 4
+
+
+def test_connector_records_prefix_reuse_between_block_trims(mock_endpoints, monkeypatch) -> None:
+    # The real client against a mock server: the default request path must keep
+    # the counters Ollama reports with its reply.
+    host, port = mock_endpoints().rsplit(":", 1)
+    settings = {("llm", "url"): host, ("llm", "port"): int(port)}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+    connector._max_history_messages = 5
+
+    stable = []
+    for turn in range(5):
+        connector.send_prompt_to_llm_sync(1, user_text=f"turn {turn}", game_state={})
+        record = connector.pop_context_record(1)
+        stable.append(record["prefix_stable"])
+    assert stable == [False, True, False, True, False]
+    assert record["shared_prefix_messages"] == 1
+    assert connector.pop_context_record(1) is None
+
+    telemetry = connector.pop_telemetry_record(1)
+    assert telemetry["prompt_eval_count"] > 0
+    assert telemetry["prefill_ms"] == float(telemetry["prompt_eval_count"])
+    assert telemetry["generation_ms"] == 20.0 and telemetry["tokens_per_second"] == 100.0
+    assert telemetry["attempts"] == 1 and telemetry["latency_ms"] >= 0
+    summary = connector.telemetry.summary()[connector.model]
+    assert summary["requests"] == 5 and summary["dominant_phase"] == "prefill"
+    assert summary["tokens_per_second"] == 100.0
+
+
+def test_block_trims_shrink_the_prefill_reported_by_the_server(mock_endpoints, monkeypatch) -> None:
+    host, port = mock_endpoints().rsplit(":", 1)
+    settings = {("llm", "url"): host, ("llm", "port"): int(port)}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+    connector._max_history_messages = 5
+
+    prefills = []
+    for turn in range(4):
+        connector.send_prompt_to_llm_sync(1, user_text=f"turn {turn}", game_state={})
+        stable = connector.pop_context_record(1)["prefix_stable"]
+        telemetry = connector.pop_telemetry_record(1)
+        prefills.append((stable, telemetry["prompt_eval_count"], telemetry["prefill_ms"]))
+
+    # Requests grow between trims and shrink when a block of exchanges is dropped.
+    assert [stable for stable, _count, _ms in prefills] == [False, True, False, True]
+    counts = [count for _stable, count, _ms in prefills]
+    assert counts[1] > counts[0] and counts[2] < counts[1] and counts[3] > counts[2]
+    assert all(ms == float(count) for _stable, count, ms in prefills)
+
+
+def test_streamed_reply_records_the_final_chunk_counters(mock_endpoints, monkeypatch) -> None:
+    host, port = mock_endpoints().rsplit(":", 1)
+    settings = {("llm", "url"): host, ("llm", "port"): int(port), ("llm", "stream_commands"): True}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+
+    assert connector.send_prompt_to_llm_sync(1, user_text="Reply with exactly M", game_state={}) == "M"
+    assert connector.pop_stream_record(1)["truncated"] is False
+    telemetry = connector.pop_telemetry_record(1)
+    assert telemetry["eval_count"] == 1 and telemetry["generation_ms"] == 10.0
+    assert telemetry["prefill_ms"] == float(telemetry["prompt_eval_count"])
+
+
+def test_latency_percentiles_use_nearest_rank() -> None:
+    assert percentile([], 50) is None
+    assert percentile([40, 10, 30, 20], 50) == 20
+    assert percentile(range(1, 101), 95) == 95
+    telemetry = LatencyTelemetry(window=2)
+    for latency in (900, 100, 300):
+        telemetry.record("m", {"latency_ms": latency, "queue_ms": 5})
+    assert telemetry.summary()["m"]["latency_p95_ms"] == 300
+    assert telemetry.summary()["m"]["dominant_phase"] == "queue"
+
+
+def test_connector_records_and_replays_replies(monkeypatch, tmp_path) -> None:
+    calls = []
+
+    def fake_chat(**kwargs):
+        calls.append(kwargs)
+        return {"message": {"content": "C15"}}
+
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(chat=fake_chat),
+    )
+    settings = {
+        ("llm", "response_cache"): "record",
+        ("llm", "response_cache_dir"): str(tmp_path),
+        ("llm", "seed"): None,
+        ("llm", "temperature"): 0.7,
+    }
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    # Sampled replies are not frozen into the cache.
+    sampled = OllamaConnector()
+    assert sampled.send_prompt_to_llm_sync(1, user_text="turn", game_state={}) == "C15"
+    assert "cache" not in sampled.pop_context_record(1)
+    assert not any(tmp_path.iterdir())
+
+    settings[("llm", "seed")] = 7
+    settings[("llm", "temperature")] = 0
+    recorder = OllamaConnector()
+    assert recorder.send_prompt_to_llm_sync(1, user_text="turn", game_state={}) == "C15"
+    assert recorder.pop_context_record(1)["cache"] == "miss"
+
+    settings[("llm", "response_cache")] = "replay"
+    replayer = OllamaConnector()
+    assert replayer.send_prompt_to_llm_sync(1, user_text="turn", game_state={}) == "C15"
+    assert replayer.pop_context_record(1)["cache"] == "hit"
+    assert replayer.pop_telemetry_record(1)["attempts"] == 1
+    assert len(calls) == 2
+
+    with pytest.raises(LLMRequestError, match="replay mode"):
+        replayer.send_prompt_to_llm_sync(1, user_text="another", game_state={})
+    settings[("llm", "temperature")] = 0.7
+    with pytest.raises(LLMRequestError, match="seed and temperature 0"):
+        OllamaConnector().send_prompt_to_llm_sync(2, user_text="turn", game_state={})
+    assert len(calls) == 2
+
+
+def test_connector_learns_request_timeouts_from_observed_latency(monkeypatch, tmp_path) -> None:
+    timeouts = []
+    hung = []
+
+    def fake_chat(*, options, **_kwargs):
+        timeouts.append(options.get("timeout"))
+        if hung:
+            raise TimeoutError("hung")
+        return {"message": {"content": "M"}}
+
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(chat=fake_chat),
+    )
+    observed = LatencyModel(tmp_path / "latency.json")
+    monkeypatch.setattr("game.ollama_connector.shared_latency_model", lambda: observed)
+    settings = {("llm", "adaptive_timeouts"): True, ("llm", "timeout"): None}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+    connector._max_history_messages = 4
+    for turn in range(10):
+        connector.send_prompt_to_llm_sync(1, user_text=f"turn {turn}", game_state={})
+
+    # Fast replies: the static default applies until enough requests were observed.
+    assert timeouts[0] is None and timeouts[-1] == 10.0
+    assert connector.pop_telemetry_record(1)["timeout_s"] == 10.0
+    assert len(observed.samples(connector.model, connector.num_ctx)) == 10
+    observed.flush()
+    assert (tmp_path / "latency.json").exists()
+
+    # Hung requests are not samples, so they do not stretch the next timeout.
+    hung.append(True)
+    for _ in range(3):
+        with pytest.raises(LLMTimeoutError):
+            connector.send_prompt_to_llm_sync(1, user_text="hang", game_state={})
+    assert set(timeouts[10:]) == {10.0}
+    assert len(observed.samples(connector.model, connector.num_ctx)) == 10
+    assert observed.suggest_timeout(connector.model, connector.num_ctx) == 10.0
+
+
+def test_constrained_requests_carry_the_command_schema(monkeypatch) -> None:
+    requests = []
+
+    def fake_constrained_chat(*, options, format, **_kwargs):
+        requests.append((options, format))
+        return {"message": {"content": '{"command": "A30"}'}, "eval_count": 7}
+
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(constrained_chat=fake_constrained_chat),
+    )
+    original_get = config.get
+    monkeypatch.setattr(
+        config,
+        "get",
+        lambda section, key: "schema" if (section, key) == ("llm", "command_constraint")
+        else original_get(section, key),
+    )
+    connector = OllamaConnector()
+
+    assert connector.send_prompt_to_llm_sync(1, user_text="turn", game_state={}) == "A30"
+    options, schema = requests[0]
+    assert options["num_predict"] <= 24
+    assert schema["properties"]["command"]["type"] == "string"
+    assert connector._get_history(1)[-1] == {"role": "assistant", "content": "A30"}
+
+
 def test_ollama_connector_timeout_raises_typed_error_and_rolls_back_prompt(monkeypatch) -> None:
     monkeypatch.setattr(
         "game.ollama_connector.Client",
@@ -235,7 +516,7 @@ def test_ollama_connector_timeout_raises_typed_error_and_rolls_back_prompt(monke
         )
 
     assert exc_info.value.attempts == 2
-    history = connector._get_history_ref(1)
+    history = connector._get_history(1)
     assert all(message["role"] != "user" for message in history)
 
 
@@ -263,7 +544,13 @@ def test_string_timeout_config_is_normalized_and_timeout_messages_stay_safe(monk
 
     setattr(exc, "timeout", "120")
     message = board._format_timeout_message(board.get_bot_by_id(1), exc)
-    assert "after 120s" in message
+    assert "after 120s" in message and message.endswith("BatLLM already retried once.")
+
+    # The text follows the retry policy's attempts rather than assuming one retry.
+    setattr(exc, "attempts", 3)
+    assert board._format_timeout_message(board.get_bot_by_id(1), exc).endswith("retried 2 times.")
+    setattr(exc, "attempts", 1)
+    assert board._format_timeout_message(board.get_bot_by_id(1), exc).endswith("did not retry it.")
 
 
 def test_connector_uses_model_specific_timeout_override(monkeypatch) -> None:
@@ -322,23 +609,26 @@ def test_connector_recreates_client_when_timeout_or_host_changes(monkeypatch) ->
 
     monkeypatch.setattr("game.ollama_connector.Client", fake_client)
 
-    overrides = {
-        ("llm", "timeout"): "120",
-    }
-    board, _scheduled_once, _history_log = _build_board(monkeypatch, overrides=overrides)
+    config.set("llm", "timeout", "120")
+    board, _scheduled_once, _history_log = _build_board(monkeypatch)
     connector = board.ollama_connector
     initial_client = connector.client
 
     connector.load_options()
     assert connector.client is initial_client
 
-    overrides[("llm", "timeout")] = "60"
+    # Setting a key to its current value is not a change.
+    config.set("llm", "timeout", "120")
+    connector.load_options()
+    assert connector.client is initial_client
+
+    config.set("llm", "timeout", "60")
     connector.load_options()
 
     assert connector.timeout == 60.0
     assert connector.client.timeout == 60.0
 
-    overrides[("llm", "url")] = "http://127.0.0.1"
+    config.set("llm", "url", "http://127.0.0.1")
     connector.load_options()
 
     assert connector.client.host == "http://127.0.0.1:11434"
@@ -398,6 +688,241 @@ def test_play_turn_records_valid_and_invalid_commands(monkeypatch) -> None:
     assert len(scheduled_once) == 1
 
 
+def _reply_by_prompt(monkeypatch, board, replies) -> None:
+    """Answer each chat request by the player prompt it ends with."""
+
+    def fake_chat(*, messages, **_kwargs):
+        reply = next(value for prompt, value in replies.items() if prompt in messages[-1]["content"])
+        if isinstance(reply, BaseException):
+            raise reply
+        return {"message": {"content": reply}}
+
+    fake = SimpleNamespace(chat=fake_chat)
+    monkeypatch.setattr(board.ollama_connector, "client", fake)
+    monkeypatch.setattr(board.ollama_connector, "load_options", lambda: None)
+
+
+def _assistant_replies(board, bot_id: int) -> list[str]:
+    history = board.ollama_connector._get_history(bot_id)
+    return [message["content"] for message in history if message["role"] == "assistant"]
+
+
+def test_order_independent_turn_requests_bots_together_and_applies_in_turn_order(
+    monkeypatch,
+) -> None:
+    board, scheduled_once, _history_log = _build_board(monkeypatch, overrides={
+        ("game", "turns_per_round"): 2,
+        ("game", "prompt_augmentation"): False,
+        ("game", "independent_contexts"): True,
+    })
+    monkeypatch.setattr("game.game_board.random.sample", lambda seq, _n: list(reversed(seq)))
+    executor = _DeferredExecutor()
+    monkeypatch.setattr("game.bot.get_executor", lambda: executor)
+    _reply_by_prompt(monkeypatch, board, {"one": "M", "two": "S1"})
+
+    board.submit_prompt_to_bot(1, "one")
+    board.submit_prompt_to_bot(2, "two")
+    scheduled_once.pop(0)(0)
+    assert executor.bot_ids() == [2, 1]
+
+    # Bot 1 plays second this turn, so its early result waits for bot 2,
+    # and stays out of bot 1's history until it is played.
+    executor.complete(1)
+    scheduled_once.pop(0)(0)
+    assert board.history_manager.current_turn.get("plays", []) == []
+    assert _assistant_replies(board, 1) == []
+
+    executor.complete(0)
+    scheduled_once.pop(0)(0)
+    plays = board.history_manager.current_round["turns"][0]["plays"]
+    assert [(play["bot_id"], play["cmd"]) for play in plays] == [(2, "S1"), (1, "M")]
+    assert board.current_turn == 1
+    assert _assistant_replies(board, 1) == ["M"]
+
+
+def test_order_independent_turn_cancelled_by_the_first_bot_keeps_no_later_exchange(
+    monkeypatch,
+) -> None:
+    board, scheduled_once, _history_log = _build_board(monkeypatch, overrides={
+        ("game", "turns_per_round"): 2,
+        ("game", "prompt_augmentation"): False,
+        ("game", "independent_contexts"): True,
+    })
+    monkeypatch.setattr("game.game_board.random.sample", lambda seq, _n: list(reversed(seq)))
+    executor = _DeferredExecutor()
+    monkeypatch.setattr("game.bot.get_executor", lambda: executor)
+    _reply_by_prompt(monkeypatch, board, {"one": "M", "two": TimeoutError("slow model")})
+
+    board.submit_prompt_to_bot(1, "one")
+    board.submit_prompt_to_bot(2, "two")
+    scheduled_once.pop(0)(0)
+    assert executor.bot_ids() == [2, 1]
+    board._round_timeout_action = "cancel"
+
+    # Bot 1's reply arrives first, but bot 2 plays first and times out.
+    executor.complete(1)
+    scheduled_once.pop(0)(0)
+    executor.complete(0)
+    scheduled_once.pop(0)(0)
+
+    assert board.history_manager.current_turn is None  # The round was cancelled.
+    # Serial play would never have sent bot 1's request, so it left no exchange.
+    assert _assistant_replies(board, 1) == []
+    assert all(message["role"] == "system" for message in board.ollama_connector._get_history(1))
+
+
+def test_speculative_reply_commits_the_same_history_as_a_normal_request(monkeypatch) -> None:
+    sent = []
+
+    def fake_chat(*, messages, **_kwargs):
+        sent.append([dict(message) for message in messages])
+        return SimpleNamespace(message=SimpleNamespace(content="S1"))
+
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(chat=fake_chat),
+    )
+    state = {"bots": {1: {"x": 0.5}}, "current_turn": 0, "current_round": 1}
+    normal = OllamaConnector()
+    normal.send_prompt_to_llm_sync(2, user_text="shield up", game_state=state)
+    speculative = OllamaConnector()
+    reply = speculative.speculate_prompt_to_llm_sync(2, user_text="shield up", game_state=state)
+
+    assert sent[0] == sent[1]
+    assert all(message["role"] == "system" for message in speculative._get_history(2))
+    assert speculative.commit_speculative_reply(reply)
+    assert speculative._get_history(2) == normal._get_history(2)
+    assert not speculative.commit_speculative_reply(reply)
+    # Prefix reuse is recorded for the adopted request, as for the normal one.
+    assert speculative.pop_context_record(2) == normal.pop_context_record(2)
+
+    # A discarded speculation leaves no trace in the prefix-reuse metrics.
+    discarded = OllamaConnector()
+    discarded.speculate_prompt_to_llm_sync(2, user_text="shield up", game_state=state)
+    discarded.send_prompt_to_llm_sync(2, user_text="shield up", game_state=state)
+    fresh = OllamaConnector()
+    fresh.send_prompt_to_llm_sync(2, user_text="shield up", game_state=state)
+    assert discarded.pop_context_record(2) == fresh.pop_context_record(2)
+
+
+def test_prefill_warm_up_sends_the_next_prefix_without_touching_history(monkeypatch) -> None:
+    sent = []
+
+    def fake_chat(*, messages, options=None, **_kwargs):
+        sent.append(([dict(message) for message in messages], dict(options or {})))
+        return {"message": {"content": "M"}, "prompt_eval_count": 120}
+
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(chat=fake_chat, constrained_chat=fake_chat),
+    )
+    original_get = config.get
+    monkeypatch.setattr(
+        config,
+        "get",
+        lambda section, key: False
+        if (section, key) == ("game", "independent_contexts")
+        else original_get(section, key),
+    )
+    connector = OllamaConnector()
+    state = {"bots": {1: {"x": 0.5}}, "current_turn": 0, "current_round": 1}
+    connector.send_prompt_to_llm_sync(1, user_text="go", game_state=state)
+    history = [dict(message) for message in connector._get_history(1)]
+
+    # Shared context: both bots extend one history, so it is warmed once.
+    results = connector.warm_up([1, 2])
+    assert len(results) == 1 and results[0]["prompt_eval_count"] == 120
+    warm_messages, warm_options = sent[-1]
+    assert warm_messages == history and warm_options["num_predict"] == 1
+    assert connector._get_history(1) == history
+    assert connector.pop_telemetry_record(1)["attempts"] == 1
+
+    connector.send_prompt_to_llm_sync(2, user_text="go", game_state=state)
+    assert sent[-1][0][: len(history)] == history
+    context = connector.pop_context_record(2)
+    assert context["warmed"] is True and context["prefix_stable"] is True
+
+
+def _speculative_board(monkeypatch, first_response: str):
+    board, scheduled_once, _history_log = _build_board(monkeypatch, overrides={
+        ("game", "turns_per_round"): 2,
+        ("game", "speculative_prefetch"): True,
+        ("game", "prompt_augmentation"): True,
+        ("game", "independent_contexts"): True,
+    })
+    monkeypatch.setattr("game.game_board.random.sample", lambda seq, _n: list(seq))
+    executor = _DeferredExecutor()
+    monkeypatch.setattr("game.bot.get_executor", lambda: executor)
+    monkeypatch.setattr("game.game_board.get_executor", lambda: executor)
+    monkeypatch.setattr(
+        board.ollama_connector,
+        "send_prompt_to_llm_sync",
+        lambda bot_id, **_kwargs: first_response if bot_id == 1 else "B",
+    )
+    monkeypatch.setattr(
+        board.ollama_connector,
+        "speculate_prompt_to_llm_sync",
+        lambda bot_id, **_kwargs: SpeculativeReply(bot_id, MessageHistory(), {"role": "user"}, "S1"),
+    )
+    committed = []
+    monkeypatch.setattr(
+        board.ollama_connector,
+        "commit_speculative_reply",
+        lambda reply: committed.append(reply) or True,
+    )
+    board.submit_prompt_to_bot(1, "one")
+    board.submit_prompt_to_bot(2, "two")
+    scheduled_once.pop(0)(0)
+    assert executor.bot_ids() == [2, 1]
+    executor.complete(0)
+    executor.complete(1)
+    scheduled_once.pop(0)(0)
+    return board, scheduled_once, executor, committed
+
+
+def test_speculative_prefetch_adopts_reply_when_state_is_unchanged(monkeypatch) -> None:
+    board, scheduled_once, executor, committed = _speculative_board(monkeypatch, "nonsense")
+
+    assert len(executor.pending) == 2 and len(committed) == 1
+    scheduled_once.pop(0)(0)
+    plays = board.history_manager.current_round["turns"][0]["plays"]
+    assert [(play["bot_id"], play["cmd"]) for play in plays] == [(1, "ERR"), (2, "S1")]
+    summary = board.speculation_stats.summary()
+    assert (summary["attempts"], summary["hits"], summary["misses"]) == (1, 1, 0)
+    assert summary["hit_rate"] == 1.0
+
+
+def test_speculative_prefetch_reissues_request_when_state_changed(monkeypatch) -> None:
+    board, scheduled_once, executor, committed = _speculative_board(monkeypatch, "M")
+
+    assert executor.bot_ids() == [2, 1, 2] and committed == []
+    executor.complete(2)
+    scheduled_once.pop(0)(0)
+    plays = board.history_manager.current_round["turns"][0]["plays"]
+    assert [(play["bot_id"], play["cmd"]) for play in plays] == [(1, "M"), (2, "B")]
+    assert board.speculation_stats.summary()["misses"] == 1
+
+
+def test_augmented_turn_requests_bots_one_after_another(monkeypatch) -> None:
+    board, scheduled_once, _history_log = _build_board(monkeypatch, overrides={
+        ("game", "prompt_augmentation"): True,
+    })
+    executor = _DeferredExecutor()
+    monkeypatch.setattr("game.bot.get_executor", lambda: executor)
+    monkeypatch.setattr(
+        board.ollama_connector, "send_prompt_to_llm_sync", lambda bot_id, **_kwargs: "B"
+    )
+
+    board.submit_prompt_to_bot(1, "one")
+    board.submit_prompt_to_bot(2, "two")
+    scheduled_once.pop(0)(0)
+    assert len(executor.pending) == 1
+
+    executor.complete(0)
+    scheduled_once.pop(0)(0)
+    assert len(executor.pending) == 2
+
+
 def test_timeout_resolution_can_be_remembered_for_round(monkeypatch) -> None:
     board, _scheduled_once, _history_log = _build_board(monkeypatch)
     bot = board.get_bot_by_id(1)
@@ -455,7 +980,7 @@ def test_play_turn_timeout_can_resolve_as_err(monkeypatch) -> None:
     assert by_bot == {1: "ERR", 2: "M"}
     assert "timed out" in next(play["llm_response"] for play in plays if play["bot_id"] == 1)
     assert board.history_manager.current_round is None
-    assert any("Timeout after retry -> ERR" in text for _bot_id, text in history_log)
+    assert any("Timeout after 2 attempts -> ERR" in text for _bot_id, text in history_log)
 
 
 def test_play_turn_timeout_can_cancel_round_and_roll_back_state(monkeypatch) -> None:
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+import pytest
+
+from configs.app_config import config
+from game.invocation_policy import (
+    CancelToken,
+    InvocationEngine,
+    InvocationFailed,
+    InvocationPolicyError,
+    RetryBudget,
+    RetryPolicy,
+    can_hedge,
+    normalize_hedge_after,
+)
+from game.ollama_connector import OllamaConnector
+from game.research_runtime import InvocationPolicy, MediatedGameRuntime
+from game.trace_verifier import verify_payload
+from tests.test_trace_contract import initial_state, rules
+
+
+def test_engine_backs_off_retries_transient_errors_and_respects_the_budget() -> None:
+    waits: list[float] = []
+    engine = InvocationEngine(
+        RetryPolicy(max_attempts=3, backoff_base_s=1.0),
+        budget=RetryBudget(ratio=0.0, capacity=2),
+        sleep=waits.append,
+        rng=random.Random(0),
+    )
+    replies = iter([ConnectionError("refused"), TimeoutError("slow"), "M"])
+
+    def flaky():
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    result = engine.invoke(flaky)
+    assert (result.value, result.attempts) == ("M", 3)
+    assert result.errors == ("ConnectionError", "TimeoutError")
+    # Only the retry after the refused connection waits; a timeout already has.
+    assert len(waits) == 1 and 0.0 <= waits[0] <= 1.0
+    assert result.backoff_ms == round(waits[0] * 1000.0, 3)
+
+    # The budget is spent, so the next failure is not retried.
+    with pytest.raises(InvocationFailed) as failure:
+        engine.invoke(lambda: (_ for _ in ()).throw(ConnectionError("refused")))
+    assert failure.value.attempts == 1
+
+    calls = []
+    with pytest.raises(InvocationFailed) as failure:
+        InvocationEngine(sleep=waits.append).invoke(
+            lambda: calls.append(1) or (_ for _ in ()).throw(ValueError("bad request"))
+        )
+    assert len(calls) == 1 and isinstance(failure.value.last_error, ValueError)
+
+    assert normalize_hedge_after("P95") == "p95" and normalize_hedge_after(0) == "off"
+    assert normalize_hedge_after("1.5") == 1.5
+    with pytest.raises(InvocationPolicyError):
+        normalize_hedge_after("soon")
+
+
+def test_hedge_wins_when_the_primary_stalls() -> None:
+    release = threading.Event()
+    engine = InvocationEngine(RetryPolicy(hedge_after=0.05))
+
+    def stalled():
+        release.wait(5)
+        return "late"
+
+    cancelled: list[bool] = []
+    result = engine.invoke(
+        stalled,
+        hedge=lambda: "hedged",
+        hedge_delay=engine.policy.hedge_delay(),
+        cancel=lambda hedge: cancelled.append(hedge) or release.set(),
+    )
+    assert (result.value, result.attempts, result.hedged, result.hedge_won) == (
+        "hedged", 2, True, True
+    )
+    # The stalled primary request lost, so it is told to stop.
+    assert cancelled == [False] and release.is_set()
+
+    token = CancelToken()
+    stops: list[str] = []
+    token.on_cancel(lambda: stops.append("first"))
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: stops.append("late"))
+    assert token.cancelled and stops == ["first", "late"]
+
+    assert not can_hedge(1, "smollm2", None) and not can_hedge(1, "smollm2", "smollm2")
+    assert can_hedge(1, "smollm2", "phi3") and can_hedge(2, "smollm2", None)
+    assert RetryPolicy(hedge_after="p95").hedge_delay([100.0] * 7) is None
+    assert RetryPolicy(hedge_after="p95").hedge_delay([100.0] * 7 + [900.0]) == 0.9
+
+
+def test_connector_hedges_a_stalled_request_on_another_endpoint(
+    mock_endpoints, monkeypatch
+) -> None:
+    slow = mock_endpoints(delay=3.0)
+    fast = mock_endpoints()
+    settings = {
+        ("llm", "endpoints"): [slow, fast],
+        ("llm", "hedge_after"): 0.2,
+        ("llm", "async_transport"): True,
+    }
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+
+    # The idle pool sends the first request to the slow endpoint; the hedge rescues it.
+    assert connector.send_prompt_to_llm_sync(1, user_text="Reply with exactly M", game_state={}) == "M"
+    telemetry = connector.pop_telemetry_record(1)
+    assert telemetry["hedged"] is True and telemetry["hedge_won"] is True
+    assert telemetry["endpoint"] == fast and telemetry["attempts"] == 2
+
+    # The losing request is cancelled rather than left to finish, and releases its endpoint.
+    deadline = time.monotonic() + 0.5
+    while any(entry["outstanding"] for entry in connector.endpoint_pool.snapshot()):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_connector_does_not_hedge_on_a_single_endpoint_with_the_same_model(
+    mock_endpoints, monkeypatch
+) -> None:
+    host, port = mock_endpoints(delay=0.3).rsplit(":", 1)
+    settings = {
+        ("llm", "url"): host,
+        ("llm", "port"): int(port),
+        ("llm", "hedge_after"): 0.05,
+    }
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+
+    assert connector.send_prompt_to_llm_sync(1, user_text="Reply with exactly M", game_state={}) == "M"
+    telemetry = connector.pop_telemetry_record(1)
+    assert "hedged" not in telemetry and telemetry["attempts"] == 1
+
+
+def test_research_runtime_records_retries_in_the_trace() -> None:
+    class FlakyClient:
+        def __init__(self):
+            self.calls = 0
+
+        def chat(self, **_kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("refused")
+            return "M"
+
+    runtime = MediatedGameRuntime(
+        client=FlakyClient(),
+        initial_state=initial_state(),
+        rules=rules(),
+        policy=InvocationPolicy(provider="fixture", model="m", retry_backoff_s=0.0),
+    )
+    play = runtime.play(bot_id=1, human_prompt="act")
+    assert play["status"] == "ok" and play["attempts"] == 2
+    assert play["invocation"] == {"errors": ["ConnectionError"]}
+    assert verify_payload(runtime.session_payload()).valid
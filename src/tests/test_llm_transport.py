@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from concurrent.futures import CancelledError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import pytest
+
+from configs.app_config import config
+from game.llm_transport import AsyncChatTransport
+from game.ollama_connector import LLMRequestError, OllamaConnector
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    release = threading.Event()
+
+    def do_POST(self):  # noqa: N802 - http.server naming
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "slow" in body["messages"][-1]["content"]:
+            self.release.wait(5)
+        data = json.dumps(
+            {"message": {"content": "M"}, "prompt_eval_count": 3, "eval_count": 1}
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def chat_server():
+    _ChatHandler.release.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    _ChatHandler.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def _payload(content: str) -> dict:
+    return {"model": "m", "messages": [{"role": "user", "content": content}], "stream": False}
+
+
+def test_transport_cancels_groups_and_measures_time_to_next_response(chat_server) -> None:
+    transport = AsyncChatTransport()
+    try:
+        url = f"{chat_server}/api/chat"
+        assert transport.submit(url, _payload("fast")).result(timeout=5)["eval_count"] == 1
+
+        stale = transport.submit(url, _payload("slow"), group="game-1")
+        time.sleep(0.1)
+        assert transport.in_flight("game-1") == 1
+        assert transport.cancel_group("game-1") == 1
+        with pytest.raises(CancelledError):
+            stale.result(timeout=1)
+        assert transport.in_flight("game-1") == 0
+
+        transport.submit(url, _payload("fast"), group="game-2").result(timeout=5)
+        summary = transport.stats.summary()
+        assert summary["cancelled"] == 1 and summary["completed"] == 2
+        assert 0 <= summary["last_reset_to_response_ms"] < 5000
+
+        with pytest.raises(TimeoutError):
+            transport.submit(url, _payload("slow"), timeout=0.2).result(timeout=5)
+    finally:
+        transport.close()
+
+
+def test_connector_requests_can_be_cancelled_on_the_async_transport(chat_server, monkeypatch) -> None:
+    host, port = chat_server.rsplit(":", 1)
+    settings = {("llm", "async_transport"): True, ("llm", "url"): host, ("llm", "port"): int(port)}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+    assert connector.send_prompt_to_llm_sync(1, user_text="fast", game_state={}) == "M"
+    telemetry = connector.pop_telemetry_record(1)
+    assert telemetry["prompt_eval_count"] == 3 and telemetry["connect_ms"] >= 0
+
+    errors = []
+
+    def request() -> None:
+        try:
+            connector.send_prompt_to_llm_sync(2, user_text="slow", game_state={})
+        except LLMRequestError as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=request)
+    worker.start()
+    time.sleep(0.2)
+    assert connector.cancel_requests() == 1
+    worker.join(timeout=2)
+    assert not worker.is_alive() and errors
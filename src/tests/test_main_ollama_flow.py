@@ -170,3 +170,33 @@ def test_on_stop_stops_ollama_when_enabled(monkeypatch) -> None:
     app.on_stop()
 
     assert stopped == [False]
+
+
+def test_supervision_follows_in_memory_settings_and_logs_failures(monkeypatch, caplog) -> None:
+    main_module = _load_main_module(monkeypatch)
+    app = main_module.BatLLM()
+    config = main_module.config
+    started = []
+
+    def start_supervisor(*, overrides):
+        started.append(dict(overrides))
+        if overrides["port"] == 1:
+            raise OSError("port unavailable")
+
+    monkeypatch.setattr(main_module.ollama_service, "start_supervisor", start_supervisor)
+    monkeypatch.setattr(main_module.ollama_service, "stop_supervisor", lambda: None)
+    config.set("llm", "supervise", False)
+    app._start_supervisor()
+    try:
+        assert started == []
+
+        # Turning supervision on later starts it with the unsaved endpoint.
+        config.set("llm", "port", 11500)
+        config.set("llm", "supervise", True)
+        assert started[-1]["port"] == 11500
+
+        config.set("llm", "port", 1)
+        assert started[-1]["port"] == 1
+        assert "Could not start the Ollama supervisor" in caplog.text
+    finally:
+        config.unsubscribe(app._on_llm_config_change)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from game.message_history import MessageHistory
+from game.research_runtime import InvocationPolicy, MediatedGameRuntime, ScriptedClient
+from game.trace_verifier import verify_payload
+from tests.test_trace_contract import initial_state, rules
+
+
+def test_histories_share_messages_and_never_change() -> None:
+    system = {"role": "system", "content": "S"}
+    first = MessageHistory([system]).append({"role": "user", "content": "u1"})
+    second = first.append({"role": "assistant", "content": "a1"})
+
+    assert first == [system, {"role": "user", "content": "u1"}] and len(second) == 3
+    assert second[:2] == first and second[0] is first[0]
+    with pytest.raises(TypeError):
+        second[1]["content"] = "edited"  # type: ignore[index]
+
+    # Appending to an older snapshot branches off and leaves the newer one intact.
+    branch = first.append({"role": "assistant", "content": "other"})
+    assert second[-1]["content"] == "a1" and branch[-1]["content"] == "other"
+
+    plain = second.materialize()
+    plain[1]["content"] = "edited"
+    assert second[1]["content"] == "u1" and isinstance(plain[1], dict)
+
+    user = second[1]
+    assert second.without(user) == [system, {"role": "assistant", "content": "a1"}]
+    assert second.replace(0, {"role": "system", "content": "T"})[0]["content"] == "T"
+    assert second.prepend({"role": "system", "content": "T"})[1] is second[0] and len(second) == 3
+
+
+def test_runtime_requests_keep_their_snapshot_and_still_verify() -> None:
+    client = ScriptedClient(["M", "C15", "ERR"])
+    runtime = MediatedGameRuntime(
+        client=client,
+        initial_state=initial_state(),
+        rules=rules(),
+        policy=InvocationPolicy(provider="scripted", model="fixture"),
+        system_instructions="Reply with one command.",
+        independent_contexts=False,
+    )
+    for _ in range(4):
+        runtime.run_turn({1: "act", 2: "act"})
+
+    # Each request saw the history as it was when sent, not as it grew later.
+    sizes = [len(request["messages"]) for request in client.requests]
+    assert sizes == list(range(2, 2 + 2 * len(sizes), 2))
+    assert client.requests[0]["messages"][0] == {
+        "role": "system", "content": "Reply with one command."
+    }
+    assert verify_payload(runtime.session_payload()).valid
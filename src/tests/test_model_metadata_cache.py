@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+
+import llm.service as ollama_service
+from llm.metadata_cache import RETRY_AFTER_S, ModelMetadataCache
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.digest = "sha256:aaa"
+        self.fail = False
+        self.digest_calls = 0
+        self.metadata_calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetch_digest(self, url: str, port: int, model: str) -> str:
+        self.digest_calls += 1
+        if self.fail:
+            raise OSError("connection refused")
+        return self.digest
+
+    def fetch_metadata(self, url: str, port: int, model: str) -> dict:
+        self.release.wait(2.0)
+        self.metadata_calls += 1
+        return {"model": model, "digest": self.digest}
+
+    def cache(self, path) -> ModelMetadataCache:
+        return ModelMetadataCache.load(
+            path,
+            fetch_digest=self.fetch_digest,
+            fetch_metadata=self.fetch_metadata,
+            ttl_s=100.0,
+            clock=lambda: self.now,
+        )
+
+
+def test_lookups_never_wait_and_refetch_only_when_the_digest_changes(tmp_path) -> None:
+    server = FakeServer()
+    path = tmp_path / "model_metadata.json"
+    cache = server.cache(path)
+
+    server.release.clear()
+    assert cache.get("http://localhost", 11434, "smollm2") == {}
+    assert cache.get("http://localhost", 11434, "smollm2") == {}  # One refresh in flight.
+    server.release.set()
+    cache.wait(2.0)
+    assert cache.get("http://localhost", 11434, "smollm2")["digest"] == "sha256:aaa"
+    assert (server.digest_calls, server.metadata_calls) == (1, 1)
+
+    # A restart reads the entry from disk; an expired entry only re-checks the digest.
+    reloaded = server.cache(path)
+    server.now += 150.0
+    assert reloaded.get("http://localhost", 11434, "smollm2")["model"] == "smollm2"
+    reloaded.wait(2.0)
+    assert (server.digest_calls, server.metadata_calls) == (2, 1)
+
+    server.digest = "sha256:bbb"
+    server.now += 150.0
+    reloaded.get("http://localhost", 11434, "smollm2")
+    reloaded.wait(2.0)
+    assert reloaded.get("http://localhost", 11434, "smollm2")["digest"] == "sha256:bbb"
+    assert server.metadata_calls == 2
+
+
+def test_failed_refreshes_back_off_and_keep_the_last_metadata(tmp_path) -> None:
+    server = FakeServer()
+    cache = server.cache(tmp_path / "model_metadata.json")
+    cache.refresh("http://localhost", 11434, "smollm2")
+
+    server.fail = True
+    server.now += 150.0
+    assert cache.get("http://localhost", 11434, "smollm2")["model"] == "smollm2"
+    cache.wait(2.0)
+    assert cache.get("http://localhost", 11434, "smollm2")["model"] == "smollm2"
+    cache.wait(2.0)
+    assert server.digest_calls == 2  # Not retried until RETRY_AFTER_S has passed.
+    server.now += RETRY_AFTER_S
+    cache.get("http://localhost", 11434, "smollm2")
+    cache.wait(2.0)
+    assert server.digest_calls == 3
+
+
+def test_an_unwritable_cache_file_does_not_fail_the_refresh(tmp_path, caplog) -> None:
+    server = FakeServer()
+    blocker = tmp_path / "not-a-folder"
+    blocker.write_text("", encoding="utf-8")
+    cache = server.cache(blocker / "model_metadata.json")
+
+    assert cache.refresh("http://localhost", 11434, "smollm2")["model"] == "smollm2"
+    assert cache.get("http://localhost", 11434, "smollm2")["digest"] == "sha256:aaa"
+    assert "Could not save the model metadata cache" in caplog.text
+
+
+def test_saved_session_metadata_comes_from_the_cache(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fetch_digest(url, port, model):
+        calls.append(model)
+        return "sha256:aaa"
+
+    monkeypatch.setattr(ollama_service, "fetch_model_digest", fetch_digest)
+    monkeypatch.setattr(
+        ollama_service, "fetch_model_metadata", lambda url, port, model: {"family": "llama"}
+    )
+    assert ollama_service.lookup_model_metadata("smollm2", host="http://localhost", port=11434) == {}
+    ollama_service.model_metadata_cache().wait(2.0)
+    assert ollama_service.lookup_model_metadata("smollm2", host="http://localhost", port=11434) == {
+        "family": "llama"
+    }
+    assert calls == ["smollm2"]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+
+from configs.app_config import config
+from game.ollama_connector import OllamaConnector
+import llm.service as ollama_service
+from llm.supervisor import (
+    BACKOFF_MIN_S,
+    BROWSE_DELAY_S,
+    COLD_LOAD_MS,
+    DEFAULT_KEEP_ALIVE_S,
+    READY_INTERVAL_S,
+    ModelSupervisor,
+    set_active_supervisor,
+)
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.up = False
+        self.resident: list[str] = []
+        self.loads: list[tuple[str, float]] = []
+
+    def keep_alive(self, model: str, seconds: float) -> None:
+        self.loads.append((model, seconds))
+        if model not in self.resident:
+            self.resident.append(model)
+
+    def advance(self, supervisor: ModelSupervisor, seconds: float) -> None:
+        """Run ``supervisor`` as its thread would over the next ``seconds``."""
+        end = self.now + seconds
+        while True:
+            delay = supervisor.step()
+            if self.now + delay > end:
+                break
+            self.now += delay
+        self.now = end
+        supervisor.step()
+
+    def supervisor(self, model: str = "smollm2") -> ModelSupervisor:
+        return ModelSupervisor(
+            model=model,
+            probe=lambda: self.up,
+            resident_models=lambda: list(self.resident),
+            keep_alive=self.keep_alive,
+            clock=lambda: self.now,
+        )
+
+
+def test_supervisor_backs_off_loads_the_model_and_publishes_changes() -> None:
+    server = FakeServer()
+    supervisor = server.supervisor()
+    phases: list[str] = []
+
+    def listener(state):
+        phases.append(state.phase)
+
+    supervisor.subscribe(listener)
+
+    delays = [supervisor.step()]
+    for _ in range(3):
+        server.now += delays[-1]
+        delays.append(supervisor.step())
+    assert delays == [BACKOFF_MIN_S * 2**n for n in range(4)]
+    assert supervisor.state.phase == "down" and supervisor.state.failures == 4
+
+    server.up = True
+    supervisor.notify_starting()
+    assert supervisor.step() == READY_INTERVAL_S
+    assert supervisor.state.ready and supervisor.state.model_resident
+    assert server.loads == [("smollm2", DEFAULT_KEEP_ALIVE_S)]
+    assert phases[0] == "down" and "starting" in phases and phases[-1] == "ready"
+
+    # An eviction while the game is playing reloads the model; cold loads are counted.
+    supervisor.record_activity("smollm2", load_ms=COLD_LOAD_MS + 1)
+    server.resident.clear()
+    server.now += READY_INTERVAL_S
+    supervisor.step()
+    state = supervisor.state
+    assert (state.evictions, state.cold_loads, len(server.loads)) == (1, 1, 2)
+    assert state.model_resident
+
+    supervisor.set_model("phi3")
+    supervisor.step()
+    assert server.loads[-1][0] == "phi3" and supervisor.state.model_resident
+
+
+def test_keep_alive_follows_idle_gaps_and_browsed_models_preload() -> None:
+    server = FakeServer()
+    server.up = True
+    supervisor = server.supervisor()
+    supervisor.step()
+    server.loads.clear()
+
+    # Players take seven minutes over each round's prompts: longer than Ollama keeps a model.
+    for _ in range(3):
+        supervisor.record_activity("smollm2")
+        server.now += 420.0
+    supervisor.record_activity("smollm2")
+    assert supervisor.keep_alive_target() == 840.0
+
+    server.advance(supervisor, 0.8 * DEFAULT_KEEP_ALIVE_S - 1)
+    assert server.loads == []
+    server.advance(supervisor, 1)
+    assert server.loads == [("smollm2", 840.0)] and supervisor.state.keep_alives == 1
+    server.advance(supervisor, 600.0)
+    assert len(server.loads) == 1  # One ping per idle period.
+
+    supervisor.browse("mistral-small")
+    supervisor.browse("phi3")
+    assert supervisor.step() <= BROWSE_DELAY_S
+    server.advance(supervisor, BROWSE_DELAY_S)
+    assert server.loads[-1] == ("phi3", DEFAULT_KEEP_ALIVE_S)
+    assert supervisor.state.preloaded == "phi3"
+
+
+def test_wait_until_ready_waits_on_the_running_supervisor(monkeypatch) -> None:
+    up = threading.Event()
+    supervisor = ModelSupervisor(
+        model="",
+        endpoint="http://localhost:11434",
+        probe=up.is_set,
+        resident_models=list,
+        keep_alive=lambda model, seconds: None,
+    )
+    monkeypatch.setattr(
+        ollama_service._MODELITO, "wait_until_ready", lambda *args, **kwargs: 1 / 0, raising=False
+    )
+    set_active_supervisor(supervisor.start())
+    try:
+        threading.Timer(0.3, up.set).start()
+        ollama_service.wait_until_ready("http://localhost", 11434, timeout_seconds=5)
+        assert supervisor.state.ready
+    finally:
+        ollama_service.stop_supervisor()
+    assert not supervisor.running
+
+
+def test_replies_reporting_a_model_load_count_as_cold_loads(mock_endpoints, monkeypatch) -> None:
+    host, port = mock_endpoints(load_time=2.0).rsplit(":", 1)
+    settings = {("llm", "url"): host, ("llm", "port"): int(port)}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    supervisor = ModelSupervisor(
+        model="smollm2",
+        endpoint=f"{host}:{port}",
+        probe=lambda: True,
+        resident_models=lambda: ["smollm2"],
+        keep_alive=lambda model, seconds: None,
+    )
+    set_active_supervisor(supervisor.start())
+    try:
+        connector = OllamaConnector()
+        # The first reply reports the model load; the second finds it warm.
+        for _ in range(2):
+            connector.send_prompt_to_llm_sync(1, user_text="Reply with exactly M", game_state={})
+            assert connector.pop_telemetry_record(1)["load_ms"] >= 1.0
+        assert supervisor.state.cold_loads == 1
+    finally:
+        ollama_service.stop_supervisor()
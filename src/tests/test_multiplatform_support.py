@@ -14,6 +14,7 @@ if str(ROOT) not in sys.path:
 
 DEFAULTS = import_module("configs.app_config").DEFAULTS
 compat = import_module("util.compat")
+latency_model = import_module("llm.latency_model")
 ollama_service = import_module("llm.service")
 paths = import_module("util.paths")
 
@@ -138,6 +139,37 @@ def test_resolve_request_timeout_uses_common_model_default() -> None:
     ) == 75.0
 
 
+def test_resolve_request_timeout_learns_from_observed_latency(tmp_path) -> None:
+    observed = latency_model.LatencyModel(tmp_path / "latency.json")
+    llm = {"model": "smollm2", "timeout": None, "adaptive_timeouts": True, "num_ctx": 4096}
+    for seconds in (1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0):
+        observed.record("smollm2", 4096, 300, seconds)
+    assert ollama_service.resolve_request_timeout_details(
+        llm, model="smollm2", prompt_tokens=300, latency_model=observed
+    ) == (35.0, "model_default")
+
+    observed.record("smollm2", 4096, 300, 12.0)
+    observed.save()
+    reloaded = latency_model.LatencyModel.load(tmp_path / "latency.json")
+    assert ollama_service.resolve_request_timeout_details(
+        llm, model="smollm2", prompt_tokens=300, latency_model=reloaded
+    ) == (24.0, "adaptive")
+    # Shorter prompts borrow the next larger bucket; another num_ctx has no samples.
+    assert reloaded.suggest_timeout("smollm2", 4096, 40) == 24.0
+    assert reloaded.suggest_timeout("smollm2", 8192, 300) is None
+    assert ollama_service.resolve_request_timeout_details(
+        {**llm, "timeout": 75}, model="smollm2", latency_model=reloaded
+    ) == (75.0, "global_override")
+
+
+def test_latency_model_ignores_unreadable_files(tmp_path) -> None:
+    path = tmp_path / "latency.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert latency_model.LatencyModel.load(path).samples("smollm2", 4096) == []
+    assert latency_model.prompt_bucket(None) == 256
+    assert latency_model.prompt_bucket(700) == 1024
+
+
 def test_load_remote_timeout_catalog_contains_family_rules() -> None:
     catalog = ollama_service.load_remote_timeout_catalog()
 
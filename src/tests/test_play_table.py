@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from game import play_table
+from game.play_table import (
+    PLAY_COLUMNS,
+    PlayTable,
+    PlayTableError,
+    export_sessions,
+    load_play_table,
+)
+from game.replay_engine import GameplaySettingsSnapshot
+from game.research_runtime import InvocationPolicy, MediatedGameRuntime, ScriptedClient
+from game.session_schema import build_session_payload
+from game.session_v3 import write_session_v3
+
+RULES = {
+    "bot_diameter": 0.1,
+    "bot_step_length": 0.03,
+    "bullet_damage": 5,
+    "bullet_diameter": 0.02,
+    "bullet_step_length": 0.01,
+    "shield_size": 70,
+    "shield_initial_state": False,
+    "initial_health": 30,
+    "turns_per_round": 2,
+    "total_rounds": 1,
+}
+STATE = {
+    "1": {"id": 1, "health": 30, "x": 0.2, "y": 0.5, "rot": 0, "shield": False},
+    "2": {"id": 2, "health": 30, "x": 0.4, "y": 0.5, "rot": 180, "shield": False},
+}
+
+
+def _v2_payload() -> dict:
+    post = json.loads(json.dumps(STATE))
+    post["2"]["health"] = 25
+    return build_session_payload(
+        games=[
+            {
+                "game_id": 1,
+                "winner": 1,
+                "rounds": [
+                    {
+                        "round": 1,
+                        "gameplay_settings_snapshot": dict(RULES),
+                        "initial_state": STATE,
+                        "prompts": [],
+                        "turns": [
+                            {
+                                "turn": 1,
+                                "pre_state": STATE,
+                                "post_state": post,
+                                "plays": [
+                                    {"bot_id": 1, "llm_response": "B", "cmd": "B"},
+                                    {"bot_id": 2, "llm_response": "hello", "cmd": "ERR"},
+                                ],
+                            }
+                        ],
+                    }
+                ],
+            }
+        ],
+        app_version="0.3.6",
+        saved_at="2026-04-04T10:06:00",
+        llm_metadata={"configured_model": "smollm2", "last_served_model": "smollm2"},
+    )
+
+
+def _v3_payload() -> dict:
+    runtime = MediatedGameRuntime(
+        client=ScriptedClient(["M", "S1", "C90", "B"]),
+        initial_state={int(key): value for key, value in STATE.items()},
+        rules=GameplaySettingsSnapshot.from_mapping(RULES),
+        policy=InvocationPolicy(provider="scripted", model="fixture"),
+        system_instructions="Return one command.",
+    )
+    runtime.start_round({1: "one", 2: "two"})
+    runtime.run_turn({1: "one", 2: "two"})
+    runtime.run_turn({1: "one", 2: "two"})
+    return runtime.session_payload()
+
+
+def test_flatten_v2_and_v3_sessions_share_columns() -> None:
+    v2 = play_table.flatten_session(_v2_payload(), "saved")
+    v3 = play_table.flatten_session(_v3_payload(), "trace")
+
+    assert set(v2) == set(v3) == set(PLAY_COLUMNS)
+    assert v2["command"] == ["B", "ERR"]
+    assert v2["events"][0].split("|")[-1] == "damage"
+    assert "invalid_command" in v2["events"][1]
+    assert v2["health_after"] == [30.0, 25.0]
+    assert v2["model"] == ["smollm2", "smollm2"]
+    assert math.isnan(v2["latency_ms"][0]) and v2["attempts"] == [-1, -1]
+
+    assert v3["command"] == ["M", "S1", "C90.0", "B"]
+    assert v3["turn"] == [1, 1, 2, 2]
+    assert v3["sequence"] == [1, 2, 3, 4]
+    assert v3["model"] == ["fixture"] * 4
+    assert v3["attempts"] == [1, 1, 1, 1]
+    assert v3["x_after"][0] > v3["x_before"][0]
+
+
+def test_export_sessions_is_incremental_and_loads_selected_columns(tmp_path: Path) -> None:
+    sessions = tmp_path / "sessions"
+    sessions.mkdir()
+    (sessions / "saved.json").write_text(json.dumps(_v2_payload()), encoding="utf-8")
+    write_session_v3(_v3_payload(), sessions / "trace.json")
+    (sessions / "broken.json").write_text("{", encoding="utf-8")
+    out_dir = tmp_path / "plays"
+
+    report = export_sessions([sessions], out_dir, workers=2)
+    assert len(report.written) == 2
+    assert list(report.failed) == [str(sessions / "broken.json")]
+
+    again = export_sessions([sessions / "saved.json", sessions / "trace.json"], out_dir, workers=1)
+    assert again.written == () and len(again.skipped) == 2
+
+    table = load_play_table(out_dir, columns=("session", "command", "model", "latency_ms"))
+    assert len(table) == 6
+    assert table.column_names == ("session", "command", "model", "latency_ms")
+    assert table.count_by("session") == {"saved": 2, "trace": 4}
+    assert table.count_by("model", "command")[("fixture", "B")] == 1
+    assert set(table.mean_by("model", "latency_ms")) == {"fixture"}
+    with pytest.raises(PlayTableError, match="not loaded"):
+        table.column("turn")
+    with pytest.raises(PlayTableError, match="Unknown"):
+        load_play_table(out_dir, columns=("nope",))
+
+
+def test_mean_by_skips_missing_values_by_column_type() -> None:
+    table = PlayTable(
+        {
+            "bot": [1, 1, 1, 2],
+            "x_after": [-1.0, 0.5, math.nan, 0.25],
+            "attempts": [-1, 2, 4, 1],
+        },
+        rows=4,
+    )
+
+    # -1.0 is a real coordinate; only NaN marks a missing float.
+    assert table.mean_by("bot", "x_after") == {1: -0.25, 2: 0.25}
+    assert table.mean_by("bot", "attempts") == {1: 3.0, 2: 1.0}
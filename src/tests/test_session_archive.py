@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import zipfile
+
+import pytest
+
+from analyzer_model import open_session_model
+from game.play_table import load_any_session
+from game.session_archive import (
+    SessionArchive,
+    SessionArchiveError,
+    archive_reference,
+    pack_sessions,
+    split_archive_reference,
+)
+from game.session_catalog import SessionCatalog
+from game.session_schema import SessionFormatError, load_session_payload
+from game.session_v3 import load_session_v3, write_session_v3
+from game.trace_verifier import verify_file
+from tests.test_play_table import _v2_payload, _v3_payload
+
+
+def test_split_archive_reference() -> None:
+    assert split_archive_reference("a/b.pack#s.json") == (Path("a/b.pack"), "s.json")
+    assert split_archive_reference("a/b.json") is None
+    assert split_archive_reference("a/notes#1.json") is None
+    assert split_archive_reference("a/b.pack#") is None
+
+
+def test_archived_sessions_open_through_references(tmp_path: Path) -> None:
+    saved = tmp_path / "saved.json"
+    saved.write_text(json.dumps(_v2_payload(), indent=2), encoding="utf-8")
+    trace = write_session_v3(_v3_payload(), tmp_path / "trace.json")
+    archive_path = tmp_path / "sessions" / "archive.pack"
+
+    written, present = pack_sessions([saved, trace], archive_path)
+    assert [record.name for record in written] == ["saved.json", "trace.json"]
+    assert present == []
+    records = SessionArchive(archive_path).entries()
+    assert records[0].session_type == "batllm_saved_session"
+    assert records[1].schema_version == 3
+    assert all(record.compressed_size < record.size for record in records)
+
+    again, present = pack_sessions([saved], archive_path)
+    assert again == [] and [record.name for record in present] == ["saved.json"]
+    with pytest.raises(SessionArchiveError, match="different"):
+        SessionArchive(archive_path).append("saved.json", b"{}")
+
+    saved_ref = archive_reference(archive_path, "saved.json")
+    trace_ref = archive_reference(archive_path, "trace.json")
+    assert load_session_payload(saved_ref)["games"][0]["winner"] == 1
+    assert load_session_v3(trace_ref)["session_type"] == "batllm_research_session"
+    assert verify_file(trace_ref).valid
+    assert load_any_session(saved_ref) == load_session_payload(saved)
+    assert open_session_model(saved_ref).source.game_count() == 1
+    with pytest.raises(SessionFormatError, match="no entry"):
+        load_session_payload(archive_reference(archive_path, "missing.json"))
+
+    catalog = SessionCatalog(archive_path.parent, index_path=tmp_path / "catalog.sqlite3")
+    assert catalog.refresh() == 2
+    names = {entry.name for entry in catalog.entries()}
+    assert names == {"archive.pack#saved.json", "archive.pack#trace.json"}
+    assert catalog.refresh() == 0
+    assert catalog.entry_for(saved_ref).game_count == 1
+
+
+def test_session_archive_rejects_foreign_zip_files(tmp_path: Path) -> None:
+    foreign = tmp_path / "other.pack"
+    with zipfile.ZipFile(foreign, "w") as archive:
+        archive.writestr("saved.json", "{}")
+    with pytest.raises(SessionArchiveError, match="not a BatLLM session archive"):
+        SessionArchive(foreign).entries()
+    with pytest.raises(SessionArchiveError, match="must be JSON"):
+        SessionArchive(tmp_path / "new.pack").append("x.json", b"not json")
+    with pytest.raises(SessionArchiveError, match="cannot contain"):
+        SessionArchive(tmp_path / "new.pack").append("a#b.json", b"{}")
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from game.research_runtime import InvocationPolicy, MediatedGameRuntime, ScriptedClient
+from game.session_journal import SessionJournalError, recover_session_journal
+from game.session_v3 import load_session_v3, verify_session_envelope_hash
+from game.trace_contract import canonical_json
+from game.trace_verifier import verify_payload
+from tests.test_trace_contract import initial_state, rules
+
+
+def _runtime(journal: Path, privacy: str = "full") -> MediatedGameRuntime:
+    return MediatedGameRuntime(
+        client=ScriptedClient(["M", "C15", "S1", "B"]),
+        initial_state=initial_state(),
+        rules=rules(),
+        policy=InvocationPolicy(provider="scripted", model="fixture"),
+        system_instructions="Reply with one command.",
+        independent_contexts=False,
+        privacy_mode=privacy,
+        journal_path=journal,
+    )
+
+
+@pytest.mark.parametrize("privacy", ["full", "hashed"])
+def test_sealed_journal_is_the_session_payload(tmp_path: Path, privacy: str) -> None:
+    runtime = _runtime(tmp_path / "run.journal", privacy)
+    runtime.start_round({1: "attack", 2: "defend"})
+    runtime.run_turn({1: "attack", 2: "defend"})
+    runtime.end_round()
+    for _ in range(2):
+        runtime.run_turn({1: "attack", 2: "defend"})
+
+    output = runtime.seal(tmp_path / "session.json")
+    sealed = output.read_bytes()
+    loaded = load_session_v3(output)
+    assert sealed == canonical_json(loaded).encode("utf-8") + b"\n"
+    assert verify_session_envelope_hash(loaded) and verify_payload(loaded).valid
+    assert loaded == json.loads(canonical_json(runtime.session_payload()))
+
+
+def test_recovery_keeps_the_plays_before_an_interruption(tmp_path: Path) -> None:
+    journal = tmp_path / "run.journal"
+    runtime = _runtime(journal)
+    for _ in range(3):
+        runtime.run_turn({1: "attack", 2: "defend"})
+    plays = runtime.journal.play_count
+    # The run dies halfway through writing its next play.
+    data = journal.read_bytes()
+    last_play = data.rindex(b"\nplay\t") + 1
+    journal.write_bytes(data + data[last_play : last_play + 40])
+
+    loaded = load_session_v3(recover_session_journal(journal, tmp_path / "session.json"))
+    report = verify_payload(loaded)
+    assert report.valid, report.to_dict()
+    kept = [play for round_entry in loaded["games"][0]["rounds"] for play in round_entry["plays"]]
+    assert len(kept) == plays
+    assert loaded["games"][0]["final_state"] == kept[-1]["post_state"]
+    assert loaded["runtime_provenance"]["journal_recovery"] == {"plays": plays, "ignored_bytes": 40}
+
+    # A tampered play ends what can be trusted.
+    journal.write_bytes(data.replace(b'"sequence":5', b'"sequence":9'))
+    loaded = load_session_v3(recover_session_journal(journal, tmp_path / "session.json"))
+    assert sum(len(round_entry["plays"]) for round_entry in loaded["games"][0]["rounds"]) == 4
+
+    with pytest.raises(SessionJournalError, match="chain"):
+        runtime.journal.append_play({**kept[0], "sequence": 99, "play_id": "play_other"})
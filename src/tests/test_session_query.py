@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from game.session_query import SessionQueryIndex
+from game.session_v3 import write_session_v3
+from game.trace_contract import sha256_text
+from tests.test_play_table import _v2_payload, _v3_payload
+
+
+def _write_sessions(folder: Path) -> None:
+    folder.mkdir()
+    first = _v2_payload()
+    first["games"][0]["rounds"][0]["prompts"] = [{"bot_id": 1, "prompt": "Fire!"}]
+    second = json.loads(json.dumps(first))
+    second["llm_metadata"]["last_served_model"] = "llama3.2"
+    second["games"][0]["rounds"][0]["turns"][0]["pre_state"]["1"]["health"] = 8
+    (folder / "first.json").write_text(json.dumps(first), encoding="utf-8")
+    (folder / "second.json").write_text(json.dumps(second), encoding="utf-8")
+    write_session_v3(_v3_payload(), folder / "trace.json")
+
+
+def test_query_index_filters_plays_by_model_event_and_health(tmp_path: Path) -> None:
+    sessions = tmp_path / "sessions"
+    _write_sessions(sessions)
+    index = SessionQueryIndex(tmp_path / "query.sqlite3")
+
+    assert index.refresh([sessions]) == 3
+    assert index.refresh([sessions]) == 0
+
+    damaging = index.plays(event="damage")
+    assert {match.model for match in damaging} == {"smollm2", "llama3.2"}
+    low_health = index.plays(event="shot", model="llama3.2", health_below=10)
+    assert [(match.path.name, match.bot, match.command) for match in low_health] == [
+        ("second.json", 1, "B")
+    ]
+    assert "damage" in low_health[0].events
+    assert low_health[0].prompt_sha256 == sha256_text("Fire!")
+
+    rotations = index.plays(command="c90")
+    assert [(match.path.name, match.command, match.turn) for match in rotations] == [
+        ("trace.json", "C90.0", 2)
+    ]
+    assert index.plays(command="ERR", bot=2, session="first")[0].events == ("invalid_command",)
+    with pytest.raises(ValueError, match="Unknown replay event"):
+        index.plays(event="explosion")
+    with pytest.raises(ValueError, match="Not a BatLLM command"):
+        index.plays(command="fire")
+
+
+def test_query_index_finds_shared_prompts_and_tracks_changes(tmp_path: Path) -> None:
+    sessions = tmp_path / "sessions"
+    _write_sessions(sessions)
+    index = SessionQueryIndex(tmp_path / "query.sqlite3")
+    index.refresh([sessions])
+
+    shared = index.shared_prompts(min_sessions=2)
+    assert [prompt.prompt_sha256 for prompt in shared] == [sha256_text("Fire!")]
+    assert [occurrence.path.name for occurrence in shared[0].occurrences] == [
+        "first.json",
+        "second.json",
+    ]
+
+    second = sessions / "second.json"
+    payload = json.loads(second.read_text(encoding="utf-8"))
+    payload["games"][0]["rounds"][0]["prompts"] = [{"bot_id": 1, "prompt": "Hide."}]
+    second.write_text(json.dumps(payload), encoding="utf-8")
+    stat = second.stat()
+    os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert index.refresh([sessions]) == 1
+    assert index.shared_prompts(min_sessions=2) == []
+
+    (sessions / "trace.json").unlink()
+    (sessions / "broken.json").write_text("{", encoding="utf-8")
+    assert index.refresh([sessions]) == 1
+    assert index.plays(session="trace") == []
+    assert [path.name for path, error in index.sources() if error] == ["broken.json"]
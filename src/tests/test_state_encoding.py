@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from configs.app_config import config
+from game.ollama_connector import OllamaConnector
+from game.research_runtime import InvocationPolicy, MediatedGameRuntime, ScriptedClient
+from game.state_encoding import (
+    StateEncodingError,
+    encode_game_state,
+    normalize_state_encoding,
+    resolve_state_encoding,
+)
+from game.trace_verifier import verify_payload
+from tests.test_trace_contract import initial_state, rules
+
+GAME_STATE = {
+    "bots": {
+        1: {"id": 1, "x": 0.2, "y": 0.5, "rot": 90.0, "health": 30, "shield": False},
+        2: {"id": 2, "x": 0.8000001, "y": 0.5, "rot": 180.0, "health": 25, "shield": True},
+    },
+    "current_turn": 3,
+}
+
+
+def test_encodings_shrink_the_state_and_keep_its_meaning() -> None:
+    sizes = {
+        encoding: len(encode_game_state(GAME_STATE, encoding, bot_id=1))
+        for encoding in ("json", "quantized", "short", "relative")
+    }
+    assert sizes["json"] > sizes["quantized"] > sizes["short"] > sizes["relative"]
+    assert json.loads(encode_game_state(GAME_STATE, "short"))["b"]["2"] == {
+        "x": 0.8, "y": 0.5, "r": 180, "h": 25, "s": 1
+    }
+    relative = json.loads(encode_game_state(GAME_STATE, "relative", bot_id=1))
+    # Bot 1 faces up; the opponent to its right is 90 degrees clockwise (C90 faces it),
+    # and bot 1 is straight ahead of the opponent.
+    assert relative["foe"] == {"h": 25, "s": 1, "d": 0.6, "b": 90, "fb": 0}
+    assert relative["me"]["r"] == 90 and relative["t"] == 3
+
+    assert resolve_state_encoding(
+        "src/assets/system_instructions/compact.txt", "json", {"compact.txt": "short"}
+    ) == "short"
+    assert resolve_state_encoding("other.txt", "quantized", {"compact.txt": "short"}) == "quantized"
+    with pytest.raises(StateEncodingError):
+        normalize_state_encoding("yaml")
+
+
+def test_connector_encodes_state_for_its_instruction_set(monkeypatch) -> None:
+    sent = []
+    monkeypatch.setattr(
+        "game.ollama_connector.Client",
+        lambda *args, **kwargs: SimpleNamespace(
+            chat=lambda **kwargs: sent.append(kwargs["messages"][-1]["content"])
+            or {"message": {"content": "M"}}
+        ),
+    )
+    instructions = config.get("llm", "system_instructions_augmented_independent")
+    settings = {("llm", "state_encodings"): {instructions: "relative"}}
+    original_get = config.get
+    monkeypatch.setattr(
+        config, "get", lambda section, key: settings.get((section, key), original_get(section, key))
+    )
+    connector = OllamaConnector()
+    connector.send_prompt_to_llm_sync(
+        1, user_text="go", game_state=GAME_STATE, new_augmenting_prompt=True,
+        new_independent_contexts=True,
+    )
+    assert sent[-1].startswith('[GAME_STATE]\n{"foe":')
+    assert connector.pop_context_record(1)["state_encoding"] == "relative"
+
+
+def test_trace_records_the_encoding_and_still_reconstructs_requests() -> None:
+    runtime = MediatedGameRuntime(
+        client=ScriptedClient(["M", "C15"]),
+        initial_state=initial_state(),
+        rules=rules(),
+        policy=InvocationPolicy(provider="scripted", model="fixture"),
+        state_encoding="short",
+    )
+    runtime.run_turn({1: "act", 2: "act"})
+    payload = runtime.session_payload()
+    play = payload["games"][0]["rounds"][0]["plays"][0]
+    assert play["context_policy"]["state_encoding"] == "short"
+    assert '"b":{"1":' in play["request"]["payload"]["messages"][-1]["content"]
+    assert verify_payload(payload).valid
+
+    play["context_policy"]["state_encoding"] = "json"
+    assert "exact-request-reconstruction-mismatch" in {
+        issue.code for issue in verify_payload(payload).issues
+    }
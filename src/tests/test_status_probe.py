@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from llm.status_probe import Probe, ProbeCache, format_timings, run_probes
+import view.ollama_config_screen as screen_module
+
+
+def test_probes_run_concurrently_within_deadlines_and_cache_late_answers() -> None:
+    release = threading.Event()
+    cache = ProbeCache()
+    calls: list[str] = []
+
+    def slow() -> str:
+        calls.append("slow")
+        release.wait(2.0)
+        return "late"
+
+    def broken() -> None:
+        raise OSError("refused")
+
+    probes = [
+        Probe("slow", slow, deadline_s=0.2, ttl_s=60.0),
+        Probe("fast", lambda: "up", deadline_s=1.0, ttl_s=60.0),
+        Probe("broken", broken, deadline_s=1.0),
+    ]
+    arrivals: list[str] = []
+    started = time.perf_counter()
+    results = run_probes(probes, cache=cache, on_result=lambda result: arrivals.append(result.name))
+    assert time.perf_counter() - started < 1.0
+    assert arrivals[-1] == "slow" and results["slow"].timed_out
+    assert results["fast"].value == "up" and results["broken"].error == "OSError: refused"
+
+    # The slow probe's answer, arriving after its deadline, serves the next run.
+    release.set()
+    deadline = time.monotonic() + 2.0
+    while cache.get(("slow", None), 60.0) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    again = run_probes(probes, cache=cache)
+    assert again["slow"].cached and again["slow"].value == "late" and calls == ["slow"]
+    assert format_timings([again["slow"], results["broken"]]).endswith("(cached), broken 0 ms (failed)")
+
+
+def test_status_panel_shows_answers_as_they_arrive_with_timings(monkeypatch) -> None:
+    screen = screen_module.OllamaConfigScreen()
+    monkeypatch.setattr(screen_module.Clock, "schedule_once", lambda callback, _dt=0: callback(0))
+    details: list[str] = []
+    monkeypatch.setattr(screen, "_set_status_details", details.append)
+    monkeypatch.setattr(screen_module.ollama_service, "ollama_installed", lambda: True)
+    monkeypatch.setattr(
+        screen_module.ollama_service,
+        "ollama_version_text",
+        lambda host=None: time.sleep(0.3) or "ollama version is 0.18.2",
+    )
+    monkeypatch.setattr(screen_module.ollama_service, "server_is_up", lambda url, port: True)
+    monkeypatch.setattr(screen, "_running_model_names_via_modelito", lambda: ["smollm2:latest"])
+
+    snapshot = screen._collect_ollama_status()
+
+    # The server's answer was on screen before the slow version check finished.
+    assert "Server status: running" in details[-2] and "Installed version: checking..." in details[-2]
+    assert snapshot["running"] and snapshot["version"] == "ollama version is 0.18.2"
+    report = screen._format_status_report(snapshot)
+    assert "Running models: smollm2:latest" in report
+    assert "Checks: cli" in report and "version 3" in report
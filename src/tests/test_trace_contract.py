@@ -6,11 +6,26 @@ from pathlib import Path
 
 import pytest
 
+from game.command_grammar import (
+    COMMAND_TOKEN_LIMIT,
+    CommandConstraintError,
+    constrain_request,
+    is_grammar_command,
+    unwrap_command_reply,
+)
 from game.replay_engine import (
+    CommandRecognizer,
     GameplaySettingsSnapshot,
+    command_prefix_is_viable,
     parse_model_response,
     resolve_shot,
 )
+from game.response_cache import (
+    CachedChatClient,
+    ResponseCache,
+    ResponseCacheError,
+    ResponseCacheMiss,
+)
 from game.research_runtime import (
     InvocationPolicy,
     MediatedGameRuntime,
@@ -249,6 +264,118 @@ def test_command_grammar_rejects_suffixes_and_non_finite_numbers() -> None:
         assert parsed.normalized_cmd == "ERR"
 
 
+def test_command_prefix_viability_matches_the_whole_response_grammar() -> None:
+    for prefix in ("", "  ", "M", "M-", "M1.", "M1e+", "M1_", "C", "A.", "B ", "S", "S1", "M2 "):
+        assert command_prefix_is_viable(prefix), prefix
+    for prefix in ("x", "Bx", "B x", "S2", "S 0", "Sure", "M\nI", "Minf", "M1e999", "M1__", "M2 2"):
+        assert not command_prefix_is_viable(prefix), prefix
+        assert not parse_model_response(prefix).valid
+
+
+def test_command_recognizer_settles_on_definite_err_only() -> None:
+    recognizer = CommandRecognizer()
+    assert not recognizer.feed("C")
+    assert not recognizer.feed("90")
+    assert recognizer.result().normalized_cmd == "C90.0"
+    assert recognizer.feed("\nI turn")
+    assert recognizer.feed(" right") and recognizer.text == "C90\nI turn"
+    assert recognizer.result().normalized_cmd == "ERR"
+
+
+def test_command_constraints_only_admit_valid_commands() -> None:
+    for command in ("M", "M-2", "M0.25", "C15", "A359.5", "B", "S", "S0", "S1"):
+        assert is_grammar_command(command), command
+        assert parse_model_response(command).valid
+    for reply in ("m", "M 2", "C", "S2", "C1234", "B\n", "Sure: B"):
+        assert not is_grammar_command(reply), reply
+
+    options, schema = constrain_request("limits", {"stop": "END", "num_predict": 200})
+    assert schema is None
+    assert options == {"stop": ["END", "\n"], "num_predict": COMMAND_TOKEN_LIMIT}
+    options, schema = constrain_request("schema", {"num_predict": 3})
+    assert options == {"num_predict": 3}
+    assert schema["required"] == ["command"]
+    assert constrain_request(None, {"seed": 1}) == ({"seed": 1}, None)
+    with pytest.raises(CommandConstraintError):
+        constrain_request("regex", {})
+
+    assert unwrap_command_reply('{"command": "C15"}') == "C15"
+    assert unwrap_command_reply('{"command": ') == '{"command": '
+    assert unwrap_command_reply("M") == "M"
+
+
+def test_schema_constrained_plays_record_format_and_verify() -> None:
+    client = ScriptedClient(["C15", "S1"])
+    runtime = MediatedGameRuntime(
+        client=client,
+        initial_state=initial_state(),
+        rules=rules(),
+        policy=InvocationPolicy(
+            provider="scripted", model="fixture", command_constraint="schema"
+        ),
+        system_instructions="Return one command.",
+        privacy_mode=PrivacyMode.FULL,
+    )
+    runtime.start_round({1: "turn", 2: "defend"})
+    plays = runtime.run_turn({1: "turn", 2: "defend"})
+
+    assert [play["normalized_command"] for play in plays] == ["C15.0", "S1"]
+    assert plays[0]["command_constraint"] == "schema"
+    assert client.requests[0]["format"]["properties"]["command"]["pattern"]
+    assert plays[0]["request"]["payload"]["format"] == client.requests[0]["format"]
+    report = verify_payload(runtime.session_payload())
+    assert report.valid, report.issues
+
+
+def test_recorded_replies_replay_offline_and_are_tagged(tmp_path: Path) -> None:
+    def run(client) -> dict:
+        runtime = MediatedGameRuntime(
+            client=client,
+            initial_state=initial_state(),
+            rules=rules(),
+            policy=InvocationPolicy(
+                provider="scripted",
+                model="fixture",
+                options=deterministic,
+                max_attempts=1,
+            ),
+            system_instructions="Return one command.",
+            privacy_mode=PrivacyMode.FULL,
+        )
+        runtime.start_round({1: "advance", 2: "defend"})
+        runtime.run_turn({1: "advance", 2: "defend"})
+        return runtime.session_payload()
+
+    deterministic = {"seed": 7, "temperature": 0}
+
+    recorded = run(
+        CachedChatClient(ScriptedClient(["M", "S1"]), ResponseCache(tmp_path), "record")
+    )
+    replayed = run(
+        CachedChatClient(ScriptedClient(["B"]), ResponseCache(tmp_path), "replay")
+    )
+
+    def plays(payload: dict) -> list[dict]:
+        return payload["games"][0]["rounds"][0]["plays"]
+
+    assert [play["cache"] for play in plays(recorded)] == ["miss", "miss"]
+    assert [play["cache"] for play in plays(replayed)] == ["hit", "hit"]
+    assert [play["attempts"] for play in plays(replayed)] == [1, 1]
+    assert [play["normalized_command"] for play in plays(replayed)] == ["M", "S1"]
+    assert verify_payload(replayed).valid
+
+    empty = CachedChatClient(ScriptedClient(["B"]), ResponseCache(tmp_path / "empty"), "replay")
+    with pytest.raises(ResponseCacheMiss):
+        empty.chat(model="fixture", messages=[{"role": "user", "content": "x"}], options=deterministic)
+    with pytest.raises(ResponseCacheError, match="seed and temperature 0"):
+        empty.chat(model="fixture", messages=[{"role": "user", "content": "x"}], options={})
+
+    # Record mode passes sampled requests through without storing their replies.
+    sampled = CachedChatClient(ScriptedClient(["B"]), ResponseCache(tmp_path / "sampled"), "record")
+    reply = sampled.chat(model="fixture", messages=[{"role": "user", "content": "x"}], options={})
+    assert reply == "B" and not (tmp_path / "sampled").exists()
+
+
 def test_zero_bullet_step_is_rejected() -> None:
     with pytest.raises(ValueError, match="step lengths must be positive"):
         GameplaySettingsSnapshot.from_mapping(
@@ -106,6 +106,11 @@ def resolve_repo_relative(path_like: str | Path) -> Path:
 
 def resolve_saved_sessions_dir(folder_name: str | Path) -> Path:
     """Resolve the saved-sessions folder and ensure it exists."""
+    return resolve_user_data_dir(folder_name)
+
+
+def resolve_user_data_dir(folder_name: str | Path) -> Path:
+    """Resolve a writable data folder under the BatLLM home (or the repository) and ensure it exists."""
     path = Path(folder_name)
     if not path.is_absolute():
         home_dir = active_batllm_home()
@@ -2,21 +2,36 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
+import threading
 
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.core.window import Window
-from kivy.properties import ListProperty, StringProperty
+from kivy.properties import BooleanProperty, ListProperty, NumericProperty, StringProperty
 from kivy.uix.screenmanager import Screen
 
-from analyzer_model import AnalyzerSessionModel
+from analyzer_model import (
+    LAZY_SESSION_THRESHOLD_BYTES,
+    AnalyzerSessionModel,
+    open_session_model,
+)
 from configs.app_config import config
-from game.session_schema import SessionFormatError, load_session_payload, summarize_session_payload
+from game.session_archive import (
+    SessionArchiveError,
+    is_session_archive,
+    open_session_archive,
+)
+from game.session_catalog import CatalogEntry, SessionCatalog
+from game.session_schema import SessionFormatError, load_session_payload
 from util.paths import resolve_saved_sessions_dir
 from util.utils import switch_screen
 from view import analyzer_theme
 
 
+_logger = logging.getLogger(__name__)
+
 class AnalyzerLoadScreen(Screen):
     """Open and validate saved BatLLM sessions for replay."""
 
@@ -25,6 +40,13 @@ class AnalyzerLoadScreen(Screen):
     status_text = StringProperty("Awaiting selection.")
     status_color = ListProperty(list(analyzer_theme.TEXT_SECONDARY))
     recent_sessions_text = StringProperty("No saved sessions found yet.")
+    filter_text = StringProperty("")
+    opening = BooleanProperty(False)
+    open_progress = NumericProperty(0.0)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._catalog: SessionCatalog | None = None
 
     def on_pre_enter(self, *_args) -> None:
         saved_dir = self.default_saved_sessions_dir()
@@ -50,14 +72,35 @@ class AnalyzerLoadScreen(Screen):
         folder_name = config.get("data", "saved_sessions_folder") or "saved_sessions"
         return resolve_saved_sessions_dir(folder_name)
 
-    def refresh_recent_sessions(self) -> None:
+    def session_catalog(self) -> SessionCatalog:
         saved_dir = self.default_saved_sessions_dir()
-        sessions = sorted(saved_dir.glob("*.json"),
-                          key=lambda path: path.stat().st_mtime, reverse=True)
-        self._populate_recent_buttons(sessions[:12])
-        if sessions:
-            lines = [f"{index + 1}. {path.name}" for index, path in enumerate(sessions[:6])]
+        catalog = getattr(self, "_catalog", None)
+        if catalog is None or catalog.folder != saved_dir:
+            catalog = SessionCatalog(saved_dir)
+            self._catalog = catalog
+        return catalog
+
+    def refresh_recent_sessions(self) -> None:
+        catalog = self.session_catalog()
+        catalog.refresh()
+        self._show_recent_entries(catalog)
+
+    def on_filter_text(self, *_args) -> None:
+        if getattr(self, "_catalog", None) is not None:
+            self._show_recent_entries(self._catalog)
+
+    def _show_recent_entries(self, catalog: SessionCatalog) -> None:
+        entries = catalog.entries(sort_by="mtime", query=self.filter_text, limit=12)
+        self._populate_recent_buttons([entry.path for entry in entries])
+        if entries:
+            lines = [
+                f"{index + 1}. {entry.name}"
+                + (f" ({', '.join(entry.models)})" if entry.models else "")
+                for index, entry in enumerate(entries[:6])
+            ]
             self.recent_sessions_text = "\n".join(lines)
+        elif self.filter_text.strip():
+            self.recent_sessions_text = "No saved sessions match the filter."
         else:
             self.recent_sessions_text = "No saved sessions found yet."
 
@@ -126,16 +169,18 @@ class AnalyzerLoadScreen(Screen):
             self.status_color = list(analyzer_theme.ERROR_TEXT_DARK)
             self.summary_text = ""
             return
+        if is_session_archive(path):
+            self._preview_archive(path)
+            return
 
-        try:
-            payload = load_session_payload(path)
-        except SessionFormatError as exc:
-            self.status_text = f"Compatibility: {exc}"
+        entry: CatalogEntry = self.session_catalog().entry_for(path)
+        if not entry.compatible:
+            self.status_text = f"Compatibility: {entry.error}"
             self.status_color = list(analyzer_theme.ERROR_TEXT_DARK)
             self.summary_text = f"File: {path.name}\nStatus: incompatible"
             return
 
-        summary = summarize_session_payload(payload)
+        summary = entry.summary()
         self.status_text = "Compatibility: analyzer-compatible"
         self.status_color = list(analyzer_theme.SUCCESS_TEXT)
         self.summary_text = (
@@ -143,12 +188,36 @@ class AnalyzerLoadScreen(Screen):
             f"Schema: v{summary['schema_version']}\n"
             f"Saved: {summary.get('saved_at') or 'unknown'}\n"
             f"App: {summary.get('app_version') or 'unknown'}\n"
+            f"Models: {', '.join(summary['models']) or 'unknown'}\n"
             f"Games: {summary['game_count']}\n"
             f"Rounds: {summary['round_count']}\n"
             f"Turns: {summary['turn_count']}\n"
+            f"Winner: {'Bot ' + str(summary['winner']) if summary.get('winner') else 'none'}\n"
             f"Status: Analyzer-compatible"
         )
 
+    def _preview_archive(self, path: Path) -> None:
+        """List the sessions of a packed archive so one can be opened directly."""
+        self.selected_path = ""
+        try:
+            records = open_session_archive(path).entries()
+        except SessionArchiveError as exc:
+            self.status_text = f"Compatibility: {exc}"
+            self.status_color = list(analyzer_theme.ERROR_TEXT_DARK)
+            self.summary_text = f"File: {path.name}\nStatus: unreadable archive"
+            return
+        self._populate_recent_buttons(
+            [Path(record.reference(path)) for record in reversed(records)]
+        )
+        self.status_text = "Choose a session from the archive list."
+        self.status_color = list(analyzer_theme.TEXT_SECONDARY)
+        self.summary_text = (
+            f"Archive: {path.name}\n"
+            f"Sessions: {len(records)}\n"
+            f"Size: {sum(record.size for record in records)} bytes, "
+            f"{sum(record.compressed_size for record in records)} packed"
+        )
+
     def open_selected_session(self) -> None:
         path_text = self.selected_path.strip()
         if not path_text:
@@ -157,6 +226,9 @@ class AnalyzerLoadScreen(Screen):
             return
 
         path = Path(path_text)
+        if _is_large_session(path):
+            self._open_large_session(path)
+            return
         try:
             payload = load_session_payload(path)
         except SessionFormatError as exc:
@@ -168,6 +240,59 @@ class AnalyzerLoadScreen(Screen):
         review.load_session(AnalyzerSessionModel(payload, path))
         switch_screen(self.manager, "analyzer_review", direction="left")
 
+    def _open_large_session(self, path: Path) -> None:
+        """Index a large session off the UI thread, then open it lazily."""
+        if self.opening:
+            return
+        self.opening = True
+        self.open_progress = 0.0
+        self.status_text = f"Indexing {path.name}..."
+        self.status_color = list(analyzer_theme.TEXT_SECONDARY)
+        catalog = self.session_catalog()
+
+        def report(fraction: float) -> None:
+            Clock.schedule_once(lambda *_: self._show_open_progress(fraction), 0)
+
+        def worker() -> None:
+            try:
+                model = open_session_model(path, catalog=catalog, progress=report)
+            except SessionFormatError as exc:
+                error: Exception = exc
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                # Any failure must still reach the UI thread, or the screen stays "opening".
+                _logger.exception("Could not open the session %s", path)
+                error = exc
+            else:
+                Clock.schedule_once(lambda *_: self._finish_large_session(model, None), 0)
+                return
+            Clock.schedule_once(lambda *_: self._finish_large_session(None, error), 0)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_open_progress(self, fraction: float) -> None:
+        if not self.opening:
+            return
+        self.open_progress = fraction
+        self.status_text = f"Indexing session... {int(fraction * 100)}%"
+
+    def _finish_large_session(
+        self, model: AnalyzerSessionModel | None, error: Exception | None
+    ) -> None:
+        self.opening = False
+        if model is None:
+            if isinstance(error, SessionFormatError):
+                self.status_text = f"Compatibility: {error}"
+            else:
+                self.status_text = f"Could not open the session: {error}"
+            self.status_color = list(analyzer_theme.ERROR_TEXT_DARK)
+            return
+        self.open_progress = 1.0
+        self.status_text = "Compatibility: analyzer-compatible"
+        self.status_color = list(analyzer_theme.SUCCESS_TEXT)
+        review = self.manager.get_screen("analyzer_review")
+        review.load_session(model)
+        switch_screen(self.manager, "analyzer_review", direction="left")
+
     def go_back(self) -> None:
         if self.manager is not None and self.manager.has_screen("home"):
             switch_screen(self.manager, "home", direction="right")
@@ -175,3 +300,10 @@ class AnalyzerLoadScreen(Screen):
         app = App.get_running_app()
         if app is not None:
             app.stop()
+
+
+def _is_large_session(path: Path) -> bool:
+    try:
+        return path.stat().st_size >= LAZY_SESSION_THRESHOLD_BYTES
+    except OSError:
+        return False
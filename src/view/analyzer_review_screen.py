@@ -12,8 +12,8 @@ from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.screenmanager import Screen
 
-from analyzer_model import AnalyzerSessionModel, AnalyzerTreeRow
-from game.session_schema import SessionFormatError, load_session_payload
+from analyzer_model import AnalyzerSessionModel, AnalyzerTreeRow, open_session_model
+from game.session_schema import SessionFormatError
 from util.utils import switch_screen
 from view.analyzer_board import AnalyzerBoard  # Register custom widget before KV loads.
 from view import analyzer_theme
@@ -34,6 +34,7 @@ class AnalyzerReviewScreen(Screen):
         self._playback_event = None
         self._updating_slider = False
         self._active_tree_filters: set[str] = set()
+        self._tree_refresh_event = None
 
     def on_enter(self, *_args) -> None:
         Window.unbind(on_key_down=self.handle_window_key_down)
@@ -52,6 +53,10 @@ class AnalyzerReviewScreen(Screen):
 
     def load_session(self, model: AnalyzerSessionModel) -> None:
         self.stop_playback()
+        previous = self.model
+        if previous is not None and previous is not model:
+            previous.close()
+        model.source.on_round_loaded = self._on_round_loaded
         self.model = model
         self.current_file = model.source_name
         self.session_title = f"Game Analyzer | {model.source_name}"
@@ -64,11 +69,23 @@ class AnalyzerReviewScreen(Screen):
         if model is None:
             return
         try:
-            payload = load_session_payload(model.source_path)
+            reloaded = open_session_model(
+                model.source_path, catalog=getattr(model.source, "catalog", None)
+            )
         except SessionFormatError as exc:
             self.event_ribbon_text = f"Reload failed: {exc}"
             return
-        self.load_session(AnalyzerSessionModel(payload, model.source_path))
+        self.load_session(reloaded)
+
+    def _on_round_loaded(self, _game_index: int, _round_index: int) -> None:
+        # Called from the prefetch thread; coalesce tree rebuilds on the UI thread.
+        if self._tree_refresh_event is None:
+            self._tree_refresh_event = Clock.schedule_once(self._refresh_tree_after_prefetch, 0)
+
+    def _refresh_tree_after_prefetch(self, _dt: float) -> None:
+        self._tree_refresh_event = None
+        if self.model is not None and self.ids:
+            self._refresh_tree()
 
     def open_load_screen(self) -> None:
         self.stop_playback()
@@ -197,7 +214,13 @@ class AnalyzerReviewScreen(Screen):
 
         self.current_file = model.source_name
         self.session_title = f"Game Analyzer | {model.source_name}"
+        try:
+            self._populate_view(model, skip_tree=skip_tree)
+        except SessionFormatError as exc:
+            self.event_ribbon_text = f"Session data error: {exc}"
+            self.ids.event_ribbon.text = self.event_ribbon_text
 
+    def _populate_view(self, model: AnalyzerSessionModel, *, skip_tree: bool) -> None:
         game_spinner = self.ids.game_spinner
         game_spinner.values = model.game_labels()
         if game_spinner.values:
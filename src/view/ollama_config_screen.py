@@ -12,6 +12,8 @@ from pathlib import Path
 from typing import Any
 
 from llm import service as ollama_service
+from llm.status_probe import Probe, clear_probe_cache, format_timings, run_probes
+from llm.supervisor import PHASE_DOWN, PHASE_READY
 from modelito import ollama_service as modelito_ollama_service
 from kivy.clock import Clock
 from kivy.core.window import Window
@@ -78,6 +80,7 @@ class OllamaConfigScreen(Screen):
         self._model_picker_popup = None
         managed_model = str(config.get("llm", "last_served_model") or "").strip()
         self._managed_model_name: str | None = managed_model or None
+        self._serving_phase = ""
 
     def on_pre_enter(self, *_args):
         Window.unbind(on_key_down=self.handle_window_key_down)
@@ -85,9 +88,23 @@ class OllamaConfigScreen(Screen):
         self._refresh_warmup_timeout()
         self.refresh_ollama_status()
         self.refresh_local_models()
+        supervisor = ollama_service.active_supervisor()
+        if supervisor is not None:
+            self._serving_phase = supervisor.state.phase
+            supervisor.subscribe(self._on_serving_state)
 
     def on_pre_leave(self, *_args):
         Window.unbind(on_key_down=self.handle_window_key_down)
+        supervisor = ollama_service.active_supervisor()
+        if supervisor is not None:
+            supervisor.unsubscribe(self._on_serving_state)
+
+    def _on_serving_state(self, state):
+        """Refresh the status when the supervisor sees the server come up or go down."""
+        if state.phase == self._serving_phase:
+            return
+        self._serving_phase = state.phase
+        Clock.schedule_once(lambda *_: self.refresh_ollama_status(), 0)
 
     def handle_window_key_down(self, _window, key, *_args):
         """Handle Escape by dismissing the model picker or returning to Settings."""
@@ -120,6 +137,8 @@ class OllamaConfigScreen(Screen):
             "model": selected_model,
             "model_timeouts": dict(model_timeouts),
             "timeout": config.get("llm", "timeout"),
+            "adaptive_timeouts": config.get("llm", "adaptive_timeouts"),
+            "num_ctx": config.get("llm", "num_ctx"),
         }
 
     def _warmup_timeout_config(self) -> dict[str, Any]:
@@ -134,6 +153,7 @@ class OllamaConfigScreen(Screen):
         return {
             "model_override": "saved per-model override",
             "global_override": "global timeout setting",
+            "adaptive": "the latency observed for this model and context size",
             "model_default": "BatLLM's common-model default",
             "fallback_default": "BatLLM's generic fallback",
         }.get(source, "BatLLM timeout settings")
@@ -459,23 +479,105 @@ class OllamaConfigScreen(Screen):
         if not ok:
             raise RuntimeError(f"Failed to delete model {model_name}")
 
+    def _status_probes(self) -> list[Probe]:
+        """The independent checks behind the status panel, with deadlines and cache lifetimes."""
+        base_url, port = self._llm_endpoint()
+        endpoint = f"{base_url}:{port}"
+        host = f"{base_url.removeprefix('http://').removeprefix('https://')}:{port}"
+        probes = [
+            Probe("cli", ollama_service.ollama_installed, deadline_s=2.0, ttl_s=60.0),
+            Probe(
+                "version",
+                lambda: ollama_service.ollama_version_text(host=host),
+                deadline_s=3.0,
+                ttl_s=60.0,
+            ),
+        ]
+        supervisor = ollama_service.active_supervisor()
+        state = supervisor.state if supervisor is not None else None
+        if state is not None and supervisor.endpoint == endpoint and state.phase in (PHASE_READY, PHASE_DOWN):
+            # The supervisor checked moments ago; no need to ask the server again.
+            probes += [
+                Probe("server", lambda: state.ready, ttl_s=0),
+                Probe("running_models", lambda: list(state.resident), ttl_s=0),
+            ]
+        else:
+            probes += [
+                Probe(
+                    "server",
+                    lambda: ollama_service.server_is_up(base_url, port),
+                    deadline_s=2.0,
+                    ttl_s=2.0,
+                    key=endpoint,
+                ),
+                Probe(
+                    "running_models",
+                    self._running_model_names_via_modelito,
+                    deadline_s=3.0,
+                    ttl_s=2.0,
+                    key=endpoint,
+                ),
+            ]
+        return probes
+
+    @staticmethod
+    def _format_partial_status(results: dict[str, Any]) -> str:
+        """Describe the probes that have answered so far; the others are still checking."""
+
+        def line(label: str, name: str, describe) -> str:
+            result = results.get(name)
+            if result is None:
+                return f"{label}: checking..."
+            if not result.ok:
+                return f"{label}: {'no answer' if result.timed_out else 'unavailable'}"
+            return f"{label}: {describe(result.value)}"
+
+        return "\n".join(
+            [
+                line("Ollama CLI", "cli", lambda found: "found" if found else "not found"),
+                line("Installed version", "version", lambda text: text or "unknown"),
+                line("Server status", "server", lambda up: "running" if up else "not running"),
+                line(
+                    "Running models",
+                    "running_models",
+                    lambda names: ", ".join(names) if names else "none currently loaded",
+                ),
+            ]
+        )
+
     def _collect_ollama_status(self) -> dict[str, Any]:
-        state = ollama_service.inspect_service_state()
         base_url, port = self._llm_endpoint()
         warmup_timeout = ollama_service.resolve_warmup_timeout(self._warmup_timeout_config())
+        arrived: dict[str, Any] = {}
+
+        def show(result) -> None:
+            # Each answer is shown as it arrives instead of after the slowest one.
+            arrived[result.name] = result
+            self._set_status_details(self._format_partial_status(dict(arrived)))
+
+        results = run_probes(self._status_probes(), on_result=show)
+
+        def value(name: str) -> Any:
+            result = results[name]
+            return result.value if result.ok else None
+
+        version = str(value("version") or "")
+        running = bool(value("server"))
         snapshot: dict[str, Any] = {
-            "found": bool(state.get("installed")),
-            "version": str(state.get("version") or "unknown"),
-            "running": bool(state.get("running")),
-            "server_version": str(state.get("version") or ""),
-            "running_models": self._running_model_names_via_modelito() if state.get("running") else [],
-            "configured_model": str(state.get("configured_model") or config.get("llm", "model") or ""),
+            "found": bool(value("cli")),
+            "version": version or "unknown",
+            "running": running,
+            "server_version": version,
+            "running_models": list(value("running_models") or []) if running else [],
+            "configured_model": str(config.get("llm", "model") or ""),
             "endpoint": f"{base_url}:{port}",
             "warmup_timeout": warmup_timeout,
+            "probes": list(results.values()),
         }
         self._append_log(
-            "modelito inspect_service_state -> "
+            "status probes -> "
             f"installed={snapshot['found']} running={snapshot['running']} version={snapshot['version']}"
+            f"\n{format_timings(snapshot['probes'])}"
         )
         if snapshot["running_models"]:
             self._append_log(
@@ -518,6 +620,8 @@ class OllamaConfigScreen(Screen):
             lines.append("Server status: not running")
             lines.append(f"BatLLM model: {configured_model}")
 
+        if snapshot.get("probes"):
+            lines.append(f"Checks: {format_timings(snapshot['probes'])}")
         return "\n".join(lines)
 
     def refresh_ollama_status(self):
@@ -697,6 +801,10 @@ class OllamaConfigScreen(Screen):
     def _select_local_model(self, model_name: str):
         self._set_local_selection(model_name)
         self._append_log(f"Selected local model: {model_name}")
+        supervisor = ollama_service.active_supervisor()
+        if supervisor is not None and config.get("llm", "preload_browsed_models"):
+            # Loaded in the background, so choosing it is quick if the user does.
+            supervisor.browse(model_name)
 
     def _select_remote_model(self, model_name: str):
         self._set_remote_selection(model_name)
@@ -704,6 +812,8 @@ class OllamaConfigScreen(Screen):
 
     def refresh_all(self):
         self._append_log("Refreshing...")
+        # An explicit refresh asks again rather than showing recent results.
+        clear_probe_cache()
         self.refresh_ollama_status()
         self.refresh_local_models()
         self.refresh_remote_models()
@@ -737,9 +847,13 @@ class OllamaConfigScreen(Screen):
 
         def work():
             try:
-                names = [
-                    name for name in modelito_ollama_service.list_local_models() if str(name).strip()
-                ]
+                result = run_probes(
+                    [Probe("local_models", modelito_ollama_service.list_local_models,
+                           deadline_s=10.0, ttl_s=0)]
+                )["local_models"]
+                if not result.ok:
+                    raise RuntimeError(result.error or "no answer within 10s")
+                names = [name for name in result.value if str(name).strip()]
 
                 def update(*_):
                     self._local_model_entries = [{"name": name, "display": name} for name in names]
@@ -767,8 +881,16 @@ class OllamaConfigScreen(Screen):
 
         def work():
             try:
+                # The catalog changes rarely; reopening the picker reuses it for a while.
+                result = run_probes(
+                    [Probe("remote_catalog",
+                           lambda: list(modelito_ollama_service.list_remote_model_catalog()),
+                           deadline_s=15.0, ttl_s=300.0)]
+                )["remote_catalog"]
+                if not result.ok:
+                    raise RuntimeError(result.error or "no answer within 15s")
                 entries: list[dict[str, str]] = []
-                for entry in modelito_ollama_service.list_remote_model_catalog():
+                for entry in result.value:
                     raw = entry.raw if isinstance(entry.raw, dict) else {}
                     size = str(
                         raw.get("parameter_size")
@@ -797,6 +919,7 @@ class OllamaConfigScreen(Screen):
                     self._set_status(f"Loaded {len(names)} remote model(s).")
                     self._append_log(
                         f"modelito list_remote_model_catalog\nLoaded {len(names)} remote models"
+                        f" ({format_timings([result])})"
                     )
                     self._schedule_ui_callback(on_complete)
 
@@ -0,0 +1,113 @@
+"""Compare unconstrained, schema-constrained, and length-limited command replies.
+
+Each mode sends the same chat request repeatedly and reports the median latency,
+mean generated tokens (the server's ``eval_count``), and the share of replies
+that parse as ``ERR``. Run it against ``tools/ollama_mock_server.py`` for a
+smoke check or against a local Ollama server and real models.
+"""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from statistics import fmean, median
+import sys
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.command_grammar import (  # noqa: E402
+    CONSTRAINT_MODES,
+    CONSTRAINT_SCHEMA,
+    constrain_request,
+    unwrap_command_reply,
+)
+from game.ollama_connector import Client  # noqa: E402
+from game.replay_engine import parse_model_response  # noqa: E402
+
+DEFAULT_SYSTEM = (
+    "You control a bot in BatLLM. Reply with exactly one command: M, M<distance>, "
+    "C<degrees>, A<degrees>, B, S, S0, or S1."
+)
+DEFAULT_PROMPT = (
+    "Explain your command, then give it: the opponent is 15 degrees clockwise from you."
+)
+
+
+def run_mode(
+    client: Client,
+    *,
+    mode: str,
+    model: str,
+    messages: list[dict[str, str]],
+    repetitions: int,
+) -> dict[str, float]:
+    options, schema = constrain_request(mode, {"temperature": 0})
+    latencies: list[float] = []
+    tokens: list[int] = []
+    errors = 0
+    for _ in range(max(1, repetitions)):
+        started = perf_counter()
+        response = client.constrained_chat(
+            model=model, messages=messages, options=options, format=schema
+        )
+        latencies.append((perf_counter() - started) * 1000.0)
+        tokens.append(int(response.get("eval_count") or 0))
+        text = response["message"]["content"]
+        if mode == CONSTRAINT_SCHEMA:
+            text = unwrap_command_reply(text)
+        if not parse_model_response(text).valid:
+            errors += 1
+    return {
+        "latency_ms": median(latencies),
+        "tokens": fmean(tokens),
+        "err_rate": errors / len(latencies),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="http://localhost:11434")
+    parser.add_argument("--model", default="smollm2")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--system", default=DEFAULT_SYSTEM)
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument(
+        "--modes", nargs="+", choices=CONSTRAINT_MODES, default=list(CONSTRAINT_MODES)
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    client = Client(host=args.host, timeout=args.timeout)
+    messages = [
+        {"role": "system", "content": args.system},
+        {"role": "user", "content": args.prompt},
+    ]
+    print(f"model={args.model} repetitions={args.repetitions}")
+    for mode in args.modes:
+        result = run_mode(
+            client,
+            mode=mode,
+            model=args.model,
+            messages=messages,
+            repetitions=args.repetitions,
+        )
+        print(
+            f"{mode:<7} median={result['latency_ms']:.1f}ms "
+            f"tokens={result['tokens']:.1f} err_rate={result['err_rate']:.0%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""Compare tail latency of chat requests with and without hedging.
+
+Starts two in-process copies of ``tools/ollama_mock_server.py`` whose replies
+occasionally stall (``--tail-delay`` for ``--tail-probability`` of requests),
+or uses the servers given with ``--host``. Each run sends the same request
+repeatedly through :class:`game.invocation_policy.InvocationEngine`, first
+without hedging and then hedging on the other server, and reports p50, p95 and
+p99 latency and how many requests were hedged.
+"""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+from http.server import ThreadingHTTPServer
+from itertools import cycle
+import os
+from pathlib import Path
+import random
+import sys
+import threading
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for path in (ROOT, SRC):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.invocation_policy import (  # noqa: E402
+    InvocationEngine,
+    RetryPolicy,
+    normalize_hedge_after,
+)
+from game.llm_telemetry import percentile  # noqa: E402
+from game.ollama_connector import Client  # noqa: E402
+from tools.ollama_mock_server import MockHandler  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Reply with exactly M"}]
+
+
+def start_mock_servers(
+    count: int, *, tail_delay: float, tail_probability: float, seed: int
+) -> list[ThreadingHTTPServer]:
+    servers = []
+    for index in range(count):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+        server.chat_delay = 0.0
+        server.tail_delay = tail_delay
+        server.tail_probability = tail_probability
+        server.tail_rng = random.Random(seed + index)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def run(
+    clients: list[Client], *, model: str, hedge_after: str | float, requests: int
+) -> dict[str, float]:
+    """Send ``requests`` chats, alternating the primary server, and summarise latency."""
+    engine = InvocationEngine(RetryPolicy(hedge_after=hedge_after))
+    latencies: list[float] = []
+    hedged = 0
+    pairs = cycle([(clients[i], clients[(i + 1) % len(clients)]) for i in range(len(clients))])
+    for _ in range(max(1, requests)):
+        primary, secondary = next(pairs)
+        started = perf_counter()
+        result = engine.invoke(
+            lambda client=primary: client.constrained_chat(model=model, messages=MESSAGES),
+            hedge=lambda client=secondary: client.constrained_chat(model=model, messages=MESSAGES),
+            hedge_delay=engine.policy.hedge_delay(latencies),
+        )
+        latencies.append((perf_counter() - started) * 1000.0)
+        hedged += int(result.hedged)
+    return {
+        "p50": percentile(latencies, 50) or 0.0,
+        "p95": percentile(latencies, 95) or 0.0,
+        "p99": percentile(latencies, 99) or 0.0,
+        "hedged": hedged / len(latencies),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--host",
+        action="append",
+        default=[],
+        help="Ollama server to use instead of mock servers; repeat for several",
+    )
+    parser.add_argument("--model", default="smollm2")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--hedge-after", default="p95")
+    parser.add_argument("--tail-delay", type=float, default=0.5)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    servers: list[ThreadingHTTPServer] = []
+    hosts = list(args.host)
+    if not hosts:
+        servers = start_mock_servers(
+            2, tail_delay=args.tail_delay, tail_probability=args.tail_probability, seed=args.seed
+        )
+        hosts = [f"http://127.0.0.1:{server.server_address[1]}" for server in servers]
+    clients = [Client(host=host, timeout=args.timeout) for host in hosts]
+    print(f"model={args.model} requests={args.requests} hosts={len(hosts)}")
+    try:
+        for label, hedge_after in (
+            ("off", "off"),
+            (f"hedge={args.hedge_after}", normalize_hedge_after(args.hedge_after)),
+        ):
+            result = run(clients, model=args.model, hedge_after=hedge_after, requests=args.requests)
+            print(
+                f"{label:<12} p50={result['p50']:.1f}ms p95={result['p95']:.1f}ms "
+                f"p99={result['p99']:.1f}ms hedged={result['hedged']:.0%}"
+            )
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
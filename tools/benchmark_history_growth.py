@@ -0,0 +1,106 @@
+"""Measure how the cost of a research play grows with the history.
+
+Plays ``--plays`` turns of a shared-context game through
+``MediatedGameRuntime`` with an in-process client that always moves, and
+reports, per window of plays, the mean time and the memory allocated per play
+(tracemalloc). Alongside, it times taking one snapshot of a history of that
+length: appending to a ``MessageHistory`` against deep-copying a list, which is
+what every request used to do.
+
+The trace still commits to each full request, so in ``full`` privacy mode a
+play's record, and the hashing in any mode, grow with the history.
+"""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+from copy import deepcopy
+import os
+from pathlib import Path
+import sys
+from time import perf_counter
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.message_history import MessageHistory  # noqa: E402
+from game.replay_engine import GameplaySettingsSnapshot  # noqa: E402
+from game.research_runtime import InvocationPolicy, MediatedGameRuntime  # noqa: E402
+
+INITIAL_STATE = {
+    1: {"x": 0.25, "y": 0.5, "rot": 0.0, "shield": False, "health": 10_000},
+    2: {"x": 0.75, "y": 0.5, "rot": 180.0, "shield": False, "health": 10_000},
+}
+
+
+class MoveClient:
+    """Replies with a tiny move and keeps nothing."""
+
+    def chat(self, **_kwargs):
+        return "M0.001"
+
+
+def snapshot_costs(length: int, repeat: int = 50) -> tuple[float, float]:
+    """Return microseconds per snapshot of a ``length``-message history: append, deepcopy."""
+    messages = [{"role": "user", "content": f"message {index} " * 8} for index in range(length)]
+    history = MessageHistory(messages)
+    started = perf_counter()
+    for _ in range(repeat):
+        history = history.append({"role": "user", "content": "next"})
+    persistent = (perf_counter() - started) / repeat * 1e6
+    started = perf_counter()
+    for _ in range(repeat):
+        deepcopy(messages).append({"role": "user", "content": "next"})
+    copied = (perf_counter() - started) / repeat * 1e6
+    return persistent, copied
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plays", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=200)
+    parser.add_argument("--privacy", choices=("full", "redacted", "hashed"), default="hashed")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    window = max(1, args.window)
+    runtime = MediatedGameRuntime(
+        client=MoveClient(),
+        initial_state=INITIAL_STATE,
+        rules=GameplaySettingsSnapshot.from_mapping({"initial_health": 10_000}),
+        policy=InvocationPolicy(provider="benchmark", model="none"),
+        system_instructions="Reply with one command.",
+        independent_contexts=False,
+        privacy_mode=args.privacy,
+    )
+    print(f"plays={args.plays} privacy={args.privacy}")
+    print("plays        history  ms/play  KiB/play  snapshot us (shared / deepcopy)")
+    tracemalloc.start()
+    for start in range(0, max(1, args.plays), window):
+        count = min(window, args.plays - start)
+        before, _ = tracemalloc.get_traced_memory()
+        started = perf_counter()
+        for index in range(count):
+            runtime.play(bot_id=1 + (start + index) % 2, human_prompt="move a little")
+        elapsed = perf_counter() - started
+        after, _ = tracemalloc.get_traced_memory()
+        history = 2 * (start + count) + 1
+        persistent, copied = snapshot_costs(history)
+        print(
+            f"{start + 1:>5}-{start + count:<6} {history:>7} {elapsed / count * 1000:>8.3f} "
+            f"{(after - before) / count / 1024:>9.2f}  {persistent:>8.2f} / {copied:.1f}"
+        )
+    tracemalloc.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
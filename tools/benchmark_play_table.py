@@ -0,0 +1,113 @@
+"""Compare aggregate queries over columnar play shards with walking session JSON."""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+import json
+import os
+from pathlib import Path
+from statistics import median
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.play_table import (  # noqa: E402
+    export_sessions,
+    iter_session_files,
+    load_play_table,
+)
+
+
+def walk_json(paths: list[Path]) -> tuple[Counter, dict[str, float]]:
+    """Command counts per model and mean latency per model, straight from JSON."""
+    commands: Counter = Counter()
+    latency: dict[str, list[float]] = {}
+    for path in paths:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        provenance = payload.get("model_provenance") or {}
+        metadata = payload.get("llm_metadata") or {}
+        default_model = str(
+            provenance.get("requested_model")
+            or metadata.get("last_served_model")
+            or metadata.get("configured_model")
+            or ""
+        )
+        for game in payload.get("games", []):
+            for round_entry in game.get("rounds", []):
+                plays = list(round_entry.get("plays", []))
+                for turn in round_entry.get("turns", []):
+                    plays.extend(turn.get("plays", []))
+                for play in plays:
+                    request = (play.get("request") or {}).get("payload") or {}
+                    model = str(request.get("model") or default_model)
+                    command = play.get("normalized_command") or play.get("cmd") or ""
+                    commands[(model, command)] += 1
+                    if play.get("latency_ms") is not None:
+                        latency.setdefault(model, []).append(float(play["latency_ms"]))
+    return commands, {model: sum(v) / len(v) for model, v in latency.items() if v}
+
+
+def query_table(out_dir: Path) -> tuple[Counter, dict[str, float]]:
+    table = load_play_table(out_dir, columns=("model", "command", "latency_ms"))
+    return table.count_by("model", "command"), table.mean_by("model", "latency_ms")
+
+
+def _timed(function, *args, **kwargs) -> tuple[float, object]:
+    started = perf_counter()
+    result = function(*args, **kwargs)
+    return (perf_counter() - started) * 1000.0, result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "sessions",
+        nargs="*",
+        default=[str(ROOT / "research/urucon2026/corpus/generated")],
+    )
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    paths = list(iter_session_files(args.sessions))
+    with tempfile.TemporaryDirectory() as temp:
+        out_dir = Path(temp)
+        export_ms, report = _timed(
+            export_sessions, paths, out_dir, workers=args.workers
+        )
+        if report.failed:
+            for source, error in report.failed.items():
+                print(f"FAILED {source}: {error}")
+            return 1
+        json_times: list[float] = []
+        table_times: list[float] = []
+        for _ in range(max(1, args.repetitions)):
+            elapsed, expected = _timed(walk_json, paths)
+            json_times.append(elapsed)
+            elapsed, actual = _timed(query_table, out_dir)
+            table_times.append(elapsed)
+            if actual[0] != expected[0]:
+                print("Columnar command counts differ from the JSON walk.")
+                return 1
+    json_ms = median(json_times)
+    table_ms = median(table_times)
+    print(f"sessions={len(paths)} one-off export={export_ms:.1f}ms")
+    print(f"walk JSON median={json_ms:.1f}ms columnar median={table_ms:.1f}ms")
+    print(f"speedup={json_ms / table_ms if table_ms else float('inf'):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
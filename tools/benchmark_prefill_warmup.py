@@ -0,0 +1,110 @@
+"""Compare first-turn latency with and without a prefill warm-up.
+
+Each repetition first evicts the server's prompt cache with an unrelated
+request, then sends a round's first request: the system instructions, a
+history of ``--history`` earlier exchanges, and a new augmented user message.
+With warm-up, the system instructions and history are sent beforehand with a
+one-token reply, as ``OllamaConnector.warm_up`` does while players type.
+Reports the median latency and server prefill time of the first request.
+"""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from statistics import median
+import sys
+import time
+from time import perf_counter
+import uuid
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.llm_telemetry import server_timings  # noqa: E402
+from game.ollama_connector import Client  # noqa: E402
+from game.state_encoding import render_user_content  # noqa: E402
+from util.paths import resolve_repo_relative  # noqa: E402
+
+DEFAULT_INSTRUCTIONS = "src/assets/system_instructions/augmented_shared_1.txt"
+PROMPT = "Turn towards the opponent and shoot when the shield is down."
+
+
+def conversation(system: str, turns: int) -> list[dict[str, str]]:
+    """Return the system message and ``turns`` earlier exchanges."""
+    messages = [{"role": "system", "content": system}]
+    for turn in range(1, turns + 1):
+        state = {
+            "bots": {
+                1: {"x": 0.2 + 0.01 * turn, "y": 0.5, "rot": 10.0 * turn, "health": 30, "shield": 0},
+                2: {"x": 0.8, "y": 0.5 - 0.01 * turn, "rot": 180.0, "health": 30, "shield": 1},
+            },
+            "current_turn": turn,
+        }
+        content = render_user_content(PROMPT, state, augmented=True)
+        messages.append({"role": "user", "content": content})
+        messages.append({"role": "assistant", "content": "C15"})
+    return messages
+
+
+def first_turn(
+    client: Client, model: str, prefix: list[dict[str, str]], *, warm: bool, think: float
+) -> dict[str, float]:
+    options = {"num_predict": 1, "temperature": 0}
+    # An unrelated prompt replaces whatever the server had cached.
+    client.constrained_chat(
+        model=model,
+        messages=[{"role": "system", "content": f"Cache buster {uuid.uuid4()}."}],
+        options=options,
+    )
+    if warm:
+        client.constrained_chat(model=model, messages=prefix, options=options)
+    time.sleep(think)
+    messages = prefix + [{"role": "user", "content": PROMPT}]
+    started = perf_counter()
+    response = client.constrained_chat(model=model, messages=messages, options={"temperature": 0})
+    timings = server_timings(response)
+    return {
+        "latency_ms": (perf_counter() - started) * 1000.0,
+        "prefill_ms": float(timings.get("prefill_ms") or 0.0),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="http://localhost:11434")
+    parser.add_argument("--model", default="smollm2")
+    parser.add_argument("--instructions", default=DEFAULT_INSTRUCTIONS)
+    parser.add_argument("--history", type=int, default=8, help="earlier exchanges in the context")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--think", type=float, default=0.0, help="seconds between warm-up and turn")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    client = Client(host=args.host, timeout=args.timeout)
+    system = resolve_repo_relative(args.instructions).read_text(encoding="utf-8")
+    prefix = conversation(system, max(0, args.history))
+    print(f"model={args.model} history={args.history} repetitions={args.repetitions}")
+    for label, warm in (("cold", False), ("warm", True)):
+        results = [
+            first_turn(client, args.model, prefix, warm=warm, think=args.think)
+            for _ in range(max(1, args.repetitions))
+        ]
+        print(
+            f"{label:<5} median={median(r['latency_ms'] for r in results):.1f}ms "
+            f"prefill={median(r['prefill_ms'] for r in results):.1f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""Compare the prompt size of the game-state encodings.
+
+Plays a seeded random game and renders both bots' augmented user messages with
+each encoding, as a shared-context history would accumulate them. Reports the
+estimated tokens of one message and of the whole history. With ``--host`` each
+history is also sent to an Ollama server (with ``num_predict`` 1), which
+reports the exact ``prompt_eval_count`` under the model's tokenizer.
+"""
+# pylint: disable=wrong-import-position
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import random
+from statistics import fmean
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+# The gameplay modules import Kivy, which would otherwise parse our arguments.
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from game.context_window import estimate_message_tokens, estimate_tokens  # noqa: E402
+from game.ollama_connector import Client  # noqa: E402
+from game.state_encoding import STATE_ENCODERS, render_user_content  # noqa: E402
+
+PROMPT = "Turn towards the opponent and shoot when the shield is down."
+
+
+def random_states(turns: int, seed: int) -> list[dict]:
+    """Return one game state per turn, with bots wandering the arena."""
+    rng = random.Random(seed)
+    bots = {
+        1: {"x": 0.2, "y": 0.5, "rot": 0.0, "health": 30, "shield": 0},
+        2: {"x": 0.8, "y": 0.5, "rot": 180.0, "health": 30, "shield": 0},
+    }
+    states = []
+    for turn in range(1, turns + 1):
+        for bot in bots.values():
+            bot["x"] = min(0.95, max(0.05, bot["x"] + rng.uniform(-0.05, 0.05)))
+            bot["y"] = min(0.95, max(0.05, bot["y"] + rng.uniform(-0.05, 0.05)))
+            bot["rot"] = (bot["rot"] + rng.uniform(-45.0, 45.0)) % 360.0
+            bot["shield"] = rng.randint(0, 1)
+            if rng.random() < 0.2:
+                bot["health"] = max(0, bot["health"] - 5)
+        states.append(
+            {
+                "bots": {bot_id: dict(bot) for bot_id, bot in bots.items()},
+                "current_turn": turn,
+                "current_round": 1,
+            }
+        )
+    return states
+
+
+def shared_history(states: list[dict], encoding: str) -> list[dict[str, str]]:
+    """Return the user messages both bots would add to a shared history."""
+    return [
+        {
+            "role": "user",
+            "content": render_user_content(
+                PROMPT, state, augmented=True, encoding=encoding, bot_id=bot_id
+            ),
+        }
+        for state in states
+        for bot_id in sorted(state["bots"])
+    ]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--host", default=None, help="Ollama server for exact token counts")
+    parser.add_argument("--model", default="smollm2")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    states = random_states(max(1, args.turns), args.seed)
+    client = Client(host=args.host, timeout=args.timeout) if args.host else None
+    print(f"turns={len(states)} messages={2 * len(states)}")
+    for encoding in STATE_ENCODERS:
+        messages = shared_history(states, encoding)
+        line = (
+            f"{encoding:<10} message={fmean(estimate_message_tokens(m) for m in messages):.1f}tok "
+            f"history={estimate_tokens(messages)}tok"
+        )
+        if client is not None:
+            response = client.constrained_chat(
+                model=args.model, messages=messages, options={"num_predict": 1}
+            )
+            line += f" prompt_eval_count={response.get('prompt_eval_count')}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
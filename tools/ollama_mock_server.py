@@ -3,15 +3,54 @@
 
 Provides /api/version, /api/chat, /api/generate, /api/tags and /api/ps.
 Designed for quick integration tests; not a full Ollama implementation.
+
+Chat requests honour a structured-output ``format`` schema with a ``command``
+property (the reply becomes the first command found in the unconstrained
+reply), the ``stop`` and ``num_predict`` options, and report Ollama's token
+counters with one token per word or punctuation mark, along with phase
+durations of 1 ms per prompt token and 10 ms per generated token. The first
+chat reply reports a model load of ``--load-time`` seconds; later ones find
+the model warm.
+
+Several instances on different ports stand in for an endpoint pool; ``--delay``
+makes one of them slow enough to time out. ``--tail-delay`` and
+``--tail-probability`` add a latency tail: that share of chat replies waits the
+extra time, as when a request queues behind another on a busy server.
 """
 from __future__ import annotations
 
 import argparse
 import json
+import random
+import re
+import time
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Tuple
 
 
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_COMMAND_RE = re.compile(r"\b(M-?[0-9]+(?:\.[0-9]+)?|[CA]-?[0-9]+(?:\.[0-9]+)?|S[01]?|B|M)\b")
+
+
+def _apply_generation(reply: str, payload: dict) -> str:
+    """Apply the request's format and generation limits to a canned reply."""
+    fmt = payload.get("format")
+    if isinstance(fmt, dict) and "command" in (fmt.get("properties") or {}):
+        match = _COMMAND_RE.search(reply)
+        reply = json.dumps({"command": match.group(1) if match else "S"})
+    options = payload.get("options") or {}
+    stops = options.get("stop") or []
+    for stop in [stops] if isinstance(stops, str) else stops:
+        if stop and stop in reply:
+            reply = reply[: reply.index(stop)]
+    limit = options.get("num_predict")
+    if isinstance(limit, int) and limit > 0:
+        tokens = list(_TOKEN_RE.finditer(reply))
+        if len(tokens) > limit:
+            reply = reply[: tokens[limit - 1].end()]
+    return reply
+
+
 class MockHandler(BaseHTTPRequestHandler):
     server_version = "BatLLM-Ollama-Mock/0.1"
 
@@ -47,6 +86,11 @@ class MockHandler(BaseHTTPRequestHandler):
             payload = {}
 
         if self.path == "/api/chat":
+            delay = getattr(self.server, "chat_delay", 0.0)
+            rng = getattr(self.server, "tail_rng", random)
+            if rng.random() < getattr(self.server, "tail_probability", 0.0):
+                delay += getattr(self.server, "tail_delay", 0.0)
+            time.sleep(delay)
             # Echo/interpret simple instructions for predictable smoke responses
             content = ""
             messages = payload.get("messages") or []
@@ -58,10 +102,31 @@ class MockHandler(BaseHTTPRequestHandler):
                 reply = "OK"
             elif "Reply with exactly M" in content:
                 reply = "M"
+            elif "Explain your command" in content:
+                reply = "C15\nTurning a little clockwise keeps the shield facing the opponent."
             else:
                 reply = "mock reply"
 
-            self._send_json({"message": {"content": reply}})
+            reply = _apply_generation(reply, payload)
+            prompt_tokens = sum(
+                len(_TOKEN_RE.findall(str(message.get("content") or "")))
+                for message in messages
+                if isinstance(message, dict)
+            )
+            reply_tokens = len(_TOKEN_RE.findall(reply))
+            load_time = getattr(self.server, "load_time", 0.0)
+            self.server.load_time = 0.0
+            self._send_json(
+                {
+                    "message": {"role": "assistant", "content": reply},
+                    "done": True,
+                    "load_duration": int(load_time * 1e9) + 1_000_000,
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": prompt_tokens * 1_000_000,
+                    "eval_count": reply_tokens,
+                    "eval_duration": reply_tokens * 10_000_000,
+                }
+            )
             return
 
         if self.path == "/api/generate":
@@ -76,8 +141,19 @@ class MockHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
 
-def run_server(host: str, port: int) -> None:
+def run_server(
+    host: str,
+    port: int,
+    delay: float = 0.0,
+    tail_delay: float = 0.0,
+    tail_probability: float = 0.0,
+    load_time: float = 0.0,
+) -> None:
     server = ThreadingHTTPServer((host, port), MockHandler)
+    server.chat_delay = delay
+    server.tail_delay = tail_delay
+    server.tail_probability = tail_probability
+    server.load_time = load_time
     print(f"Mock Ollama server listening on http://{host}:{port}")
     try:
         server.serve_forever()
@@ -85,14 +161,23 @@ def run_server(host: str, port: int) -> None:
         pass
 
 
-def parse_args() -> Tuple[str, int]:
+def parse_args() -> Tuple[str, int, float, float, float, float]:
     p = argparse.ArgumentParser(description="Mock Ollama HTTP server for CI smoke tests")
     p.add_argument("--host", default="127.0.0.1")
     p.add_argument("--port", type=int, default=11434)
+    p.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each chat reply")
+    p.add_argument("--tail-delay", type=float, default=0.0, help="extra seconds for slow replies")
+    p.add_argument(
+        "--tail-probability", type=float, default=0.0, help="share of chat replies that are slow"
+    )
+    p.add_argument(
+        "--load-time", type=float, default=0.0, help="model load seconds reported by the first reply"
+    )
     args = p.parse_args()
-    return args.host, args.port
+    return (
+        args.host, args.port, args.delay, args.tail_delay, args.tail_probability, args.load_time
+    )
 
 
 if __name__ == "__main__":
-    host, port = parse_args()
-    run_server(host, port)
+    run_server(*parse_args())